@@ -7,6 +7,7 @@ import json
 import signal
 import traceback
 from datetime import datetime
+from functools import partial
 from typing import List, Dict, Tuple, Any, Optional
 import uuid
 
@@ -15,14 +16,18 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Import assistant modules
 from assistant.memory_manager import MemoryManager, memory_manager
+from assistant.conversation_window import ConversationEntry, make_window
 from assistant.speech_recognition_service import SpeechRecognitionService, speech_recognition_service
 from assistant.tts_service import TTSService, tts_service
 from assistant.intent_classifier import IntentClassifier, intent_classifier
-from assistant.spotify_control import control_spotify
-from assistant.browser_control import browser_action
+from assistant.spotify_control import control_spotify, prepare_spotify
+from assistant.browser_control import browser_action, prepare_browser
 from assistant.whatsapp_integration import whatsapp_action
 from assistant.system_prompts import prompt_manager
 from assistant.command_processor import CommandProcessor
+from assistant.plan_cache import CommandPlan
+from assistant.step_planner import summarize_results
+from assistant.speculation import SpeculativeWarmer
 from assistant.config_manager import config_manager
 from assistant.StatusIndicator import StatusIndicator
 from assistant.SessionManager import SessionManager
@@ -118,11 +123,23 @@ class SamanthaAssistant:
         self.command_processor = CommandProcessor()
         self._register_command_handlers()
 
+        # Warm up the likely handler from partial transcripts while the user
+        # is still speaking
+        self.speculative_warmer = SpeculativeWarmer(
+            self.command_processor.grammar.classify,
+            min_words=config_manager.get('speculation.min_words', 1)
+        )
+        self.speculative_warmer.register_warmup("Browsing", prepare_browser)
+        self.speculative_warmer.register_warmup("Media", prepare_spotify)
+        if config_manager.get('speculation.enabled', True) and hasattr(self.recognizer, "add_partial_callback"):
+            self.recognizer.add_partial_callback(self.speculative_warmer.on_partial)
+
         # Other initializations...
         self.listening = False
         self.running = True
         self.continuous_mode = self.session_manager.get_setting('continuous_mode', False)
-        self.conversation_history = []
+        # Recent exchanges only; the memory manager keeps the full history on disk
+        self.conversation_history = make_window([], config_manager.get('memory.max_conversation_length', 100))
 
         # Load conversation history if available and configured
         if config_manager.get('memory.load_conversation_history', True):
@@ -201,11 +218,7 @@ class SamanthaAssistant:
                         text = text.lower()
                         logger.info(f"User said: {text}")
                         print (f"heard:{text}")
-                        self.conversation_history.append({
-                            "role": "user",
-                            "content": text,
-                            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        })
+                        self.conversation_history.append(ConversationEntry("user", text))
                         return text
                     else:
                         print("No audio input detected.")
@@ -387,9 +400,11 @@ class SamanthaAssistant:
                         self._speak(message)
                     return message, "confirmation_handled"
 
-            # Detect intent using the classifier
-            # Using the classify method from IntentClassifier instead of classify_with_context
-            intent, confidence = self.intent_classifier.classify(text)
+            # Resolve the command plan (steps, categories, intent, prompt);
+            # repeated commands reuse their cached plan
+            plan = self.command_processor.plan_command(text)
+            intent, confidence = plan.intent, plan.confidence
+            speculation = self.speculative_warmer.on_final(plan.text, plan.category)
 
             intent_data = {
                 "intent": intent,
@@ -408,15 +423,13 @@ class SamanthaAssistant:
             # Stop the thinking indicator now that we have detected intent
             thinking_thread.join(timeout=0.5)
             StatusIndicator.clear_line()
-            command_processor = CommandProcessor()
-            steps = command_processor.extract_steps_from_text(text)
-            if len(steps) > 1:
-                logger.info(f"📋 Multi-step command detected with {len(steps)} steps")
-                return self._handle_multi_step_command(steps)
+            if plan.is_multi_step:
+                logger.info(f"📋 Multi-step command detected with {len(plan.steps)} steps")
+                return self._handle_multi_step_command(plan)
 
             # For single commands, process directly
             # Get appropriate system prompt for the detected intent
-            system_prompt = prompt_manager.get_prompt(f"{intent}.general", {"user_context": conversation_context})
+            system_prompt = prompt_manager.get_prompt(plan.prompt_context, {"user_context": conversation_context})
             if not system_prompt:
                 system_prompt = prompt_manager.get_prompt("default")
 
@@ -431,26 +444,35 @@ class SamanthaAssistant:
 
             if intent == "browser":
                 self.memory.set_context("current_app", "browser")
-                response, action = self.handle_browser_command(text, system_prompt)
+                # Open pages with the browser a speculative warm-up resolved
+                browser = self.speculative_warmer.use(speculation, "Browsing")
+                response, action = self._run_handler(
+                    "Browsing", partial(self.handle_browser_command, browser=browser),
+                    plan.text, system_prompt, plan.entities
+                )
 
             elif intent == "spotify":
                 self.memory.set_context("current_app", "spotify")
-                response, action = self.handle_spotify_command(text, system_prompt)
+                # Reuse the Spotify connection a speculative warm-up opened
+                spotify = self.speculative_warmer.use(speculation, "Media")
+                response, action = self._run_handler("Media", partial(self.handle_spotify_command, spotify=spotify),
+                                                     plan.text, system_prompt, plan.entities)
 
             elif intent == "whatsapp":
                 self.memory.set_context("current_app", "whatsapp")
-                response, action = self.handle_whatsapp_command(text, system_prompt)
+                response, action = self._run_handler("Communication", self.handle_whatsapp_command,
+                                                     plan.text, system_prompt, plan.entities)
 
             elif intent == "system":
                 self.memory.set_context("current_app", "system")
-                response, action = self.handle_system_command(text, system_prompt)
+                response, action = self._run_handler("System", self.handle_system_command, text, system_prompt)
 
             elif intent == "timer":
                 self.memory.set_context("current_app", "timer")
-                response, action = self.handle_timer_command(text, system_prompt)
+                response, action = self._run_handler("Timer", self.handle_timer_command, text, system_prompt)
 
             elif intent == "weather":
-                response, action = self.handle_weather_command(text, system_prompt)
+                response, action = self._run_handler("Weather", self.handle_weather_command, text, system_prompt)
 
             else:  # general or unknown
                 # Handle general conversation
@@ -515,49 +537,67 @@ class SamanthaAssistant:
         icon = intent_icons.get(intent, "🔍")
         return f"{icon} Processing {intent} request..."
 
-    def _handle_multi_step_command(self, steps: List[str]):
+    def _run_handler(self, category: str, handler, text: str, system_prompt=None, entities=None) -> Tuple[str, str]:
+        """
+        Run a command handler within its category's deadline
+
+        A handler that times out, fails or is cancelled by a newer command
+        yields a spoken explanation instead of freezing the assistant.
+
+        Args:
+            category: Command category of the handler
+            handler: Handler method taking the text and system prompt
+            text: Command text
+            system_prompt: System prompt for the handler
+            entities: Entities from the command's plan, passed to the handler if given
+
+        Returns:
+            Tuple of (response, action)
+        """
+        if self.command_processor.cancel_on_new_command:
+            self.command_processor.cancel_pending()
+        if entities is not None:
+            handler = partial(handler, entities=entities)
+        result = self.command_processor.dispatch_command(
+            category, text, lambda command: handler(command, system_prompt)
+        )
+        if result.ok:
+            return result.response
+        StatusIndicator.show_error(result.message)
+        return result.message, f"{category.lower()}_{result.status}"
+
+    def _handle_multi_step_command(self, plan: CommandPlan):
         """
         Handle multi-step commands using the command processor with enhanced feedback
 
+        Independent steps run concurrently; the responses are spoken in the
+        original step order.
+
         Args:
-            steps: List of individual command steps
+            plan: Resolved plan of the command
         """
+        steps = plan.steps
         logger.info(f"🔄 Processing multi-step command with {len(steps)} steps")
 
         # Print steps for user feedback
         print(f"📋 I'll help you with these {len(steps)} steps:")
         for i, step in enumerate(steps):
-            print(f"   {i+1}. {step}")
-
-        # Create a descriptive name for the sequence
-        sequence_name = f"Multi-step command ({len(steps)} steps)"
-
-        # Create a command sequence with the steps
-        sequence = self.command_processor.create_sequence(
-            sequence_name,
-            steps,
-            require_confirmation=True
-        )
-
-        # Queue the sequence for processing
-        self.command_processor.queue_sequence(sequence)
+            print(f"   {i+1}. {step.text}")
 
         # Announce the multi-step process
         intro_message = f"I'll help you with this {len(steps)}-step task."
         self._speak(intro_message)
 
-        # Process the first command in the sequence with progress indicator
-        StatusIndicator.show_thinking(f"Processing step 1 of {len(steps)}", end="\n")
-        response, result = self.command_processor.process_current_command()
+        StatusIndicator.show_thinking(f"Processing {len(steps)} steps", end="\n")
+        results = self.command_processor.run_plan(plan)
 
-        # Show completion of first step
-        StatusIndicator.show_success(f"Completed step 1 of {len(steps)}")
-        self._speak(response)
+        completed = sum(1 for result in results if result.ok)
+        StatusIndicator.show_success(f"Completed {completed} of {len(steps)} steps")
 
-        # Request confirmation for the next step if needed
-        self._request_next_step_confirmation()
+        response = summarize_results(results)
+        self._speak(response)
 
-        return intro_message, "multi_step_started"
+        return response, "multi_step_completed"
 
     def _request_next_step_confirmation(self):
         """Request confirmation for the next step if available"""
@@ -586,8 +626,8 @@ class SamanthaAssistant:
 
                 self._speak(confirmation_message)
 
-    def handle_browser_command(self, text: str, system_prompt=None) -> Tuple[str, str]:
-        """Handle browser-related commands using context-specific system prompts"""
+    def handle_browser_command(self, text: str, system_prompt=None, browser=None, entities=None) -> Tuple[str, str]:
+        """Handle browser-related commands using context-specific system prompts, opening pages with browser if given"""
         if system_prompt is None:
             # Determine specific browser task
             if "search" in text.lower():
@@ -606,7 +646,7 @@ class SamanthaAssistant:
             print("🌐 Working with browser...")
 
             # Call browser action with the system prompt
-            response, action = browser_action(text, system_prompt)
+            response, action = browser_action(text, system_prompt, browser, entities)
 
             # Show success feedback
             StatusIndicator.show_success("Browser action completed")
@@ -622,8 +662,8 @@ class SamanthaAssistant:
             error_msg = f"I had trouble with that browser request. {str(e)[:100] if self.debug_mode else 'Please try again.'}"
             return error_msg, "browser_error"
 
-    def handle_spotify_command(self, text: str, system_prompt=None) -> Tuple[str, str]:
-        """Handle Spotify commands using context-specific system prompts"""
+    def handle_spotify_command(self, text: str, system_prompt=None, entities=None, spotify=None) -> Tuple[str, str]:
+        """Handle Spotify commands using context-specific system prompts, reusing a connected spotify if given"""
         # Get user music preferences for personalized recommendations
         user_preferences = self.memory.get_user_preferences().get("music", {})
 
@@ -648,7 +688,9 @@ class SamanthaAssistant:
             print("🎵 Working with Spotify...")
 
             # Call Spotify control with the system prompt and user preferences
-            response, action = control_spotify(text, system_prompt, user_preferences=user_preferences)
+            response = control_spotify(text, system_prompt, user_preferences=user_preferences,
+                                       entities=entities, spotify=spotify)
+            action = "spotify_action"
 
             # Show success feedback
             StatusIndicator.show_success("Spotify action completed")
@@ -664,7 +706,7 @@ class SamanthaAssistant:
             error_msg = f"I had trouble with that Spotify request. {str(e)[:100] if self.debug_mode else 'Please try again.'}"
             return error_msg, "spotify_error"
 
-    def handle_whatsapp_command(self, text: str, system_prompt=None) -> Tuple[str, str]:
+    def handle_whatsapp_command(self, text: str, system_prompt=None, entities=None) -> Tuple[str, str]:
         """Handle WhatsApp commands using context-specific system prompts"""
         if system_prompt is None:
             # Determine specific WhatsApp task
@@ -683,8 +725,9 @@ class SamanthaAssistant:
             # Show feedback during processing
             print("💬 Working with WhatsApp...")
 
-            # Call WhatsApp action with the system prompt
-            response, action = whatsapp_action(text, system_prompt)
+            # Call WhatsApp action with the entities from the plan
+            response = whatsapp_action(text, entities)
+            action = "whatsapp_action"
 
             # Show success feedback
             StatusIndicator.show_success("WhatsApp action completed")
@@ -766,11 +809,7 @@ class SamanthaAssistant:
             self.memory.add_conversation_entry("assistant", text)
 
             # Add to conversation history
-            self.conversation_history.append({
-                "speaker": "assistant",
-                "text": text,
-                "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            })
+            self.conversation_history.append(ConversationEntry("assistant", text))
 
             # Show visual speaking indicator
             print(f"\n🗣️ {self.assistant_name}: {text}")
@@ -960,11 +999,7 @@ class SamanthaAssistant:
                 print(f"👂 Heard: {text}")
 
                 # Add to conversation history
-                self.conversation_history.append({
-                    "speaker": "user",
-                    "text": text,
-                    "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                })
+                self.conversation_history.append(ConversationEntry("user", text))
 
                 return text
             else:
@@ -1156,13 +1191,24 @@ class SamanthaAssistant:
             history_file = config_manager.get('memory.conversation_history_file', 'conversation_history.json')
 
             with open(history_file, "w") as f:
-                json.dump(self.conversation_history, f, indent=2)
+                json.dump([entry.to_dict() for entry in self.conversation_history], f, indent=2)
 
             logger.info(f"Conversation history saved to {history_file}")
         except Exception as e:
             logger.error(f"❌ Error saving conversation history: {e}")
             StatusIndicator.show_error(f"Failed to save conversation history: {str(e)[:50]}...")
 
+    @staticmethod
+    def _history_entry(data: Dict[str, Any]) -> ConversationEntry:
+        """Convert a saved history entry, including ones saved with "role"/"content" or "time" keys."""
+        when = data.get("timestamp", data.get("time"))
+        try:
+            when = datetime.fromisoformat(when)
+        except (TypeError, ValueError):
+            pass
+        return ConversationEntry(data.get("speaker", data.get("role", "")),
+                                 data.get("text", data.get("content", "")), when)
+
     def _load_conversation_history(self):
         """Load conversation history from file if available"""
         try:
@@ -1171,17 +1217,18 @@ class SamanthaAssistant:
 
             if os.path.exists(history_file):
                 with open(history_file, "r") as f:
-                    self.conversation_history = json.load(f)
+                    entries = json.load(f)
 
-                # Limit the history size if needed
+                # Only the most recent entries are kept
                 max_history = config_manager.get('memory.max_conversation_length', 100)
-                if len(self.conversation_history) > max_history:
-                    self.conversation_history = self.conversation_history[-max_history:]
+                self.conversation_history = make_window(
+                    (self._history_entry(entry) for entry in entries[-max_history:]), max_history
+                )
 
                 logger.info(f"Loaded {len(self.conversation_history)} conversation entries from history")
         except Exception as e:
             logger.error(f"Failed to load conversation history: {e}")
-            self.conversation_history = []
+            self.conversation_history.clear()
 
     def cleanup(self):
         """Clean up resources before exit with user feedback"""
@@ -1198,9 +1245,18 @@ class SamanthaAssistant:
                 print("🎤 Stopping speech recognition...")
                 self.recognizer.stop_continuous_listening()
 
+            # Stop speculative warm-ups
+            if hasattr(self, 'speculative_warmer'):
+                logger.info(f"Speculation stats: {self.speculative_warmer.get_stats()}")
+                self.speculative_warmer.shutdown()
+
             # Save conversation history
             print("📝 Saving conversation history...")
             self._save_conversation_history()
+            if hasattr(self.memory, 'close'):
+                if hasattr(self.memory, 'get_write_behind_stats'):
+                    logger.info(f"Memory write-behind stats: {self.memory.get_write_behind_stats()}")
+                self.memory.close()
 
             # Cancel any pending commands call removed - method doesn't exist
 
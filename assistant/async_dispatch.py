@@ -0,0 +1,277 @@
+"""
+Async Dispatch Module
+
+This module runs command handlers on a shared asyncio event loop with a
+deadline per category. Coroutine handlers run on the loop directly and
+synchronous handlers run in a worker pool, so a slow handler (Spotify HTTP
+calls, WhatsApp automation, browser launches) can no longer freeze the
+assistant. Handlers still running when the user issues a new command can be
+cancelled, and every outcome is reported as a DispatchResult with a message
+that can be spoken back.
+"""
+
+import time
+import inspect
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Callable, Set, Hashable
+
+
+logger = logging.getLogger(__name__)
+
+# Dispatch result statuses
+DISPATCH_OK = "ok"
+DISPATCH_ERROR = "error"
+DISPATCH_TIMEOUT = "timeout"
+DISPATCH_CANCELLED = "cancelled"
+
+DEFAULT_HANDLER_TIMEOUT = 15.0
+DEFAULT_MAX_WORKERS = 8
+
+# Deadlines per command category, in seconds. WhatsApp automation waits for
+# the app between keystrokes, so communication gets longer.
+DEFAULT_CATEGORY_TIMEOUTS = {
+    "Browsing": 10.0,
+    "Media": 10.0,
+    "System": 10.0,
+    "Weather": 10.0,
+    "Communication": 30.0
+}
+
+
+class DispatchResult:
+    """
+    Outcome of dispatching a command to its handler.
+    """
+
+    def __init__(self, category: str, text: str, response: Any = None,
+                 status: str = DISPATCH_OK, elapsed: float = 0.0, error: Optional[str] = None):
+        """
+        Initialize a dispatch result.
+
+        Args:
+            category: Command category
+            text: Command text
+            response: Handler response, or None if the handler did not finish
+            status: One of "ok", "error", "timeout" or "cancelled"
+            elapsed: Seconds until the handler finished or was abandoned
+            error: Error message if the handler raised
+        """
+        self.category = category
+        self.text = text
+        self.response = response
+        self.status = status
+        self.elapsed = elapsed
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        """Whether the handler completed successfully."""
+        return self.status == DISPATCH_OK
+
+    @property
+    def message(self) -> Any:
+        """The handler response, or a spoken explanation if it did not complete."""
+        if self.status == DISPATCH_OK:
+            return self.response
+        if self.status == DISPATCH_TIMEOUT:
+            return f"Sorry, that {self.category.lower()} command took too long, so I stopped waiting."
+        if self.status == DISPATCH_CANCELLED:
+            return f"I cancelled the {self.category.lower()} command."
+        return f"Sorry, I ran into a problem with that {self.category.lower()} command."
+
+    def __repr__(self) -> str:
+        return f"DispatchResult({self.category!r}, {self.status!r}, {self.response!r})"
+
+
+class AsyncDispatcher:
+    """
+    Runs handlers on a background event loop with deadlines and cancellation.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS):
+        """
+        Initialize the dispatcher. The event loop thread starts on first use.
+
+        Args:
+            max_workers: Maximum number of synchronous handlers running at once
+        """
+        self.max_workers = max_workers
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        # Running tasks by group, so one processor's cancellation spares others
+        self._tasks: Dict[Hashable, Set[asyncio.Task]] = {}
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Get the event loop, starting its thread on first use."""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="command-handler")
+                self._thread = threading.Thread(target=self._loop.run_forever, name="command-dispatch", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the event loop thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    async def _run(self, category: str, handler: Callable, text: str,
+                   timeout: Optional[float], group: Hashable) -> DispatchResult:
+        """Run a handler on the loop and turn its outcome into a result."""
+        task = asyncio.current_task()
+        self._tasks.setdefault(group, set()).add(task)
+        start = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(handler):
+                pending = handler(text)
+            else:
+                pending = asyncio.get_running_loop().run_in_executor(self._executor, handler, text)
+            response = await asyncio.wait_for(pending, timeout)
+            # Synchronous wrappers around coroutine handlers return an awaitable
+            if inspect.isawaitable(response):
+                response = await asyncio.wait_for(response, None if timeout is None else
+                                                  max(0.0, timeout - (time.perf_counter() - start)))
+            return DispatchResult(category, text, response, DISPATCH_OK, time.perf_counter() - start)
+        except asyncio.TimeoutError:
+            logger.warning(f"{category} handler timed out after {timeout}s: {text!r}")
+            return DispatchResult(category, text, None, DISPATCH_TIMEOUT, time.perf_counter() - start)
+        except asyncio.CancelledError:
+            logger.info(f"{category} handler cancelled: {text!r}")
+            return DispatchResult(category, text, None, DISPATCH_CANCELLED, time.perf_counter() - start)
+        except Exception as e:
+            logger.error(f"Error in {category} handler: {e}")
+            return DispatchResult(category, text, None, DISPATCH_ERROR, time.perf_counter() - start, str(e))
+        finally:
+            tasks = self._tasks.get(group)
+            if tasks is not None:
+                tasks.discard(task)
+                if not tasks:
+                    del self._tasks[group]
+
+    def submit(self, category: str, handler: Callable, text: str,
+               timeout: Optional[float] = DEFAULT_HANDLER_TIMEOUT, group: Hashable = None):
+        """
+        Start a handler without waiting for it.
+
+        Args:
+            category: Command category
+            handler: Coroutine function or function taking the command text
+            text: Command text
+            timeout: Seconds the handler may take, or None for no limit
+            group: Key grouping handlers for cancel_pending
+
+        Returns:
+            concurrent.futures.Future resolving to a DispatchResult
+        """
+        loop = self._get_loop()
+        return asyncio.run_coroutine_threadsafe(self._run(category, handler, text, timeout, group), loop)
+
+    def dispatch(self, category: str, handler: Callable, text: str,
+                 timeout: Optional[float] = DEFAULT_HANDLER_TIMEOUT, group: Hashable = None) -> DispatchResult:
+        """
+        Run a handler and wait for its result.
+
+        Must not be called from a coroutine handler, since those run on the
+        dispatcher's own loop.
+
+        Args:
+            category: Command category
+            handler: Coroutine function or function taking the command text
+            text: Command text
+            timeout: Seconds the handler may take, or None for no limit
+            group: Key grouping handlers for cancel_pending
+
+        Returns:
+            Dispatch result
+        """
+        return self.submit(category, handler, text, timeout, group).result()
+
+    async def dispatch_async(self, category: str, handler: Callable, text: str,
+                             timeout: Optional[float] = DEFAULT_HANDLER_TIMEOUT,
+                             group: Hashable = None) -> DispatchResult:
+        """
+        Run a handler from another event loop and await its result.
+
+        Args:
+            category: Command category
+            handler: Coroutine function or function taking the command text
+            text: Command text
+            timeout: Seconds the handler may take, or None for no limit
+            group: Key grouping handlers for cancel_pending
+
+        Returns:
+            Dispatch result
+        """
+        return await asyncio.wrap_future(self.submit(category, handler, text, timeout, group))
+
+    def cancel_pending(self, group: Hashable = None, all_groups: bool = False) -> int:
+        """
+        Cancel handlers that are still running.
+
+        Coroutine handlers are interrupted at their next await. Synchronous
+        handlers cannot be interrupted; their result is reported as cancelled
+        and discarded when they finish.
+
+        Args:
+            group: Group whose handlers to cancel
+            all_groups: Cancel the handlers of every group
+
+        Returns:
+            Number of handlers cancelled
+        """
+        if self._loop is None:
+            return 0
+
+        def cancel() -> int:
+            groups = list(self._tasks) if all_groups else [group]
+            tasks = [task for key in groups for task in self._tasks.get(key, ())]
+            for task in tasks:
+                task.cancel()
+            return len(tasks)
+
+        if threading.current_thread() is self._thread:
+            return cancel()
+        future = asyncio.run_coroutine_threadsafe(self._call(cancel), self._loop)
+        return future.result()
+
+    @staticmethod
+    async def _call(function: Callable[[], Any]) -> Any:
+        """Run a function on the loop thread."""
+        return function()
+
+    def pending_count(self, group: Hashable = None) -> int:
+        """Get the number of handlers of a group still running."""
+        return len(self._tasks.get(group, ()))
+
+    def shutdown(self) -> None:
+        """Cancel every running handler and stop the event loop."""
+        with self._lock:
+            loop, thread, executor = self._loop, self._thread, self._executor
+            self._loop = self._thread = self._executor = None
+        if loop is None:
+            return
+
+        async def drain():
+            tasks = [task for tasks in self._tasks.values() for task in tasks]
+            for task in tasks:
+                task.cancel()
+            # Let cancelled handlers report their results before the loop stops
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            asyncio.run_coroutine_threadsafe(drain(), loop).result(timeout=1.0)
+        except Exception as e:
+            logger.warning(f"Handlers still running at shutdown: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=1.0)
+        executor.shutdown(wait=False)
+
+
+# Create an instance for easy importing
+async_dispatcher = AsyncDispatcher()
@@ -5,14 +5,22 @@ This module provides functions for controlling the web browser,
 including opening websites, performing searches, and navigation.
 """
 
+import socket
+import logging
+import threading
 import webbrowser
 import time
-import re
-from urllib.parse import quote_plus
-from typing import Tuple, Optional
+from urllib.parse import quote_plus, urlsplit
+from typing import List, Tuple, Optional
 
 # Import system prompts
 from assistant.system_prompts import prompt_manager
+from assistant.entity_extractor import Entities, extract_entities, resolve_entities, BROWSER, TARGET, URL, QUERY
+
+logger = logging.getLogger(__name__)
+
+# Host searches without a website go to
+SEARCH_HOST = "www.google.com"
 
 
 class BrowserControl:
@@ -65,7 +73,47 @@ class BrowserControl:
             return f"Would respond to '{user_query}' with prompt: {system_prompt[:30]}..."
 
 
-def browser_action(command: str, system_prompt: Optional[str] = None) -> Tuple[str, str]:
+def prepare_browser(text: str, cancel_event: Optional[threading.Event] = None) -> webbrowser.BaseBrowser:
+    """
+    Prepare for a browsing command, e.g. while it is still spoken.
+
+    Resolves the default browser controller and looks up the addresses of
+    the search engine and of the sites the partial command names, so the
+    browser's own lookups are answered from the system resolver cache.
+
+    Args:
+        text: Partial command text
+        cancel_event: Event set when the command turns out not to be for browsing
+
+    Returns:
+        Browser controller for browser_action's browser argument
+    """
+    browser = webbrowser.get()
+    for host in prefetch_hosts(text):
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        try:
+            socket.getaddrinfo(host, 443, proto=socket.IPPROTO_TCP)
+        except OSError as e:
+            logger.debug(f"Prefetching {host} failed: {e}")
+    return browser
+
+
+def prefetch_hosts(text: str) -> List[str]:
+    """Get the hosts a command is likely to open: the sites it names, then the search engine."""
+    hosts = []
+    for value in extract_entities(text.lower()).values(URL):
+        host = urlsplit(value if "://" in value else f"https://{value}").hostname
+        if host and host not in hosts:
+            hosts.append(host)
+    if SEARCH_HOST not in hosts:
+        hosts.append(SEARCH_HOST)
+    return hosts
+
+
+def browser_action(command: str, system_prompt: Optional[str] = None,
+                   browser: Optional[webbrowser.BaseBrowser] = None,
+                   entities: Optional[Entities] = None) -> Tuple[str, str]:
     """
     Enhanced browser control function that can handle complex commands
     for any website and search query.
@@ -73,36 +121,31 @@ def browser_action(command: str, system_prompt: Optional[str] = None) -> Tuple[s
     Args:
         command: The user's voice command
         system_prompt: Optional system prompt to use for response generation
+        browser: Browser controller resolved ahead of time, e.g. by a
+                 speculative warm-up; the default browser if None
+        entities: Entities of the lowercased command from its plan; extracted
+                  here if None
 
     Returns:
         Tuple of (response message, action type)
     """
     command = command.lower()
     action_type = "browser_unknown"
+    open_url = browser.open if browser is not None else webbrowser.open
 
     try:
-        # Handle opening specific browsers
-        browser_match = re.search(r"open (brave|chrome|firefox|safari|edge|opera) browser", command)
-        browser_type = browser_match.group(1) if browser_match else None
+        entities = resolve_entities(command, entities)
 
-        # Extract website names with improved pattern to match test cases
-        # Look for domains in various formats including with or without protocol
-        website_pattern = r'(?:open|go to|visit|navigate to)\s+(?:the\s+)?([a-z0-9]+(?:\.[a-z0-9]+)+(?:/[^\s]*)?|(?:https?://)?[a-z0-9]+(?:\.[a-z0-9]+)+(?:/[^\s]*)?)(?:\s+|$|\.)'
-        website_match = re.search(website_pattern, command)
-        website = website_match.group(1) if website_match else None
+        # Handle opening specific browsers
+        browser_type = entities.first(BROWSER)
 
-        # Direct "open domain.com" pattern for test cases
-        if not website and command.startswith("open "):
-            simple_domain = command[5:].strip()  # Strip "open " prefix
-            if re.match(r'^(?:https?://)?[a-z0-9]+(?:\.[a-z0-9]+)+(?:/[^\s]*)?$', simple_domain):
-                website = simple_domain
+        # A website is a domain or URL that is the target of "open", "go to",
+        # "visit" or "navigate to"
+        target_starts = {entity.start for entity in entities.all(TARGET)}
+        website = next((entity.value for entity in entities.all(URL) if entity.start in target_starts), None)
 
         # Extract search terms
-        search_terms = []
-        if "search" in command:
-            # Extract all search phrases following "search" or "search for"
-            search_parts = re.findall(r'search(?:\s+for)?\s+([^.]+?)(?:\s+in\s+it|$|\s+and\s+|\s+then\s+)', command)
-            search_terms = [term.strip() for term in search_parts if term.strip()]
+        search_terms = entities.values(QUERY) if "search" in command else []
 
         # Handle navigation commands
         if "back" in command and ("go" in command or "navigate" in command):
@@ -126,7 +169,7 @@ def browser_action(command: str, system_prompt: Optional[str] = None) -> Tuple[s
 
             # Open specified browser
             browser_url = browser_urls.get(browser_type, "https://www.google.com")
-            webbrowser.open(browser_url)
+            open_url(browser_url)
             response = f"Opening {browser_type.capitalize()} browser."
             action_type = "browser_open"
 
@@ -138,7 +181,7 @@ def browser_action(command: str, system_prompt: Optional[str] = None) -> Tuple[s
                 else:
                     website_url = website
 
-                webbrowser.open(website_url)
+                open_url(website_url)
                 response += f" Navigating to {website}."
 
                 # If search terms are also specified for the website
@@ -161,7 +204,7 @@ def browser_action(command: str, system_prompt: Optional[str] = None) -> Tuple[s
                         # Generic approach for other sites
                         search_url = f"https://www.google.com/search?q={quote_plus(search_query)}+site:{website}"
 
-                    webbrowser.open(search_url)
+                    open_url(search_url)
                     response += f" Searching for '{search_query}'."
                     action_type = "browser_search"
 
@@ -174,7 +217,7 @@ def browser_action(command: str, system_prompt: Optional[str] = None) -> Tuple[s
             else:
                 website_url = website
 
-            webbrowser.open(website_url)
+            open_url(website_url)
             response = f"Opening {website}."
             action_type = "browser_open"
             return response, action_type
@@ -182,8 +225,8 @@ def browser_action(command: str, system_prompt: Optional[str] = None) -> Tuple[s
         # Handle direct searches without specifying a website
         elif "search" in command and search_terms:
             search_query = search_terms[0]  # Use the first search term
-            url = f"https://www.google.com/search?q={quote_plus(search_query)}"
-            webbrowser.open(url)
+            url = f"https://{SEARCH_HOST}/search?q={quote_plus(search_query)}"
+            open_url(url)
             response = f"Searching for '{search_query}' on Google."
             action_type = "browser_search"
             return response, action_type
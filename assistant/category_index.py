@@ -0,0 +1,126 @@
+"""
+Category Index Module
+
+This module provides an inverted index from keywords and multi-word phrases
+to command categories. A command is tokenized once and every category is
+scored in a single pass over its tokens, instead of running one regex per
+keyword per category.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase word tokens.
+
+    Args:
+        text: Input text
+
+    Returns:
+        List of tokens
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class CategoryIndex:
+    """
+    Inverted index scoring command categories by the keywords they contain.
+
+    Each matched keyword adds a weight of 1 / (number of categories sharing
+    the keyword) to every category it belongs to, so specific keywords like
+    "github" count more than shared ones like "open". Ties are resolved by
+    category weight and then by the order the categories were defined in.
+    """
+
+    def __init__(self, categories: Dict[str, List[str]],
+                 category_weights: Optional[Dict[str, float]] = None):
+        """
+        Build the index.
+
+        Args:
+            categories: Mapping of category names to keywords and phrases
+            category_weights: Tie-breaking weight per category (default 1.0)
+        """
+        self.categories = list(categories)
+        self.category_weights = category_weights or {}
+
+        owners: Dict[Tuple[str, ...], List[str]] = {}
+        for category, keywords in categories.items():
+            for keyword in keywords:
+                phrase = tuple(tokenize(keyword))
+                if phrase and category not in owners.setdefault(phrase, []):
+                    owners[phrase].append(category)
+
+        # phrase -> [(category, specificity)]
+        self._index: Dict[Tuple[str, ...], List[Tuple[str, float]]] = {
+            phrase: [(category, 1.0 / len(cats)) for category in cats]
+            for phrase, cats in owners.items()
+        }
+        self.max_phrase_length = max((len(phrase) for phrase in self._index), default=0)
+
+        # Sort key for ties: higher weight first, then definition order
+        self._rank = {
+            category: (-self.category_weights.get(category, 1.0), position)
+            for position, category in enumerate(self.categories)
+        }
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def match(self, text: str) -> List[Tuple[str, ...]]:
+        """
+        Find the indexed keywords and phrases in a text.
+
+        Args:
+            text: Input text
+
+        Returns:
+            Distinct matched phrases in order of first occurrence
+        """
+        tokens = tokenize(text)
+        matched = {}
+        for start in range(len(tokens)):
+            for length in range(1, min(self.max_phrase_length, len(tokens) - start) + 1):
+                phrase = tuple(tokens[start:start + length])
+                if phrase in self._index:
+                    matched.setdefault(phrase, None)
+        return list(matched)
+
+    def score(self, text: str) -> Dict[str, float]:
+        """
+        Score every category that has a keyword in the text.
+
+        Each distinct keyword counts once, however often it occurs.
+
+        Args:
+            text: Input text
+
+        Returns:
+            Dictionary of category names to scores; categories without matches are omitted
+        """
+        scores: Dict[str, float] = {}
+        for phrase in self.match(text):
+            for category, weight in self._index[phrase]:
+                scores[category] = scores.get(category, 0.0) + weight
+        return scores
+
+    def classify(self, text: str) -> Optional[str]:
+        """
+        Get the best scoring category for a text.
+
+        Args:
+            text: Input text
+
+        Returns:
+            Category name, or None if no keyword matches
+        """
+        scores = self.score(text)
+        if not scores:
+            return None
+        # Round so float sums like 1/3 + 1/3 + 1/3 tie with 1.0
+        return min(scores, key=lambda category: (-round(scores[category], 6),) + self._rank[category])
@@ -0,0 +1,343 @@
+"""
+Classifier Cascade Module
+
+This module runs intent classification as a cascade of tiers ordered from
+cheapest to most expensive. Each tier has its own confidence threshold and
+latency budget, and the cascade stops at the first tier that is confident
+enough. Per-tier hit rates and latencies are recorded so thresholds can be
+tuned from production data.
+
+Skipping a tier hands its texts to the next, more expensive tier, so only
+the last enabled tier, which defers to the cheap fallback, is ever skipped
+for being over budget, and only after several slow calls in a row.
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Tuple, Callable
+
+
+logger = logging.getLogger(__name__)
+
+# A tier returns (intent, confidence) or None when it has no answer
+TierResult = Optional[Tuple[str, float]]
+
+
+class TierStats:
+    """
+    Running counters for a single cascade tier.
+    """
+
+    # Smoothing factor for the moving average latency
+    EWMA_ALPHA = 0.2
+
+    def __init__(self):
+        """Initialize empty counters."""
+        self.reset()
+
+    def reset(self) -> None:
+        """Reset all counters."""
+        self.calls = 0
+        self.hits = 0
+        self.skipped = 0
+        self.errors = 0
+        self.over_budget = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.ewma_ms = 0.0
+        self.consecutive_over_budget = 0
+        self.calls_since_probe = 0
+
+    def record(self, elapsed_ms: float, hit: bool, over_budget: bool) -> None:
+        """
+        Record one tier invocation.
+
+        Args:
+            elapsed_ms: Time spent in the tier
+            hit: Whether the tier's answer was accepted
+            over_budget: Whether the call exceeded the tier's latency budget
+        """
+        self.calls += 1
+        self.hits += int(hit)
+        self.over_budget += int(over_budget)
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.consecutive_over_budget = self.consecutive_over_budget + 1 if over_budget else 0
+        if self.calls == 1:
+            self.ewma_ms = elapsed_ms
+        else:
+            self.ewma_ms += self.EWMA_ALPHA * (elapsed_ms - self.ewma_ms)
+        self.calls_since_probe = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the counters as a dictionary."""
+        return {
+            "calls": self.calls,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.calls if self.calls else 0.0,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "over_budget": self.over_budget,
+            "avg_ms": self.total_ms / self.calls if self.calls else 0.0,
+            "max_ms": self.max_ms,
+            "ewma_ms": self.ewma_ms
+        }
+
+
+class CascadeTier:
+    """
+    A single classifier tier in the cascade.
+    """
+
+    def __init__(self, name: str,
+                 classify_fn: Callable[[str], TierResult],
+                 threshold: float = 0.0,
+                 latency_budget_ms: Optional[float] = None,
+                 batch_fn: Optional[Callable[[List[str]], List[TierResult]]] = None,
+                 enabled: bool = True):
+        """
+        Initialize a tier.
+
+        Args:
+            name: Tier name used in configuration and stats
+            classify_fn: Function classifying one text
+            threshold: Minimum confidence for the tier's answer to be accepted
+            latency_budget_ms: Expected upper bound on the tier's latency.
+                               A tier whose average latency exceeds its budget
+                               is skipped except for periodic probe calls.
+            batch_fn: Optional vectorized version of classify_fn
+            enabled: Whether the tier takes part in classification
+        """
+        self.name = name
+        self.classify_fn = classify_fn
+        self.batch_fn = batch_fn
+        self.threshold = threshold
+        self.latency_budget_ms = latency_budget_ms
+        self.enabled = enabled
+        self.stats = TierStats()
+
+    def accepts(self, result: TierResult) -> bool:
+        """Check whether a tier result is confident enough to stop the cascade."""
+        return result is not None and result[1] >= self.threshold
+
+    def is_over_budget(self, elapsed_ms: float) -> bool:
+        """Check whether a call exceeded the tier's latency budget."""
+        return self.latency_budget_ms is not None and elapsed_ms > self.latency_budget_ms
+
+
+class ClassifierCascade:
+    """
+    Runs classifier tiers in order and stops at the first confident answer.
+    """
+
+    def __init__(self, tiers: List[CascadeTier],
+                 fallback: Callable[[str], Tuple[str, float]],
+                 fallback_name: str = "fallback",
+                 probe_interval: int = 50,
+                 skip_after: int = 3):
+        """
+        Initialize the cascade.
+
+        Args:
+            tiers: Tiers in the order they should be tried
+            fallback: Function that always produces an answer when no tier is confident
+            fallback_name: Name under which fallback answers are recorded
+            probe_interval: How many skipped calls before an over-budget tier is retried
+            skip_after: Consecutive over-budget calls before a tier is skipped,
+                        so one slow or cold call does not take a tier out
+        """
+        self.tiers = tiers
+        self.fallback = fallback
+        self.fallback_name = fallback_name
+        self.fallback_stats = TierStats()
+        self.probe_interval = probe_interval
+        self.skip_after = max(1, skip_after)
+        self._lock = threading.Lock()
+
+    def get_tier(self, name: str) -> Optional[CascadeTier]:
+        """Get a tier by name."""
+        for tier in self.tiers:
+            if tier.name == name:
+                return tier
+        return None
+
+    def configure_tier(self, name: str, threshold: Optional[float] = None,
+                       latency_budget_ms: Optional[float] = None,
+                       enabled: Optional[bool] = None) -> bool:
+        """
+        Update the settings of a tier.
+
+        Args:
+            name: Tier name
+            threshold: New confidence threshold
+            latency_budget_ms: New latency budget
+            enabled: Enable or disable the tier
+
+        Returns:
+            True if the tier exists, False otherwise
+        """
+        tier = self.get_tier(name)
+        if tier is None:
+            return False
+        if threshold is not None:
+            tier.threshold = threshold
+        if latency_budget_ms is not None:
+            tier.latency_budget_ms = latency_budget_ms
+        if enabled is not None:
+            tier.enabled = enabled
+        return True
+
+    def _defers_to_fallback(self, tier: CascadeTier) -> bool:
+        """Check whether skipping a tier goes straight to the fallback, not to a costlier tier."""
+        later = self.tiers[self.tiers.index(tier) + 1:]
+        return not any(other.enabled for other in later)
+
+    def _should_run(self, tier: CascadeTier) -> bool:
+        """Decide whether to run a tier, skipping it while it is over budget."""
+        if not tier.enabled:
+            return False
+        if (tier.latency_budget_ms is None or tier.stats.ewma_ms <= tier.latency_budget_ms or
+                tier.stats.consecutive_over_budget < self.skip_after or
+                not self._defers_to_fallback(tier)):
+            return True
+
+        with self._lock:
+            tier.stats.calls_since_probe += 1
+            if tier.stats.calls_since_probe >= self.probe_interval:
+                return True
+            tier.stats.skipped += 1
+        return False
+
+    def _run_tier(self, tier: CascadeTier, text: str) -> TierResult:
+        """
+        Run one tier on one text and record its stats.
+
+        Returns:
+            The tier's result if it was accepted, None otherwise
+        """
+        start = time.perf_counter()
+        try:
+            result = tier.classify_fn(text)
+        except Exception as e:
+            logger.error(f"Error in {tier.name} classification tier: {e}")
+            result = None
+            with self._lock:
+                tier.stats.errors += 1
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        hit = tier.accepts(result)
+        with self._lock:
+            tier.stats.record(elapsed_ms, hit, tier.is_over_budget(elapsed_ms))
+        return result if hit else None
+
+    def _run_fallback(self, text: str) -> Tuple[str, float, str]:
+        """Run the fallback classifier and record its stats."""
+        start = time.perf_counter()
+        intent, confidence = self.fallback(text)
+        with self._lock:
+            self.fallback_stats.record((time.perf_counter() - start) * 1000, True, False)
+        return intent, confidence, self.fallback_name
+
+    def classify(self, text: str) -> Tuple[str, float, str]:
+        """
+        Classify a text through the cascade.
+
+        Args:
+            text: Normalized input text
+
+        Returns:
+            Tuple of (intent_name, confidence_score, tier_name)
+        """
+        for tier in self.tiers:
+            if not self._should_run(tier):
+                continue
+            result = self._run_tier(tier, text)
+            if result is not None:
+                return result[0], result[1], tier.name
+
+        return self._run_fallback(text)
+
+    def classify_batch(self, texts: List[str]) -> List[Tuple[str, float, str]]:
+        """
+        Classify many texts, running each tier once over all texts still pending.
+
+        Tiers with a batch function are called once per batch; latency is
+        recorded per text as the batch time divided by the batch size.
+
+        Args:
+            texts: Normalized input texts
+
+        Returns:
+            List of (intent_name, confidence_score, tier_name) tuples in input order
+        """
+        results: List[Optional[Tuple[str, float, str]]] = [None] * len(texts)
+        pending = list(range(len(texts)))
+
+        for tier in self.tiers:
+            if not pending or not self._should_run(tier):
+                continue
+
+            if tier.batch_fn is None:
+                remaining = []
+                for i in pending:
+                    result = self._run_tier(tier, texts[i])
+                    if result is not None:
+                        results[i] = (result[0], result[1], tier.name)
+                    else:
+                        remaining.append(i)
+                pending = remaining
+                continue
+
+            start = time.perf_counter()
+            try:
+                batch_results = tier.batch_fn([texts[i] for i in pending])
+            except Exception as e:
+                logger.error(f"Error in {tier.name} batch classification tier: {e}")
+                batch_results = [None] * len(pending)
+                with self._lock:
+                    tier.stats.errors += 1
+            per_text_ms = (time.perf_counter() - start) * 1000 / len(pending)
+
+            remaining = []
+            for i, result in zip(pending, batch_results):
+                hit = tier.accepts(result)
+                with self._lock:
+                    tier.stats.record(per_text_ms, hit, tier.is_over_budget(per_text_ms))
+                if hit:
+                    results[i] = (result[0], result[1], tier.name)
+                else:
+                    remaining.append(i)
+            pending = remaining
+
+        for i in pending:
+            results[i] = self._run_fallback(texts[i])
+
+        return results
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get hit rate and latency statistics for every tier.
+
+        Returns:
+            Dictionary mapping tier names to their stats and settings
+        """
+        with self._lock:
+            stats = {}
+            for tier in self.tiers:
+                tier_stats = tier.stats.to_dict()
+                tier_stats.update({
+                    "threshold": tier.threshold,
+                    "latency_budget_ms": tier.latency_budget_ms,
+                    "enabled": tier.enabled
+                })
+                stats[tier.name] = tier_stats
+            stats[self.fallback_name] = self.fallback_stats.to_dict()
+            return stats
+
+    def reset_stats(self) -> None:
+        """Reset the statistics of all tiers."""
+        with self._lock:
+            for tier in self.tiers:
+                tier.stats.reset()
+            self.fallback_stats.reset()
@@ -0,0 +1,250 @@
+"""
+Command Grammar Module
+
+This module holds the compiled, immutable parts of command processing: the
+command categories and their keyword index, the step parser and the default
+handler table. A grammar is built once and shared by every CommandProcessor
+in the process, so creating a processor costs next to nothing and concurrent
+use needs no locking.
+"""
+
+import re
+from types import MappingProxyType
+from typing import List, Dict, Optional, Callable, Mapping, Tuple
+
+from assistant.category_index import CategoryIndex
+
+
+# Command categories and their keywords
+DEFAULT_COMMAND_CATEGORIES = {
+    "Browsing": ["open", "browse", "search", "visit", "website", "google", "bing",
+                 "chrome", "firefox", "internet", "github", "youtube", "facebook",
+                 "twitter", "instagram", "linkedin", "reddit"],
+
+    "Media": ["play", "pause", "stop", "next", "previous", "volume", "music",
+              "video", "audio", "spotify", "netflix", "youtube", "movie", "song"],
+
+    "System": ["shutdown", "restart", "sleep", "hibernate", "lock", "settings",
+               "preferences", "control panel", "task manager", "performance"],
+
+    "Files": ["open", "save", "delete", "rename", "copy", "move", "document",
+              "file", "folder", "directory", "create", "text file"],
+
+    "Weather": ["weather", "temperature", "forecast", "humidity", "rain",
+                "snow", "sunny", "cloudy", "windy"],
+
+    "Calendar": ["meeting", "appointment", "schedule", "event", "reminder",
+                 "calendar", "date", "time", "day", "month", "year"],
+
+    "Communication": ["email", "message", "call", "contact", "send", "gmail",
+                      "outlook", "whatsapp", "telegram", "slack", "discord"],
+
+    "Timer": ["timer", "alarm", "countdown", "stopwatch", "minutes", "seconds",
+              "hours", "set timer", "remind me"]
+}
+
+# Tie-breaking weights for categories scoring equally; generic categories
+# whose keywords ("open", "time", "day") often appear in other commands
+# lose ties. Overridable via command_processor.category_weights.
+DEFAULT_CATEGORY_WEIGHTS = {
+    "Browsing": 1.0,
+    "Media": 1.0,
+    "System": 1.0,
+    "Files": 0.9,
+    "Weather": 1.0,
+    "Calendar": 0.8,
+    "Communication": 1.0,
+    "Timer": 1.0
+}
+
+# Every step separator, recognized in one scan. Each alternative matches a
+# bounded amount of text, so scanning is linear in the input length.
+SEPARATOR_PATTERN = re.compile(r"""
+    (?P<numbered>(?:^|(?<=\s))\d+\.(?!\d))         # "1." list markers
+  | (?P<bullet>•|(?:^|(?<=\n))[*\-](?=\s))          # "•", or "-"/"*" starting a line
+  | (?P<semicolon>;)
+  | (?P<comma>,)
+  | (?P<conjunction>(?<=\s)(?:and|then)(?=\s+\w))   # "and"/"then" between words
+""", re.VERBOSE | re.IGNORECASE)
+
+# Separator kinds from the most to the least specific. Steps are split at the
+# most specific kind present; commas and conjunctions form one level so
+# "a, b, and c" yields three steps.
+SEPARATOR_PRECEDENCE = [("numbered",), ("bullet",), ("semicolon",), ("comma", "conjunction")]
+
+# List markers start a step; text before the first marker is not a step
+LIST_MARKER_KINDS = ("numbered", "bullet")
+
+
+class CommandStep:
+    """
+    One step of a multi-step command.
+    """
+
+    __slots__ = ("text", "start", "end", "separator")
+
+    def __init__(self, text: str, start: int, end: int, separator: Optional[str] = None):
+        """
+        Initialize a step.
+
+        Args:
+            text: Step text without surrounding whitespace
+            start: Offset of the step in the parsed text
+            end: Offset just past the step in the parsed text
+            separator: Separator preceding the step ("numbered", "bullet",
+                       "semicolon", "comma", "and" or "then"), or None
+        """
+        self.text = text
+        self.start = start
+        self.end = end
+        self.separator = separator
+
+    def __repr__(self) -> str:
+        return f"CommandStep({self.text!r}, {self.start}, {self.end}, {self.separator!r})"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CommandStep):
+            return NotImplemented
+        return (self.text, self.start, self.end, self.separator) == (other.text, other.start, other.end, other.separator)
+
+
+def _separator_name(match: "re.Match") -> str:
+    """Get the separator name of a scanner match, naming conjunctions by their word."""
+    if match.lastgroup == "conjunction":
+        return match.group().lower()
+    return match.lastgroup
+
+
+def _merge_separators(previous: Optional[str], current: str) -> str:
+    """Combine adjacent separators such as ", then" or "and then" into one."""
+    return "then" if "then" in (previous, current) else current
+
+
+def parse_steps(text: str) -> List[CommandStep]:
+    """
+    Split a command into steps in a single scan of the text.
+
+    All separators are found in one pass, then the text is split at the most
+    specific kind present: numbered list markers, then bullets, then
+    semicolons, then commas together with "and"/"then".
+
+    Args:
+        text: Command text
+
+    Returns:
+        Non-empty steps in order, with their spans and preceding separators
+    """
+    found: Dict[str, List[Tuple[int, int, str]]] = {}
+    for match in SEPARATOR_PATTERN.finditer(text):
+        found.setdefault(match.lastgroup, []).append((match.start(), match.end(), _separator_name(match)))
+
+    separators: List[Tuple[int, int, str]] = []
+    starts_with_marker = False
+    for kinds in SEPARATOR_PRECEDENCE:
+        if any(kind in found for kind in kinds):
+            separators = sorted(sep for kind in kinds for sep in found.get(kind, []))
+            starts_with_marker = kinds[0] in LIST_MARKER_KINDS
+            break
+
+    steps = []
+    position = 0
+    pending: Optional[str] = None
+    boundaries = separators + [(len(text), len(text), None)]
+    for index, (sep_start, sep_end, name) in enumerate(boundaries):
+        segment_start, segment_end = position, sep_start
+        position = sep_end
+
+        # Skip surrounding whitespace without copying the text
+        while segment_start < segment_end and text[segment_start].isspace():
+            segment_start += 1
+        while segment_end > segment_start and text[segment_end - 1].isspace():
+            segment_end -= 1
+
+        if segment_start < segment_end and not (starts_with_marker and index == 0):
+            steps.append(CommandStep(text[segment_start:segment_end], segment_start, segment_end, pending))
+            pending = None
+
+        # Separators with nothing between them, like "and then", act as one
+        if name is not None:
+            pending = name if pending is None else _merge_separators(pending, name)
+
+    return steps
+
+
+class CommandGrammar:
+    """
+    Immutable command categories, keyword index and handler table.
+    """
+
+    __slots__ = ("categories", "category_weights", "category_index", "handlers")
+
+    def __init__(self, categories: Optional[Dict[str, List[str]]] = None,
+                 category_weights: Optional[Dict[str, float]] = None,
+                 handlers: Optional[Dict[str, Callable[[str], str]]] = None,
+                 category_index: Optional[CategoryIndex] = None):
+        """
+        Compile a grammar.
+
+        Args:
+            categories: Mapping of category names to keywords and phrases
+            category_weights: Tie-breaking weight per category
+            handlers: Default handler per category
+            category_index: Prebuilt index for these categories and weights
+        """
+        categories = categories if categories is not None else DEFAULT_COMMAND_CATEGORIES
+        weights = dict(DEFAULT_CATEGORY_WEIGHTS if category_weights is None else category_weights)
+
+        object.__setattr__(self, "categories", MappingProxyType(
+            {name: tuple(keywords) for name, keywords in categories.items()}))
+        object.__setattr__(self, "category_weights", MappingProxyType(weights))
+        object.__setattr__(self, "category_index", category_index or CategoryIndex(categories, weights))
+        object.__setattr__(self, "handlers", MappingProxyType(dict(handlers or {})))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CommandGrammar is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("CommandGrammar is immutable")
+
+    def with_handlers(self, handlers: Mapping[str, Callable[[str], str]]) -> "CommandGrammar":
+        """
+        Get a grammar with some handlers replaced, sharing the compiled index.
+
+        Args:
+            handlers: Handlers to add or replace, by category
+
+        Returns:
+            New grammar
+        """
+        merged = dict(self.handlers)
+        merged.update(handlers)
+        return CommandGrammar(dict(self.categories), dict(self.category_weights), merged, self.category_index)
+
+    def classify(self, text: str) -> Optional[str]:
+        """
+        Classify a command by its keywords.
+
+        Args:
+            text: Command text
+
+        Returns:
+            Best matching category, or None if no keyword matches
+        """
+        return self.category_index.classify(text.lower())
+
+    def get_handler(self, category: str) -> Optional[Callable[[str], str]]:
+        """Get the default handler of a category."""
+        return self.handlers.get(category)
+
+    def extract_steps(self, text: str) -> List[str]:
+        """
+        Extract multiple steps or commands from a text.
+
+        Args:
+            text: Text containing multiple steps
+
+        Returns:
+            List of individual command steps
+        """
+        # If we couldn't identify any step, return the whole text as a single step
+        return [step.text for step in parse_steps(text)] or [text]
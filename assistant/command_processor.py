@@ -5,72 +5,100 @@ This module processes user commands, extracts multi-step instructions,
 and handles command execution.
 """
 
-import re
+import inspect
 import logging
+import threading
+from functools import lru_cache, partial
 from typing import List, Dict, Any, Tuple, Optional, Callable, Union
 import datetime
 
 from assistant.config_manager import config_manager
 from assistant.intent_classifier import intent_classifier
+from assistant.system_prompts import prompt_manager
+from assistant.command_grammar import CommandGrammar, CommandStep, parse_steps, DEFAULT_CATEGORY_WEIGHTS
+from assistant.category_index import CategoryIndex
+from assistant.step_planner import (
+    StepPlanner, StepExecutor, StepResult, PlannedStep,
+    DEFAULT_MAX_WORKERS
+)
+from assistant.async_dispatch import (
+    AsyncDispatcher, DispatchResult, async_dispatcher,
+    DEFAULT_HANDLER_TIMEOUT, DEFAULT_CATEGORY_TIMEOUTS
+)
+from assistant.plan_cache import PlanCache, CommandPlan, plan_key, DEFAULT_PLAN_CACHE_SIZE
+from assistant.entity_extractor import (
+    Entities, extract_entities, resolve_entities, TARGET, QUERY, MEDIA, LOCATION, CONTACT, DURATION
+)
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=256)
+def takes_entities(handler: Callable) -> bool:
+    """Whether a handler accepts the entities resolved by the command's plan."""
+    try:
+        return "entities" in inspect.signature(handler).parameters
+    except (TypeError, ValueError):
+        return False
+
+# Grammars shared process-wide, one per distinct category weighting
+_grammars: Dict[Tuple[Tuple[str, float], ...], CommandGrammar] = {}
+_grammars_lock = threading.Lock()
+
+
 class CommandProcessor:
     """
     Processes user commands and extracts multi-step instructions.
     """
 
-    def __init__(self):
-        """Initialize the command processor."""
-        self.config = config_manager.get_section("command_processor")
-
-        # Command categories and their keywords
-        self.command_categories = {
-            "Browsing": ["open", "browse", "search", "visit", "website", "google", "bing",
-                         "chrome", "firefox", "internet", "github", "youtube", "facebook",
-                         "twitter", "instagram", "linkedin", "reddit"],
-
-            "Media": ["play", "pause", "stop", "next", "previous", "volume", "music",
-                     "video", "audio", "spotify", "netflix", "youtube", "movie", "song"],
-
-            "System": ["shutdown", "restart", "sleep", "hibernate", "lock", "settings",
-                      "preferences", "control panel", "task manager", "performance"],
-
-            "Files": ["open", "save", "delete", "rename", "copy", "move", "document",
-                     "file", "folder", "directory", "create", "text file"],
-
-            "Weather": ["weather", "temperature", "forecast", "humidity", "rain",
-                       "snow", "sunny", "cloudy", "windy"],
-
-            "Calendar": ["meeting", "appointment", "schedule", "event", "reminder",
-                        "calendar", "date", "time", "day", "month", "year"],
-
-            "Communication": ["email", "message", "call", "contact", "send", "gmail",
-                            "outlook", "whatsapp", "telegram", "slack", "discord"],
+    def __init__(self, grammar: Optional[CommandGrammar] = None,
+                 dispatcher: Optional[AsyncDispatcher] = None):
+        """
+        Initialize the command processor.
 
-            "Timer": ["timer", "alarm", "countdown", "stopwatch", "minutes", "seconds",
-                     "hours", "set timer", "remind me"]
-        }
+        Args:
+            grammar: Compiled command grammar; by default the grammar shared by
+                     all processors with the configured category weights
+            dispatcher: Dispatcher running the handlers; by default the shared one
+        """
+        self.config = config_manager.get_section("command_processor")
+        self.grammar = grammar or get_command_grammar(self.config.get("category_weights"))
+
+        # Handlers registered on this processor, taking precedence over the grammar's
+        self.command_handlers: Dict[str, Callable[[str], str]] = {}
+        self.handlers_version = 0
+
+        # Handlers run on the dispatcher with a deadline per category
+        self.dispatcher = dispatcher or async_dispatcher
+        self.handler_timeouts = dict(DEFAULT_CATEGORY_TIMEOUTS)
+        self.handler_timeouts.update(self.config.get("handler_timeouts", {}))
+        self.default_handler_timeout = self.config.get("handler_timeout_s", DEFAULT_HANDLER_TIMEOUT)
+        self.cancel_on_new_command = self.config.get("cancel_on_new_command", True)
+
+        # Independent steps of multi-step commands run concurrently; each step
+        # is bounded by its handler deadline unless step_timeout_s is set
+        self.step_planner = StepPlanner(lambda text: self.classify_command(text))
+        self.step_executor = StepExecutor(
+            lambda step: self.dispatch_command(step.category, step.text, entities=step.entities),
+            max_workers=self.config.get("max_parallel_steps", DEFAULT_MAX_WORKERS),
+            step_timeout=self.config.get("step_timeout_s")
+        )
+
+        # Resolved plans of recent commands, so repeated commands skip parsing
+        # and classification
+        self.wake_words = config_manager.get('assistant.wake_words', ["samantha", "hey samantha"])
+        self.plan_cache = PlanCache(self.config.get("plan_cache_size", DEFAULT_PLAN_CACHE_SIZE))
+
+    @property
+    def command_categories(self) -> Dict[str, Tuple[str, ...]]:
+        """Command categories and their keywords (read-only)."""
+        return self.grammar.categories
+
+    @property
+    def category_index(self) -> CategoryIndex:
+        """Keyword index of the command categories."""
+        return self.grammar.category_index
 
-        # Initialize command handlers
-        self.command_handlers = {}
-        self._register_default_handlers()
-
-    def _register_default_handlers(self) -> None:
-        """Register default command handlers."""
-        # This would be expanded with actual handlers in a full implementation
-        self.command_handlers = {
-            "Browsing": self._handle_browsing_command,
-            "Media": self._handle_media_command,
-            "System": self._handle_system_command,
-            "Files": self._handle_files_command,
-            "Weather": self._handle_weather_command,
-            "Calendar": self._handle_calendar_command,
-            "Communication": self._handle_communication_command,
-            "Timer": self._handle_timer_command,
-            "General": self._handle_general_command
-        }
     def cleanup(self):
         """Clean up resources before exit with user feedback"""
         print("\n" + "=" * 50)
@@ -106,16 +134,120 @@ class CommandProcessor:
         Returns:
             Tuple of (category, response)
         """
-        # Classify the command category
-        category = self.classify_command(command_text)
+        # A new command supersedes handlers still running for the previous one
+        if self.cancel_on_new_command:
+            self.cancel_pending()
+
+        plan = self.plan_command(command_text)
+        return plan.category, self.dispatch_command(plan.category, plan.text, plan.handler, plan.entities).message
+
+    def get_plan_versions(self) -> Tuple[int, int, int]:
+        """Get the versions of the intents, prompts and handlers plans depend on."""
+        return intent_classifier.version, prompt_manager.version, self.handlers_version
+
+    def plan_command(self, command_text: str) -> CommandPlan:
+        """
+        Resolve a command into a plan, reusing the cached plan of a repeated command.
+
+        Args:
+            command_text: User's command text
+
+        Returns:
+            Command plan
+        """
+        key = plan_key(command_text, self.wake_words)
+        versions = self.get_plan_versions()
+        plan = self.plan_cache.get(key, versions)
+        if plan is not None:
+            return plan
+
+        category = self.classify_command(key)
+        intent, confidence = intent_classifier.classify(key)
+        steps = self.parse_steps_from_text(key) or [CommandStep(key, 0, len(key))]
+        planned = self.step_planner.plan(steps)
+        # Entities are extracted once here; handlers read them from the plan
+        for step in planned:
+            step.entities = extract_entities(step.text.lower())
+        plan = CommandPlan(
+            text=key,
+            category=category,
+            handler=self.get_handler(category),
+            intent=intent,
+            confidence=confidence,
+            prompt_context=prompt_manager.resolve_context(f"{intent}.general"),
+            steps=steps,
+            planned=planned,
+            entities=extract_entities(key.lower()),
+            versions=versions
+        )
+        self.plan_cache.put(key, plan)
+        return plan
+
+    def get_plan_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get hit and miss counters of the plan cache.
+
+        Returns:
+            Dictionary with cache size, hits, misses, hit rate, evictions,
+            invalidations and stale plans found
+        """
+        return self.plan_cache.get_stats()
+
+    def execute_command(self, category: str, command_text: str) -> str:
+        """
+        Run the handler of a category on a command.
+
+        Args:
+            category: Command category
+            command_text: User's command text
+
+        Returns:
+            Handler response, or a message saying why it did not complete
+        """
+        return self.dispatch_command(category, command_text).message
+
+    def get_handler(self, category: str) -> Callable[[str], str]:
+        """Get the handler of a category, falling back to the general handler."""
+        return (self.command_handlers.get(category)
+                or self.grammar.get_handler(category)
+                or self._handle_general_command)
+
+    def get_handler_timeout(self, category: str) -> Optional[float]:
+        """Get the deadline of a category's handler in seconds, or None for no limit."""
+        return self.handler_timeouts.get(category, self.default_handler_timeout)
+
+    def dispatch_command(self, category: str, command_text: str, handler: Optional[Callable] = None,
+                         entities: Optional[Entities] = None) -> DispatchResult:
+        """
+        Run a handler on the dispatcher within the category's deadline.
 
-        # Get handler for this category
-        handler = self.command_handlers.get(category, self._handle_general_command)
+        Args:
+            category: Command category
+            command_text: User's command text
+            handler: Handler to run instead of the category's handler;
+                     may be a coroutine function
+            entities: Entities resolved for the command, passed to handlers
+                      taking an entities argument
 
-        # Execute handler
-        response = handler(command_text)
+        Returns:
+            Dispatch result
+        """
+        handler = handler or self.get_handler(category)
+        if entities is not None and takes_entities(handler):
+            handler = partial(handler, entities=entities)
+        return self.dispatcher.dispatch(
+            category, handler, command_text,
+            timeout=self.get_handler_timeout(category), group=self
+        )
+
+    def cancel_pending(self) -> int:
+        """
+        Cancel this processor's handlers that are still running.
 
-        return category, response
+        Returns:
+            Number of handlers cancelled
+        """
+        return self.dispatcher.cancel_pending(group=self)
 
     def classify_command(self, command_text: str) -> str:
         """
@@ -129,13 +261,10 @@ class CommandProcessor:
         """
         command_text = command_text.lower()
 
-        # Check each category for keywords
-        for category, keywords in self.command_categories.items():
-            for keyword in keywords:
-                # Look for whole words that match the keyword
-                pattern = r'\b' + re.escape(keyword) + r'\b'
-                if re.search(pattern, command_text):
-                    return category
+        # Score all categories in one pass over the command's tokens
+        category = self.grammar.classify(command_text)
+        if category:
+            return category
 
         # Special handling for browser/github commands
         if "open github" in command_text or "go to github" in command_text:
@@ -168,62 +297,47 @@ class CommandProcessor:
         Returns:
             List of individual command steps
         """
-        # Check for numbered list format (e.g., "1. Do this\n2. Do that")
-        numbered_pattern = r'\d+\.\s*(.*?)(?=\d+\.|$)'
-        numbered_matches = re.findall(numbered_pattern, text)
-        if numbered_matches:
-            # Clean up the matches
-            return [step.strip() for step in numbered_matches if step.strip()]
-
-        # Check for bullet points
-        bullet_pattern = r'[•\-*]\s*(.*?)(?=[•\-*]|$)'
-        bullet_matches = re.findall(bullet_pattern, text)
-        if bullet_matches:
-            return [step.strip() for step in bullet_matches if step.strip()]
-
-        # Check for comma-separated or semicolon-separated commands
-        if ';' in text:
-            # Split by semicolons
-            return [step.strip() for step in text.split(';') if step.strip()]
-        elif ',' in text and 'and' not in text.lower():
-            # If it's a simple comma-separated list (no "and")
-            return [step.strip() for step in text.split(',') if step.strip()]
-
-        # Check for "and" or "then" separators
-        and_then_pattern = r'(.*?)(?:(?:\s+and\s+|\s+then\s+)(?=\w)|\s*$)'
-        and_then_matches = re.findall(and_then_pattern, text)
-        if len(and_then_matches) > 1:
-            return [step.strip() for step in and_then_matches if step.strip()]
-
-        # If we couldn't identify multiple steps, return the whole text as a single step
-        return [text]
-
-    def _handle_browsing_command(self, command: str) -> str:
+        return self.grammar.extract_steps(text)
+
+    def parse_steps_from_text(self, text: str) -> List[CommandStep]:
+        """
+        Split a text into steps, keeping their spans and separators.
+
+        Args:
+            text: Text containing multiple steps
+
+        Returns:
+            List of steps in order
+        """
+        return parse_steps(text)
+
+    @staticmethod
+    def _handle_browsing_command(command: str, entities: Optional[Entities] = None) -> str:
         """Handle a browsing-related command."""
+        entities = resolve_entities(command.lower(), entities)
+
         # Extract URL or search term
         if "open" in command.lower():
             # Extract what to open
-            match = re.search(r"open\s+(.*?)(?:\s+in\s+|\s*$)", command.lower())
-            if match:
-                site = match.group(1).strip()
+            site = entities.first(TARGET)
+            if site:
                 return f"Opening {site} in your browser."
 
         # Handle search
         if "search" in command.lower():
-            match = re.search(r"search(?:\s+for)?\s+(.*?)(?:\s+on\s+|\s*$)", command.lower())
-            if match:
-                query = match.group(1).strip()
+            query = entities.first(QUERY)
+            if query:
                 return f"Searching for '{query}'"
 
         # Default response
         return "I'll help you browse the web."
 
-    def _handle_media_command(self, command: str) -> str:
+    @staticmethod
+    def _handle_media_command(command: str, entities: Optional[Entities] = None) -> str:
         """Handle a media-related command."""
         if "play" in command.lower():
-            match = re.search(r"play\s+(.*?)(?:\s+on\s+|\s*$)", command.lower())
-            if match:
-                media = match.group(1).strip()
+            media = resolve_entities(command.lower(), entities).first(MEDIA)
+            if media:
                 return f"Playing {media} now."
 
         if "pause" in command.lower() or "stop" in command.lower():
@@ -237,7 +351,8 @@ class CommandProcessor:
 
         return "I'll help you with media controls."
 
-    def _handle_system_command(self, command: str) -> str:
+    @staticmethod
+    def _handle_system_command(command: str) -> str:
         """Handle a system-related command."""
         # For safety, we just simulate these commands
         if "shutdown" in command.lower() or "turn off" in command.lower():
@@ -251,33 +366,29 @@ class CommandProcessor:
 
         return "I'll help you with system controls."
 
-    def _handle_files_command(self, command: str) -> str:
+    @staticmethod
+    def _handle_files_command(command: str, entities: Optional[Entities] = None) -> str:
         """Handle a file-related command."""
-        if "open" in command.lower():
-            match = re.search(r"open\s+(.*?)(?:\s+in\s+|\s*$)", command.lower())
-            if match:
-                file = match.group(1).strip()
-                return f"Opening file: {file}"
+        file = resolve_entities(command.lower(), entities).first(TARGET)
+
+        if "open" in command.lower() and file:
+            return f"Opening file: {file}"
 
-        if "create" in command.lower():
-            match = re.search(r"create\s+(.*?)(?:\s+in\s+|\s*$)", command.lower())
-            if match:
-                file = match.group(1).strip()
-                return f"Creating file: {file}"
+        if "create" in command.lower() and file:
+            return f"Creating file: {file}"
 
         return "I'll help you with file operations."
 
-    def _handle_weather_command(self, command: str) -> str:
+    @staticmethod
+    def _handle_weather_command(command: str, entities: Optional[Entities] = None) -> str:
         """Handle a weather-related command."""
         # Extract location if specified
-        location = "your area"
-        match = re.search(r"weather(?:\s+in\s+|\s+for\s+)(.*?)(?:\s+on\s+|\s*$)", command.lower())
-        if match:
-            location = match.group(1).strip()
+        location = resolve_entities(command.lower(), entities).first(LOCATION, "your area")
 
         return f"I'll check the weather in {location} for you."
 
-    def _handle_calendar_command(self, command: str) -> str:
+    @staticmethod
+    def _handle_calendar_command(command: str) -> str:
         """Handle a calendar-related command."""
         # Get current date for context
         today = datetime.datetime.now()
@@ -290,26 +401,25 @@ class CommandProcessor:
 
         return "I'll help you with your calendar."
 
-    def _handle_communication_command(self, command: str) -> str:
+    @staticmethod
+    def _handle_communication_command(command: str, entities: Optional[Entities] = None) -> str:
         """Handle a communication-related command."""
         if "email" in command.lower() or "send email" in command.lower():
             # Extract recipient if available
-            match = re.search(r"email(?:\s+to)?\s+(.*?)(?:\s+about|\s*$)", command.lower())
-            if match:
-                recipient = match.group(1).strip()
+            recipient = resolve_entities(command.lower(), entities).first(CONTACT)
+            if recipient:
                 return f"I'll help you draft an email to {recipient}."
 
         return "I'll help you with communication."
 
-    def _handle_timer_command(self, command: str) -> str:
+    @staticmethod
+    def _handle_timer_command(command: str, entities: Optional[Entities] = None) -> str:
         """Handle a timer-related command."""
         # Extract time if specified
         duration = "some time"
-        match = re.search(r"(\d+)\s*(minute|second|hour|min|sec|hr)s?", command.lower())
-        if match:
-            amount = match.group(1)
-            unit = match.group(2)
-            duration = f"{amount} {unit}"
+        entity = resolve_entities(command.lower(), entities).get(DURATION)
+        if entity is not None:
+            duration = entity.describe()
 
         if "set" in command.lower() or "start" in command.lower():
             return f"Setting a timer for {duration}."
@@ -319,7 +429,8 @@ class CommandProcessor:
 
         return "I'll help you with timer operations."
 
-    def _handle_general_command(self, command: str) -> str:
+    @staticmethod
+    def _handle_general_command(command: str) -> str:
         """Handle a general command."""
         return "I'll try to help with your request."
 
@@ -329,9 +440,13 @@ class CommandProcessor:
 
         Args:
             category: Command category
-            handler: Function that takes a command string and returns a response string
+            handler: Function or coroutine function that takes a command string
+                     and returns a response string; given an entities
+                     keyword argument, it also receives the command's
+                     extracted entities
         """
         self.command_handlers[category] = handler
+        self.handlers_version += 1
 
     def process_multi_step_command(self, command_text: str) -> List[Tuple[str, str]]:
         """
@@ -343,14 +458,76 @@ class CommandProcessor:
         Returns:
             List of (category, response) tuples for each step
         """
-        steps = self.extract_steps_from_text(command_text)
-        results = []
+        plan = self.plan_command(command_text)
+        return [(result.category, result.response) for result in self.run_plan(plan)]
+
+    def run_steps(self, steps: List[CommandStep]) -> List[StepResult]:
+        """
+        Run the steps of a command, concurrently where they are independent.
+
+        Steps for the same app, steps introduced by "then" and steps that refer
+        to an earlier result wait for the steps they depend on.
+
+        Args:
+            steps: Parsed steps of the command
+
+        Returns:
+            Step results in the original order
+        """
+        if self.cancel_on_new_command:
+            self.cancel_pending()
+        return self.step_executor.execute(self.step_planner.plan(steps))
 
-        for step in steps:
-            category, response = self.process_command(step)
-            results.append((category, response))
+    def run_plan(self, plan: CommandPlan) -> List[StepResult]:
+        """
+        Run the steps of a resolved plan.
+
+        Args:
+            plan: Plan from plan_command
+
+        Returns:
+            Step results in the original order
+        """
+        if self.cancel_on_new_command:
+            self.cancel_pending()
+        return self.step_executor.execute(plan.planned)
+
+
+# Default handler per category, shared through the command grammar
+DEFAULT_COMMAND_HANDLERS = {
+    "Browsing": CommandProcessor._handle_browsing_command,
+    "Media": CommandProcessor._handle_media_command,
+    "System": CommandProcessor._handle_system_command,
+    "Files": CommandProcessor._handle_files_command,
+    "Weather": CommandProcessor._handle_weather_command,
+    "Calendar": CommandProcessor._handle_calendar_command,
+    "Communication": CommandProcessor._handle_communication_command,
+    "Timer": CommandProcessor._handle_timer_command,
+    "General": CommandProcessor._handle_general_command
+}
+
+
+def get_command_grammar(category_weights: Optional[Dict[str, float]] = None) -> CommandGrammar:
+    """
+    Get the process-wide command grammar for some category weights.
+
+    The grammar is compiled on first use and then shared.
 
-        return results
+    Args:
+        category_weights: Overrides of the default tie-breaking weights
+
+    Returns:
+        Shared command grammar
+    """
+    weights = dict(DEFAULT_CATEGORY_WEIGHTS)
+    weights.update(category_weights or {})
+    key = tuple(sorted(weights.items()))
+
+    with _grammars_lock:
+        grammar = _grammars.get(key)
+        if grammar is None:
+            grammar = _grammars[key] = CommandGrammar(category_weights=weights, handlers=DEFAULT_COMMAND_HANDLERS)
+        return grammar
 
 
 # Create an instance for easy importing
@@ -114,11 +114,29 @@ class ConfigManager:
             },
             "memory": {
                 "max_conversations": 100,
-                "file_path": "assistant_memory.json"
+                "file_path": "assistant_memory.json",
+                "storage_backend": "json",
+                "history_window": 1000,
+                "history_buffer_entries": 32,
+                "history_fsync_interval": 5.0,
+                "batch_size": 32,
+                "write_behind_interval": 1.0,
+                "retention_enabled": True,
+                "conversation_gap_minutes": 30,
+                "compaction_interval": 3600,
+                "semantic_recall_enabled": True,
+                "embedder": "sentence",
+                "vector_dim": 256,
+                "shared": False,
+                "sync_interval": 1.0
             },
             "models": {
                 "intent_classifier": {
                     "device": "auto"
+                },
+                "embeddings": {
+                    "model_path": "sentence-transformers/all-MiniLM-L6-v2",
+                    "device": "auto"
                 }
             }
         }
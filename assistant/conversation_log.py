@@ -0,0 +1,461 @@
+"""
+Conversation Log Module
+
+This module stores conversation history as an append-only, line-delimited
+JSON log. Each entry is one line, so adding an entry writes only that entry
+instead of rewriting the whole history. Writes are buffered and synced to
+disk periodically, and a compact index of line offsets lets the most recent
+entries be read without scanning the log. Histories saved by older versions
+as a single JSON document are migrated once. Given a FileLock, several
+processes can append to and rewrite the same log.
+"""
+
+import os
+import json
+import time
+import struct
+import logging
+import threading
+from contextlib import nullcontext
+from typing import Dict, List, Any, Optional, Iterable, Iterator
+
+
+logger = logging.getLogger(__name__)
+
+# The index holds one little-endian 64-bit byte offset per entry
+INDEX_SUFFIX = ".idx"
+OFFSET_FORMAT = "<Q"
+OFFSET_SIZE = struct.calcsize(OFFSET_FORMAT)
+
+# Entries written per batch; 1 hands every entry to the OS immediately
+DEFAULT_BUFFER_ENTRIES = 1
+
+# Seconds between fsyncs of the log
+DEFAULT_FSYNC_INTERVAL = 5.0
+
+# Suffix given to a legacy JSON history once it has been migrated
+MIGRATED_SUFFIX = ".migrated"
+
+
+def _encode(entry: Dict[str, Any]) -> bytes:
+    """Encode an entry as one log line."""
+    return json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+class ConversationLog:
+    """
+    Append-only JSONL conversation log with an offset index.
+    """
+
+    def __init__(self, path: str, buffer_entries: int = DEFAULT_BUFFER_ENTRIES,
+                 fsync_interval: Optional[float] = DEFAULT_FSYNC_INTERVAL, lock=None):
+        """
+        Initialize the log. Files are created on the first write.
+
+        Args:
+            path: Path of the log file
+            buffer_entries: Number of entries buffered before they are written
+            fsync_interval: Seconds between fsyncs, or None to sync only on
+                            sync() and close()
+            lock: FileLock held while writing, if other processes share the log
+        """
+        self.path = path
+        self.index_path = path + INDEX_SUFFIX
+        # A shared log writes every entry at once, so readers never have to
+        # take the file lock to flush a buffer
+        self.buffer_entries = max(1, buffer_entries) if lock is None else 1
+        self.fsync_interval = fsync_interval
+        self.lock = lock
+
+        self._lock = threading.RLock()
+        self._data_file = None
+        self._index_file = None
+        self._pending: List[bytes] = []
+        # Bytes and entries on disk as this process last saw them; _count
+        # also includes buffered entries
+        self._size = 0
+        self._count = 0
+        self._stamp = None
+        # Set when a write caught up with other processes' entries, which
+        # changed_externally() has not reported yet
+        self._external = False
+        self._last_sync = time.monotonic()
+
+        with self._locked():
+            self._recover()
+
+    def _locked(self):
+        """Hold the file lock, if the log is shared."""
+        return self.lock if self.lock is not None else nullcontext()
+
+    def _disk_stamp(self):
+        """Identify the log's current contents: its inode and size."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_size
+
+    def _recover(self) -> None:
+        """Check the index against the log and rebuild it if they disagree."""
+        self._stamp = self._disk_stamp()
+        if self._stamp is None:
+            self._size = self._count = 0
+            return
+
+        self._size = os.path.getsize(self.path)
+        if self._index_matches():
+            self._count = (os.path.getsize(self.index_path) // OFFSET_SIZE
+                           if os.path.exists(self.index_path) else 0)
+            return
+
+        logger.warning(f"Rebuilding conversation log index for {self.path}")
+        self._rebuild_index()
+        self._stamp = self._disk_stamp()
+
+    def _sync_with_disk(self) -> bool:
+        """
+        Catch up with entries other processes wrote. Call holding the file lock.
+
+        Returns:
+            True if the log changed since this process last wrote or saw it
+        """
+        stamp = self._disk_stamp()
+        if stamp == self._stamp:
+            return False
+        if self._data_file is not None and (stamp is None or
+                                            os.fstat(self._data_file.fileno()).st_ino != stamp[0]):
+            # Rewritten by another process; append to the new log from now on
+            self._data_file.close()
+            self._index_file.close()
+            self._data_file = self._index_file = None
+        self._recover()
+        self._count += len(self._pending)
+        return True
+
+    def changed_externally(self) -> bool:
+        """
+        Check whether another process changed the log, catching up if so.
+
+        Cheap when nothing changed: the log is only stat'ed.
+
+        Returns:
+            True if entries were added or the log was rewritten elsewhere
+        """
+        if self.lock is None:
+            return False
+        with self._lock:
+            external, self._external = self._external, False
+            if self._disk_stamp() == self._stamp:
+                return external
+            with self.lock:
+                return self._sync_with_disk() or external
+
+    def _index_matches(self) -> bool:
+        """Whether the index ends at the start of the log's last complete line."""
+        if not os.path.exists(self.index_path):
+            return self._size == 0
+        index_size = os.path.getsize(self.index_path)
+        if index_size % OFFSET_SIZE:
+            return False
+        if index_size == 0:
+            return self._size == 0
+
+        with open(self.index_path, "rb") as f:
+            f.seek(index_size - OFFSET_SIZE)
+            last_offset, = struct.unpack(OFFSET_FORMAT, f.read(OFFSET_SIZE))
+        if last_offset >= self._size:
+            return False
+
+        with open(self.path, "rb") as f:
+            if last_offset > 0:
+                f.seek(last_offset - 1)
+                if f.read(1) != b"\n":
+                    return False
+            f.seek(last_offset)
+            tail = f.read()
+        return tail.endswith(b"\n") and tail.count(b"\n") == 1
+
+    def _rebuild_index(self) -> None:
+        """Rebuild the index by scanning the log, dropping a torn last line."""
+        offsets: List[int] = []
+        end = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                offsets.append(end)
+                end += len(line)
+
+        if end < self._size:
+            # A crash mid-write left a partial entry at the end
+            logger.warning(f"Dropping {self._size - end} bytes of incomplete entry from {self.path}")
+            with open(self.path, "r+b") as f:
+                f.truncate(end)
+
+        with open(self.index_path, "wb") as f:
+            f.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+        self._size = end
+        self._count = len(offsets)
+
+    def _open_files(self) -> None:
+        """Open the log and index for appending."""
+        if self._data_file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._data_file = open(self.path, "ab")
+            self._index_file = open(self.index_path, "ab")
+
+    def _write_pending(self) -> None:
+        """Write buffered entries, the log before the index."""
+        if not self._pending:
+            return
+        with self._locked():
+            if self.lock is not None and self._sync_with_disk():
+                self._external = True
+            offsets = []
+            size = self._size
+            for line in self._pending:
+                offsets.append(size)
+                size += len(line)
+
+            self._open_files()
+            self._data_file.write(b"".join(self._pending))
+            self._data_file.flush()
+            self._index_file.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+            self._index_file.flush()
+            self._pending = []
+            self._size = size
+            self._stamp = self._disk_stamp()
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        """
+        Append an entry to the log.
+
+        Args:
+            entry: JSON-serializable entry
+        """
+        line = _encode(entry)
+        with self._lock:
+            self._pending.append(line)
+            self._count += 1
+
+            sync_due = (self.fsync_interval is not None and
+                        time.monotonic() - self._last_sync >= self.fsync_interval)
+            if len(self._pending) >= self.buffer_entries or sync_due:
+                self._write_pending()
+            if sync_due:
+                self.sync()
+
+    @property
+    def pending(self) -> int:
+        """Number of entries buffered but not yet written."""
+        return len(self._pending)
+
+    def flush(self) -> None:
+        """Write buffered entries to the OS."""
+        with self._lock:
+            self._write_pending()
+
+    def sync(self) -> None:
+        """Write buffered entries and fsync the log and index."""
+        with self._lock:
+            self._write_pending()
+            if self._data_file is not None:
+                os.fsync(self._data_file.fileno())
+                os.fsync(self._index_file.fileno())
+            self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        """Sync and close the log. Later appends reopen it."""
+        with self._lock:
+            self.sync()
+            if self._data_file is not None:
+                self._data_file.close()
+                self._index_file.close()
+                self._data_file = self._index_file = None
+
+    def _parse(self, lines: Iterator[bytes]) -> List[Dict[str, Any]]:
+        """Decode log lines, skipping any that are corrupt."""
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError as e:
+                logger.warning(f"Skipping corrupt conversation log entry in {self.path}: {e}")
+        return entries
+
+    def read_all(self) -> List[Dict[str, Any]]:
+        """
+        Read every entry in the log.
+
+        Returns:
+            Entries in the order they were appended
+        """
+        with self._lock:
+            self._write_pending()
+            if not os.path.exists(self.path):
+                return []
+            # Only up to what this process has seen, which is complete
+            with open(self.path, "rb") as f:
+                return self._parse(f.read(self._size).splitlines(keepends=True))
+
+    def iter_entries(self) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the entries in the log without reading it all at once.
+
+        Entries appended while iterating are not included.
+
+        Yields:
+            Entries in the order they were appended
+        """
+        with self._lock:
+            self._write_pending()
+            count = self._count
+            if count == 0 or not os.path.exists(self.path):
+                return
+            f = open(self.path, "rb")
+        with f:
+            for _, line in zip(range(count), f):
+                yield from self._parse([line])
+
+    def tail(self, n: int) -> List[Dict[str, Any]]:
+        """
+        Read the most recent entries, seeking straight to them via the index.
+
+        Args:
+            n: Number of entries to read
+
+        Returns:
+            Up to n entries, oldest first
+        """
+        with self._lock:
+            if n <= 0:
+                return []
+            if n >= self._count:
+                return self.read_all()
+
+            self._write_pending()
+            with open(self.index_path, "rb") as f:
+                f.seek((self._count - n) * OFFSET_SIZE)
+                offset, = struct.unpack(OFFSET_FORMAT, f.read(OFFSET_SIZE))
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                return self._parse(f.read(self._size - offset).splitlines(keepends=True))
+
+    def read_at(self, positions: List[int]) -> List[Dict[str, Any]]:
+        """
+        Read entries by position, seeking straight to each via the index.
+
+        Args:
+            positions: Zero-based positions of the entries to read
+
+        Returns:
+            The entries, in the order of positions
+        """
+        with self._lock:
+            for position in positions:
+                if not 0 <= position < self._count:
+                    raise IndexError(f"Conversation log position {position} out of range")
+            if not positions:
+                return []
+
+            self._write_pending()
+            entries = []
+            with open(self.index_path, "rb") as index, open(self.path, "rb") as f:
+                for position in positions:
+                    index.seek(position * OFFSET_SIZE)
+                    offset, = struct.unpack(OFFSET_FORMAT, index.read(OFFSET_SIZE))
+                    f.seek(offset)
+                    entries.extend(self._parse([f.readline()]))
+            return entries
+
+    def rewrite(self, entries: Iterable[Dict[str, Any]]) -> None:
+        """
+        Replace the whole log, e.g. after clearing or importing history.
+
+        The new log and index are written to temporary files and swapped in,
+        so a crash, or an error raised while iterating the entries, leaves
+        either the old or the new history. Entries are written as they are
+        iterated, so they need not all be in memory.
+
+        Args:
+            entries: Entries of the new log
+        """
+        with self._lock, self._locked():
+            self._pending = []
+            self.close()
+
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            count = 0
+            size = 0
+            data_tmp = self.path + ".tmp"
+            index_tmp = self.index_path + ".tmp"
+            with open(data_tmp, "wb") as f, open(index_tmp, "wb") as index:
+                for entry in entries:
+                    line = _encode(entry)
+                    index.write(struct.pack(OFFSET_FORMAT, size))
+                    size += len(line)
+                    count += 1
+                    f.write(line)
+                for handle in (f, index):
+                    handle.flush()
+                    os.fsync(handle.fileno())
+
+            # A crash between the two renames is repaired by _recover
+            os.replace(data_tmp, self.path)
+            os.replace(index_tmp, self.index_path)
+            self._size = size
+            self._count = count
+            self._stamp = self._disk_stamp()
+            self._external = False
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        self.rewrite([])
+
+    def migrate_json(self, json_path: str) -> int:
+        """
+        Move a history saved as one JSON list into the log.
+
+        Runs once: the JSON file is renamed afterwards, and nothing is
+        migrated into a log that already has entries.
+
+        Args:
+            json_path: Path of the legacy JSON history
+
+        Returns:
+            Number of entries migrated
+        """
+        if not os.path.exists(json_path):
+            return 0
+
+        with self._lock:
+            if self._count > 0:
+                logger.warning(f"Not migrating {json_path}: {self.path} already has entries")
+                return 0
+
+            try:
+                if os.path.getsize(json_path) > 0:
+                    with open(json_path, "r", encoding="utf-8") as f:
+                        entries = json.load(f)
+                else:
+                    entries = []
+            except (json.JSONDecodeError, OSError) as e:
+                logger.error(f"Could not migrate conversation history from {json_path}: {e}")
+                return 0
+            if not isinstance(entries, list):
+                logger.error(f"Could not migrate conversation history from {json_path}: not a list")
+                return 0
+
+            self.rewrite(entries)
+            os.replace(json_path, json_path + MIGRATED_SUFFIX)
+            logger.info(f"Migrated {len(entries)} conversation entries from {json_path} to {self.path}")
+            return len(entries)
+
+    def __len__(self) -> int:
+        return self._count
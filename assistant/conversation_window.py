@@ -0,0 +1,278 @@
+"""
+Conversation Window Module
+
+This module provides the compact in-memory form of conversation entries.
+Entries are slotted objects holding an interned speaker id, the text and
+an epoch-float timestamp instead of dicts with repeated keys and ISO
+strings, and recent history is kept in a bounded deque while older entries
+stay on disk. Entries still read like the dicts they replace, so callers
+can index them by "speaker", "text" and "timestamp".
+"""
+
+import os
+import sys
+import json
+import logging
+import tracemalloc
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Union, Iterable, Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Entries kept in memory by default; older ones are read from storage
+DEFAULT_WINDOW_SIZE = 1000
+
+ENTRY_KEYS = ("speaker", "text", "timestamp")
+
+# Naive timestamps are stored as seconds since this moment, so they convert
+# back to the same ISO string regardless of the local timezone
+EPOCH = datetime(1970, 1, 1)
+ONE_SECOND = timedelta(seconds=1)
+
+
+class SpeakerTable:
+    """
+    Interns speaker names as small integer ids.
+    """
+
+    def __init__(self):
+        """Initialize the table."""
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+
+    def id(self, name: str) -> int:
+        """
+        Get the id of a speaker, assigning one on first use.
+
+        Args:
+            name: Speaker name
+
+        Returns:
+            Speaker id
+        """
+        speaker_id = self._ids.get(name)
+        if speaker_id is None:
+            # setdefault keeps the first id if two threads intern the same name
+            speaker_id = self._ids.setdefault(name, len(self._names))
+            if speaker_id == len(self._names):
+                self._names.append(sys.intern(name))
+        return speaker_id
+
+    def name(self, speaker_id: int) -> str:
+        """Get the speaker name for an id."""
+        return self._names[speaker_id]
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+# Create an instance for easy importing
+speaker_table = SpeakerTable()
+
+
+def to_epoch(timestamp: Union[datetime, str, float, None]) -> Tuple[float, Optional[str]]:
+    """
+    Convert a timestamp to epoch seconds.
+
+    Args:
+        timestamp: Datetime, ISO string, epoch seconds or None for now
+
+    Returns:
+        Tuple of epoch seconds and the original string if it would not be
+        reproduced exactly from the seconds (timezone-aware or non-ISO)
+    """
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp), None
+    if timestamp is None:
+        timestamp = datetime.now()
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is not None:
+            return timestamp.timestamp(), timestamp.isoformat()
+        return (timestamp - EPOCH) / ONE_SECOND, None
+
+    try:
+        moment = datetime.fromisoformat(timestamp)
+    except (TypeError, ValueError):
+        return 0.0, timestamp
+    if moment.tzinfo is not None:
+        return moment.timestamp(), timestamp
+    seconds = (moment - EPOCH) / ONE_SECOND
+    return seconds, None if from_epoch(seconds) == timestamp else timestamp
+
+
+def from_epoch(seconds: float) -> str:
+    """Convert epoch seconds back to a naive ISO timestamp."""
+    return (EPOCH + timedelta(microseconds=round(seconds * 1e6))).isoformat()
+
+
+class ConversationEntry:
+    """
+    One conversation entry, readable like the dict it replaces.
+    """
+
+    __slots__ = ("speaker_id", "text", "time", "_timestamp_text", "extra")
+
+    def __init__(self, speaker: str, text: str, timestamp: Union[datetime, str, float, None] = None,
+                 extra: Optional[Dict[str, Any]] = None):
+        """
+        Initialize an entry.
+
+        Args:
+            speaker: Who spoke (user, assistant, system)
+            text: What was said
+            timestamp: When it was said (defaults to now)
+            extra: Other fields of the entry, if any
+        """
+        self.speaker_id = speaker_table.id(speaker)
+        self.text = text
+        self.time, self._timestamp_text = to_epoch(timestamp)
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ConversationEntry":
+        """
+        Create an entry from its dict form.
+
+        Args:
+            data: Entry with speaker, text and timestamp keys
+
+        Returns:
+            Compact entry
+        """
+        extra = {key: value for key, value in data.items() if key not in ENTRY_KEYS}
+        return cls(data.get("speaker", ""), data.get("text", ""), data.get("timestamp", ""), extra)
+
+    @property
+    def speaker(self) -> str:
+        """Who spoke."""
+        return speaker_table.name(self.speaker_id)
+
+    @property
+    def timestamp(self) -> str:
+        """When it was said, as an ISO string."""
+        if self._timestamp_text is not None:
+            return self._timestamp_text
+        return from_epoch(self.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the dict form of the entry."""
+        data = {"speaker": self.speaker, "text": self.text, "timestamp": self.timestamp}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def keys(self) -> List[str]:
+        """Get the field names, as for a dict."""
+        return list(ENTRY_KEYS) + list(self.extra or ())
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a field, as for a dict."""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "speaker":
+            return self.speaker
+        if key == "text":
+            return self.text
+        if key == "timestamp":
+            return self.timestamp
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in ENTRY_KEYS or bool(self.extra and key in self.extra)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(ENTRY_KEYS) + len(self.extra or ())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ConversationEntry):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"ConversationEntry(speaker={self.speaker!r}, text={self.text!r}, timestamp={self.timestamp!r})"
+
+
+def make_window(entries: Iterable[Union[Dict[str, Any], ConversationEntry]],
+                size: Optional[int] = DEFAULT_WINDOW_SIZE) -> "deque[ConversationEntry]":
+    """
+    Build a bounded window of compact entries.
+
+    Args:
+        entries: Entries in dict or compact form, oldest first
+        size: Most entries to keep, or None for no bound
+
+    Returns:
+        Deque of the most recent entries
+    """
+    return deque((entry if isinstance(entry, ConversationEntry) else ConversationEntry.from_dict(entry)
+                  for entry in entries), maxlen=size)
+
+
+def _rss_bytes() -> Optional[int]:
+    """Get the resident set size of this process, where /proc is available."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def measure_entry_memory(count: int = 100000) -> Dict[str, Any]:
+    """
+    Measure the memory used by conversation entries as dicts and as
+    compact entries.
+
+    Args:
+        count: Number of entries to create
+
+    Returns:
+        Dictionary with traced bytes and RSS growth for each form
+    """
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    speakers = ("user", "assistant")
+    # The same texts for both forms, so only the entry overhead differs
+    texts = [f"message number {i}" for i in range(count)]
+
+    def build_dicts():
+        return [{"speaker": speakers[i % 2], "text": texts[i],
+                 "timestamp": (start + timedelta(seconds=i)).isoformat()} for i in range(count)]
+
+    def build_compact():
+        return make_window((ConversationEntry(speakers[i % 2], texts[i], start + timedelta(seconds=i))
+                            for i in range(count)), size=None)
+
+    report = {"entries": count}
+    for label, build in (("dict", build_dicts), ("compact", build_compact)):
+        tracemalloc.start()
+        entries = build()
+        report[f"{label}_bytes"], _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        report[f"{label}_bytes_per_entry"] = report[f"{label}_bytes"] / count
+        del entries
+
+    # RSS is measured without tracing, keeping both forms alive so the
+    # second does not reuse memory freed by the first
+    kept = []
+    for label, build in (("dict", build_dicts), ("compact", build_compact)):
+        rss_before = _rss_bytes()
+        kept.append(build())
+        rss_after = _rss_bytes()
+        report[f"{label}_rss_bytes"] = rss_after - rss_before if rss_before is not None else None
+    return report
+
+if __name__ == "__main__":
+    print(json.dumps(measure_entry_memory(), indent=2))
@@ -0,0 +1,303 @@
+"""
+Entity Extractor Module
+
+This module extracts typed entities from command text with one compiled
+pattern and a single scan: durations, percentages, numbers, URLs and
+domains, quoted titles, artists, contacts, message texts, and the
+targets of open, search, play and weather commands. Handlers read their arguments from the
+extracted entities instead of running their own regexes, and results are
+cached so a command parsed by several handlers is scanned once.
+"""
+
+import re
+from typing import Dict, List, Any, Optional, Iterator, Tuple
+
+from assistant.lru_cache import LRUCache
+
+
+# Entity kinds
+DURATION = "duration"
+PERCENT = "percent"
+NUMBER = "number"
+URL = "url"
+QUOTED = "quoted"
+BROWSER = "browser"
+ARTIST = "artist"
+CONTACT = "contact"
+MESSAGE = "message"
+TARGET = "target"
+QUERY = "query"
+MEDIA = "media"
+LOCATION = "location"
+
+# Seconds per canonical duration unit
+DURATION_UNITS = {
+    "hour": 3600, "hours": 3600, "hr": 3600, "hrs": 3600,
+    "minute": 60, "minutes": 60, "min": 60, "mins": 60,
+    "second": 1, "seconds": 1, "sec": 1, "secs": 1
+}
+CANONICAL_UNITS = {3600: "hour", 60: "minute", 1: "second"}
+
+DEFAULT_CACHE_SIZE = 256
+
+# A word of a phrase; dots only inside words so "github.com" is one word
+# but the full stop after "github." is not
+_WORD = r"[\w'&-]+(?:\.[\w'&-]+)*"
+_ALPHA_WORD = r"[^\W\d][\w'&-]*(?:\.[\w'&-]+)*"
+
+
+def _phrase(name: str, stop_words: str, first_word: str = _WORD) -> str:
+    """Build a named group matching words up to a stop word or punctuation."""
+    stop = rf"(?!(?:{stop_words})\b)"
+    return rf"(?P<{name}>{stop}{first_word}(?:\s+{stop}{_WORD})*)"
+
+
+_TARGET = _phrase(TARGET, r"in|and|then|on|with|for")
+_QUERY = _phrase(QUERY, r"on|in\s+it|and|then")
+_MEDIA = _phrase(MEDIA, r"on|by|in|and|then|from")
+_LOCATION = _phrase(LOCATION, r"on|and|then|today|tomorrow")
+_ARTIST = _phrase(ARTIST, r"on|in|and|then|from", _ALPHA_WORD)
+_CONTACT = _phrase(CONTACT, r"about|saying|that|and|then|in|at|on|for|with|to|file", _ALPHA_WORD)
+
+# Token entities consume their text. Phrase entities are anchored on a
+# trigger word and captured inside a lookahead, so the tokens within them
+# (a domain after "open", a duration after "call mom") are still found.
+ENTITY_PATTERN = re.compile(rf"""
+    (?P<url>(?<![\w@./])(?:https?://)?[a-z0-9](?:[a-z0-9-]*[a-z0-9])?(?:\.[a-z0-9-]+)*\.[a-z]{{2,}}\b(?::\d+)?(?:/(?:[^\s,;"]*[^\s,;"?!.])?)?)
+  | (?P<duration>(?<![\w.])(?P<duration_amount>\d+(?:\.\d+)?)\s*(?P<duration_unit>hours?|hrs?|minutes?|mins?|seconds?|secs?)\b)
+  | (?P<percent>(?<![\w.])(?P<percent_amount>\d+(?:\.\d+)?)\s*(?:%|percent\b))
+  | (?P<number>(?<![\w.])\d+(?:\.\d+)?\b)
+  | (?P<quoted>"(?P<quoted_double>[^"]+)"|(?<!\w)'(?P<quoted_single>[^']+)'(?!\w)|“(?P<quoted_curly>[^”]+)”)
+  | (?P<browser>(?<!\w)(?:brave|chrome|firefox|safari|edge|opera)(?=\s+browser\b))
+  | (?=(?<!\w)(?:open|launch|go\s+to|visit|navigate\s+to|close|quit|create)\s+(?:the\s+)?
+        {_TARGET})
+  | (?=(?<!\w)search\s+(?:for\s+)?["']?{_QUERY})
+  | (?=(?<!\w)(?:play|listen\s+to|start)\s+(?:the\s+)?(?:song\s+|track\s+)?["']?
+        {_MEDIA})
+  | (?=(?<!\w)weather(?:\s+(?:like|be|is|today|tomorrow))*\s+(?:in|for|at)\s+{_LOCATION})
+  | (?=(?<!\w)by\s+{_ARTIST})
+  | (?=(?<!\w)(?:call|message|text|email|ping|(?:share|send)\s+file)\s+(?:(?:to|with)\s+)?(?:(?:the|a|an|my)\s+)?
+        {_CONTACT})
+  | (?=(?:(?<!\w)(?:saying|that\s+says|to\s+say)|(?<=[^\W\d]):)\s+(?P<message>\S.*?)\s*$)
+""", re.VERBOSE | re.IGNORECASE)
+
+# Entity kinds in pattern order
+ENTITY_KINDS = (URL, DURATION, PERCENT, NUMBER, QUOTED, BROWSER,
+                TARGET, QUERY, MEDIA, LOCATION, ARTIST, CONTACT, MESSAGE)
+
+
+def _to_number(text: str):
+    """Parse an integer or decimal number."""
+    return float(text) if "." in text else int(text)
+
+
+class Entity:
+    """
+    One typed entity found in a command.
+    """
+
+    __slots__ = ("kind", "value", "text", "start", "end", "amount", "unit")
+
+    def __init__(self, kind: str, value: Any, text: str, start: int, end: int,
+                 amount: Optional[float] = None, unit: Optional[str] = None):
+        """
+        Initialize an entity.
+
+        Args:
+            kind: Entity kind, e.g. "duration" or "contact"
+            value: Parsed value (seconds for durations, numbers for
+                   percentages and numbers, text otherwise)
+            text: Text the entity was found in
+            start: Offset of the entity in the command
+            end: Offset just past the entity in the command
+            amount: Amount as spoken, for durations
+            unit: Canonical unit ("hour", "minute" or "second"), for durations
+        """
+        self.kind = kind
+        self.value = value
+        self.text = text
+        self.start = start
+        self.end = end
+        self.amount = amount
+        self.unit = unit
+
+    def describe(self) -> str:
+        """Spoken form of the entity, e.g. "5 minutes"."""
+        if self.kind == DURATION:
+            return f"{self.amount:g} {self.unit}{'' if self.amount == 1 else 's'}"
+        if self.kind == PERCENT:
+            return f"{self.value}%"
+        return str(self.value)
+
+    def __repr__(self) -> str:
+        return f"Entity({self.kind!r}, {self.value!r}, {self.start}, {self.end})"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Entity):
+            return NotImplemented
+        return (self.kind, self.value, self.start, self.end) == (other.kind, other.value, other.start, other.end)
+
+
+class Entities:
+    """
+    The entities of a command, in order of appearance.
+    """
+
+    __slots__ = ("text", "items", "_by_kind")
+
+    def __init__(self, text: str, items: List[Entity]):
+        """
+        Initialize the entity list.
+
+        Args:
+            text: Command text
+            items: Entities in order of appearance
+        """
+        self.text = text
+        self.items = tuple(items)
+        self._by_kind: Dict[str, List[Entity]] = {}
+        for entity in self.items:
+            self._by_kind.setdefault(entity.kind, []).append(entity)
+
+    def get(self, kind: str) -> Optional[Entity]:
+        """Get the first entity of a kind, or None."""
+        found = self._by_kind.get(kind)
+        return found[0] if found else None
+
+    def first(self, kind: str, default: Any = None) -> Any:
+        """Get the value of the first entity of a kind, or a default."""
+        found = self._by_kind.get(kind)
+        return found[0].value if found else default
+
+    def all(self, kind: str) -> List[Entity]:
+        """Get every entity of a kind."""
+        return list(self._by_kind.get(kind, ()))
+
+    def values(self, kind: str) -> List[Any]:
+        """Get the values of every entity of a kind."""
+        return [entity.value for entity in self._by_kind.get(kind, ())]
+
+    def as_dict(self) -> Dict[str, List[Any]]:
+        """Get the values of every kind present."""
+        return {kind: [entity.value for entity in found] for kind, found in self._by_kind.items()}
+
+    def __contains__(self, kind: str) -> bool:
+        return kind in self._by_kind
+
+    def __iter__(self) -> Iterator[Entity]:
+        return iter(self.items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __repr__(self) -> str:
+        return f"Entities({list(self.items)!r})"
+
+
+class EntityExtractor:
+    """
+    Extracts typed entities from command text in a single scan.
+    """
+
+    def __init__(self, cache_size: int = DEFAULT_CACHE_SIZE):
+        """
+        Initialize the extractor.
+
+        Args:
+            cache_size: Number of extraction results kept. 0 disables caching.
+        """
+        self.cache = LRUCache(cache_size)
+
+    def extract(self, text: str) -> Entities:
+        """
+        Extract the entities of a command.
+
+        Args:
+            text: Command text
+
+        Returns:
+            Entities in order of appearance
+        """
+        entities = self.cache.get(text)
+        if entities is None:
+            entities = Entities(text, list(self._scan(text)))
+            self.cache.put(text, entities)
+        return entities
+
+    def _scan(self, text: str) -> Iterator[Entity]:
+        """Yield the entities of a text in order of appearance."""
+        for match in ENTITY_PATTERN.finditer(text):
+            kind, start, end = self._match_kind(match)
+            if kind is None:
+                continue
+            raw = text[start:end]
+
+            if kind == DURATION:
+                amount = _to_number(match.group("duration_amount"))
+                seconds = DURATION_UNITS[match.group("duration_unit").lower()]
+                yield Entity(kind, amount * seconds, raw, start, end, amount, CANONICAL_UNITS[seconds])
+            elif kind == PERCENT:
+                yield Entity(kind, _to_number(match.group("percent_amount")), raw, start, end)
+            elif kind == NUMBER:
+                yield Entity(kind, _to_number(raw), raw, start, end)
+            elif kind == QUOTED:
+                value = match.group("quoted_double") or match.group("quoted_single") or match.group("quoted_curly")
+                yield Entity(kind, value.strip(), raw, start, end)
+            elif kind == URL:
+                yield Entity(kind, raw.lower(), raw, start, end)
+            else:
+                value = raw.strip("'\"")
+                if value:
+                    yield Entity(kind, value, raw, start, end)
+
+    @staticmethod
+    def _match_kind(match: "re.Match") -> Tuple[Optional[str], int, int]:
+        """Get the kind and span of the entity a scanner match found."""
+        for kind in ENTITY_KINDS:
+            start = match.start(kind)
+            if start != -1:
+                return kind, start, match.end(kind)
+        return None, -1, -1
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get hit and miss counters of the extraction cache.
+
+        Returns:
+            Dictionary with cache size, hits, misses, hit rate, evictions and invalidations
+        """
+        return self.cache.get_stats()
+
+
+# Create an instance for easy importing
+entity_extractor = EntityExtractor()
+
+
+def extract_entities(text: str) -> Entities:
+    """
+    Extract the entities of a command with the shared extractor.
+
+    Args:
+        text: Command text
+
+    Returns:
+        Entities in order of appearance
+    """
+    return entity_extractor.extract(text)
+
+
+def resolve_entities(text: str, entities: Optional[Entities] = None) -> Entities:
+    """
+    Get the entities of a command, reusing ones already resolved for it.
+
+    Args:
+        text: Command text
+        entities: Entities resolved earlier, e.g. by the command's plan
+
+    Returns:
+        The given entities if they were extracted from this text, else
+        newly extracted ones
+    """
+    if entities is not None and entities.text == text:
+        return entities
+    return extract_entities(text)
@@ -0,0 +1,53 @@
+"""
+File Utilities Module
+
+This module provides helpers for writing data files safely, so that a crash
+or a concurrent reader never sees a partially written file.
+"""
+
+import os
+import json
+import tempfile
+from typing import Any
+
+
+def atomic_write_text(path: str, text: str, encoding: str = "utf-8") -> None:
+    """
+    Write text to a file atomically.
+
+    The text is written to a temporary file in the same directory, flushed
+    to disk and then renamed over the target, which replaces it in one step.
+
+    Args:
+        path: Destination file path
+        text: Text to write
+        encoding: Text encoding
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding=encoding) as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_json(path: str, data: Any, indent: int = 2) -> None:
+    """
+    Serialize data as JSON and write it to a file atomically.
+
+    Args:
+        path: Destination file path
+        data: JSON-serializable data
+        indent: Indentation passed to json.dumps
+    """
+    atomic_write_text(path, json.dumps(data, indent=indent))
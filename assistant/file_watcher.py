@@ -0,0 +1,131 @@
+"""
+File Watcher Module
+
+This module watches a file for changes by polling its modification time and
+size, and calls back once the file has stopped changing. Polling keeps the
+watcher dependency-free and works the same on every platform.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Callable, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# (modification time in ns, size) of a file, or None if it does not exist
+FileSignature = Optional[Tuple[int, int]]
+
+
+class FileWatcher:
+    """
+    Polls a file and reports changes once they have settled.
+    """
+
+    def __init__(self, path: str, callback: Callable[[str], None],
+                 interval: float = 1.0, debounce: float = 0.5):
+        """
+        Initialize the watcher.
+
+        Args:
+            path: File to watch
+            callback: Function called with the path after the file changed
+            interval: Seconds between polls
+            debounce: Seconds the file must stay unchanged before the callback
+                      runs, so editors that write in several steps trigger one reload
+        """
+        self.path = path
+        self.callback = callback
+        self.interval = interval
+        self.debounce = debounce
+
+        self._signature = self._read_signature()
+        self._pending_signature: FileSignature = None
+        self._pending_since: Optional[float] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _read_signature(self) -> FileSignature:
+        """Get the current signature of the watched file."""
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def ignore_current(self) -> None:
+        """
+        Treat the file's current contents as already seen.
+
+        Call this after writing the file yourself so the write does not
+        trigger a reload.
+        """
+        with self._lock:
+            self._signature = self._read_signature()
+            self._pending_signature = None
+            self._pending_since = None
+
+    def check(self) -> bool:
+        """
+        Poll the file once.
+
+        Returns:
+            True if the callback was called, False otherwise
+        """
+        signature = self._read_signature()
+        now = time.monotonic()
+
+        with self._lock:
+            if signature == self._signature:
+                self._pending_signature = None
+                self._pending_since = None
+                return False
+
+            # Restart the debounce window whenever the file changes again
+            if signature != self._pending_signature:
+                self._pending_signature = signature
+                self._pending_since = now
+            if now - self._pending_since < self.debounce:
+                return False
+
+            self._signature = signature
+            self._pending_signature = None
+            self._pending_since = None
+
+        try:
+            self.callback(self.path)
+        except Exception as e:
+            logger.error(f"Error handling change to {self.path}: {e}")
+        return True
+
+    def start(self) -> None:
+        """Start polling on a background thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"file-watcher-{os.path.basename(self.path)}",
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop polling."""
+        self._stop_event.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.interval + 1)
+        self._thread = None
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the polling thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self) -> None:
+        """Polling loop."""
+        while not self._stop_event.wait(self.interval):
+            self.check()
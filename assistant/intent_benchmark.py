@@ -0,0 +1,409 @@
+"""
+Intent Benchmark Module
+
+This module benchmarks every intent classification tier (rules, keyword
+match, statistical, neural) and the full cascade over a held-out, labeled
+corpus of utterances kept apart from the intent patterns the tiers are
+built and trained from. It reports per-intent precision and recall, the
+confusion matrix, p50/p99 latency, single- and multi-threaded throughput
+and memory, writes the report as JSON and compares it against a committed
+baseline so accuracy or latency regressions are caught.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import logging
+import platform
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple, Callable
+
+from assistant.intent_model_export import current_rss_mb
+
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE_PATH = os.path.join(BASE_DIR, "data", "intent_benchmark_baseline.json")
+DEFAULT_CORPUS_PATH = os.path.join(BASE_DIR, "data", "intent_benchmark_corpus.jsonl")
+
+DEFAULT_THREADS = 4
+
+# Allowed drift before a difference from the baseline counts as a regression
+DEFAULT_ACCURACY_TOLERANCE = 0.01
+DEFAULT_LATENCY_FACTOR = 3.0
+DEFAULT_LATENCY_SLACK_MS = 0.5
+
+def load_corpus(path: str = DEFAULT_CORPUS_PATH) -> List[Tuple[str, str]]:
+    """
+    Load a labeled corpus written as one {"text", "intent"} JSON object per line.
+
+    Args:
+        path: Corpus file path
+
+    Returns:
+        List of (utterance, intent_name) pairs
+    """
+    corpus = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                entry = json.loads(line)
+                corpus.append((entry["text"], entry["intent"]))
+    return corpus
+
+
+def held_out(corpus: List[Tuple[str, str]], intents: Dict[str, Any],
+             wake_words: List[str] = ()) -> List[Tuple[str, str]]:
+    """
+    Keep the utterances of a corpus that are not training data.
+
+    An utterance that normalizes to one of the intent patterns would only
+    measure recall of the training set, and an utterance labeled with an
+    unknown intent cannot be scored, so both are dropped.
+
+    Args:
+        corpus: List of (utterance, intent_name) pairs
+        intents: Intent definitions
+        wake_words: Wake words stripped during normalization
+
+    Returns:
+        List of (normalized_utterance, intent_name) pairs
+    """
+    from assistant.intent_classifier import normalize_command_text
+
+    patterns = {normalize_command_text(pattern, wake_words)
+                for data in intents.values() for pattern in data.get("patterns", [])}
+    kept = []
+    for text, label in corpus:
+        text = normalize_command_text(text, wake_words)
+        if label in intents and text and text not in patterns:
+            kept.append((text, label))
+
+    dropped = len(corpus) - len(kept)
+    if dropped:
+        logger.warning(f"Dropped {dropped} corpus utterances that are training patterns or unknown intents")
+    return kept
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Get a nearest-rank percentile.
+
+    Args:
+        values: Sample values
+        pct: Percentile between 0 and 100
+
+    Returns:
+        The percentile value, or 0.0 for an empty sample
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def evaluate(labels: List[str], predictions: List[str]) -> Dict[str, Any]:
+    """
+    Compute accuracy, per-intent precision and recall and the confusion matrix.
+
+    Args:
+        labels: True intent names
+        predictions: Predicted intent names
+
+    Returns:
+        Dictionary with accuracy, macro_f1, per_intent metrics and the confusion
+        matrix as {true_intent: {predicted_intent: count}}
+    """
+    classes = sorted(set(labels) | set(predictions))
+    confusion = {true: {pred: 0 for pred in classes} for true in classes}
+    for true, pred in zip(labels, predictions):
+        confusion[true][pred] += 1
+
+    per_intent = {}
+    for name in classes:
+        true_positives = confusion[name][name]
+        predicted = sum(confusion[true][name] for true in classes)
+        support = sum(confusion[name].values())
+        precision = true_positives / predicted if predicted else 0.0
+        recall = true_positives / support if support else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        per_intent[name] = {
+            "precision": round(precision, 4),
+            "recall": round(recall, 4),
+            "f1": round(f1, 4),
+            "support": support
+        }
+
+    labelled = [name for name in classes if per_intent[name]["support"]]
+    correct = sum(confusion[name][name] for name in classes)
+    return {
+        "accuracy": round(correct / len(labels), 4) if labels else 0.0,
+        "macro_f1": round(sum(per_intent[name]["f1"] for name in labelled) / len(labelled), 4) if labelled else 0.0,
+        "per_intent": per_intent,
+        "confusion_matrix": confusion
+    }
+
+
+def measure_throughput(classify_fn: Callable[[str], Any], texts: List[str], threads: int = 1) -> float:
+    """
+    Measure classifications per second.
+
+    Args:
+        classify_fn: Function classifying one text
+        texts: Texts to classify
+        threads: Number of worker threads
+
+    Returns:
+        Classifications per second
+    """
+    if not texts:
+        return 0.0
+
+    start = time.perf_counter()
+    if threads <= 1:
+        for text in texts:
+            classify_fn(text)
+    else:
+        chunk = (len(texts) + threads - 1) // threads
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            futures = [
+                executor.submit(lambda part: [classify_fn(text) for text in part], texts[i:i + chunk])
+                for i in range(0, len(texts), chunk)
+            ]
+            for future in futures:
+                future.result()
+    elapsed = time.perf_counter() - start
+    return round(len(texts) / elapsed, 1) if elapsed > 0 else 0.0
+
+
+def get_tier_functions(classifier: Any) -> Dict[str, Optional[Callable[[str], Optional[Tuple[str, float]]]]]:
+    """
+    Get the classification function of every tier of a classifier.
+
+    Tiers whose model is not loaded map to None. Tier functions take
+    normalized text and return None when they have no answer; the cascade
+    always answers and bypasses the result cache so its latency is real.
+
+    Args:
+        classifier: IntentClassifier instance
+
+    Returns:
+        Dictionary mapping tier names to functions or None
+    """
+    def cascade(text: str) -> Tuple[str, float]:
+        intent, confidence, _ = classifier.cascade.classify(text)
+        return intent, confidence
+
+    return {
+        "rules": classifier._match_rules,
+        "keyword": classifier._classify_keywords,
+        "statistical": classifier._predict_statistical if classifier.statistical_model else None,
+        "neural": classifier._predict_neural if classifier.is_model_ready else None,
+        "cascade": cascade
+    }
+
+
+def benchmark_tier(classify_fn: Callable[[str], Optional[Tuple[str, float]]],
+                   corpus: List[Tuple[str, str]], threads: int = DEFAULT_THREADS) -> Dict[str, Any]:
+    """
+    Benchmark one tier over a normalized, labeled corpus.
+
+    A tier that has no answer for a text is counted as predicting "default".
+
+    Args:
+        classify_fn: Tier function taking normalized text
+        corpus: List of (normalized_text, intent_name) pairs
+        threads: Worker threads for the multi-threaded throughput run
+
+    Returns:
+        Dictionary of accuracy metrics, coverage, latency and throughput
+    """
+    labels = [label for _, label in corpus]
+    texts = [text for text, _ in corpus]
+
+    predictions = []
+    latencies_ms = []
+    answered = 0
+    for text in texts:
+        start = time.perf_counter()
+        result = classify_fn(text)
+        latencies_ms.append((time.perf_counter() - start) * 1000)
+        answered += result is not None
+        predictions.append(result[0] if result is not None else "default")
+
+    report = evaluate(labels, predictions)
+    report.update({
+        "coverage": round(answered / len(texts), 4) if texts else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies_ms, 50), 4),
+            "p99": round(percentile(latencies_ms, 99), 4),
+            "mean": round(sum(latencies_ms) / len(latencies_ms), 4) if latencies_ms else 0.0
+        },
+        "throughput_per_s": {
+            "single_thread": measure_throughput(classify_fn, texts, threads=1),
+            "multi_thread": measure_throughput(classify_fn, texts, threads=threads),
+            "threads": threads
+        }
+    })
+    return report
+
+
+def run_benchmark(classifier: Optional[Any] = None,
+                  corpus: Optional[List[Tuple[str, str]]] = None,
+                  threads: int = DEFAULT_THREADS,
+                  tiers: Optional[List[str]] = None,
+                  model_timeout: Optional[float] = 300) -> Dict[str, Any]:
+    """
+    Benchmark the classifier tiers and the cascade.
+
+    Args:
+        classifier: IntentClassifier to benchmark; a new one is created if None
+        corpus: Labeled (utterance, intent_name) pairs; the committed
+                held-out corpus is loaded if None
+        threads: Worker threads for the multi-threaded throughput run
+        tiers: Tier names to run, or None for all
+        model_timeout: Seconds to wait for the neural model to load
+
+    Returns:
+        Benchmark report
+    """
+    from assistant.intent_classifier import IntentClassifier
+
+    rss_before = current_rss_mb()
+    if classifier is None:
+        classifier = IntentClassifier()
+    if classifier.model_state in ("loading", "not_loaded"):
+        classifier.wait_for_model(timeout=model_timeout)
+    rss_after = current_rss_mb()
+
+    corpus = held_out(load_corpus() if corpus is None else corpus,
+                      classifier.intents, classifier.wake_words)
+
+    results: Dict[str, Any] = {}
+    for name, classify_fn in get_tier_functions(classifier).items():
+        if tiers and name not in tiers:
+            continue
+        if classify_fn is None:
+            results[name] = {"skipped": "model not loaded"}
+            continue
+        logger.info(f"Benchmarking {name} tier on {len(corpus)} utterances")
+        results[name] = benchmark_tier(classify_fn, corpus, threads)
+
+    return {
+        "meta": {
+            "corpus_size": len(corpus),
+            "intents": sorted(classifier.intents),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")
+        },
+        "memory_mb": {
+            "rss": round(rss_after, 1),
+            "classifier_rss_delta": round(rss_after - rss_before, 1)
+        },
+        "model_status": classifier.get_model_status(),
+        "tiers": results
+    }
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any],
+                        accuracy_tolerance: float = DEFAULT_ACCURACY_TOLERANCE,
+                        latency_factor: float = DEFAULT_LATENCY_FACTOR,
+                        latency_slack_ms: float = DEFAULT_LATENCY_SLACK_MS) -> List[str]:
+    """
+    Find regressions of a report against a baseline.
+
+    Accuracy and macro F1 may not drop by more than accuracy_tolerance. Since
+    latency depends on the machine, p99 latency only counts as a regression
+    when it grows by more than latency_factor and by more than
+    latency_slack_ms. Tiers skipped in either report are not compared.
+
+    Args:
+        report: New benchmark report
+        baseline: Baseline benchmark report
+        accuracy_tolerance: Allowed absolute drop in accuracy and macro F1
+        latency_factor: Allowed ratio of new to baseline p99 latency
+        latency_slack_ms: Allowed absolute p99 growth, so sub-millisecond tiers
+                          do not flag timer noise
+
+    Returns:
+        List of human-readable regression descriptions, empty if none
+    """
+    regressions = []
+    for name, base in baseline.get("tiers", {}).items():
+        current = report.get("tiers", {}).get(name)
+        if not current or "skipped" in current or "skipped" in base:
+            continue
+
+        for metric in ("accuracy", "macro_f1"):
+            if current[metric] < base[metric] - accuracy_tolerance:
+                regressions.append(f"{name}: {metric} dropped from {base[metric]:.4f} to {current[metric]:.4f}")
+
+        base_p99 = base["latency_ms"]["p99"]
+        current_p99 = current["latency_ms"]["p99"]
+        if current_p99 > base_p99 * latency_factor and current_p99 - base_p99 > latency_slack_ms:
+            regressions.append(f"{name}: p99 latency grew from {base_p99:.3f}ms to {current_p99:.3f}ms")
+
+    return regressions
+
+
+def save_report(report: Dict[str, Any], path: str) -> None:
+    """Write a benchmark report as JSON."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+def load_report(path: str) -> Optional[Dict[str, Any]]:
+    """Read a benchmark report, or None if it does not exist."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark intent classification accuracy and latency")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS_PATH, help="Labeled corpus path (JSON lines)")
+    parser.add_argument("--threads", type=int, default=DEFAULT_THREADS, help="Threads for the throughput run")
+    parser.add_argument("--tiers", nargs="*", default=None, help="Tiers to run (default: all)")
+    parser.add_argument("--output", default="intent_benchmark_report.json", help="Report path")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="Baseline report path")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the report as the new baseline")
+    args = parser.parse_args()
+
+    report = run_benchmark(corpus=load_corpus(args.corpus), threads=args.threads, tiers=args.tiers)
+    save_report(report, args.output)
+
+    for name, tier in report["tiers"].items():
+        if "skipped" in tier:
+            print(f"{name:>12}: skipped ({tier['skipped']})")
+            continue
+        print(f"{name:>12}: accuracy {tier['accuracy']:.3f}, macro F1 {tier['macro_f1']:.3f}, "
+              f"coverage {tier['coverage']:.2f}, p50 {tier['latency_ms']['p50']:.3f}ms, "
+              f"p99 {tier['latency_ms']['p99']:.3f}ms, "
+              f"{tier['throughput_per_s']['single_thread']:.0f}/s single, "
+              f"{tier['throughput_per_s']['multi_thread']:.0f}/s x{args.threads}")
+    print(f"RSS {report['memory_mb']['rss']:.0f}MB (classifier +{report['memory_mb']['classifier_rss_delta']:.0f}MB)")
+
+    if args.update_baseline:
+        save_report(report, args.baseline)
+        print(f"Baseline written to {args.baseline}")
+        sys.exit(0)
+
+    baseline = load_report(args.baseline)
+    if baseline is None:
+        print(f"No baseline at {args.baseline}")
+        sys.exit(0)
+
+    regressions = compare_to_baseline(report, baseline)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    sys.exit(1 if regressions else 0)
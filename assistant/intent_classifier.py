@@ -6,10 +6,13 @@ and actions for the assistant.
 """
 
 import os
+import re
+import time
 import logging
 import json
+import threading
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple, Union
+from typing import Dict, List, Any, Optional, Set, Tuple, Union
 
 # Optional imports for machine learning models
 try:
@@ -21,10 +24,77 @@ except ImportError:
     ML_AVAILABLE = False
 
 from assistant.config_manager import config_manager
+from assistant.intent_model import StatisticalIntentModel, DEFAULT_MODEL_PATH
+from assistant.classifier_cascade import ClassifierCascade, CascadeTier
+from assistant.intent_model_export import QuantizedIntentBackend, DEFAULT_EXPORT_DIR, DEFAULT_MODEL_NAME
+from assistant.lru_cache import LRUCache
+from assistant.file_utils import atomic_write_json
+from assistant.file_watcher import FileWatcher
 
 
 logger = logging.getLogger(__name__)
 
+# Neural model loading states
+MODEL_STATE_DISABLED = "disabled"
+MODEL_STATE_NOT_LOADED = "not_loaded"
+MODEL_STATE_LOADING = "loading"
+MODEL_STATE_READY = "ready"
+MODEL_STATE_FAILED = "failed"
+
+# Default cascade settings, overridable per tier via intent_classifier.cascade
+DEFAULT_CASCADE_CONFIG = {
+    "rules": {"threshold": 0.85, "latency_budget_ms": 1.0},
+    "statistical": {"threshold": 0.6, "latency_budget_ms": 5.0},
+    "neural": {"threshold": 0.0, "latency_budget_ms": 250.0}
+}
+
+# Default number of classification results kept in the cache
+DEFAULT_CACHE_SIZE = 512
+
+
+def normalize_command_text(text: str, wake_words: List[str] = ()) -> str:
+    """
+    Normalize a command for classification and caching.
+
+    Lowercases the text, replaces punctuation with spaces, collapses
+    whitespace and strips a leading wake word, so that "Hey Samantha,
+    open Brave browser!" and "open brave browser" classify identically.
+
+    Args:
+        text: Raw user input
+        wake_words: Wake words to strip from the start of the text
+
+    Returns:
+        Normalized text
+    """
+    text = re.sub(r"[^\w\s']", " ", text.lower())
+    text = " ".join(text.split())
+
+    # Try longer wake words first so "hey samantha" wins over "samantha"
+    for wake_word in sorted(wake_words, key=len, reverse=True):
+        wake_word = " ".join(re.sub(r"[^\w\s']", " ", wake_word.lower()).split())
+        if wake_word and text.startswith(wake_word + " "):
+            return text[len(wake_word) + 1:]
+
+    return text
+
+
+def diff_intents(old: Dict[str, Any], new: Dict[str, Any]) -> Tuple[Set[str], Set[str], Set[str]]:
+    """
+    Compare two sets of intent definitions.
+
+    Args:
+        old: Current intent definitions
+        new: Updated intent definitions
+
+    Returns:
+        Tuple of (added, removed, changed) intent names
+    """
+    added = set(new) - set(old)
+    removed = set(old) - set(new)
+    changed = {name for name in set(old) & set(new) if old[name] != new[name]}
+    return added, removed, changed
+
 
 class IntentClassifier:
     """
@@ -37,25 +107,111 @@ class IntentClassifier:
         """
         # Load configuration
         self.config = config_manager.get_section("intent_classifier")
-        self.model_name = self.config.get("model", "microsoft/DialoGPT-small")
+        self.model_name = self.config.get("model", DEFAULT_MODEL_NAME)
+
+        # "eager" runs the transformers model; "quantized" runs the int8 export on CPU
+        self.neural_backend = self.config.get("neural_backend", "eager")
 
-        # Set up device
+        # Set up device (the quantized backend always runs on CPU)
+        use_accelerator = ML_AVAILABLE and self.neural_backend == "eager"
         self.device = "cpu"
-        if ML_AVAILABLE and torch.cuda.is_available() and self.config.get("use_gpu", False):
+        if use_accelerator and torch.cuda.is_available() and self.config.get("use_gpu", False):
             self.device = "cuda"
-        elif ML_AVAILABLE and hasattr(torch.backends, 'mps') and torch.backends.mps.is_built() and self.config.get("use_mps", True):
+        elif use_accelerator and hasattr(torch.backends, 'mps') and torch.backends.mps.is_built() and self.config.get("use_mps", True):
             self.device = "mps"
 
         logger.info(f"Using {self.device} for intent classification")
 
+        # Cache of classification results keyed on normalized text. It is
+        # cleared whenever the intents or the models answering them change.
+        self.wake_words = config_manager.get('assistant.wake_words', ["samantha", "hey samantha"])
+        self.cache = LRUCache(self.config.get("cache_size", DEFAULT_CACHE_SIZE))
+
+        # Incremented whenever classification results may change, so caches
+        # built on top of the classifier can tell their entries are stale
+        self.version = 0
+
+        # Per-intent matcher index and neural token ids, updated incrementally
+        # when intents change instead of being rebuilt from scratch
+        self._intent_index: Dict[str, Dict[str, Any]] = {}
+        self._intent_token_ids: Dict[str, List[int]] = {}
+        self._stale_statistical_intents: Set[str] = set()
+
         # Load intents from file
+        self.intents_path = self._get_intents_path()
         self.intents = self._load_intents()
 
-        # Initialize model
+        # Initialize statistical model (TF-IDF + linear classifier)
+        self.statistical_model = None
+        if self.config.get("use_statistical_model", True):
+            self._load_statistical_model()
+
+        # Build the confidence-gated cascade: rules -> statistical -> neural -> keywords
+        self.cascade = self._build_cascade()
+
+        # Initialize model. Loading is "background" (default), "lazy" (on the
+        # first cascade miss) or "eager" (blocking, during construction); the
+        # fast tiers answer on their own until the model is ready.
         self.model = None
         self.tokenizer = None
+        self.model_loading = self.config.get("model_loading", "background")
+        self.model_state = MODEL_STATE_DISABLED
+        self.model_load_time: Optional[float] = None
+        self._model_ready = threading.Event()
+        self._model_lock = threading.Lock()
+        self._model_thread: Optional[threading.Thread] = None
+
         if self.config.get("use_ml_model", True) and ML_AVAILABLE:
-            self._load_model()
+            self.model_state = MODEL_STATE_NOT_LOADED
+            if self.model_loading == "eager":
+                self._load_model_and_track()
+            elif self.model_loading == "background":
+                self.load_model_async()
+        else:
+            self._model_ready.set()
+
+        # Writes of intents.json are debounced so bursts of add_intent calls
+        # produce one write; edits to the file can be picked up while running
+        self.save_debounce = self.config.get("save_debounce_s", 0.5)
+        self._save_timer: Optional[threading.Timer] = None
+        self._save_lock = threading.Lock()
+        self._unsaved_intents: Set[str] = set()
+        self.intents_watcher: Optional[FileWatcher] = None
+        if self.config.get("hot_reload_intents", False):
+            self.watch_intents()
+
+    @property
+    def intents(self) -> Dict[str, Any]:
+        """Intent definitions used by every tier."""
+        return self._intents
+
+    @intents.setter
+    def intents(self, intents: Dict[str, Any]) -> None:
+        self._intent_index = {name: self._index_intent(data) for name, data in intents.items()}
+        self._intents = intents
+        self.clear_cache()
+
+    @property
+    def statistical_model(self) -> Optional[StatisticalIntentModel]:
+        """Trained statistical model used by the statistical tier, if any."""
+        return self._statistical_model
+
+    @statistical_model.setter
+    def statistical_model(self, model: Optional[StatisticalIntentModel]) -> None:
+        self._statistical_model = model
+        self._stale_statistical_intents = set()
+        self.clear_cache()
+
+    def _get_intents_path(self) -> str:
+        """Get the path of the intents file."""
+        intents_path = self.config.get("intents_file")
+
+        # If no file specified, use default path
+        if not intents_path:
+            base_dir = os.path.dirname(os.path.abspath(__file__))
+            intents_path = os.path.join(base_dir, "data", "intents.json")
+
+        return intents_path
 
     def _load_intents(self) -> Dict[str, Any]:
         """
@@ -64,14 +220,31 @@ class IntentClassifier:
         Returns:
             Dictionary of intent definitions
         """
-        intents_path = self.config.get("intents_file")
+        try:
+            return self._read_intents_file()
+        except Exception as e:
+            logger.error(f"Error loading intents file: {e}")
+            return self._default_intents()
 
-        # If no file specified, use default path
-        if not intents_path:
-            base_dir = os.path.dirname(os.path.abspath(__file__))
-            intents_path = os.path.join(base_dir, "data", "intents.json")
+    def _read_intents_file(self) -> Dict[str, Any]:
+        """
+        Read the intents file on top of the built-in intents.
+
+        Returns:
+            Dictionary of intent definitions
+
+        Raises:
+            OSError, ValueError: If the file cannot be read or parsed
+        """
+        intents = self._default_intents()
+        if os.path.exists(self.intents_path):
+            with open(self.intents_path, "r", encoding="utf-8") as f:
+                intents.update(json.load(f))
+        return intents
 
-        intents = {
+    def _default_intents(self) -> Dict[str, Any]:
+        """Get the built-in intents used when the file does not define them."""
+        return {
             "default": {
                 "patterns": [],
                 "responses": ["I'm not sure I understand. Can you rephrase that?"]
@@ -86,15 +259,191 @@ class IntentClassifier:
             }
         }
 
+    def _index_intent(self, intent_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Precompute the matcher entries of one intent.
+
+        Args:
+            intent_data: Intent definition
+
+        Returns:
+            Dictionary with normalized patterns and their word lists
+        """
+        # Normalized like the commands they are matched against, which have
+        # their punctuation stripped
+        patterns = [normalize_command_text(pattern) for pattern in intent_data.get("patterns", [])]
+        return {
+            "patterns": patterns,
+            "pattern_words": [pattern.split() for pattern in patterns]
+        }
+
+    def _update_intents(self, new_intents: Dict[str, Any]) -> Dict[str, List[str]]:
+        """
+        Switch to new intent definitions, updating only what changed.
+
+        Matcher entries of unchanged intents are reused, statistical
+        predictions for intents whose patterns changed since the model was
+        trained are ignored, and only cached results the change can affect
+        are dropped.
+
+        Args:
+            new_intents: Updated intent definitions
+
+        Returns:
+            Dictionary with the sorted added, removed and changed intent names
+        """
+        added, removed, changed = diff_intents(self._intents, new_intents)
+        affected = added | removed | changed
+
+        if affected:
+            old_index = self._intent_index
+            self._intent_index = {
+                name: old_index[name] if name in old_index and name not in affected else self._index_intent(data)
+                for name, data in new_intents.items()
+            }
+            self._intents = new_intents
+
+            for name in removed:
+                self._intent_token_ids.pop(name, None)
+            if self.statistical_model:
+                self._stale_statistical_intents |= changed | removed
+            self._invalidate_cached(affected)
+
+        return {"added": sorted(added), "removed": sorted(removed), "changed": sorted(changed)}
+
+    def _invalidate_cached(self, intent_names: Set[str]) -> None:
+        """
+        Drop the cached results that changes to some intents can affect.
+
+        Args:
+            intent_names: Names of the added, removed or changed intents
+        """
+        # The neural tier scores every intent, so any change can affect any result
+        if self.is_model_ready:
+            self.clear_cache()
+            return
+
+        entries = [self._intent_index[name] for name in intent_names if name in self._intent_index]
+        patterns = [pattern for entry in entries for pattern in entry["patterns"]]
+        words = {word for entry in entries for pattern_words in entry["pattern_words"] for word in pattern_words}
+
+        def is_stale(text: str, result: Tuple[str, float]) -> bool:
+            return (result[0] in intent_names
+                    or any(pattern in text for pattern in patterns)
+                    or not words.isdisjoint(text.split()))
+
+        self.cache.remove_if(is_stale)
+        self.version += 1
+
+    def reload_intents(self) -> Dict[str, List[str]]:
+        """
+        Reload intent definitions from file and apply only what changed.
+
+        Intents added with add_intent that are not saved yet are kept. If the
+        file cannot be parsed, for example while it is being written, the
+        current intents stay in use.
+
+        Returns:
+            Dictionary with the sorted added, removed and changed intent names
+        """
         try:
-            if os.path.exists(intents_path):
-                with open(intents_path, "r", encoding="utf-8") as f:
-                    loaded_intents = json.load(f)
-                    intents.update(loaded_intents)
+            new_intents = self._read_intents_file()
         except Exception as e:
-            logger.error(f"Error loading intents file: {e}")
+            logger.error(f"Error reloading intents file, keeping current intents: {e}")
+            return {"added": [], "removed": [], "changed": []}
+
+        with self._save_lock:
+            for name in self._unsaved_intents:
+                if name in self._intents:
+                    new_intents[name] = self._intents[name]
+
+        summary = self._update_intents(new_intents)
+        if any(summary.values()):
+            logger.info(
+                f"Reloaded intents: {len(summary['added'])} added, "
+                f"{len(summary['removed'])} removed, {len(summary['changed'])} changed"
+            )
+        return summary
+
+    def watch_intents(self, interval: Optional[float] = None) -> None:
+        """
+        Reload intents automatically when the intents file changes.
 
-        return intents
+        Args:
+            interval: Seconds between checks of the file
+        """
+        if self.intents_watcher is None:
+            self.intents_watcher = FileWatcher(
+                self.intents_path,
+                lambda path: self.reload_intents(),
+                interval=interval or self.config.get("intents_watch_interval_s", 1.0),
+                debounce=self.config.get("intents_watch_debounce_s", 0.5)
+            )
+        self.intents_watcher.start()
+
+    def stop_watching_intents(self) -> None:
+        """Stop reloading intents when the intents file changes."""
+        if self.intents_watcher is not None:
+            self.intents_watcher.stop()
+
+    def _build_cascade(self) -> ClassifierCascade:
+        """
+        Build the classifier cascade from configuration.
+
+        Returns:
+            Cascade of rule, statistical and neural tiers with keyword fallback
+        """
+        cascade_config = self.config.get("cascade", {})
+
+        def tier_setting(name: str, key: str) -> Any:
+            default = DEFAULT_CASCADE_CONFIG[name][key]
+            if name == "statistical" and key == "threshold":
+                default = self.config.get("statistical_threshold", default)
+            return cascade_config.get(name, {}).get(key, default)
+
+        tiers = [
+            CascadeTier("rules", self._match_rules),
+            CascadeTier("statistical", self._predict_statistical, batch_fn=self._predict_statistical_batch),
+            CascadeTier("neural", self._predict_neural)
+        ]
+        for tier in tiers:
+            tier.threshold = tier_setting(tier.name, "threshold")
+            tier.latency_budget_ms = tier_setting(tier.name, "latency_budget_ms")
+            tier.enabled = cascade_config.get(tier.name, {}).get("enabled", True)
+
+        return ClassifierCascade(
+            tiers,
+            fallback=self._classify_keywords,
+            fallback_name="keyword",
+            probe_interval=cascade_config.get("probe_interval", 50),
+            skip_after=cascade_config.get("skip_after", 3)
+        )
+
+    def _load_statistical_model(self) -> None:
+        """
+        Load the trained statistical intent model if an artifact exists.
+
+        Predictions for intents whose patterns changed since the model was
+        trained are ignored; a model that cannot tell which intents changed
+        is not used until it is retrained.
+        """
+        model_path = self.config.get("statistical_model_path", DEFAULT_MODEL_PATH)
+        model = StatisticalIntentModel.load(model_path)
+        if not model:
+            return
+
+        stale = model.stale_intents(self.intents)
+        if stale is None:
+            logger.warning(f"Intent model {model_path} was trained on other intents and needs retraining "
+                           f"(python -m assistant.intent_model); not using it")
+            return
+
+        self.statistical_model = model
+        self._stale_statistical_intents = stale
+        logger.info(f"Loaded statistical intent model from {model_path}")
+        if stale:
+            logger.warning(f"Intents changed since {model_path} was trained, ignoring its predictions for "
+                           f"{', '.join(sorted(stale))}; retrain with python -m assistant.intent_model")
 
     def _load_model(self) -> None:
         """
@@ -104,20 +453,115 @@ class IntentClassifier:
             logger.warning("Machine learning libraries not available. Using rule-based classification only.")
             return
 
+        if self.neural_backend == "quantized":
+            self._load_quantized_model()
+            return
+
         try:
             print(f"Loading intent classifier model: {self.model_name}")
             # Load tokenizer and model
-            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-            self.model = AutoModelForCausalLM.from_pretrained(self.model_name)
+            tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            model = AutoModelForCausalLM.from_pretrained(self.model_name)
 
-            # Move model to appropriate device
-            self.model.to(self.device)
+            # Move model to appropriate device before publishing it to classify()
+            model.to(self.device)
+            self.tokenizer = tokenizer
+            self.model = model
             logger.info(f"Loaded intent classifier model: {self.model_name}")
         except Exception as e:
             logger.error(f"Error loading intent classifier model: {e}")
             self.model = None
             self.tokenizer = None
 
+    def _load_quantized_model(self) -> None:
+        """
+        Load the quantized export of the ML model for CPU inference.
+        """
+        export_dir = self.config.get("quantized_model_dir", DEFAULT_EXPORT_DIR)
+        try:
+            backend = QuantizedIntentBackend(export_dir, intra_op_threads=self.config.get("intra_op_threads"))
+            self.tokenizer = backend.tokenizer
+            self.model = backend
+            logger.info(f"Loaded quantized intent classifier model from {export_dir}")
+        except Exception as e:
+            logger.error(f"Error loading quantized intent classifier model: {e}")
+            self.model = None
+            self.tokenizer = None
+
+    def load_model_async(self) -> bool:
+        """
+        Start loading the ML model on a background thread.
+
+        Returns:
+            True if a load was started, False if the model is disabled,
+            already loading or already loaded
+        """
+        with self._model_lock:
+            if self.model_state != MODEL_STATE_NOT_LOADED:
+                return False
+            self.model_state = MODEL_STATE_LOADING
+
+        self._model_thread = threading.Thread(
+            target=self._load_model_and_track,
+            name="intent-model-loader",
+            daemon=True
+        )
+        self._model_thread.start()
+        return True
+
+    def _load_model_and_track(self) -> None:
+        """Load the ML model and record the readiness state and load time."""
+        with self._model_lock:
+            self.model_state = MODEL_STATE_LOADING
+
+        start = time.perf_counter()
+        self._load_model()
+        self.model_load_time = time.perf_counter() - start
+
+        with self._model_lock:
+            self.model_state = MODEL_STATE_READY if self.model is not None else MODEL_STATE_FAILED
+        logger.info(f"Intent model {self.model_state} after {self.model_load_time:.2f}s")
+
+        # Results cached while the model was loading came from the fast tiers only
+        if self.model_state == MODEL_STATE_READY:
+            self._intent_token_ids = {}
+            self.clear_cache()
+        self._model_ready.set()
+
+    def wait_for_model(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until model loading has finished.
+
+        Args:
+            timeout: Maximum time to wait in seconds, or None to wait indefinitely
+
+        Returns:
+            True if the model is ready, False otherwise
+        """
+        if self.model_state == MODEL_STATE_NOT_LOADED:
+            self.load_model_async()
+        self._model_ready.wait(timeout)
+        return self.is_model_ready
+
+    @property
+    def is_model_ready(self) -> bool:
+        """Whether the ML model is loaded and used by the cascade."""
+        return self.model_state == MODEL_STATE_READY
+
+    def get_model_status(self) -> Dict[str, Any]:
+        """
+        Get the ML model readiness state and load timing.
+
+        Returns:
+            Dictionary with model name, loading mode, state and load time in seconds
+        """
+        return {
+            "model": self.model_name,
+            "loading": self.model_loading,
+            "state": self.model_state,
+            "load_time_s": self.model_load_time
+        }
+
     def classify(self, text: str) -> Tuple[str, float]:
         """
         Classify the intent of the user's text.
@@ -128,23 +572,133 @@ class IntentClassifier:
         Returns:
             Tuple of (intent_name, confidence_score)
         """
-        text = text.lower().strip()
+        key = normalize_command_text(text, self.wake_words)
+        result = self.cache.get(key)
+        if result is None:
+            intent, confidence, _ = self.cascade.classify(key)
+            result = (intent, confidence)
+            self.cache.put(key, result)
+        return result
+
+    def classify_batch(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """
+        Classify many texts, vectorizing the statistical tier.
+
+        Args:
+            texts: List of user input texts
+
+        Returns:
+            List of (intent_name, confidence_score) tuples in input order
+        """
+        keys = [normalize_command_text(text, self.wake_words) for text in texts]
+        results = [self.cache.get(key) for key in keys]
+
+        # Classify each distinct uncached text once
+        missing = list(dict.fromkeys(key for key, result in zip(keys, results) if result is None))
+        if missing:
+            classified = {
+                key: (intent, confidence)
+                for key, (intent, confidence, _) in zip(missing, self.cascade.classify_batch(missing))
+            }
+            for key, result in classified.items():
+                self.cache.put(key, result)
+            results = [classified.get(key, result) for key, result in zip(keys, results)]
+
+        return results
+
+    def get_cascade_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get per-tier hit rates and latencies for threshold tuning.
+
+        Returns:
+            Dictionary mapping tier names to their statistics
+        """
+        return self.cascade.get_stats()
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get hit and miss counters of the classification cache.
+
+        Returns:
+            Dictionary with cache size, hits, misses, hit rate, evictions and invalidations
+        """
+        return self.cache.get_stats()
+
+    def clear_cache(self) -> None:
+        """Drop all cached classification results."""
+        self.cache.clear()
+        self.version += 1
+
+    def _match_rules(self, text: str) -> Optional[Tuple[str, float]]:
+        """
+        Match the text against intent patterns.
 
-        # Rule-based matching first
-        for intent_name, intent_data in self.intents.items():
-            patterns = intent_data.get("patterns", [])
-            for pattern in patterns:
-                if pattern.lower() in text:
+        Args:
+            text: Normalized input text
+
+        Returns:
+            Tuple of (intent_name, confidence_score), or None if no pattern matches
+        """
+        for intent_name, entry in self._intent_index.items():
+            for pattern in entry["patterns"]:
+                if pattern in text:
                     return intent_name, 0.9  # High confidence for exact matches
+        return None
+
+    def _predict_statistical(self, text: str) -> Optional[Tuple[str, float]]:
+        """
+        Predict with the statistical model.
+
+        Args:
+            text: Normalized input text
+
+        Returns:
+            Tuple of (intent_name, confidence_score), or None if the model is
+            not loaded or predicts an intent that is no longer defined
+        """
+        if not self.statistical_model:
+            return None
+        return self._known_intent(self.statistical_model.predict(text))
+
+    def _predict_statistical_batch(self, texts: List[str]) -> List[Optional[Tuple[str, float]]]:
+        """Vectorized version of _predict_statistical."""
+        if not self.statistical_model:
+            return [None] * len(texts)
+        return [self._known_intent(result) for result in self.statistical_model.predict_batch(texts)]
+
+    def _known_intent(self, result: Tuple[str, float]) -> Optional[Tuple[str, float]]:
+        """Drop predictions for intents that are undefined or changed since training."""
+        if result[0] not in self.intents or result[0] in self._stale_statistical_intents:
+            return None
+        return result
+
+    def _predict_neural(self, text: str) -> Optional[Tuple[str, float]]:
+        """
+        Predict with the neural model if it is loaded.
 
-        # Use ML model if available
-        if self.model and self.tokenizer:
-            try:
-                return self._classify_with_model(text)
-            except Exception as e:
-                logger.error(f"Error in ML classification: {e}")
+        Args:
+            text: Normalized input text
+
+        Returns:
+            Tuple of (intent_name, confidence_score), or None if the model is not ready
+        """
+        if self.model_state != MODEL_STATE_READY:
+            # Lazy loading starts on the first text the fast tiers cannot answer
+            if self.model_state == MODEL_STATE_NOT_LOADED and self.model_loading == "lazy":
+                self.load_model_async()
+            return None
+        return self._classify_with_model(text)
+
+    def _classify_keywords(self, text: str) -> Tuple[str, float]:
+        """
+        Classify by keyword overlap, the last tier of the cascade.
+
+        Args:
+            text: Normalized input text
 
-        # Fall back to simple keyword matching
+        Returns:
+            Tuple of (intent_name, confidence_score)
+        """
         intent_scores = self._simple_keyword_match(text)
         best_intent = max(intent_scores.items(), key=lambda x: x[1])
 
@@ -164,30 +718,43 @@ class IntentClassifier:
         Returns:
             Tuple of (intent_name, confidence_score)
         """
-        # Encode the input text
-        inputs = self.tokenizer.encode_plus(
-            text,
-            add_special_tokens=True,
-            return_tensors="pt"
-        ).to(self.device)
-
-        # Get model output
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-
-        # Process the outputs to get intent and confidence
-        # This is a simplified approach - actual implementation depends on model
-        logits = outputs.logits
+        if isinstance(self.model, QuantizedIntentBackend):
+            probs = self.model.next_token_probs([text])[0]
+        else:
+            # Encode the input text
+            inputs = self.tokenizer.encode_plus(
+                text,
+                add_special_tokens=True,
+                return_tensors="pt"
+            ).to(self.device)
+
+            # Get model output
+            with torch.no_grad():
+                outputs = self.model(**inputs)
+
+            # Convert logits of the last position to probabilities
+            probs = torch.softmax(outputs.logits[:, -1], dim=-1)[0]
+
+        return self._score_intents(probs)
+
+    def _score_intents(self, probs: Any) -> Tuple[str, float]:
+        """
+        Map a next-token probability distribution to the best intent.
 
-        # Convert logits to probabilities
-        probs = torch.softmax(logits[:, -1], dim=-1)
+        Args:
+            probs: Indexable next-token probabilities for one text
 
+        Returns:
+            Tuple of (intent_name, confidence_score)
+        """
         # Map to intents (simplified approach)
         intent_scores = {}
         for intent_name in self.intents.keys():
             # This is a placeholder approach - would need to be customized based on the model
-            intent_tokens = self.tokenizer.encode(intent_name)
-            score = sum(probs[0, token].item() for token in intent_tokens) / len(intent_tokens)
+            intent_tokens = self._intent_token_ids.get(intent_name)
+            if intent_tokens is None:
+                intent_tokens = self._intent_token_ids[intent_name] = self.tokenizer.encode(intent_name)
+            score = sum(float(probs[token]) for token in intent_tokens) / len(intent_tokens)
             intent_scores[intent_name] = score
 
         best_intent = max(intent_scores.items(), key=lambda x: x[1])
@@ -204,14 +771,12 @@ class IntentClassifier:
             Dictionary of intent names and confidence scores
         """
         words = text.split()
-        scores = {intent: 0.0 for intent in self.intents}
+        scores = {intent: 0.0 for intent in self._intent_index}
 
-        for intent_name, intent_data in self.intents.items():
-            patterns = intent_data.get("patterns", [])
+        for intent_name, entry in self._intent_index.items():
             max_score = 0.0
 
-            for pattern in patterns:
-                pattern_words = pattern.lower().split()
+            for pattern_words in entry["pattern_words"]:
                 matches = sum(1 for word in words if word in pattern_words)
 
                 if pattern_words:  # Avoid division by zero
@@ -255,31 +820,60 @@ class IntentClassifier:
             patterns: List of pattern strings
             responses: List of response strings
         """
-        self.intents[name] = {
+        new_intents = dict(self.intents)
+        new_intents[name] = {
             "patterns": patterns,
             "responses": responses
         }
+        self._update_intents(new_intents)
 
-        # Save updated intents to file
-        self._save_intents()
+        # Save updated intents to file once the burst of changes is over
+        with self._save_lock:
+            self._unsaved_intents.add(name)
+        self._schedule_save()
 
-    def _save_intents(self) -> None:
-        """Save intent definitions to file."""
-        intents_path = self.config.get("intents_file")
+    def _schedule_save(self) -> None:
+        """Save intents after save_debounce seconds without further changes."""
+        if self.save_debounce <= 0:
+            self.flush_intents()
+            return
 
-        # If no file specified, use default path
-        if not intents_path:
-            base_dir = os.path.dirname(os.path.abspath(__file__))
-            intents_path = os.path.join(base_dir, "data", "intents.json")
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            # Not a daemon thread, so a pending save still runs at interpreter exit
+            self._save_timer = threading.Timer(self.save_debounce, self.flush_intents)
+            self._save_timer.start()
+
+    def flush_intents(self) -> bool:
+        """
+        Write pending intent changes to file now.
+
+        Returns:
+            True if changes were written, False if nothing was pending
+        """
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self._unsaved_intents:
+                return False
+            self._unsaved_intents.clear()
 
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(intents_path), exist_ok=True)
+        self._save_intents()
+        return True
 
+    def _save_intents(self) -> None:
+        """Save intent definitions to file."""
         try:
-            with open(intents_path, "w", encoding="utf-8") as f:
-                json.dump(self.intents, f, indent=2)
+            atomic_write_json(self.intents_path, self.intents)
         except Exception as e:
             logger.error(f"Error saving intents file: {e}")
+            return
+
+        # Our own write is not an external change to reload
+        if self.intents_watcher is not None:
+            self.intents_watcher.ignore_current()
 
 
 # Create an instance for easy importing
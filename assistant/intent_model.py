@@ -0,0 +1,345 @@
+"""
+Intent Model Module
+
+This module trains and loads the statistical intent model used by the
+intent classifier. The model is a word and character n-gram TF-IDF
+representation feeding a linear classifier, trained from the patterns in
+intents.json and from logged user commands.
+"""
+
+import os
+import json
+import logging
+import hashlib
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Set, Tuple, Iterable
+
+# Optional imports for the statistical model
+try:
+    import numpy as np
+    import joblib
+    from sklearn.pipeline import Pipeline, FeatureUnion
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
+
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BASE_DIR)
+
+DEFAULT_INTENTS_PATH = os.path.join(BASE_DIR, "data", "intents.json")
+DEFAULT_MODEL_PATH = os.path.join(BASE_DIR, "data", "intent_model.joblib")
+DEFAULT_LOG_PATHS = [os.path.join(PROJECT_DIR, "samantha_local_data.json")]
+
+ARTIFACT_VERSION = 1
+
+
+def match_intent_patterns(text: str, intents: Dict[str, Any]) -> Optional[str]:
+    """
+    Find the first intent with a pattern contained in the text.
+
+    This mirrors the rule-based matching of the intent classifier and is
+    used to weakly label logged commands.
+
+    Args:
+        text: Lowercased input text
+        intents: Intent definitions
+
+    Returns:
+        Intent name or None if no pattern matches
+    """
+    for intent_name, intent_data in intents.items():
+        for pattern in intent_data.get("patterns", []):
+            if pattern.lower() in text:
+                return intent_name
+    return None
+
+
+def load_logged_commands(log_paths: Iterable[str]) -> List[str]:
+    """
+    Load command strings from assistant log files.
+
+    Args:
+        log_paths: Paths to JSON files containing lists of
+                   {"command": ..., "response": ...} records
+
+    Returns:
+        List of command strings
+    """
+    commands = []
+    for log_path in log_paths:
+        try:
+            if not os.path.exists(log_path):
+                continue
+            with open(log_path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+            for record in records:
+                if isinstance(record, dict) and record.get("command"):
+                    commands.append(str(record["command"]))
+        except Exception as e:
+            logger.error(f"Error loading logged commands from {log_path}: {e}")
+    return commands
+
+
+def build_training_data(intents: Dict[str, Any],
+                        logged_commands: Optional[List[str]] = None,
+                        label_unmatched_as_default: bool = True) -> Tuple[List[str], List[str]]:
+    """
+    Build a labeled training set from intent patterns and logged commands.
+
+    Patterns are used as-is. Logged commands are labeled with the intent
+    whose pattern they contain; commands matching no pattern are labeled
+    "default" so the model learns what falls outside the known intents.
+
+    Args:
+        intents: Intent definitions
+        logged_commands: Raw command strings from usage logs
+        label_unmatched_as_default: Whether unmatched commands become "default" examples
+
+    Returns:
+        Tuple of (texts, labels)
+    """
+    texts, labels = [], []
+    seen = set()
+
+    for intent_name, intent_data in intents.items():
+        for pattern in intent_data.get("patterns", []):
+            key = (pattern.lower().strip(), intent_name)
+            if key[0] and key not in seen:
+                seen.add(key)
+                texts.append(key[0])
+                labels.append(intent_name)
+
+    for command in logged_commands or []:
+        text = command.lower().strip()
+        if not text:
+            continue
+        label = match_intent_patterns(text, intents)
+        if label is None:
+            if not label_unmatched_as_default or "default" not in intents:
+                continue
+            label = "default"
+        if (text, label) not in seen:
+            seen.add((text, label))
+            texts.append(text)
+            labels.append(label)
+
+    return texts, labels
+
+
+def intents_fingerprint(intents: Dict[str, Any]) -> str:
+    """Return a stable hash of the intent patterns a model was trained on."""
+    patterns = {name: sorted(data.get("patterns", [])) for name, data in intents.items()}
+    payload = json.dumps(patterns, sort_keys=True).encode("utf-8")
+    return hashlib.sha1(payload).hexdigest()
+
+
+def intent_fingerprints(intents: Dict[str, Any]) -> Dict[str, str]:
+    """Return a stable hash of each intent's patterns, keyed by intent name."""
+    return {
+        name: hashlib.sha1(json.dumps(sorted(data.get("patterns", []))).encode("utf-8")).hexdigest()
+        for name, data in intents.items()
+    }
+
+
+class StatisticalIntentModel:
+    """
+    TF-IDF plus linear classifier intent model with batch prediction.
+    """
+
+    def __init__(self, pipeline: Any, metadata: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the model around a fitted scikit-learn pipeline.
+
+        Args:
+            pipeline: Fitted pipeline exposing predict_proba and classes_
+            metadata: Training metadata stored alongside the artifact
+        """
+        self.pipeline = pipeline
+        self.labels = [str(label) for label in pipeline.classes_]
+        self.metadata = metadata or {}
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """
+        Predict the intent of a single text.
+
+        Args:
+            text: User's input text
+
+        Returns:
+            Tuple of (intent_name, confidence_score)
+        """
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """
+        Predict intents for many texts with one vectorized call.
+
+        Args:
+            texts: List of input texts
+
+        Returns:
+            List of (intent_name, confidence_score) tuples in input order
+        """
+        if not texts:
+            return []
+        probs = self.pipeline.predict_proba([text.lower().strip() for text in texts])
+        best = probs.argmax(axis=1)
+        return [(self.labels[idx], float(probs[row, idx])) for row, idx in enumerate(best)]
+
+    def stale_intents(self, intents: Dict[str, Any]) -> Optional[Set[str]]:
+        """
+        Find the intents whose patterns changed since the model was trained.
+
+        Args:
+            intents: Current intent definitions
+
+        Returns:
+            Names of current intents the model was trained on with other
+            patterns, or None if the artifact cannot tell which intents
+            changed and the whole model needs retraining
+        """
+        if self.metadata.get("intents_fingerprint") == intents_fingerprint(intents):
+            return set()
+
+        trained = self.metadata.get("intent_fingerprints")
+        if trained is None:
+            return None
+        current = intent_fingerprints(intents)
+        return {name for name in current if name in trained and trained[name] != current[name]}
+
+    def save(self, path: str = DEFAULT_MODEL_PATH) -> None:
+        """
+        Persist the model as a compressed artifact.
+
+        Args:
+            path: Output file path
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        artifact = {
+            "version": ARTIFACT_VERSION,
+            "pipeline": self.pipeline,
+            "metadata": self.metadata
+        }
+        joblib.dump(artifact, path, compress=3)
+        logger.info(f"Saved intent model to {path}")
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_MODEL_PATH) -> Optional["StatisticalIntentModel"]:
+        """
+        Load a persisted model artifact.
+
+        Args:
+            path: Artifact file path
+
+        Returns:
+            Loaded model, or None if unavailable or incompatible
+        """
+        if not SKLEARN_AVAILABLE:
+            return None
+        if not os.path.exists(path):
+            return None
+
+        try:
+            artifact = joblib.load(path)
+            if artifact.get("version") != ARTIFACT_VERSION:
+                logger.warning(f"Ignoring intent model with unsupported version: {path}")
+                return None
+            return cls(artifact["pipeline"], artifact.get("metadata"))
+        except Exception as e:
+            logger.error(f"Error loading intent model: {e}")
+            return None
+
+
+def build_pipeline(max_iter: int = 1000) -> Any:
+    """
+    Build the untrained TF-IDF plus linear classifier pipeline.
+
+    Args:
+        max_iter: Maximum solver iterations for the classifier
+
+    Returns:
+        Unfitted scikit-learn pipeline
+    """
+    features = FeatureUnion([
+        ("word", TfidfVectorizer(analyzer="word", ngram_range=(1, 2),
+                                 sublinear_tf=True, dtype=np.float32)),
+        ("char", TfidfVectorizer(analyzer="char_wb", ngram_range=(2, 4),
+                                 sublinear_tf=True, dtype=np.float32)),
+    ])
+    classifier = LogisticRegression(max_iter=max_iter, class_weight="balanced")
+    return Pipeline([("features", features), ("classifier", classifier)])
+
+
+def train_intent_model(intents: Optional[Dict[str, Any]] = None,
+                       intents_path: str = DEFAULT_INTENTS_PATH,
+                       log_paths: Optional[List[str]] = None,
+                       output_path: Optional[str] = DEFAULT_MODEL_PATH) -> StatisticalIntentModel:
+    """
+    Train the statistical intent model and optionally persist it.
+
+    Args:
+        intents: Intent definitions. Loaded from intents_path if None.
+        intents_path: Path to intents.json
+        log_paths: Logged command files. Defaults to samantha_local_data.json.
+        output_path: Where to save the artifact, or None to skip saving
+
+    Returns:
+        Trained model
+    """
+    if not SKLEARN_AVAILABLE:
+        raise ImportError("Please install scikit-learn to train the intent model")
+
+    if intents is None:
+        with open(intents_path, "r", encoding="utf-8") as f:
+            intents = json.load(f)
+
+    if log_paths is None:
+        log_paths = DEFAULT_LOG_PATHS
+
+    texts, labels = build_training_data(intents, load_logged_commands(log_paths))
+    if len(set(labels)) < 2:
+        raise ValueError("Need examples for at least two intents to train the intent model")
+
+    pipeline = build_pipeline()
+    pipeline.fit(texts, labels)
+
+    # Stop word lists are only needed for introspection and bloat the artifact
+    for _, vectorizer in pipeline.named_steps["features"].transformer_list:
+        if hasattr(vectorizer, "stop_words_"):
+            vectorizer.stop_words_ = None
+
+    metadata = {
+        "trained_at": datetime.now().isoformat(),
+        "n_samples": len(texts),
+        "intents_fingerprint": intents_fingerprint(intents),
+        "intent_fingerprints": intent_fingerprints(intents)
+    }
+    model = StatisticalIntentModel(pipeline, metadata)
+
+    if output_path:
+        model.save(output_path)
+
+    logger.info(f"Trained intent model on {len(texts)} examples across {len(model.labels)} intents")
+    return model
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train the statistical intent model")
+    parser.add_argument("--intents", default=DEFAULT_INTENTS_PATH, help="Path to intents.json")
+    parser.add_argument("--logs", nargs="*", default=DEFAULT_LOG_PATHS, help="Logged command files")
+    parser.add_argument("--output", default=DEFAULT_MODEL_PATH, help="Artifact output path")
+    args = parser.parse_args()
+
+    trained = train_intent_model(intents_path=args.intents, log_paths=args.logs, output_path=args.output)
+    print(f"Trained on {trained.metadata['n_samples']} examples: {', '.join(trained.labels)}")
+
+    for sample in ["hello there", "what's the weather like", "play some music", "open brave browser"]:
+        intent, confidence = trained.predict(sample)
+        print(f"{sample!r} -> {intent} ({confidence:.2f})")
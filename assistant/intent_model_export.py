@@ -0,0 +1,402 @@
+"""
+Intent Model Export Module
+
+This module exports the neural intent model to a dynamically int8-quantized
+TorchScript or ONNX artifact and provides a CPU inference backend for it.
+The backend runs with a fixed number of intra-op threads and feeds the
+model padded micro-batches of a fixed shape. A benchmark compares latency
+and resident memory of the quantized backend against eager PyTorch.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+from typing import Dict, List, Any, Optional, Iterator
+
+from assistant.config_manager import config_manager
+
+# Optional imports for model export and inference
+try:
+    import numpy as np
+    import torch
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+
+try:
+    import onnxruntime as ort
+    from onnxruntime.quantization import quantize_dynamic as ort_quantize_dynamic, QuantType
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_EXPORT_DIR = os.path.join(BASE_DIR, "data", "intent_model_quantized")
+METADATA_FILE = "export.json"
+
+DEFAULT_MODEL_NAME = "microsoft/DialoGPT-small"
+DEFAULT_MAX_LENGTH = 32
+DEFAULT_MICRO_BATCH_SIZE = 8
+
+
+def configured_model_name() -> str:
+    """Get the neural intent model the classifier serves (intent_classifier.model)."""
+    return config_manager.get_section("intent_classifier").get("model", DEFAULT_MODEL_NAME)
+
+
+def micro_batches(items: List[Any], size: int) -> Iterator[List[Any]]:
+    """
+    Split items into consecutive micro-batches.
+
+    Args:
+        items: Items to split
+        size: Maximum micro-batch size
+
+    Yields:
+        Lists of at most size items
+    """
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def current_rss_mb() -> float:
+    """
+    Get the resident set size of this process in megabytes.
+
+    Returns:
+        Current RSS where /proc is available, otherwise the peak RSS
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+if TORCH_AVAILABLE:
+
+    class LastTokenLogits(torch.nn.Module):
+        """
+        Wraps a causal LM to return the logits of the last real token of each row.
+
+        Inputs are padded on the right, and causal attention keeps padding
+        from reaching earlier tokens, so the model runs without the padding
+        mask. Newer transformers build that mask with vmap, which cannot be
+        traced.
+        """
+
+        def __init__(self, model: Any):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids: "torch.Tensor", attention_mask: "torch.Tensor") -> "torch.Tensor":
+            logits = self.model(input_ids=input_ids)[0]
+            last = attention_mask.sum(dim=1) - 1
+            return logits[torch.arange(logits.size(0)), last]
+
+
+def _conv1d_to_linear(module: Any) -> None:
+    """
+    Replace GPT-2 style Conv1D layers with equivalent nn.Linear layers.
+
+    Dynamic quantization only targets nn.Linear, and GPT-2 derived models
+    such as DialoGPT implement their projections as Conv1D.
+
+    Args:
+        module: Module to convert in place
+    """
+    for name, child in module.named_children():
+        if type(child).__name__ == "Conv1D" and hasattr(child, "nf"):
+            in_features, out_features = child.weight.shape
+            linear = torch.nn.Linear(in_features, out_features)
+            linear.weight.data = child.weight.data.t().contiguous()
+            linear.bias.data = child.bias.data
+            setattr(module, name, linear)
+        else:
+            _conv1d_to_linear(child)
+
+
+def _load_tokenizer(name_or_path: str) -> Any:
+    """Load a tokenizer that pads on the right with the EOS token if needed."""
+    tokenizer = AutoTokenizer.from_pretrained(name_or_path)
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    tokenizer.padding_side = "right"
+    return tokenizer
+
+
+def export_quantized_model(model_name: str,
+                           output_dir: str = DEFAULT_EXPORT_DIR,
+                           export_format: str = "torchscript",
+                           max_length: int = DEFAULT_MAX_LENGTH,
+                           micro_batch_size: int = DEFAULT_MICRO_BATCH_SIZE) -> str:
+    """
+    Export a causal LM as a dynamically int8-quantized inference artifact.
+
+    Args:
+        model_name: Hugging Face model name or path (intent_classifier.model)
+        output_dir: Directory for the artifact, tokenizer and metadata
+        export_format: "torchscript" or "onnx"
+        max_length: Fixed sequence length inputs are padded or truncated to
+        micro_batch_size: Fixed batch size inputs are padded to
+
+    Returns:
+        Path to the exported model file
+    """
+    if not TORCH_AVAILABLE:
+        raise ImportError("Please install torch and transformers to export the intent model")
+    if export_format not in ("torchscript", "onnx"):
+        raise ValueError(f"Unsupported export format: {export_format}")
+    if export_format == "onnx" and not ONNX_AVAILABLE:
+        raise ImportError("Please install onnxruntime to export the intent model to ONNX")
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    tokenizer = _load_tokenizer(model_name)
+    model = AutoModelForCausalLM.from_pretrained(model_name, torchscript=True)
+    model.eval()
+    _conv1d_to_linear(model)
+
+    example = tokenizer(
+        [""] * micro_batch_size,
+        padding="max_length",
+        truncation=True,
+        max_length=max_length,
+        return_tensors="pt"
+    )
+    example_inputs = (example["input_ids"], example["attention_mask"])
+
+    if export_format == "torchscript":
+        quantized = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        with torch.no_grad():
+            traced = torch.jit.trace(LastTokenLogits(quantized), example_inputs)
+        model_path = os.path.join(output_dir, "model.pt")
+        torch.jit.save(traced, model_path)
+    else:
+        fp32_path = os.path.join(output_dir, "model.fp32.onnx")
+        model_path = os.path.join(output_dir, "model.onnx")
+        with torch.no_grad():
+            torch.onnx.export(
+                LastTokenLogits(model),
+                example_inputs,
+                fp32_path,
+                input_names=["input_ids", "attention_mask"],
+                output_names=["logits"],
+                dynamic_axes={"input_ids": {0: "batch"}, "attention_mask": {0: "batch"}, "logits": {0: "batch"}},
+                opset_version=14
+            )
+        ort_quantize_dynamic(fp32_path, model_path, weight_type=QuantType.QInt8)
+        os.remove(fp32_path)
+
+    tokenizer.save_pretrained(output_dir)
+    metadata = {
+        "model_name": model_name,
+        "format": export_format,
+        "model_file": os.path.basename(model_path),
+        "max_length": max_length,
+        "micro_batch_size": micro_batch_size,
+        "quantization": "dynamic_int8"
+    }
+    with open(os.path.join(output_dir, METADATA_FILE), "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2)
+
+    logger.info(f"Exported quantized {export_format} intent model to {model_path}")
+    return model_path
+
+
+class QuantizedIntentBackend:
+    """
+    CPU inference backend for an exported quantized intent model.
+    """
+
+    def __init__(self, export_dir: str = DEFAULT_EXPORT_DIR, intra_op_threads: Optional[int] = None):
+        """
+        Load an exported model.
+
+        Args:
+            export_dir: Directory written by export_quantized_model
+            intra_op_threads: Fixed number of intra-op threads. Defaults to
+                              the number of CPUs, capped at 4.
+        """
+        if not TORCH_AVAILABLE:
+            raise ImportError("Please install torch and transformers to use the quantized intent model")
+
+        with open(os.path.join(export_dir, METADATA_FILE), "r", encoding="utf-8") as f:
+            self.metadata = json.load(f)
+
+        self.format = self.metadata["format"]
+        self.max_length = self.metadata["max_length"]
+        self.micro_batch_size = self.metadata["micro_batch_size"]
+        self.intra_op_threads = intra_op_threads or min(4, os.cpu_count() or 1)
+        self.tokenizer = _load_tokenizer(export_dir)
+
+        model_path = os.path.join(export_dir, self.metadata["model_file"])
+        if self.format == "torchscript":
+            torch.set_num_threads(self.intra_op_threads)
+            self._module = torch.jit.load(model_path, map_location="cpu")
+            self._module.eval()
+            self._session = None
+        else:
+            if not ONNX_AVAILABLE:
+                raise ImportError("Please install onnxruntime to use the ONNX intent model")
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = self.intra_op_threads
+            options.inter_op_num_threads = 1
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            self._session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+            self._module = None
+
+    def next_token_probs(self, texts: List[str]) -> "np.ndarray":
+        """
+        Get the next-token probability distribution after each text.
+
+        Texts are processed in micro-batches padded to a fixed batch size
+        and sequence length, so every call hits the same input shape.
+
+        Args:
+            texts: Input texts
+
+        Returns:
+            Array of shape (len(texts), vocab_size)
+        """
+        rows = []
+        for batch in micro_batches(texts, self.micro_batch_size):
+            padded = batch + [""] * (self.micro_batch_size - len(batch))
+            encoded = self.tokenizer(
+                padded,
+                padding="max_length",
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np"
+            )
+            # Empty padding rows still need one attended token for the last-token gather
+            encoded["attention_mask"][:, 0] = 1
+
+            if self._session is not None:
+                logits = self._session.run(["logits"], {
+                    "input_ids": encoded["input_ids"].astype(np.int64),
+                    "attention_mask": encoded["attention_mask"].astype(np.int64)
+                })[0]
+            else:
+                with torch.no_grad():
+                    logits = self._module(
+                        torch.from_numpy(encoded["input_ids"].astype(np.int64)),
+                        torch.from_numpy(encoded["attention_mask"].astype(np.int64))
+                    ).numpy()
+            rows.append(logits[:len(batch)])
+
+        logits = np.concatenate(rows, axis=0)
+        logits = logits - logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        return probs / probs.sum(axis=1, keepdims=True)
+
+
+def _benchmark_worker(backend: str, model_name: str, export_dir: str, texts: List[str],
+                      runs: int, threads: int, results: Any) -> None:
+    """Measure one backend in an isolated process so RSS numbers do not mix."""
+    baseline_rss = current_rss_mb()
+    start = time.perf_counter()
+
+    if backend == "eager":
+        torch.set_num_threads(threads)
+        tokenizer = _load_tokenizer(model_name)
+        model = AutoModelForCausalLM.from_pretrained(model_name)
+        model.eval()
+
+        def infer(text):
+            inputs = tokenizer(text, return_tensors="pt")
+            with torch.no_grad():
+                logits = model(**inputs).logits
+            return torch.softmax(logits[:, -1], dim=-1)
+    else:
+        quantized = QuantizedIntentBackend(export_dir, intra_op_threads=threads)
+
+        def infer(text):
+            return quantized.next_token_probs([text])
+
+    load_s = time.perf_counter() - start
+
+    infer(texts[0])  # warm-up
+    latencies = []
+    for _ in range(runs):
+        for text in texts:
+            t0 = time.perf_counter()
+            infer(text)
+            latencies.append((time.perf_counter() - t0) * 1000)
+    latencies.sort()
+
+    results[backend] = {
+        "load_s": load_s,
+        "p50_ms": latencies[len(latencies) // 2],
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "rss_mb": current_rss_mb(),
+        "rss_delta_mb": current_rss_mb() - baseline_rss
+    }
+
+
+def benchmark_backends(model_name: str, export_dir: str = DEFAULT_EXPORT_DIR,
+                       texts: Optional[List[str]] = None, runs: int = 20,
+                       threads: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Compare latency and memory of the eager and quantized backends.
+
+    Each backend runs in its own process.
+
+    Args:
+        model_name: Model used for the eager path
+        export_dir: Directory of the exported quantized model
+        texts: Sample utterances
+        runs: Passes over the sample texts
+        threads: Intra-op threads for both backends
+
+    Returns:
+        Dictionary mapping backend name to load time, p50/p99 latency and RSS
+    """
+    import multiprocessing
+
+    texts = texts or ["play some music", "what's the weather like today",
+                      "open github", "send a message to john", "set a timer for 5 minutes"]
+    threads = threads or min(4, os.cpu_count() or 1)
+
+    context = multiprocessing.get_context("spawn")
+    with context.Manager() as manager:
+        results = manager.dict()
+        for backend in ("eager", "quantized"):
+            process = context.Process(
+                target=_benchmark_worker,
+                args=(backend, model_name, export_dir, texts, runs, threads, results)
+            )
+            process.start()
+            process.join()
+        return dict(results)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export and benchmark the quantized intent model")
+    parser.add_argument("command", choices=["export", "benchmark"])
+    parser.add_argument("--model", default=configured_model_name(),
+                        help="Model name or path; defaults to intent_classifier.model")
+    parser.add_argument("--output", default=DEFAULT_EXPORT_DIR, help="Export directory")
+    parser.add_argument("--format", default="torchscript", choices=["torchscript", "onnx"])
+    parser.add_argument("--threads", type=int, default=None, help="Intra-op threads")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        path = export_quantized_model(args.model, args.output, args.format)
+        print(f"Exported to {path}")
+    else:
+        for name, numbers in benchmark_backends(args.model, args.output, threads=args.threads).items():
+            print(f"{name:>10}: load {numbers['load_s']:.2f}s, p50 {numbers['p50_ms']:.1f}ms, "
+                  f"p99 {numbers['p99_ms']:.1f}ms, RSS {numbers['rss_mb']:.0f}MB")
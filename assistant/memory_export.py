@@ -0,0 +1,329 @@
+"""
+Memory Export Module
+
+This module writes and reads memory exports as a stream. An export is a
+line-delimited JSON file of records: a header, the user preferences, the
+context data, one record per conversation entry and an end record holding
+the entry count. Entries are written as they are read from storage and
+read back one line at a time, so exporting or importing holds only a
+small batch of entries in memory however long the history is. Exports
+can be compressed with gzip or, if the zstandard package is installed,
+zstd. Exports written by older versions as one JSON document can still be
+imported.
+"""
+
+import io
+import os
+import json
+import gzip
+import logging
+from datetime import datetime
+from itertools import islice
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Callable
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+FORMAT_NAME = "samantha-memory"
+FORMAT_VERSION = 1
+
+# Compression choices; "auto" picks one from the file extension when
+# writing and from the file's first bytes when reading
+COMPRESSION_AUTO = "auto"
+COMPRESSION_NONE = "none"
+COMPRESSION_GZIP = "gzip"
+COMPRESSION_ZSTD = "zstd"
+
+EXTENSIONS = {".gz": COMPRESSION_GZIP, ".gzip": COMPRESSION_GZIP, ".zst": COMPRESSION_ZSTD, ".zstd": COMPRESSION_ZSTD}
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Entries handled per batch when importing
+DEFAULT_BATCH_SIZE = 1000
+
+# Entries between progress reports
+DEFAULT_PROGRESS_INTERVAL = 1000
+
+# Called with the entries done so far and the expected total, if known
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """
+    Split an iterable into lists of up to size items.
+
+    Args:
+        items: Items to split
+        size: Most items per list
+
+    Yields:
+        Lists of consecutive items
+    """
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def detect_compression(path: str) -> str:
+    """
+    Detect the compression of an existing file from its first bytes.
+
+    Args:
+        path: Path of the file
+
+    Returns:
+        Compression name
+    """
+    with open(path, "rb") as f:
+        magic = f.read(len(ZSTD_MAGIC))
+    if magic.startswith(GZIP_MAGIC):
+        return COMPRESSION_GZIP
+    if magic.startswith(ZSTD_MAGIC):
+        return COMPRESSION_ZSTD
+    return COMPRESSION_NONE
+
+
+def compression_for_path(path: str) -> str:
+    """Choose a compression for a new file from its extension."""
+    return EXTENSIONS.get(os.path.splitext(path)[1].lower(), COMPRESSION_NONE)
+
+
+def open_text(path: str, mode: str, compression: str = COMPRESSION_AUTO) -> io.TextIOBase:
+    """
+    Open a possibly compressed file as UTF-8 text.
+
+    Args:
+        path: Path of the file
+        mode: "r" or "w"
+        compression: Compression name, or "auto" to detect it
+
+    Returns:
+        Text stream
+
+    Raises:
+        ValueError: If the compression is unknown or zstandard is needed but
+                    not installed
+    """
+    if compression == COMPRESSION_AUTO:
+        compression = detect_compression(path) if mode == "r" else compression_for_path(path)
+
+    if compression == COMPRESSION_NONE:
+        return open(path, mode, encoding="utf-8")
+    if compression == COMPRESSION_GZIP:
+        # Level 6 compresses nearly as well as 9 in a fraction of the time
+        return gzip.open(path, mode + "t", encoding="utf-8", compresslevel=6)
+    if compression == COMPRESSION_ZSTD:
+        if not ZSTD_AVAILABLE:
+            raise ValueError("zstd compression needs the zstandard package")
+        raw = open(path, mode + "b")
+        if mode == "w":
+            stream = zstandard.ZstdCompressor(level=3).stream_writer(raw)
+        else:
+            stream = zstandard.ZstdDecompressor().stream_reader(raw)
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+def _write_record(f: io.TextIOBase, kind: str, value: Any) -> None:
+    """Write one record as a line."""
+    f.write(json.dumps({kind: value}, ensure_ascii=False, separators=(",", ":")))
+    f.write("\n")
+
+
+def write_memory_export(path: str, entries: Iterable[Dict[str, Any]],
+                        user_preferences: Dict[str, Any], context_data: Dict[str, Any],
+                        entry_count: Optional[int] = None, compression: str = COMPRESSION_AUTO,
+                        progress: Optional[ProgressCallback] = None,
+                        progress_interval: int = DEFAULT_PROGRESS_INTERVAL) -> int:
+    """
+    Write a memory export, streaming the entries.
+
+    The export is written to a temporary file and renamed into place, so an
+    interrupted export never leaves a partial file at path.
+
+    Args:
+        path: Path of the export
+        entries: Conversation entries, oldest first
+        user_preferences: User preferences
+        context_data: Context data
+        entry_count: Expected number of entries, reported to progress
+        compression: Compression name, or "auto" to choose by extension
+        progress: Called with the entries written and entry_count
+        progress_interval: Entries between progress reports
+
+    Returns:
+        Number of entries written
+    """
+    if compression == COMPRESSION_AUTO:
+        compression = compression_for_path(path)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.tmp")
+
+    written = 0
+    try:
+        with open_text(tmp_path, "w", compression) as f:
+            _write_record(f, "header", {
+                "format": FORMAT_NAME,
+                "version": FORMAT_VERSION,
+                "exported_at": datetime.now().isoformat(),
+                "entries": entry_count
+            })
+            _write_record(f, "user_preferences", user_preferences)
+            _write_record(f, "context_data", context_data)
+            for entry in entries:
+                _write_record(f, "entry", entry)
+                written += 1
+                if progress is not None and written % progress_interval == 0:
+                    progress(written, entry_count)
+            _write_record(f, "end", {"entries": written})
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    if progress is not None:
+        progress(written, entry_count)
+    logger.info(f"Exported {written} conversation entries to {path}")
+    return written
+
+
+class MemoryExportReader:
+    """
+    Reads a memory export, streaming the conversation entries.
+
+    The header, preferences and context are read when the reader is
+    opened; entries() then yields the entries one line at a time.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open an export.
+
+        Args:
+            path: Path of the export
+
+        Raises:
+            ValueError: If the file is not a memory export this version reads
+        """
+        self.path = path
+        self.compression = detect_compression(path)
+        self.header: Dict[str, Any] = {}
+        self.user_preferences: Optional[Dict[str, Any]] = None
+        self.context_data: Optional[Dict[str, Any]] = None
+        self.has_history = False
+        self.legacy = False
+        self._legacy_entries: List[Dict[str, Any]] = []
+        self._next_line: Optional[str] = None
+        self._file = open_text(path, "r", self.compression)
+        try:
+            self._read_head()
+        except BaseException:
+            self.close()
+            raise
+
+    def _read_head(self) -> None:
+        """Read the records before the first entry."""
+        first = self._file.readline()
+        try:
+            record = json.loads(first)
+        except ValueError:
+            record = None
+        if not (isinstance(record, dict) and isinstance(record.get("header"), dict)):
+            self._read_legacy()
+            return
+
+        self.header = record["header"]
+        if self.header.get("format") != FORMAT_NAME:
+            raise ValueError(f"{self.path} is not a memory export")
+        if self.header.get("version", 0) > FORMAT_VERSION:
+            raise ValueError(f"{self.path} has export version {self.header['version']}, "
+                             f"newer than supported version {FORMAT_VERSION}")
+
+        self.has_history = True
+        for line in self._file:
+            record = json.loads(line)
+            if "user_preferences" in record:
+                self.user_preferences = record["user_preferences"]
+            elif "context_data" in record:
+                self.context_data = record["context_data"]
+            else:
+                self._next_line = line
+                return
+
+    def _read_legacy(self) -> None:
+        """Read an export written as one JSON document by older versions."""
+        self._file.close()
+        with open_text(self.path, "r", self.compression) as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError(f"{self.path} is not a memory export")
+
+        self.legacy = True
+        self.header = {"format": FORMAT_NAME, "version": 0, "exported_at": data.get("exported_at")}
+        self.user_preferences = data.get("user_preferences")
+        self.context_data = data.get("context_data")
+        self.has_history = "conversation_history" in data
+        self._legacy_entries = data.get("conversation_history") or []
+        self.header["entries"] = len(self._legacy_entries)
+
+    @property
+    def entry_count(self) -> Optional[int]:
+        """Number of entries the export says it holds, if known."""
+        return self.header.get("entries")
+
+    def entries(self) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the conversation entries. Can only be iterated once.
+
+        Raises:
+            ValueError: If the export is truncated or its end record does
+                        not match the entries read
+        """
+        if self.legacy:
+            yield from self._legacy_entries
+            return
+
+        count = 0
+        lines = self._file
+        if self._next_line is not None:
+            lines = _prepend(self._next_line, lines)
+            self._next_line = None
+        for line in lines:
+            record = json.loads(line)
+            if "entry" in record:
+                count += 1
+                yield record["entry"]
+            elif "end" in record:
+                expected = record["end"].get("entries")
+                if expected != count:
+                    raise ValueError(f"{self.path} holds {count} entries, expected {expected}")
+                return
+            else:
+                logger.warning(f"Skipping unknown record in {self.path}: {list(record)}")
+        raise ValueError(f"{self.path} is truncated after {count} entries")
+
+    def close(self) -> None:
+        """Close the export."""
+        self._file.close()
+
+    def __enter__(self) -> "MemoryExportReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _prepend(first: str, lines: Iterable[str]) -> Iterator[str]:
+    """Yield first, then lines."""
+    yield first
+    yield from lines
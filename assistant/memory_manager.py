@@ -3,13 +3,50 @@ Memory Manager Module
 
 This module manages user interactions history, preferences, and session data.
 It provides persistence and recall capabilities for the assistant.
+
+Callers on any thread may use one MemoryManager. Changes update the
+in-memory state under a short lock and publish a new immutable snapshot,
+which readers use without locking. The storage writes they need are queued
+to a single writer thread, and each caller waits, outside the lock, until
+its write has been made, so writes from concurrent callers are merged.
+
+Several processes may share one memory directory when created with
+shared=True: their storage writes take a lock on the directory, and a
+background thread reloads the in-memory state whenever another process
+changed the store.
 """
 
-import json
 import os
+import time
+import threading
+from concurrent.futures import Future
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Union, Iterator
+
+from assistant.config_manager import config_manager
+from assistant.conversation_log import DEFAULT_FSYNC_INTERVAL
+from assistant.memory_storage import (
+    MemoryStorage, JsonMemoryStorage, create_storage,
+    BACKEND_JSON, BACKEND_SQLITE, DATABASE_FILENAME, DEFAULT_BUFFER_ENTRIES, DEFAULT_BATCH_SIZE,
+    CHANGED_HISTORY, CHANGED_PREFERENCES, CHANGED_CONTEXT
+)
+from assistant.memory_retention import RetentionPolicy, RetentionManager
+from assistant.memory_search import SearchResults, DEFAULT_SEARCH_LIMIT
+from assistant.conversation_window import ConversationEntry, make_window, DEFAULT_WINDOW_SIZE
+from assistant.memory_export import (
+    MemoryExportReader, ProgressCallback, write_memory_export, batched,
+    COMPRESSION_AUTO, DEFAULT_BATCH_SIZE as DEFAULT_IMPORT_BATCH_SIZE, DEFAULT_PROGRESS_INTERVAL
+)
+from assistant.memory_writer import MemoryWriter, MemorySnapshot
+from assistant.memory_sync import (
+    FileLock, StoreWatcher, claim_file, release_claim,
+    LOCK_FILENAME, VECTORS_LOCK_FILENAME, DEFAULT_SYNC_INTERVAL
+)
+from assistant.memory_vectors import (
+    SemanticMemory, create_embedder, NUMPY_AVAILABLE, DEFAULT_DIM, DEFAULT_IVF_THRESHOLD,
+    EMBEDDER_SENTENCE, DEFAULT_SENTENCE_MODEL
+)
 
 
 class MemoryManager:
@@ -17,12 +54,35 @@ class MemoryManager:
     Manages conversation history, user preferences, and session data.
     """
 
-    def __init__(self, data_dir: str = None):
+    def __init__(self, data_dir: str = None, history_buffer_entries: int = DEFAULT_BUFFER_ENTRIES,
+                 history_fsync_interval: Optional[float] = DEFAULT_FSYNC_INTERVAL,
+                 storage_backend: str = BACKEND_JSON, history_window: Optional[int] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 retention_policy: Optional[RetentionPolicy] = None,
+                 semantic_recall: bool = False, embedder=None,
+                 vector_ivf_threshold: int = DEFAULT_IVF_THRESHOLD,
+                 shared: bool = False, sync_interval: float = DEFAULT_SYNC_INTERVAL):
         """
         Initialize the memory manager with a data directory.
 
         Args:
             data_dir: Directory to store memory data. If None, uses a default location.
+            history_buffer_entries: Conversation entries buffered before they are written (JSON backend)
+            history_fsync_interval: Seconds between fsyncs of the conversation log (JSON backend)
+            storage_backend: "json" or "sqlite"
+            history_window: Most recent entries kept in conversation_history; older
+                            entries are read from storage on demand. Defaults to 1000.
+            batch_size: Conversation entries written per transaction (SQLite backend)
+            retention_policy: Limits enforced by compaction on load and in the
+                              background. None keeps everything.
+            semantic_recall: Embed entries in the background for recall() (needs numpy)
+            embedder: Embedder for semantic recall; defaults to HashingEmbedder
+            vector_ivf_threshold: Indexed entries at which recall switches from a
+                                  full scan to the IVF index
+            shared: Share data_dir with other processes. Only one of them keeps
+                    the vector index for semantic recall.
+            sync_interval: Seconds between checks for changes made by other
+                           processes when shared
         """
         if data_dir is None:
             # Use a sensible default if no directory is specified
@@ -34,76 +94,210 @@ class MemoryManager:
         # Ensure the directory exists
         os.makedirs(self.data_dir, exist_ok=True)
 
-        # Define paths for different types of memory
+        # Define paths for different types of memory. History saved as one
+        # JSON document by older versions is migrated to the log on load.
         self.history_path = os.path.join(self.data_dir, "conversation_history.json")
+        self.history_log_path = os.path.join(self.data_dir, "conversation_history.jsonl")
         self.preferences_path = os.path.join(self.data_dir, "user_preferences.json")
         self.context_path = os.path.join(self.data_dir, "context_data.json")
-
-        # Initialize memory structures
-        self.conversation_history: List[Dict[str, Any]] = []
+        self.database_path = os.path.join(self.data_dir, DATABASE_FILENAME)
+
+        # Initialize memory structures. Recent history is a bounded window of
+        # compact entries that read like dicts.
+        if history_window is None:
+            history_window = DEFAULT_WINDOW_SIZE
+        self.history_window = history_window
+        self.conversation_history = make_window([], history_window)
         self.user_preferences: Dict[str, Any] = {}
         self.context_data: Dict[str, Any] = {}
 
+        self.storage_backend = storage_backend
+        self.shared = shared
+        self.store_lock: Optional[FileLock] = (
+            FileLock(os.path.join(self.data_dir, LOCK_FILENAME)) if shared else None
+        )
+        self.storage: MemoryStorage = create_storage(
+            storage_backend, self.data_dir, buffer_entries=history_buffer_entries,
+            fsync_interval=history_fsync_interval, batch_size=batch_size, lock=self.store_lock
+        )
+
+        # Serializes changes to the in-memory state; persistence runs on the
+        # writer thread, and readers use the published snapshot
+        self._write_lock = threading.RLock()
+        self.writer = MemoryWriter()
+        # Deferred writes are made from the writer thread, where the flusher
+        # cannot install its SIGTERM handler, so its exit hooks go in here
+        flusher = getattr(self.storage, "flusher", None)
+        if flusher is not None:
+            flusher.install_exit_hooks()
+        self._entry_count = 0
+        self._version = 0
+        self._snapshot = MemorySnapshot(0, (), {}, {}, 0)
+
         # Load existing data if available
         self._load_memory()
+        self._publish()
+
+        self.semantic: Optional[SemanticMemory] = None
+        self._vectors_claim: Optional[int] = None
+        if semantic_recall:
+            if not NUMPY_AVAILABLE:
+                print("Semantic recall disabled: numpy is not installed")
+            elif shared and not self._claim_vectors():
+                print("Semantic recall disabled: another process keeps the vector index")
+            else:
+                self.semantic = SemanticMemory(self.data_dir, embedder, ivf_threshold=vector_ivf_threshold)
+
+        # Compact on load so the hot history stays small, then keep compacting
+        self.retention: Optional[RetentionManager] = None
+        if retention_policy is not None:
+            self.retention = RetentionManager(self, retention_policy)
+            self.compact_memory()
+            self.retention.start()
+
+        # Embed entries added since the vector index was last updated
+        if self.semantic is not None:
+            try:
+                self.semantic.catch_up(self.storage.range_entries)
+            except Exception as e:
+                print(f"Error updating the vector index: {e}")
+
+        # Pick up what other processes write from now on
+        self.watcher: Optional[StoreWatcher] = None
+        if shared:
+            self.watcher = StoreWatcher(self.refresh, sync_interval)
+            self.watcher.start()
+
+    def _claim_vectors(self) -> bool:
+        """Become the one process sharing the directory that keeps the vector index."""
+        self._vectors_claim = claim_file(os.path.join(self.data_dir, VECTORS_LOCK_FILENAME))
+        return self._vectors_claim is not None
 
     def _load_memory(self) -> None:
         """Load all memory data from disk."""
+        if self.storage_backend == BACKEND_SQLITE:
+            self._import_json_memory()
         self._load_conversation_history()
         self._load_user_preferences()
         self._load_context_data()
 
+    def _import_json_memory(self) -> None:
+        """Copy memory saved by the JSON backend into a new, empty database."""
+        json_files = (self.history_path, self.history_log_path, self.preferences_path, self.context_path)
+        if not any(os.path.exists(path) for path in json_files):
+            return
+        if self.storage.count_entries() or self.storage.load_preferences() or self.storage.load_context():
+            return
+
+        try:
+            json_storage = create_storage(BACKEND_JSON, self.data_dir)
+            json_storage.migrate_json(self.history_path)
+            self.storage.replace_entries(json_storage.recent_entries())
+            self.storage.replace_preferences(json_storage.load_preferences())
+            self.storage.replace_context(json_storage.load_context())
+            json_storage.close()
+        except Exception as e:
+            print(f"Error importing JSON memory into {self.database_path}: {e}")
+
     def _load_conversation_history(self) -> None:
-        """Load conversation history from disk."""
+        """Load conversation history from disk, up to the history window."""
         try:
-            if os.path.exists(self.history_path) and os.path.getsize(self.history_path) > 0:
-                with open(self.history_path, 'r', encoding='utf-8') as f:
-                    self.conversation_history = json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError) as e:
+            if isinstance(self.storage, JsonMemoryStorage):
+                self.storage.migrate_json(self.history_path)
+            self._set_window(self.storage.recent_entries(self.history_window))
+        except Exception as e:
             print(f"Error loading conversation history: {e}")
-            self.conversation_history = []
+            self._set_window([], count=0)
 
     def _load_user_preferences(self) -> None:
         """Load user preferences from disk."""
         try:
-            if os.path.exists(self.preferences_path) and os.path.getsize(self.preferences_path) > 0:
-                with open(self.preferences_path, 'r', encoding='utf-8') as f:
-                    self.user_preferences = json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError) as e:
+            self.user_preferences = self.storage.load_preferences()
+        except Exception as e:
             print(f"Error loading user preferences: {e}")
             self.user_preferences = {}
 
     def _load_context_data(self) -> None:
         """Load context data from disk."""
         try:
-            if os.path.exists(self.context_path) and os.path.getsize(self.context_path) > 0:
-                with open(self.context_path, 'r', encoding='utf-8') as f:
-                    self.context_data = json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError) as e:
+            self.context_data = self.storage.load_context()
+        except Exception as e:
             print(f"Error loading context data: {e}")
             self.context_data = {}
 
-    def _save_conversation_history(self) -> None:
-        """Save conversation history to disk."""
+    def _publish(self) -> None:
+        """Publish the in-memory state as a new snapshot. Call while holding _write_lock."""
+        self._version += 1
+        self._snapshot = MemorySnapshot(self._version, tuple(self.conversation_history),
+                                        self.user_preferences, self.context_data, self._entry_count)
+
+    def snapshot(self) -> MemorySnapshot:
+        """
+        Get a consistent view of the in-memory state without locking.
+
+        Returns:
+            The latest published snapshot
+        """
+        return self._snapshot
+
+    def _set_window(self, entries: List[Dict[str, Any]], count: Optional[int] = None) -> None:
+        """
+        Replace the in-memory window with the most recent of the given entries.
+
+        Args:
+            entries: Most recent stored entries, oldest first
+            count: Number of stored entries; read from storage if None
+        """
+        self.conversation_history = make_window(entries, self.history_window)
+        self._entry_count = self.storage.count_entries() if count is None else count
+        self._publish()
+
+    def _await(self, written: Future) -> None:
+        """Wait for a queued write. On the writer thread it runs after the current operation."""
+        if not self.writer.on_writer_thread():
+            written.result()
+
+    def _exclusive(self, fn, *args) -> Any:
+        """Run an operation that rewrites memory on the writer thread, holding off changes."""
+        with self._write_lock:
+            return self.writer.call(fn, *args)
+
+    def _save_conversation_history(self, entries: Optional[List[Dict[str, Any]]] = None) -> None:
+        """
+        Replace the stored conversation history.
+
+        Args:
+            entries: New history; defaults to the entries in the window
+        """
+        if entries is None:
+            entries = [entry.to_dict() for entry in self.conversation_history]
+        try:
+            self.storage.replace_entries(entries)
+            if self.semantic is not None:
+                self.semantic.rebuild(entries)
+        except Exception as e:
+            print(f"Error saving conversation history: {e}")
+
+    def _append_conversation_entries(self, entries: List[Dict[str, Any]]) -> None:
+        """Append entries to the stored conversation history and the vector index."""
         try:
-            with open(self.history_path, 'w', encoding='utf-8') as f:
-                json.dump(self.conversation_history, f, indent=2)
+            self.storage.append_entries(entries)
+            if self.semantic is not None:
+                self.semantic.enqueue(entries)
         except Exception as e:
             print(f"Error saving conversation history: {e}")
 
     def _save_user_preferences(self) -> None:
         """Save user preferences to disk."""
         try:
-            with open(self.preferences_path, 'w', encoding='utf-8') as f:
-                json.dump(self.user_preferences, f, indent=2)
+            self.storage.replace_preferences(self.user_preferences)
         except Exception as e:
             print(f"Error saving user preferences: {e}")
 
     def _save_context_data(self) -> None:
         """Save context data to disk."""
         try:
-            with open(self.context_path, 'w', encoding='utf-8') as f:
-                json.dump(self.context_data, f, indent=2)
+            self.storage.replace_context(self.context_data)
         except Exception as e:
             print(f"Error saving context data: {e}")
 
@@ -126,22 +320,128 @@ class MemoryManager:
             "timestamp": timestamp.isoformat()
         }
 
-        self.conversation_history.append(entry)
-        self._save_conversation_history()
+        with self._write_lock:
+            # The window drops its oldest entry once full; that entry stays on disk
+            self.conversation_history.append(ConversationEntry(speaker, text, timestamp))
+            self._entry_count += 1
+            self._publish()
+            written = self.writer.append(self._append_conversation_entries, [entry])
+        self._await(written)
 
     def get_conversation_history(self, n_recent: int = None) -> List[Dict[str, Any]]:
         """
         Get conversation history, optionally limited to recent entries.
 
+        Entries older than the history window are read from storage once
+        the writes queued before this call have been made.
+
         Args:
             n_recent: Number of most recent entries to return. If None, returns all.
 
         Returns:
             List of conversation entries
         """
+        snapshot = self._snapshot
+        window = snapshot.history
         if n_recent is None:
-            return self.conversation_history
-        return self.conversation_history[-n_recent:]
+            if snapshot.history_complete:
+                return [entry.to_dict() for entry in window]
+            self.writer.wait()
+            return self.storage.recent_entries()
+        if n_recent > len(window) and not snapshot.history_complete:
+            self.writer.wait()
+            return self.storage.recent_entries(n_recent)
+        if n_recent <= 0:
+            return []
+        return [entry.to_dict() for entry in window[max(0, len(window) - n_recent):]]
+
+    def get_conversation_range(self, start: Union[datetime, str, None] = None,
+                               end: Union[datetime, str, None] = None,
+                               speaker: Optional[str] = None,
+                               limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get conversation entries within a time range.
+
+        Args:
+            start: Earliest timestamp to include
+            end: Timestamp to stop before
+            speaker: Only return entries by this speaker
+            limit: Maximum number of entries to return
+
+        Returns:
+            Matching entries, oldest first
+        """
+        if isinstance(start, datetime):
+            start = start.isoformat()
+        if isinstance(end, datetime):
+            end = end.isoformat()
+        self.writer.wait()
+        return self.storage.range_entries(start, end, speaker, limit)
+
+    def get_conversation_count(self) -> int:
+        """Get the number of conversation entries, including ones still being written."""
+        return self._snapshot.entry_count
+
+    def search_conversation(self, query: str = "", speaker: Optional[str] = None,
+                            start: Union[datetime, str, None] = None,
+                            end: Union[datetime, str, None] = None,
+                            limit: Optional[int] = DEFAULT_SEARCH_LIMIT,
+                            offset: int = 0) -> SearchResults:
+        """
+        Search the conversation history.
+
+        Args:
+            query: Keywords and quoted phrases that must all appear, e.g.
+                   'weather "in london"'. An empty query matches every entry.
+            speaker: Only return entries by this speaker
+            start: Earliest timestamp to include
+            end: Timestamp to stop before
+            limit: Results per page, or None for all
+            offset: Number of results to skip
+
+        Returns:
+            Results ranked by relevance (newest first for an empty query)
+        """
+        if isinstance(start, datetime):
+            start = start.isoformat()
+        if isinstance(end, datetime):
+            end = end.isoformat()
+
+        search_start = time.perf_counter()
+        try:
+            self.writer.wait()
+            results, total = self.storage.search_entries(query, start, end, speaker, limit, offset)
+        except Exception as e:
+            print(f"Error searching conversation history: {e}")
+            results, total = [], 0
+        return SearchResults(query, results, total, offset, limit,
+                             (time.perf_counter() - search_start) * 1000)
+
+    def recall(self, query: str, k: int = 5, speaker: Optional[str] = None,
+               min_score: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Recall the past entries most similar in meaning to a query.
+
+        Entries are indexed in the background, so one added a moment ago
+        may not be recalled yet.
+
+        Args:
+            query: Text to compare against
+            k: Number of entries to return
+            speaker: Only return entries by this speaker
+            min_score: Lowest cosine similarity to return
+
+        Returns:
+            Entries with a "score", most similar first, or an empty list if
+            semantic recall is disabled
+        """
+        if self.semantic is None:
+            return []
+        try:
+            return self.semantic.recall(query, k, speaker, min_score)
+        except Exception as e:
+            print(f"Error recalling conversation history: {e}")
+            return []
 
     def set_user_preference(self, key: str, value: Any) -> None:
         """
@@ -151,8 +451,19 @@ class MemoryManager:
             key: Preference key
             value: Preference value
         """
-        self.user_preferences[key] = value
-        self._save_user_preferences()
+        with self._write_lock:
+            # Replaced rather than modified, so published snapshots never change
+            self.user_preferences = {**self.user_preferences, key: value}
+            self._publish()
+            written = self.writer.submit(self._store_preference, key, value, self.user_preferences)
+        self._await(written)
+
+    def _store_preference(self, key: str, value: Any, preferences: Dict[str, Any]) -> None:
+        """Store one user preference."""
+        try:
+            self.storage.set_preference(key, value, preferences)
+        except Exception as e:
+            print(f"Error saving user preferences: {e}")
 
     def get_user_preference(self, key: str, default: Any = None) -> Any:
         """
@@ -165,7 +476,7 @@ class MemoryManager:
         Returns:
             Preference value or default
         """
-        return self.user_preferences.get(key, default)
+        return self._snapshot.preferences.get(key, default)
 
     def set_context_data(self, key: str, value: Any) -> None:
         """
@@ -175,8 +486,29 @@ class MemoryManager:
             key: Context key
             value: Context value
         """
-        self.context_data[key] = value
-        self._save_context_data()
+        with self._write_lock:
+            self.context_data = {**self.context_data, key: value}
+            self._publish()
+            written = self.writer.submit(self._store_context, key, value, self.context_data)
+        if self.retention is not None:
+            self.retention.touch_context(key)
+        self._await(written)
+
+    def _store_context(self, key: str, value: Any, context: Dict[str, Any]) -> None:
+        """Store one context value."""
+        try:
+            self.storage.set_context(key, value, context)
+        except Exception as e:
+            print(f"Error saving context data: {e}")
+
+    def _remove_context(self, keys: List[str]) -> None:
+        """Remove context values. Runs on the writer thread, see _exclusive."""
+        self.context_data = {key: value for key, value in self.context_data.items() if key not in keys}
+        self._publish()
+        try:
+            self.storage.delete_context(keys)
+        except Exception as e:
+            print(f"Error saving context data: {e}")
 
     def get_context_data(self, key: str, default: Any = None) -> Any:
         """
@@ -189,44 +521,151 @@ class MemoryManager:
         Returns:
             Context value or default
         """
-        return self.context_data.get(key, default)
+        return self._snapshot.context.get(key, default)
 
     def clear_conversation_history(self) -> None:
         """Clear all conversation history."""
-        self.conversation_history = []
-        self._save_conversation_history()
+        self._exclusive(self._clear_conversation_history)
+
+    def _clear_conversation_history(self) -> None:
+        """Clear the stored history and the window. Runs on the writer thread."""
+        self._save_conversation_history([])
+        self._set_window([], count=0)
+
+    def refresh(self) -> bool:
+        """
+        Reload the in-memory state if another process sharing the memory
+        directory changed the store. Called periodically when shared.
+
+        Only the history window and entry count are read back, not the
+        whole history; preferences and context are small and reloaded whole.
+
+        Returns:
+            True if anything was reloaded
+        """
+        if not self.shared:
+            return False
+        return self._exclusive(self._refresh)
+
+    def _refresh(self) -> bool:
+        """Reload what other processes changed. Runs on the writer thread."""
+        changed = self.storage.external_changes()
+        if not changed:
+            return False
+        if CHANGED_HISTORY in changed:
+            self._set_window(self.storage.recent_entries(self.history_window))
+            if self.semantic is not None:
+                self.semantic.catch_up(self.storage.range_entries)
+        if CHANGED_PREFERENCES in changed:
+            self._load_user_preferences()
+        if CHANGED_CONTEXT in changed:
+            self._load_context_data()
+        self._publish()
+        return True
+
+    def compact_memory(self) -> Dict[str, Any]:
+        """
+        Enforce the retention policy now.
+
+        Returns:
+            Compaction result, or an empty dictionary if no policy is set
+        """
+        if self.retention is None:
+            return {}
+        try:
+            return self.retention.compact()
+        except Exception as e:
+            print(f"Error compacting memory: {e}")
+            return {}
 
-    def export_memory(self, filepath: str) -> bool:
+    def flush(self) -> None:
+        """Make queued writes, then write buffered conversation entries and sync them to disk."""
+        try:
+            self.writer.wait()
+            self.storage.flush()
+        except Exception as e:
+            print(f"Error saving conversation history: {e}")
+
+    def get_write_behind_stats(self) -> Dict[str, Any]:
+        """
+        Get counters of the deferred preference and context writes.
+
+        Returns:
+            Dictionary with mutations, writes, coalesced writes and flush
+            latencies, or an empty dictionary if the backend writes directly
+        """
+        flusher = getattr(self.storage, "flusher", None)
+        return flusher.get_stats() if flusher is not None else {}
+
+    def get_writer_stats(self) -> Dict[str, Any]:
+        """
+        Get counters of the writer thread.
+
+        Returns:
+            Dictionary with operations submitted, completed and queued,
+            batches, merged appends and failures
+        """
+        return self.writer.get_stats()
+
+    def close(self) -> None:
+        """Stop compaction and syncing, make queued writes, stop embedding and close the storage."""
+        try:
+            if self.watcher is not None:
+                self.watcher.stop()
+            if self.retention is not None:
+                self.retention.stop()
+            self.writer.close()
+            if self.semantic is not None:
+                self.semantic.close()
+            if self._vectors_claim is not None:
+                release_claim(self._vectors_claim)
+                self._vectors_claim = None
+            self.storage.close()
+            if self.store_lock is not None:
+                self.store_lock.close()
+        except Exception as e:
+            print(f"Error closing conversation history: {e}")
+
+    def export_memory(self, filepath: str, compression: str = COMPRESSION_AUTO,
+                      progress: Optional[ProgressCallback] = None) -> bool:
         """
         Export all memory data to a file.
 
+        Entries are streamed from storage to the file, so memory use does
+        not grow with the size of the history.
+
         Args:
-            filepath: Path to export file
+            filepath: Path to export file; a .gz or .zst extension compresses it
+            compression: "none", "gzip", "zstd", or "auto" to choose by extension
+            progress: Called with the entries exported so far and the total
 
         Returns:
             True if successful, False otherwise
         """
         try:
-            memory_data = {
-                "conversation_history": self.conversation_history,
-                "user_preferences": self.user_preferences,
-                "context_data": self.context_data,
-                "exported_at": datetime.now().isoformat()
-            }
-
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(memory_data, f, indent=2)
+            self.writer.wait()
+            write_memory_export(filepath, self.storage.iter_entries(), dict(self.user_preferences),
+                                dict(self.context_data), entry_count=self.storage.count_entries(),
+                                compression=compression, progress=progress)
             return True
         except Exception as e:
             print(f"Error exporting memory: {e}")
             return False
 
-    def import_memory(self, filepath: str) -> bool:
+    def import_memory(self, filepath: str, progress: Optional[ProgressCallback] = None,
+                      batch_size: int = DEFAULT_IMPORT_BATCH_SIZE) -> bool:
         """
         Import memory data from a file.
 
+        Entries are streamed from the file into storage, which keeps the
+        old history if the file turns out to be truncated or corrupt.
+        Exports written by older versions as one JSON document are read too.
+        The import runs on the writer thread, which also calls progress.
+
         Args:
-            filepath: Path to import file
+            filepath: Path to import file, compressed or not
+            progress: Called with the entries imported so far and the total
+            batch_size: Entries handled per batch
 
         Returns:
             True if successful, False otherwise
@@ -236,29 +675,73 @@ class MemoryManager:
                 print(f"Import file not found: {filepath}")
                 return False
 
-            with open(filepath, 'r', encoding='utf-8') as f:
-                memory_data = json.load(f)
+            self._exclusive(self._import_memory, filepath, progress, batch_size)
+            return True
+        except Exception as e:
+            print(f"Error importing memory: {e}")
+            return False
 
-            if "conversation_history" in memory_data:
-                self.conversation_history = memory_data["conversation_history"]
-                self._save_conversation_history()
+    def _import_memory(self, filepath: str, progress: Optional[ProgressCallback], batch_size: int) -> None:
+        """Replace memory with the contents of an export. Runs on the writer thread."""
+        with MemoryExportReader(filepath) as export:
+            if export.has_history:
+                self.storage.replace_entries(self._imported_entries(export, progress, batch_size))
+                self._set_window(self.storage.recent_entries(self.history_window))
+                self._reindex_semantic(batch_size)
 
-            if "user_preferences" in memory_data:
-                self.user_preferences = memory_data["user_preferences"]
+            if export.user_preferences is not None:
+                self.user_preferences = export.user_preferences
                 self._save_user_preferences()
 
-            if "context_data" in memory_data:
-                self.context_data = memory_data["context_data"]
+            if export.context_data is not None:
+                self.context_data = export.context_data
                 self._save_context_data()
-
-            return True
-        except Exception as e:
-            print(f"Error importing memory: {e}")
-            return False
+            self._publish()
+
+    @staticmethod
+    def _imported_entries(export: MemoryExportReader, progress: Optional[ProgressCallback],
+                          batch_size: int) -> Iterator[Dict[str, Any]]:
+        """Yield the entries of an export in batches, reporting progress."""
+        total = export.entry_count
+        done = 0
+        reported = 0
+        for batch in batched(export.entries(), batch_size):
+            yield from batch
+            done += len(batch)
+            if progress is not None and done - reported >= DEFAULT_PROGRESS_INTERVAL:
+                progress(done, total)
+                reported = done
+        if progress is not None:
+            progress(done, total)
+
+    def _reindex_semantic(self, batch_size: int) -> None:
+        """Rebuild the vector index from storage, one batch in the queue at a time."""
+        if self.semantic is None:
+            return
+        self.semantic.rebuild([])
+        for batch in batched(self.storage.iter_entries(), batch_size):
+            self.semantic.enqueue(batch)
+            self.semantic.wait()
 
 
 # Create an instance for easy importing
-memory_manager = MemoryManager()
+memory_manager = MemoryManager(
+    history_buffer_entries=config_manager.get('memory.history_buffer_entries', DEFAULT_BUFFER_ENTRIES),
+    history_fsync_interval=config_manager.get('memory.history_fsync_interval', DEFAULT_FSYNC_INTERVAL),
+    storage_backend=config_manager.get('memory.storage_backend', BACKEND_JSON),
+    history_window=config_manager.get('memory.history_window', DEFAULT_WINDOW_SIZE),
+    batch_size=config_manager.get('memory.batch_size', DEFAULT_BATCH_SIZE),
+    retention_policy=(RetentionPolicy.from_config(config_manager.get_section('memory'))
+                      if config_manager.get('memory.retention_enabled', True) else None),
+    semantic_recall=config_manager.get('memory.semantic_recall_enabled', True),
+    embedder=create_embedder(config_manager.get('memory.embedder', EMBEDDER_SENTENCE),
+                             dim=config_manager.get('memory.vector_dim', DEFAULT_DIM),
+                             model_path=config_manager.get('models.embeddings.model_path', DEFAULT_SENTENCE_MODEL),
+                             device=config_manager.get('models.embeddings.device', 'auto')),
+    vector_ivf_threshold=config_manager.get('memory.vector_ivf_threshold', DEFAULT_IVF_THRESHOLD),
+    shared=config_manager.get('memory.shared', False),
+    sync_interval=config_manager.get('memory.sync_interval', DEFAULT_SYNC_INTERVAL)
+)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,441 @@
+"""
+Memory Retention Module
+
+This module enforces the memory limits from config. A compaction job splits
+the conversation history into conversations, keeps the most recent ones in
+the hot history, moves older entries into compressed archive segments and
+records a small rollup for everything it removes. Entries and archive
+segments older than the retention period are forgotten, and context values
+that have not been updated within their retention period expire.
+"""
+
+import os
+import gzip
+import json
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional
+
+from assistant.conversation_log import ConversationLog
+from assistant.file_utils import atomic_write_json
+from assistant.write_behind import write_behind_flusher
+
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIRNAME = "archive"
+ARCHIVE_PREFIX = "conversation-"
+ARCHIVE_SUFFIX = ".jsonl.gz"
+ARCHIVE_TIME_FORMAT = "%Y%m%dT%H%M%S"
+ROLLUPS_FILENAME = "conversation_rollups.jsonl"
+STATE_FILENAME = "retention_state.json"
+
+DEFAULT_CONVERSATION_GAP_MINUTES = 30
+DEFAULT_COMPACTION_INTERVAL = 3600.0
+PREVIEW_LENGTH = 80
+
+
+def _parse_timestamp(entry: Dict[str, Any], default: datetime) -> datetime:
+    """Get the timestamp of an entry, or a default if it is missing or malformed."""
+    try:
+        return datetime.fromisoformat(entry["timestamp"])
+    except (KeyError, TypeError, ValueError):
+        return default
+
+
+class RetentionPolicy:
+    """
+    Memory limits to enforce. A limit of None is not enforced.
+    """
+
+    def __init__(self, max_conversations: Optional[int] = None,
+                 max_conversation_length: Optional[int] = None,
+                 context_retention_period_days: Optional[float] = None,
+                 forget_older_than_days: Optional[float] = None,
+                 conversation_gap_minutes: float = DEFAULT_CONVERSATION_GAP_MINUTES,
+                 max_archive_segments: Optional[int] = None,
+                 compaction_interval: float = DEFAULT_COMPACTION_INTERVAL):
+        """
+        Initialize a retention policy.
+
+        Args:
+            max_conversations: Conversations kept in the hot history
+            max_conversation_length: Most recent entries kept per hot conversation
+            context_retention_period_days: Days a context value lives without updates
+            forget_older_than_days: Days after which entries and archives are forgotten
+            conversation_gap_minutes: Idle minutes that start a new conversation
+            max_archive_segments: Archive segments kept, newest first
+            compaction_interval: Seconds between background compactions
+        """
+        self.max_conversations = max_conversations
+        self.max_conversation_length = max_conversation_length
+        self.context_retention_period_days = context_retention_period_days
+        self.forget_older_than_days = forget_older_than_days
+        self.conversation_gap_minutes = conversation_gap_minutes
+        self.max_archive_segments = max_archive_segments
+        self.compaction_interval = compaction_interval
+
+    @classmethod
+    def from_config(cls, memory_config: Dict[str, Any]) -> "RetentionPolicy":
+        """
+        Build a policy from the "memory" config section.
+
+        Args:
+            memory_config: The "memory" config section
+
+        Returns:
+            Retention policy
+        """
+        return cls(
+            max_conversations=memory_config.get("max_conversations"),
+            max_conversation_length=memory_config.get("max_conversation_length"),
+            context_retention_period_days=memory_config.get("context_retention_period_days"),
+            forget_older_than_days=memory_config.get("forget_older_than_days"),
+            conversation_gap_minutes=memory_config.get("conversation_gap_minutes", DEFAULT_CONVERSATION_GAP_MINUTES),
+            max_archive_segments=memory_config.get("max_archive_segments"),
+            compaction_interval=memory_config.get("compaction_interval", DEFAULT_COMPACTION_INTERVAL)
+        )
+
+    def __repr__(self) -> str:
+        return (f"RetentionPolicy(max_conversations={self.max_conversations}, "
+                f"max_conversation_length={self.max_conversation_length}, "
+                f"forget_older_than_days={self.forget_older_than_days})")
+
+
+class RetentionManager:
+    """
+    Compacts a MemoryManager's history according to a retention policy.
+    """
+
+    def __init__(self, memory, policy: RetentionPolicy):
+        """
+        Initialize the retention manager.
+
+        Args:
+            memory: MemoryManager whose data to compact
+            policy: Limits to enforce
+        """
+        self.memory = memory
+        self.policy = policy
+        self.archive_dir = os.path.join(memory.data_dir, ARCHIVE_DIRNAME)
+        self.rollups = ConversationLog(os.path.join(memory.data_dir, ROLLUPS_FILENAME),
+                                       lock=memory.storage.lock)
+        self.state_path = os.path.join(memory.data_dir, STATE_FILENAME)
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._state = self._load_state()
+        self.reset_stats()
+
+    def _load_state(self) -> Dict[str, Any]:
+        """Load when each context key was last updated."""
+        write_behind_flusher.flush(self.state_path)
+        try:
+            if os.path.exists(self.state_path):
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+                    state.setdefault("context_updated", {})
+                    return state
+        except (json.JSONDecodeError, OSError) as e:
+            logger.error(f"Error loading retention state: {e}")
+        return {"context_updated": {}}
+
+    def _save_state(self) -> None:
+        """Schedule a write of the retention state."""
+        write_behind_flusher.mark_dirty(self.state_path, self._write_state)
+
+    def _write_state(self) -> None:
+        """Write the retention state atomically."""
+        with self._lock:
+            state = json.loads(json.dumps(self._state))
+        atomic_write_json(self.state_path, state)
+
+    def touch_context(self, key: str, when: Optional[datetime] = None) -> None:
+        """
+        Record that a context value was updated.
+
+        Args:
+            key: Context key
+            when: Update time (defaults to now)
+        """
+        with self._lock:
+            self._state["context_updated"][key] = (when or datetime.now()).isoformat()
+        self._save_state()
+
+    def split_conversations(self, entries: List[Dict[str, Any]], now: datetime) -> List[List[Dict[str, Any]]]:
+        """
+        Split entries into conversations separated by idle gaps.
+
+        Args:
+            entries: Entries in chronological order
+            now: Time used for entries without a valid timestamp
+
+        Returns:
+            Conversations in chronological order
+        """
+        gap = timedelta(minutes=self.policy.conversation_gap_minutes)
+        conversations: List[List[Dict[str, Any]]] = []
+        previous = None
+        for entry in entries:
+            timestamp = _parse_timestamp(entry, now)
+            if previous is None or timestamp - previous > gap:
+                conversations.append([])
+            conversations[-1].append(entry)
+            previous = timestamp
+        return conversations
+
+    def _rollup(self, chunk: List[Dict[str, Any]], archive: Optional[str], now: datetime) -> Dict[str, Any]:
+        """Summarize entries removed from the hot history."""
+        speakers: Dict[str, int] = {}
+        for entry in chunk:
+            speaker = entry.get("speaker", "unknown")
+            speakers[speaker] = speakers.get(speaker, 0) + 1
+        preview = next((entry.get("text", "") for entry in chunk if entry.get("speaker") == "user"),
+                       chunk[0].get("text", ""))
+        return {
+            "start": chunk[0].get("timestamp"),
+            "end": chunk[-1].get("timestamp"),
+            "entries": len(chunk),
+            "speakers": speakers,
+            "preview": preview[:PREVIEW_LENGTH],
+            "archive": archive,
+            "rolled_up_at": now.isoformat()
+        }
+
+    def _write_archive(self, chunks: List[List[Dict[str, Any]]], now: datetime) -> str:
+        """Write evicted entries to a new compressed archive segment."""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        entries = sorted((entry for chunk in chunks for entry in chunk),
+                         key=lambda entry: _parse_timestamp(entry, now))
+        first = _parse_timestamp(entries[0], now).strftime(ARCHIVE_TIME_FORMAT)
+        last = _parse_timestamp(entries[-1], now).strftime(ARCHIVE_TIME_FORMAT)
+        name = f"{ARCHIVE_PREFIX}{first}-{last}-{now.strftime(ARCHIVE_TIME_FORMAT)}{ARCHIVE_SUFFIX}"
+        path = os.path.join(self.archive_dir, name)
+        suffix = 1
+        while os.path.exists(path):
+            path = os.path.join(self.archive_dir, name.replace(ARCHIVE_SUFFIX, f"-{suffix}{ARCHIVE_SUFFIX}"))
+            suffix += 1
+
+        tmp_path = path + ".tmp"
+        with gzip.open(tmp_path, "wb") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+        os.replace(tmp_path, path)
+        return os.path.basename(path)
+
+    def list_archives(self) -> List[str]:
+        """Get the archive segment names, oldest first."""
+        if not os.path.isdir(self.archive_dir):
+            return []
+        return sorted(name for name in os.listdir(self.archive_dir)
+                      if name.startswith(ARCHIVE_PREFIX) and name.endswith(ARCHIVE_SUFFIX))
+
+    def read_archive(self, name: str) -> List[Dict[str, Any]]:
+        """
+        Read the entries of an archive segment.
+
+        Args:
+            name: Segment name from list_archives
+
+        Returns:
+            Entries in chronological order
+        """
+        with gzip.open(os.path.join(self.archive_dir, name), "rb") as f:
+            return [json.loads(line) for line in f]
+
+    def _rotate_archives(self, now: datetime) -> int:
+        """Delete archive segments past the retention period or the segment limit."""
+        names = self.list_archives()
+        remove = set()
+        if self.policy.forget_older_than_days is not None:
+            cutoff = now - timedelta(days=self.policy.forget_older_than_days)
+            for name in names:
+                try:
+                    last = datetime.strptime(name[len(ARCHIVE_PREFIX):].split("-")[1], ARCHIVE_TIME_FORMAT)
+                except (IndexError, ValueError):
+                    continue
+                if last < cutoff:
+                    remove.add(name)
+        if self.policy.max_archive_segments is not None:
+            remaining = [name for name in names if name not in remove]
+            remove.update(remaining[:max(0, len(remaining) - self.policy.max_archive_segments)])
+
+        for name in remove:
+            try:
+                os.remove(os.path.join(self.archive_dir, name))
+            except OSError as e:
+                logger.error(f"Could not remove archive segment {name}: {e}")
+        return len(remove)
+
+    def _expire_context(self, now: datetime) -> int:
+        """Remove context values not updated within their retention period."""
+        with self._lock:
+            updated = self._state["context_updated"]
+            before = dict(updated)
+            # Values stored before retention was enabled start their period now
+            for key in self.memory.context_data:
+                updated.setdefault(key, now.isoformat())
+            for key in list(updated):
+                if key not in self.memory.context_data:
+                    del updated[key]
+
+            if self.policy.context_retention_period_days is None:
+                expired = []
+            else:
+                cutoff = now - timedelta(days=self.policy.context_retention_period_days)
+                expired = [key for key, when in updated.items()
+                           if _parse_timestamp({"timestamp": when}, now) < cutoff]
+            for key in expired:
+                del updated[key]
+            changed = updated != before
+        if changed:
+            self._save_state()
+
+        if expired:
+            self.memory._remove_context(expired)
+        return len(expired)
+
+    def compact(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Enforce the retention policy once.
+
+        Evicted entries are archived and rolled up before the hot history
+        is rewritten, so a crash can at worst archive entries twice.
+
+        Args:
+            now: Current time (defaults to now)
+
+        Returns:
+            Dictionary with entries kept, archived and forgotten, rollups
+            written, archive segments removed, context values expired and
+            elapsed milliseconds
+        """
+        return self.memory._exclusive(self._compact, now or datetime.now())
+
+    def _compact(self, now: datetime) -> Dict[str, Any]:
+        """Enforce the retention policy once. Runs on the memory's writer thread."""
+        start = time.perf_counter()
+        policy = self.policy
+
+        # Other processes sharing the store must not append between the
+        # read and the rewrite
+        with self.memory.storage.locked():
+            entries = self.memory.storage.recent_entries()
+            conversations = self.split_conversations(entries, now)
+
+            expired: List[List[Dict[str, Any]]] = []
+            kept: List[List[Dict[str, Any]]] = []
+            if policy.forget_older_than_days is not None:
+                cutoff = now - timedelta(days=policy.forget_older_than_days)
+                for conversation in conversations:
+                    last = _parse_timestamp(conversation[-1], now)
+                    (expired if last < cutoff else kept).append(conversation)
+            else:
+                kept = conversations
+
+            archived: List[List[Dict[str, Any]]] = []
+            if policy.max_conversations is not None and len(kept) > policy.max_conversations:
+                split = len(kept) - policy.max_conversations
+                archived.extend(kept[:split])
+                kept = kept[split:]
+            if policy.max_conversation_length is not None:
+                limit = policy.max_conversation_length
+                for i, conversation in enumerate(kept):
+                    if len(conversation) > limit:
+                        archived.append(conversation[:-limit])
+                        kept[i] = conversation[-limit:]
+
+            rollups = []
+            if expired or archived:
+                archive_name = self._write_archive(archived, now) if archived else None
+                rollups = ([self._rollup(chunk, None, now) for chunk in expired] +
+                           [self._rollup(chunk, archive_name, now) for chunk in archived])
+                for rollup in sorted(rollups, key=lambda rollup: rollup["start"] or ""):
+                    self.rollups.append(rollup)
+                self.rollups.sync()
+
+                hot = [entry for conversation in kept for entry in conversation]
+                self.memory.storage.replace_entries(hot)
+                self.memory._set_window(self.memory.storage.recent_entries(self.memory.history_window))
+
+            # Archived entries stay recallable; forgotten ones leave the vector index too
+            semantic = getattr(self.memory, "semantic", None)
+            if expired and semantic is not None:
+                semantic.forget_before(cutoff.isoformat())
+
+            result = {
+                "kept": sum(len(conversation) for conversation in kept),
+                "archived": sum(len(chunk) for chunk in archived),
+                "forgotten": sum(len(chunk) for chunk in expired),
+                "rollups": len(rollups),
+                "segments_removed": self._rotate_archives(now),
+                "context_expired": self._expire_context(now),
+                "elapsed_ms": (time.perf_counter() - start) * 1000
+            }
+
+        with self._lock:
+            self.runs += 1
+            for key in ("archived", "forgotten", "rollups", "segments_removed", "context_expired"):
+                self.totals[key] += result[key]
+            self.last_result = result
+        if result["archived"] or result["forgotten"] or result["context_expired"]:
+            logger.info(f"Memory compaction: {result}")
+        return result
+
+    def get_rollups(self, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get rollups of removed conversations.
+
+        Args:
+            n: Number of most recent rollups, or None for all
+
+        Returns:
+            Rollups, oldest first
+        """
+        return self.rollups.read_all() if n is None else self.rollups.tail(n)
+
+    def _run(self) -> None:
+        """Compact every interval until stopped."""
+        while not self._stop.wait(self.policy.compaction_interval):
+            try:
+                self.compact()
+            except Exception as e:
+                logger.error(f"Memory compaction failed: {e}")
+
+    def start(self) -> None:
+        """Start background compaction."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="memory-compaction", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop background compaction and close the rollup log."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5.0)
+        self._thread = None
+        self.rollups.close()
+        write_behind_flusher.flush(self.state_path)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get compaction counters.
+
+        Returns:
+            Dictionary with runs, totals of archived and forgotten entries,
+            rollups, removed segments and expired context values, and the
+            last compaction result
+        """
+        with self._lock:
+            return dict(self.totals, runs=self.runs, last=self.last_result)
+
+    def reset_stats(self) -> None:
+        """Reset the counters."""
+        self.runs = 0
+        self.totals = {"archived": 0, "forgotten": 0, "rollups": 0, "segments_removed": 0, "context_expired": 0}
+        self.last_result: Optional[Dict[str, Any]] = None
@@ -0,0 +1,277 @@
+"""
+Memory Search Module
+
+This module provides full-text search over the conversation history. Queries
+are keywords and quoted phrases that must all match; results are ranked with
+BM25 and can be filtered by speaker and time range and paginated. The
+SearchIndex here is an in-memory inverted index maintained incrementally as
+entries are added; the SQLite backend answers the same queries with FTS5.
+"""
+
+import re
+import math
+import heapq
+import bisect
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Tuple, Iterator
+
+logger = logging.getLogger(__name__)
+
+# BM25 parameters, the same defaults FTS5 uses
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+DEFAULT_SEARCH_LIMIT = 10
+
+TOKEN_PATTERN = re.compile(r"\w+")
+PHRASE_PATTERN = re.compile(r'"([^"]*)"')
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase word tokens.
+
+    Args:
+        text: Text to split
+
+    Returns:
+        Tokens in order
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def parse_query(query: str) -> Tuple[List[str], List[List[str]]]:
+    """
+    Split a query into keywords and quoted phrases.
+
+    Args:
+        query: Query such as 'weather "in london"'
+
+    Returns:
+        Tuple of keywords and phrases (each a list of tokens)
+    """
+    query = query or ""
+    terms = tokenize(PHRASE_PATTERN.sub(" ", query))
+    phrases = []
+    for phrase in PHRASE_PATTERN.findall(query):
+        tokens = tokenize(phrase)
+        if len(tokens) == 1:
+            terms.extend(tokens)
+        elif tokens:
+            phrases.append(tokens)
+    return terms, phrases
+
+
+def to_fts5_query(query: str) -> str:
+    """
+    Translate a query into an FTS5 MATCH expression.
+
+    Every keyword and phrase is quoted, so FTS5 operators in user input are
+    matched as plain words.
+
+    Args:
+        query: Search query
+
+    Returns:
+        MATCH expression, or an empty string if the query has no words
+    """
+    terms, phrases = parse_query(query)
+    parts = [f'"{term}"' for term in terms] + ['"' + " ".join(tokens) + '"' for tokens in phrases]
+    return " ".join(parts)
+
+
+def matches_filters(entry: Dict[str, Any], start: Optional[str] = None, end: Optional[str] = None,
+                    speaker: Optional[str] = None) -> bool:
+    """Whether an entry has start <= timestamp < end and, if given, the speaker."""
+    timestamp = entry.get("timestamp", "")
+    return ((start is None or timestamp >= start) and (end is None or timestamp < end) and
+            (speaker is None or entry.get("speaker") == speaker))
+
+
+class SearchResults:
+    """
+    One page of search results.
+    """
+
+    def __init__(self, query: str, results: List[Dict[str, Any]], total: int,
+                 offset: int = 0, limit: Optional[int] = DEFAULT_SEARCH_LIMIT, elapsed_ms: float = 0.0):
+        """
+        Initialize a page of results.
+
+        Args:
+            query: Query that produced the results
+            results: Matching entries on this page, each with a "score"
+            total: Number of matching entries across all pages
+            offset: Index of the first result on this page
+            limit: Page size, or None for every result
+            elapsed_ms: Time the search took in milliseconds
+        """
+        self.query = query
+        self.results = results
+        self.total = total
+        self.offset = offset
+        self.limit = limit
+        self.elapsed_ms = elapsed_ms
+
+    @property
+    def has_more(self) -> bool:
+        """Whether there are results after this page."""
+        return self.offset + len(self.results) < self.total
+
+    def texts(self) -> List[str]:
+        """Get the text of each result on this page."""
+        return [entry.get("text", "") for entry in self.results]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.results)
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+    def __repr__(self) -> str:
+        return f"SearchResults(query={self.query!r}, results={len(self.results)}, total={self.total}, offset={self.offset})"
+
+
+class SearchIndex:
+    """
+    Inverted index over conversation entries with BM25 ranking.
+    """
+
+    def __init__(self, entries: Optional[List[Dict[str, Any]]] = None):
+        """
+        Initialize the index.
+
+        Args:
+            entries: Entries to index, oldest first
+        """
+        self._lock = threading.Lock()
+        self.clear()
+        if entries:
+            self.add_entries(entries)
+
+    def clear(self) -> None:
+        """Remove every entry from the index."""
+        with self._lock:
+            self._entries: List[Dict[str, Any]] = []
+            self._lengths: List[int] = []
+            self._timestamps: List[str] = []
+            # term -> {entry id: positions of the term in the entry}
+            self._postings: Dict[str, Dict[int, List[int]]] = {}
+            self._total_length = 0
+            # Range-only queries bisect the timestamps while entries arrive in order
+            self._chronological = True
+
+    def add_entries(self, entries: List[Dict[str, Any]]) -> None:
+        """
+        Index entries appended to the history.
+
+        Args:
+            entries: Entries in the order they were added
+        """
+        with self._lock:
+            for entry in entries:
+                doc_id = len(self._entries)
+                tokens = tokenize(entry.get("text", ""))
+                for position, token in enumerate(tokens):
+                    self._postings.setdefault(token, {}).setdefault(doc_id, []).append(position)
+
+                timestamp = entry.get("timestamp", "")
+                if self._timestamps and timestamp < self._timestamps[-1]:
+                    self._chronological = False
+                self._entries.append(entry)
+                self._lengths.append(len(tokens))
+                self._timestamps.append(timestamp)
+                self._total_length += len(tokens)
+
+    def add_entry(self, entry: Dict[str, Any]) -> None:
+        """Index one entry appended to the history."""
+        self.add_entries([entry])
+
+    def _has_phrase(self, doc_id: int, tokens: List[str]) -> bool:
+        """Whether an entry contains the tokens next to each other."""
+        positions = [set(self._postings[token][doc_id]) for token in tokens[1:]]
+        return any(all(first + i + 1 in following for i, following in enumerate(positions))
+                   for first in self._postings[tokens[0]][doc_id])
+
+    def _score(self, doc_id: int, terms: List[str], average_length: float) -> float:
+        """BM25 score of an entry for the query terms."""
+        count = len(self._entries)
+        length_norm = 1 - BM25_B + BM25_B * self._lengths[doc_id] / average_length
+        score = 0.0
+        for term in terms:
+            postings = self._postings[term]
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            frequency = len(postings[doc_id])
+            score += idf * frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * length_norm)
+        return score
+
+    def _range_ids(self, start: Optional[str], end: Optional[str]) -> range:
+        """Ids of the entries that can be inside a time range."""
+        if not self._chronological:
+            return range(len(self._entries))
+        low = 0 if start is None else bisect.bisect_left(self._timestamps, start)
+        high = len(self._entries) if end is None else bisect.bisect_left(self._timestamps, end)
+        return range(low, high)
+
+    def search(self, query: str, start: Optional[str] = None, end: Optional[str] = None,
+               speaker: Optional[str] = None, limit: Optional[int] = DEFAULT_SEARCH_LIMIT,
+               offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Find entries matching every keyword and phrase of a query.
+
+        Args:
+            query: Keywords and quoted phrases; an empty query matches every
+                   entry within the filters
+            start: Earliest timestamp to include
+            end: Timestamp to stop before
+            speaker: Only match entries by this speaker
+            limit: Maximum number of results, or None for all
+            offset: Number of results to skip
+
+        Returns:
+            Tuple of the page of matching entries, each copied with a
+            "score", best first (newest first for an empty query), and the
+            total number of matches
+        """
+        terms, phrases = parse_query(query)
+        required = list(dict.fromkeys(terms + [token for tokens in phrases for token in tokens]))
+
+        with self._lock:
+            if not required:
+                matches = [doc_id for doc_id in self._range_ids(start, end)
+                           if matches_filters(self._entries[doc_id], start, end, speaker)]
+                matches.reverse()
+                page = matches[offset:] if limit is None else matches[offset:offset + limit]
+                return [dict(self._entries[doc_id], score=0.0) for doc_id in page], len(matches)
+
+            if any(term not in self._postings for term in required):
+                return [], 0
+
+            # Intersect postings starting from the rarest term
+            ordered = sorted(required, key=lambda term: len(self._postings[term]))
+            candidates = set(self._postings[ordered[0]])
+            for term in ordered[1:]:
+                candidates.intersection_update(self._postings[term])
+                if not candidates:
+                    return [], 0
+
+            matches = [doc_id for doc_id in candidates
+                       if matches_filters(self._entries[doc_id], start, end, speaker)
+                       and all(self._has_phrase(doc_id, tokens) for tokens in phrases)]
+
+            average_length = self._total_length / len(self._entries) or 1.0
+            scored = [(self._score(doc_id, required, average_length), doc_id) for doc_id in matches]
+            if limit is None:
+                ranked = sorted(scored, reverse=True)[offset:]
+            else:
+                ranked = heapq.nlargest(offset + limit, scored)[offset:]
+            return [dict(self._entries[doc_id], score=score) for score, doc_id in ranked], len(matches)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def vocabulary_size(self) -> int:
+        """Number of distinct indexed terms."""
+        return len(self._postings)
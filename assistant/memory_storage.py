@@ -0,0 +1,753 @@
+"""
+Memory Storage Module
+
+This module provides the storage backends behind MemoryManager. The JSON
+backend keeps the original file layout (an append-only conversation log
+plus preference and context JSON files). The SQLite backend keeps
+everything in one database in WAL mode with indexed tables, so recent
+history and time ranges are read with indexed queries instead of loading
+the whole history, and readers on other threads are never blocked by the
+writer. Both backends answer full-text searches: the JSON backend with an
+in-memory index built on first use, the SQLite backend with FTS5.
+
+Given a FileLock, either backend can share its directory with other
+processes: writes are made holding the lock, the JSON backend merges the
+keys it changed into the preference and context files instead of
+overwriting them, and external_changes() tells a process what the others
+changed.
+"""
+
+import os
+import json
+import sqlite3
+import logging
+import threading
+from contextlib import nullcontext
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Set, Tuple
+
+from assistant.conversation_log import ConversationLog, DEFAULT_FSYNC_INTERVAL
+from assistant.file_utils import atomic_write_json
+from assistant.memory_sync import FileLock, file_stamp
+from assistant.memory_search import SearchIndex, matches_filters, to_fts5_query, DEFAULT_SEARCH_LIMIT
+from assistant.write_behind import WriteBehindFlusher, write_behind_flusher
+
+
+logger = logging.getLogger(__name__)
+
+# Storage backend names
+BACKEND_JSON = "json"
+BACKEND_SQLITE = "sqlite"
+
+DATABASE_FILENAME = "memory.db"
+
+# Conversation entries collected before they are written, per JSON log
+# batch or SQLite transaction. Fewer are written by the write-behind
+# flusher within its interval, so a quiet session never holds entries
+# longer than that.
+DEFAULT_BUFFER_ENTRIES = 32
+DEFAULT_BATCH_SIZE = 32
+
+# Parts of the store reported by external_changes()
+CHANGED_HISTORY = "history"
+CHANGED_PREFERENCES = "preferences"
+CHANGED_CONTEXT = "context"
+
+# Marks a key removed in a pending JSON change
+_DELETED = object()
+
+# Conversation entries read per query when iterating the history
+DEFAULT_ITER_BATCH_SIZE = 1000
+
+# Entry fields with their own columns; anything else goes in "extra"
+ENTRY_COLUMNS = ("speaker", "text", "timestamp")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversation (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    speaker TEXT NOT NULL,
+    text TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_conversation_timestamp ON conversation (timestamp);
+CREATE INDEX IF NOT EXISTS idx_conversation_speaker_timestamp ON conversation (speaker, timestamp);
+CREATE TABLE IF NOT EXISTS preferences (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS context (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Statements are kept as constants so sqlite3's statement cache reuses
+# their prepared form
+INSERT_ENTRY_SQL = "INSERT INTO conversation (speaker, text, timestamp, extra) VALUES (?, ?, ?, ?)"
+SELECT_RECENT_SQL = "SELECT speaker, text, timestamp, extra FROM conversation ORDER BY id DESC LIMIT ?"
+SELECT_ALL_SQL = "SELECT speaker, text, timestamp, extra FROM conversation ORDER BY id"
+SELECT_AFTER_SQL = ("SELECT id, speaker, text, timestamp, extra FROM conversation "
+                    "WHERE id > ? AND id <= ? ORDER BY id LIMIT ?")
+MAX_ID_SQL = "SELECT MAX(id) FROM conversation"
+COUNT_ENTRIES_SQL = "SELECT COUNT(*) FROM conversation"
+DELETE_ENTRIES_SQL = "DELETE FROM conversation"
+UPSERT_SQL = "INSERT INTO {table} (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value"
+SELECT_ITEMS_SQL = "SELECT key, value FROM {table}"
+DELETE_ITEMS_SQL = "DELETE FROM {table}"
+DELETE_ITEM_SQL = "DELETE FROM {table} WHERE key = ?"
+
+# Full-text index kept in sync with the conversation table by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE conversation_fts USING fts5(text, content='conversation', content_rowid='id');
+CREATE TRIGGER conversation_fts_insert AFTER INSERT ON conversation BEGIN
+    INSERT INTO conversation_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER conversation_fts_delete AFTER DELETE ON conversation BEGIN
+    INSERT INTO conversation_fts (conversation_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+INSERT INTO conversation_fts (conversation_fts) VALUES ('rebuild');
+"""
+FTS_EXISTS_SQL = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'conversation_fts'"
+SEARCH_FROM_SQL = ("FROM conversation_fts JOIN conversation c ON c.id = conversation_fts.rowid "
+                   "WHERE conversation_fts MATCH ?")
+
+
+class MemoryStorage:
+    """
+    Interface of a MemoryManager storage backend.
+    """
+
+    # Held while writing when other processes share the store
+    lock: Optional[FileLock] = None
+
+    def locked(self):
+        """Hold the store lock, if shared, e.g. across a read and a rewrite."""
+        return self.lock if self.lock is not None else nullcontext()
+
+    def external_changes(self) -> Set[str]:
+        """
+        Check which parts of a shared store other processes changed since
+        this storage last wrote or loaded them.
+
+        Returns:
+            Set of "history", "preferences" and "context"
+        """
+        return set()
+
+    def append_entries(self, entries: List[Dict[str, Any]]) -> None:
+        """Append conversation entries."""
+        raise NotImplementedError
+
+    def replace_entries(self, entries: Iterable[Dict[str, Any]]) -> None:
+        """
+        Replace the whole conversation history.
+
+        Entries are consumed as they are written, so they can be streamed.
+        If iterating them raises, the old history is kept.
+        """
+        raise NotImplementedError
+
+    def recent_entries(self, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get the n most recent conversation entries, oldest first, or all if n is None."""
+        raise NotImplementedError
+
+    def range_entries(self, start: Optional[str] = None, end: Optional[str] = None,
+                      speaker: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get entries with start <= timestamp < end, optionally for one speaker, oldest first."""
+        raise NotImplementedError
+
+    def count_entries(self) -> int:
+        """Get the number of conversation entries."""
+        raise NotImplementedError
+
+    def iter_entries(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over all conversation entries, oldest first, without loading them all at once."""
+        raise NotImplementedError
+
+    def search_entries(self, query: str, start: Optional[str] = None, end: Optional[str] = None,
+                       speaker: Optional[str] = None, limit: Optional[int] = DEFAULT_SEARCH_LIMIT,
+                       offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """Get a page of entries matching a query and the total number of matches. See SearchIndex.search."""
+        raise NotImplementedError
+
+    def load_preferences(self) -> Dict[str, Any]:
+        """Get all user preferences."""
+        raise NotImplementedError
+
+    def set_preference(self, key: str, value: Any, preferences: Dict[str, Any]) -> None:
+        """Store one user preference; preferences is the full updated mapping."""
+        raise NotImplementedError
+
+    def replace_preferences(self, preferences: Dict[str, Any]) -> None:
+        """Replace all user preferences."""
+        raise NotImplementedError
+
+    def load_context(self) -> Dict[str, Any]:
+        """Get all context data."""
+        raise NotImplementedError
+
+    def set_context(self, key: str, value: Any, context: Dict[str, Any]) -> None:
+        """Store one context value; context is the full updated mapping."""
+        raise NotImplementedError
+
+    def replace_context(self, context: Dict[str, Any]) -> None:
+        """Replace all context data."""
+        raise NotImplementedError
+
+    def delete_context(self, keys: List[str]) -> None:
+        """Remove context values."""
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Write pending changes and sync them to disk."""
+
+    def close(self) -> None:
+        """Flush and release open files or connections."""
+
+
+class JsonMemoryStorage(MemoryStorage):
+    """
+    Stores history in an append-only JSONL log and the rest in JSON files.
+
+    Preference and context changes are written behind: each change updates
+    a snapshot and marks its file dirty, and the flusher writes the file
+    atomically once per interval however many changes were made. Buffered
+    conversation entries are written by the flusher the same way. When the
+    store is shared, the flusher instead applies the changed keys to the
+    file as it is on disk, holding the lock, so other processes' keys are
+    kept.
+    """
+
+    def __init__(self, history_log_path: str, preferences_path: str, context_path: str,
+                 buffer_entries: int = DEFAULT_BUFFER_ENTRIES,
+                 fsync_interval: Optional[float] = DEFAULT_FSYNC_INTERVAL,
+                 flusher: Optional[WriteBehindFlusher] = None, lock: Optional[FileLock] = None):
+        """
+        Initialize the JSON storage.
+
+        Args:
+            history_log_path: Path of the conversation log
+            preferences_path: Path of the preferences file
+            context_path: Path of the context file
+            buffer_entries: Conversation entries buffered before they are written;
+                            fewer are written by the flusher
+            fsync_interval: Seconds between fsyncs of the conversation log
+            flusher: Write-behind flusher; defaults to the shared one, so every
+                     storage for the same file sees its pending writes
+            lock: FileLock of the store, if other processes share it
+        """
+        self.lock = lock
+        self.flusher = flusher or write_behind_flusher
+        # Entries still buffered by an earlier storage for this log land first
+        self.flusher.flush(history_log_path)
+        self.log = ConversationLog(history_log_path, buffer_entries, fsync_interval, lock)
+        self.preferences_path = preferences_path
+        self.context_path = context_path
+        self._lock = threading.Lock()
+        # Snapshots written by the flusher, by file path
+        self._snapshots: Dict[str, Dict[str, Any]] = {preferences_path: {}, context_path: {}}
+        # Keys changed since the last write and whether the file is replaced
+        # outright, by file path; used to merge writes into a shared file
+        self._changes: Dict[str, Dict[str, Any]] = {preferences_path: {}, context_path: {}}
+        self._replaced: Dict[str, bool] = {preferences_path: False, context_path: False}
+        # Stamps of the files as last loaded or written by this storage
+        self._stamps: Dict[str, Any] = {}
+        # Built from the log on the first search, then kept up to date
+        self._search_index: Optional[SearchIndex] = None
+        self._index_lock = threading.Lock()
+
+    def migrate_json(self, json_path: str) -> int:
+        """Move a legacy JSON history into the log. See ConversationLog.migrate_json."""
+        return self.log.migrate_json(json_path)
+
+    def append_entries(self, entries: List[Dict[str, Any]]) -> None:
+        with self._index_lock:
+            for entry in entries:
+                self.log.append(entry)
+            if self._search_index is not None:
+                self._search_index.add_entries(entries)
+        if self.log.pending:
+            self.flusher.mark_dirty(self.log.path, self.log.flush)
+
+    def replace_entries(self, entries: Iterable[Dict[str, Any]]) -> None:
+        with self._index_lock:
+            self.log.rewrite(entries)
+            self._search_index = None
+
+    def recent_entries(self, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        return self.log.read_all() if n is None else self.log.tail(n)
+
+    def range_entries(self, start: Optional[str] = None, end: Optional[str] = None,
+                      speaker: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        matches = [entry for entry in self.log.read_all() if matches_filters(entry, start, end, speaker)]
+        return matches if limit is None else matches[:limit]
+
+    def count_entries(self) -> int:
+        return len(self.log)
+
+    def iter_entries(self) -> Iterator[Dict[str, Any]]:
+        return self.log.iter_entries()
+
+    def external_changes(self) -> Set[str]:
+        changed = set()
+        if self.log.changed_externally():
+            changed.add(CHANGED_HISTORY)
+            with self._index_lock:
+                self._search_index = None
+        if self.lock is not None:
+            for name, path in ((CHANGED_PREFERENCES, self.preferences_path), (CHANGED_CONTEXT, self.context_path)):
+                if file_stamp(path) != self._stamps.get(path):
+                    changed.add(name)
+        return changed
+
+    def search_entries(self, query: str, start: Optional[str] = None, end: Optional[str] = None,
+                       speaker: Optional[str] = None, limit: Optional[int] = DEFAULT_SEARCH_LIMIT,
+                       offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        with self._index_lock:
+            if self._search_index is None:
+                self._search_index = SearchIndex(self.log.read_all())
+            index = self._search_index
+        return index.search(query, start, end, speaker, limit, offset)
+
+    def _flush_key(self, path: str) -> str:
+        """Key of a file's pending write; per storage when shared, since each merges its own changes."""
+        return path if self.lock is None else f"{path}#{id(self):x}"
+
+    @staticmethod
+    def _read(path: str) -> Dict[str, Any]:
+        """Read a JSON mapping, or an empty one if the file is missing or empty."""
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {}
+
+    def _load(self, path: str) -> Dict[str, Any]:
+        """Load a JSON mapping, or an empty one if the file is missing or empty."""
+        # Writes still pending from any storage for this file land first
+        self.flusher.flush(self._flush_key(path))
+        # Stamped before reading, so a write racing the read is seen next time
+        stamp = file_stamp(path)
+        data = self._read(path)
+        with self._lock:
+            self._snapshots[path] = dict(data)
+            self._stamps[path] = stamp
+        return data
+
+    def _write(self, path: str) -> None:
+        """Write the current snapshot of a file atomically, or merge the changes into a shared one."""
+        with self._lock:
+            data = dict(self._snapshots[path])
+            changes, self._changes[path] = self._changes[path], {}
+            replaced, self._replaced[path] = self._replaced[path], False
+        if not os.path.isdir(os.path.dirname(os.path.abspath(path))):
+            logger.warning(f"Memory directory of {path} no longer exists, dropping pending write")
+            return
+        if self.lock is None:
+            atomic_write_json(path, data)
+            return
+
+        try:
+            with self.lock:
+                if not replaced:
+                    data = self._read(path)
+                    for key, value in changes.items():
+                        if value is _DELETED:
+                            data.pop(key, None)
+                        else:
+                            data[key] = value
+                stamp_before = file_stamp(path)
+                atomic_write_json(path, data)
+                stamp = file_stamp(path)
+        except Exception:
+            with self._lock:
+                # Retried by the flusher; changes made since take precedence
+                self._changes[path] = {**changes, **self._changes[path]}
+                self._replaced[path] = self._replaced[path] or replaced
+            raise
+        with self._lock:
+            # Another process's write merged in here still counts as an
+            # external change, so it is reloaded
+            if stamp_before == self._stamps.get(path):
+                self._stamps[path] = stamp
+
+    def _schedule(self, path: str) -> None:
+        """Schedule the write of a file."""
+        self.flusher.mark_dirty(self._flush_key(path), lambda: self._write(path))
+
+    def _set(self, path: str, key: str, value: Any) -> None:
+        """Update one key of a snapshot and schedule the write."""
+        with self._lock:
+            self._snapshots[path][key] = value
+            self._changes[path][key] = value
+        self._schedule(path)
+
+    def _delete(self, path: str, keys: List[str]) -> None:
+        """Remove keys from a snapshot and schedule the write."""
+        with self._lock:
+            for key in keys:
+                self._snapshots[path].pop(key, None)
+                self._changes[path][key] = _DELETED
+        self._schedule(path)
+
+    def _replace(self, path: str, data: Dict[str, Any]) -> None:
+        """Replace a snapshot and schedule the write."""
+        with self._lock:
+            self._snapshots[path] = dict(data)
+            self._changes[path] = {}
+            self._replaced[path] = True
+        self._schedule(path)
+
+    def load_preferences(self) -> Dict[str, Any]:
+        return self._load(self.preferences_path)
+
+    def set_preference(self, key: str, value: Any, preferences: Dict[str, Any]) -> None:
+        self._set(self.preferences_path, key, value)
+
+    def replace_preferences(self, preferences: Dict[str, Any]) -> None:
+        self._replace(self.preferences_path, preferences)
+
+    def load_context(self) -> Dict[str, Any]:
+        return self._load(self.context_path)
+
+    def set_context(self, key: str, value: Any, context: Dict[str, Any]) -> None:
+        self._set(self.context_path, key, value)
+
+    def replace_context(self, context: Dict[str, Any]) -> None:
+        self._replace(self.context_path, context)
+
+    def delete_context(self, keys: List[str]) -> None:
+        self._delete(self.context_path, keys)
+
+    def flush(self) -> None:
+        self.log.sync()
+        self.flusher.flush(self._flush_key(self.preferences_path))
+        self.flusher.flush(self._flush_key(self.context_path))
+
+    def close(self) -> None:
+        self.log.close()
+        self.flusher.flush(self._flush_key(self.preferences_path))
+        self.flusher.flush(self._flush_key(self.context_path))
+
+
+class SQLiteMemoryStorage(MemoryStorage):
+    """
+    Stores history, preferences and context in one SQLite database.
+
+    SQLite already serializes writers across processes; when the store is
+    shared, writes also take the store lock so processes queue on it
+    instead of retrying on a busy database, and entries are written as
+    they are appended so other processes see them.
+    """
+
+    def __init__(self, path: str, batch_size: int = DEFAULT_BATCH_SIZE, lock: Optional[FileLock] = None,
+                 flusher: Optional[WriteBehindFlusher] = None):
+        """
+        Initialize the SQLite storage, creating the schema if needed.
+
+        Args:
+            path: Path of the database file
+            batch_size: Conversation entries collected before they are
+                        written in one transaction; fewer are written by
+                        the flusher
+            lock: FileLock of the store, if other processes share it
+            flusher: Write-behind flusher; defaults to the shared one
+        """
+        self.path = path
+        self.lock = lock
+        self.batch_size = 1 if lock is not None else max(1, batch_size)
+        self.flusher = flusher or write_behind_flusher
+        # Entries still collected by an earlier storage for this database land first
+        self.flusher.flush(path)
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[str, str, str, Optional[str]]] = []
+        # Held from taking collected entries until they are committed, so
+        # batches written by the flusher and by appends land in order
+        self._write_lock = threading.Lock()
+
+        connection = self._connection()
+        # Processes opening a shared store at once must not both create it
+        with self.locked():
+            connection.executescript(SCHEMA)
+            self.fts_enabled = self._create_search_index(connection)
+        # Used instead of FTS5 when SQLite is built without it
+        self._search_index: Optional[SearchIndex] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection, so readers on other threads run concurrently."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False,
+                                         isolation_level=None, cached_statements=64)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def _create_search_index(self, connection: sqlite3.Connection) -> bool:
+        """Create the FTS5 index, indexing existing entries, unless it exists."""
+        if connection.execute(FTS_EXISTS_SQL).fetchone():
+            return True
+        try:
+            connection.executescript("BEGIN;" + FTS_SCHEMA + "COMMIT;")
+            return True
+        except sqlite3.OperationalError as e:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            logger.warning(f"FTS5 unavailable, searching {self.path} with an in-memory index: {e}")
+            return False
+
+    @staticmethod
+    def _range_conditions(start: Optional[str], end: Optional[str], speaker: Optional[str],
+                          prefix: str = "") -> Tuple[List[str], List[Any]]:
+        """Build the WHERE conditions and parameters of a range query."""
+        conditions, params = [], []
+        if speaker is not None:
+            conditions.append(f"{prefix}speaker = ?")
+            params.append(speaker)
+        if start is not None:
+            conditions.append(f"{prefix}timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            conditions.append(f"{prefix}timestamp < ?")
+            params.append(end)
+        return conditions, params
+
+    @staticmethod
+    def _to_row(entry: Dict[str, Any]) -> Tuple[str, str, str, Optional[str]]:
+        """Split an entry into its columns."""
+        extra = {key: value for key, value in entry.items() if key not in ENTRY_COLUMNS}
+        return (entry.get("speaker", ""), entry.get("text", ""), entry.get("timestamp", ""),
+                json.dumps(extra) if extra else None)
+
+    @staticmethod
+    def _to_entry(row: Tuple[str, str, str, Optional[str]]) -> Dict[str, Any]:
+        """Rebuild an entry from its columns."""
+        entry = {"speaker": row[0], "text": row[1], "timestamp": row[2]}
+        if row[3]:
+            entry.update(json.loads(row[3]))
+        return entry
+
+    def _write_pending(self) -> None:
+        """Insert collected entries in one transaction."""
+        with self._write_lock:
+            with self._lock:
+                rows, self._pending = self._pending, []
+            if not rows:
+                return
+            connection = self._connection()
+            with self.locked(), connection:
+                connection.execute("BEGIN")
+                connection.executemany(INSERT_ENTRY_SQL, rows)
+            if self._search_index is not None:
+                self._search_index.add_entries([self._to_entry(row) for row in rows])
+
+    def append_entries(self, entries: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._pending.extend(self._to_row(entry) for entry in entries)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._write_pending()
+        elif self._pending:
+            self.flusher.mark_dirty(self.path, self._write_pending)
+
+    def replace_entries(self, entries: Iterable[Dict[str, Any]]) -> None:
+        with self._write_lock:
+            with self._lock:
+                self._pending = []
+            connection = self._connection()
+            with self.locked(), connection:
+                connection.execute("BEGIN")
+                connection.execute(DELETE_ENTRIES_SQL)
+                connection.executemany(INSERT_ENTRY_SQL, (self._to_row(entry) for entry in entries))
+            self._search_index = None
+
+    def recent_entries(self, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        self._write_pending()
+        connection = self._connection()
+        if n is None:
+            return [self._to_entry(row) for row in connection.execute(SELECT_ALL_SQL)]
+        if n <= 0:
+            return []
+        rows = connection.execute(SELECT_RECENT_SQL, (n,)).fetchall()
+        return [self._to_entry(row) for row in reversed(rows)]
+
+    def range_entries(self, start: Optional[str] = None, end: Optional[str] = None,
+                      speaker: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        self._write_pending()
+        conditions, params = self._range_conditions(start, end, speaker)
+
+        sql = "SELECT speaker, text, timestamp, extra FROM conversation"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY timestamp, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [self._to_entry(row) for row in self._connection().execute(sql, params)]
+
+    def count_entries(self) -> int:
+        self._write_pending()
+        return self._connection().execute(COUNT_ENTRIES_SQL).fetchone()[0]
+
+    def iter_entries(self, batch_size: int = DEFAULT_ITER_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over all conversation entries, reading one batch per query.
+
+        Entries appended while iterating are not included.
+
+        Args:
+            batch_size: Entries read per query
+        """
+        self._write_pending()
+        connection = self._connection()
+        last_id = connection.execute(MAX_ID_SQL).fetchone()[0]
+        if last_id is None:
+            return
+        after = 0
+        while True:
+            rows = connection.execute(SELECT_AFTER_SQL, (after, last_id, batch_size)).fetchall()
+            if not rows:
+                return
+            after = rows[-1][0]
+            for row in rows:
+                yield self._to_entry(row[1:])
+
+    def search_entries(self, query: str, start: Optional[str] = None, end: Optional[str] = None,
+                       speaker: Optional[str] = None, limit: Optional[int] = DEFAULT_SEARCH_LIMIT,
+                       offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        self._write_pending()
+        if not self.fts_enabled:
+            if self._search_index is None:
+                self._search_index = SearchIndex(self.recent_entries())
+            return self._search_index.search(query, start, end, speaker, limit, offset)
+
+        connection = self._connection()
+        match = to_fts5_query(query)
+        conditions, params = self._range_conditions(start, end, speaker, prefix="c.")
+        page = (-1 if limit is None else limit, offset)
+
+        if not match:
+            where = " WHERE " + " AND ".join(conditions) if conditions else ""
+            rows = connection.execute(
+                "SELECT c.speaker, c.text, c.timestamp, c.extra, 0.0 FROM conversation c" + where +
+                " ORDER BY c.timestamp DESC, c.id DESC LIMIT ? OFFSET ?", params + list(page)).fetchall()
+            total = connection.execute("SELECT COUNT(*) FROM conversation c" + where, params).fetchone()[0]
+        else:
+            where = "".join(f" AND {condition}" for condition in conditions)
+            # bm25() is lower for better matches; scores are reported higher-is-better
+            rows = connection.execute(
+                "SELECT c.speaker, c.text, c.timestamp, c.extra, -bm25(conversation_fts) AS score " +
+                SEARCH_FROM_SQL + where + " ORDER BY score DESC, c.id DESC LIMIT ? OFFSET ?",
+                [match] + params + list(page)).fetchall()
+            total = connection.execute("SELECT COUNT(*) " + SEARCH_FROM_SQL + where, [match] + params).fetchone()[0]
+        return [dict(self._to_entry(row[:4]), score=row[4]) for row in rows], total
+
+    def external_changes(self) -> Set[str]:
+        """
+        Check whether other connections changed the database since this
+        thread's connection last checked. The database cannot tell which
+        table changed, so any change reports all of them, as does the
+        first check on a thread.
+        """
+        if self.lock is None:
+            return set()
+        version = self._connection().execute("PRAGMA data_version").fetchone()[0]
+        last, self._local.data_version = getattr(self._local, "data_version", None), version
+        if version == last:
+            return set()
+        self._search_index = None
+        return {CHANGED_HISTORY, CHANGED_PREFERENCES, CHANGED_CONTEXT}
+
+    def _load_items(self, table: str) -> Dict[str, Any]:
+        """Load a key-value table."""
+        rows = self._connection().execute(SELECT_ITEMS_SQL.format(table=table))
+        return {key: json.loads(value) for key, value in rows}
+
+    def _set_item(self, table: str, key: str, value: Any) -> None:
+        """Insert or update one key-value row."""
+        with self.locked():
+            self._connection().execute(UPSERT_SQL.format(table=table), (key, json.dumps(value)))
+
+    def _delete_items(self, table: str, keys: List[str]) -> None:
+        """Delete key-value rows in one transaction."""
+        connection = self._connection()
+        with self.locked(), connection:
+            connection.execute("BEGIN")
+            connection.executemany(DELETE_ITEM_SQL.format(table=table), ((key,) for key in keys))
+
+    def _replace_items(self, table: str, items: Dict[str, Any]) -> None:
+        """Replace a key-value table in one transaction."""
+        connection = self._connection()
+        with self.locked(), connection:
+            connection.execute("BEGIN")
+            connection.execute(DELETE_ITEMS_SQL.format(table=table))
+            connection.executemany(UPSERT_SQL.format(table=table),
+                                   ((key, json.dumps(value)) for key, value in items.items()))
+
+    def load_preferences(self) -> Dict[str, Any]:
+        return self._load_items("preferences")
+
+    def set_preference(self, key: str, value: Any, preferences: Dict[str, Any]) -> None:
+        self._set_item("preferences", key, value)
+
+    def replace_preferences(self, preferences: Dict[str, Any]) -> None:
+        self._replace_items("preferences", preferences)
+
+    def load_context(self) -> Dict[str, Any]:
+        return self._load_items("context")
+
+    def set_context(self, key: str, value: Any, context: Dict[str, Any]) -> None:
+        self._set_item("context", key, value)
+
+    def replace_context(self, context: Dict[str, Any]) -> None:
+        self._replace_items("context", context)
+
+    def delete_context(self, keys: List[str]) -> None:
+        self._delete_items("context", keys)
+
+    def flush(self) -> None:
+        self._write_pending()
+        self._connection().execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def close(self) -> None:
+        self._write_pending()
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+
+def create_storage(backend: str, data_dir: str, **options) -> MemoryStorage:
+    """
+    Create a storage backend for a memory directory.
+
+    Args:
+        backend: "json" or "sqlite"
+        data_dir: Memory directory
+        **options: buffer_entries and fsync_interval for JSON, batch_size for
+                   SQLite, flusher, the WriteBehindFlusher for deferred
+                   writes, and lock, the FileLock of a store shared with
+                   other processes
+
+    Returns:
+        Storage backend
+    """
+    if backend == BACKEND_JSON:
+        return JsonMemoryStorage(
+            os.path.join(data_dir, "conversation_history.jsonl"),
+            os.path.join(data_dir, "user_preferences.json"),
+            os.path.join(data_dir, "context_data.json"),
+            options.get("buffer_entries", DEFAULT_BUFFER_ENTRIES),
+            options.get("fsync_interval", DEFAULT_FSYNC_INTERVAL),
+            flusher=options.get("flusher"), lock=options.get("lock")
+        )
+    if backend == BACKEND_SQLITE:
+        return SQLiteMemoryStorage(os.path.join(data_dir, DATABASE_FILENAME),
+                                   options.get("batch_size", DEFAULT_BATCH_SIZE), options.get("lock"),
+                                   options.get("flusher"))
+    raise ValueError(f"Unknown memory storage backend: {backend}")
@@ -0,0 +1,321 @@
+"""
+Memory Sync Module
+
+This module lets several assistant processes share one memory directory.
+Writers take an advisory lock on a file in the directory, so appends,
+rewrites and merges of the store never interleave across processes. Each
+process keeps its in-memory caches coherent by polling for changes made by
+the others: a stat of the store's files or SQLite's data_version tells it
+cheaply whether anything changed, and only then does it reload the recent
+history window and the small preference and context data.
+"""
+
+import os
+import json
+import time
+import logging
+import tempfile
+import threading
+import multiprocessing
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+LOCK_FILENAME = "memory.lock"
+VECTORS_LOCK_FILENAME = "memory_vectors.lock"
+
+# Seconds between checks for changes made by other processes
+DEFAULT_SYNC_INTERVAL = 1.0
+
+
+def file_stamp(path: str) -> Optional[Tuple[int, int, int]]:
+    """
+    Identify the current version of a file without reading it.
+
+    Atomic rewrites replace the inode and appends grow the size, so either
+    changes the stamp.
+
+    Args:
+        path: Path of the file
+
+    Returns:
+        Tuple of inode, size and modification time, or None if it is missing
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+class FileLock:
+    """
+    Advisory lock on a file, exclusive across processes and reentrant
+    within one.
+
+    Threads of the process serialize on an in-process lock first, so the
+    file lock is taken once however many threads or nested calls want it.
+    Where fcntl is unavailable only the in-process lock is held.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the lock. The lock file is created on first use.
+
+        Args:
+            path: Path of the lock file
+        """
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._fd: Optional[int] = None
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+        if not FCNTL_AVAILABLE:
+            logger.warning(f"fcntl unavailable, {path} only locks out threads of this process")
+
+    def _lock_file(self, blocking: bool) -> bool:
+        """Take the file lock, counting contention and time spent waiting."""
+        if not FCNTL_AVAILABLE:
+            return True
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            with self._stats_lock:
+                self.contended += 1
+            if not blocking:
+                return False
+        start = time.perf_counter()
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        with self._stats_lock:
+            self.wait_time += time.perf_counter() - start
+        return True
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """
+        Acquire the lock.
+
+        Args:
+            blocking: Wait for the lock, or give up at once if it is held
+
+        Returns:
+            True if the lock was acquired
+        """
+        if not self._lock.acquire(blocking):
+            return False
+        if self._depth == 0:
+            try:
+                locked = self._lock_file(blocking)
+            except BaseException:
+                self._lock.release()
+                raise
+            if not locked:
+                self._lock.release()
+                return False
+            with self._stats_lock:
+                self.acquisitions += 1
+        self._depth += 1
+        return True
+
+    def release(self) -> None:
+        """Release the lock."""
+        self._depth -= 1
+        if self._depth == 0 and FCNTL_AVAILABLE:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._lock.release()
+
+    def close(self) -> None:
+        """Close the lock file. The lock must not be held."""
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get lock counters.
+
+        Returns:
+            Dictionary with file lock acquisitions, acquisitions that found
+            the lock held by another process and milliseconds spent waiting
+        """
+        with self._stats_lock:
+            return {
+                "acquisitions": self.acquisitions,
+                "contended": self.contended,
+                "wait_ms": self.wait_time * 1000
+            }
+
+    def reset_stats(self) -> None:
+        """Reset lock counters."""
+        with self._stats_lock:
+            self.acquisitions = 0
+            self.contended = 0
+            self.wait_time = 0.0
+
+
+def claim_file(path: str) -> Optional[int]:
+    """
+    Take a lock on a file for as long as this process wants it, without
+    waiting, to pick one owner among the processes sharing a store.
+
+    Args:
+        path: Path of the lock file
+
+    Returns:
+        Descriptor holding the lock, for release_claim(), or None if another
+        process holds it
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    if FCNTL_AVAILABLE:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+    return fd
+
+
+def release_claim(fd: int) -> None:
+    """Release a lock taken by claim_file()."""
+    os.close(fd)
+
+
+class StoreWatcher:
+    """
+    Calls a refresh function at an interval on a background thread.
+    """
+
+    def __init__(self, refresh: Callable[[], Any], interval: float = DEFAULT_SYNC_INTERVAL):
+        """
+        Initialize the watcher.
+
+        Args:
+            refresh: Function picking up changes made by other processes
+            interval: Seconds between calls
+        """
+        self.refresh = refresh
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        """Refresh every interval until stopped."""
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Refreshing shared memory failed: {e}")
+
+    def start(self) -> None:
+        """Start watching."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="memory-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop watching."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5.0)
+        self._thread = None
+
+
+def _benchmark_worker(data_dir: str, backend: str, index: int, entries: int,
+                      barrier, results) -> None:
+    """Add entries and preferences from one process of the benchmark."""
+    from assistant.memory_manager import MemoryManager
+
+    manager = MemoryManager(data_dir=data_dir, storage_backend=backend, history_window=50, shared=True)
+    barrier.wait()
+    start = time.perf_counter()
+    for i in range(entries):
+        manager.add_conversation_entry(f"process-{index}", str(i))
+        if i % 10 == 0:
+            manager.set_user_preference(f"process-{index}", i)
+    manager.flush()
+    elapsed = time.perf_counter() - start
+    results.put({"index": index, "elapsed_s": elapsed, "lock": manager.store_lock.get_stats()})
+    manager.close()
+
+
+def concurrent_writers_benchmark(processes: int = 4, entries: int = 500, backend: str = "json",
+                                 data_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Write to one memory directory from several processes at once and check
+    nothing was lost.
+
+    Args:
+        processes: Number of writer processes
+        entries: Conversation entries added by each process; every tenth
+                 also sets a preference
+        backend: Storage backend, "json" or "sqlite"
+        data_dir: Memory directory; a temporary one if None
+
+    Returns:
+        Dictionary with entries written, entries per second across all
+        processes, the slowest process's time, lock contention and whether
+        every entry and preference arrived intact
+    """
+    from assistant.memory_manager import MemoryManager
+
+    if data_dir is None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            return concurrent_writers_benchmark(processes, entries, backend, temp_dir)
+
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(processes)
+    results = context.Queue()
+    workers = [context.Process(target=_benchmark_worker, args=(data_dir, backend, i, entries, barrier, results))
+               for i in range(processes)]
+    for worker in workers:
+        worker.start()
+    reports = [results.get(timeout=120) for _ in workers]
+    for worker in workers:
+        worker.join()
+
+    manager = MemoryManager(data_dir=data_dir, storage_backend=backend, shared=True)
+    stored: Dict[str, List[int]] = {}
+    for entry in manager.storage.iter_entries():
+        stored.setdefault(entry["speaker"], []).append(int(entry["text"]))
+    last_preference = (entries - 1) // 10 * 10
+    intact = (len(stored) == processes and
+              all(texts == list(range(entries)) for texts in stored.values()) and
+              all(manager.get_user_preference(f"process-{i}") == last_preference for i in range(processes)))
+    manager.close()
+
+    elapsed = max(report["elapsed_s"] for report in reports)
+    return {
+        "backend": backend,
+        "processes": processes,
+        "entries": processes * entries,
+        "entries_per_second": processes * entries / elapsed if elapsed else 0.0,
+        "slowest_s": elapsed,
+        "lock_contended": sum(report["lock"]["contended"] for report in reports),
+        "lock_wait_ms": sum(report["lock"]["wait_ms"] for report in reports),
+        "intact": intact
+    }
+
+
+if __name__ == "__main__":
+    for backend in ("json", "sqlite"):
+        for processes in (1, 2, 4):
+            print(json.dumps(concurrent_writers_benchmark(processes, backend=backend)))
@@ -0,0 +1,828 @@
+"""
+Memory Vectors Module
+
+This module provides semantic recall over the conversation history. Entries
+are embedded in the background as they arrive and their vectors appended to
+a float16 file that is searched through a read-only memory map, so the index
+never has to fit in RAM. The row-to-entry map is an append-only conversation
+log read by position. Small indexes are searched with a blocked matrix
+product; past a size threshold an inverted-file (IVF) index of k-means
+clusters limits each search to the clusters nearest the query. Entries are
+embedded with a sentence-embedding model when one is configured, or with a
+dependency-free hashing embedder otherwise.
+"""
+
+import os
+import json
+import math
+import time
+import zlib
+import itertools
+import queue
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Tuple, Callable, Iterator
+
+# Optional import for vector search
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Optional imports for sentence embeddings
+try:
+    import torch
+    from transformers import AutoConfig, AutoModel, AutoTokenizer
+    TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    TRANSFORMERS_AVAILABLE = False
+
+from assistant.conversation_log import ConversationLog
+from assistant.file_utils import atomic_write_json
+from assistant.memory_search import tokenize
+
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILENAME = "memory_vectors.f16"
+IDS_FILENAME = "memory_vectors_ids.jsonl"
+META_FILENAME = "memory_vectors.json"
+CENTROIDS_FILENAME = "memory_vectors_centroids.npy"
+ASSIGNMENTS_FILENAME = "memory_vectors_lists.i32"
+
+DEFAULT_DIM = 256
+# Rows scored per matrix product, bounding the memory a search uses
+DEFAULT_BLOCK_SIZE = 16384
+# Rows at which searches switch from a full scan to the IVF index
+DEFAULT_IVF_THRESHOLD = 50000
+# Clusters searched per query
+DEFAULT_NPROBE = 8
+DEFAULT_EMBED_BATCH_SIZE = 64
+
+EMBEDDER_HASHING = "hashing"
+EMBEDDER_SENTENCE = "sentence"
+DEFAULT_SENTENCE_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+# Tokens per text given to the sentence-embedding model
+DEFAULT_MAX_TOKENS = 128
+
+MIN_LISTS = 16
+MAX_LISTS = 4096
+SAMPLE_PER_LIST = 64
+KMEANS_ITERATIONS = 10
+
+
+class HashingEmbedder:
+    """
+    Dependency-free embedder hashing words, word pairs and character
+    trigrams into a fixed number of signed buckets.
+
+    Any object with a name, a dim and an embed(texts) method returning
+    L2-normalized float32 rows can be used instead, such as SentenceEmbedder.
+    Hashing only matches shared words and spellings, so it is the fallback
+    when no sentence-embedding model is available.
+    """
+
+    name = "hashing-v1"
+
+    def __init__(self, dim: int = DEFAULT_DIM):
+        """
+        Initialize the embedder.
+
+        Args:
+            dim: Vector dimension
+        """
+        self.dim = dim
+
+    def _features(self, text: str) -> Iterator[Tuple[str, float]]:
+        """Yield the hashed features of a text with their weights."""
+        tokens = tokenize(text)
+        for token in tokens:
+            yield token, 1.0
+            padded = f"#{token}#"
+            for i in range(len(padded) - 2):
+                yield "c:" + padded[i:i + 3], 0.5
+        for first, second in zip(tokens, tokens[1:]):
+            yield f"{first} {second}", 1.0
+
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        """
+        Embed texts.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            Array of shape (len(texts), dim) with L2-normalized rows
+        """
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text):
+                h = zlib.crc32(feature.encode("utf-8"))
+                vectors[row, h % self.dim] += weight if h & 0x80000000 else -weight
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+class SentenceEmbedder:
+    """
+    Embedder mean-pooling the token states of a transformers sentence
+    embedding model, so paraphrases without shared words are recalled.
+
+    The model is only loaded from a local directory or the local model
+    hub cache, so startup never waits on the network. Only its configuration
+    is read up front, for the dimension; the weights are loaded on the first
+    embed(), which normally runs on the background embedding thread.
+    """
+
+    def __init__(self, model_path: str = DEFAULT_SENTENCE_MODEL, device: str = "auto",
+                 max_tokens: int = DEFAULT_MAX_TOKENS):
+        """
+        Initialize the embedder.
+
+        Args:
+            model_path: Local directory or model hub name of a cached model
+            device: "cpu", "cuda", "mps" or "auto" to pick the fastest available
+            max_tokens: Tokens per text; longer texts are truncated
+
+        Raises:
+            ImportError: If torch and transformers are not installed
+            OSError: If the model is not available locally
+        """
+        if not TRANSFORMERS_AVAILABLE:
+            raise ImportError("torch and transformers are required for sentence embeddings")
+        self.model_path = model_path
+        self.name = f"sentence:{model_path}"
+        self.dim = AutoConfig.from_pretrained(model_path, local_files_only=True).hidden_size
+        self.max_tokens = max_tokens
+
+        if device == "auto":
+            device = "cpu"
+            if torch.cuda.is_available():
+                device = "cuda"
+            elif hasattr(torch.backends, 'mps') and torch.backends.mps.is_available():
+                device = "mps"
+        self.device = device
+
+        self.tokenizer = None
+        self.model = None
+        self._load_lock = threading.Lock()
+
+    def _load(self) -> None:
+        """Load the tokenizer and model weights once."""
+        with self._load_lock:
+            if self.model is not None:
+                return
+            tokenizer = AutoTokenizer.from_pretrained(self.model_path, local_files_only=True)
+            model = AutoModel.from_pretrained(self.model_path, local_files_only=True)
+            model.to(self.device)
+            model.eval()
+            self.tokenizer = tokenizer
+            self.model = model
+            logger.info(f"Loaded sentence embedding model {self.model_path} on {self.device}")
+
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        """
+        Embed texts.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            Array of shape (len(texts), dim) with L2-normalized rows
+        """
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        if self.model is None:
+            self._load()
+
+        encoded = self.tokenizer(texts, padding=True, truncation=True, max_length=self.max_tokens,
+                                 return_tensors="pt").to(self.device)
+        with torch.no_grad():
+            states = self.model(**encoded).last_hidden_state
+        # Average the token states, ignoring padding
+        mask = encoded["attention_mask"].unsqueeze(-1).to(states.dtype)
+        pooled = (states * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+        pooled = torch.nn.functional.normalize(pooled, dim=1)
+        return pooled.cpu().numpy().astype(np.float32)
+
+
+def create_embedder(kind: str = EMBEDDER_HASHING, **options) -> Any:
+    """
+    Create the embedder for semantic recall.
+
+    A sentence embedder that cannot be created, because torch and
+    transformers are missing or the model has not been downloaded, falls
+    back to the hashing embedder.
+
+    Args:
+        kind: "hashing" or "sentence"
+        **options: dim for hashing; model_path, device and max_tokens for sentence
+
+    Returns:
+        Embedder
+    """
+    if kind == EMBEDDER_SENTENCE:
+        try:
+            return SentenceEmbedder(options.get("model_path", DEFAULT_SENTENCE_MODEL),
+                                    options.get("device", "auto"),
+                                    options.get("max_tokens", DEFAULT_MAX_TOKENS))
+        except Exception as e:
+            logger.warning(f"Sentence embeddings unavailable, using the hashing embedder (download the model "
+                           f"or point models.embeddings.model_path at a local copy): {e}")
+    elif kind != EMBEDDER_HASHING:
+        raise ValueError(f"Unknown memory embedder: {kind}")
+    return HashingEmbedder(options.get("dim", DEFAULT_DIM))
+
+
+class VectorIndex:
+    """
+    Append-only float16 vector file with a row-to-entry map and an optional
+    IVF index, searched by cosine similarity.
+    """
+
+    def __init__(self, directory: str, dim: int, embedder_name: str = HashingEmbedder.name,
+                 block_size: int = DEFAULT_BLOCK_SIZE, ivf_threshold: int = DEFAULT_IVF_THRESHOLD,
+                 nprobe: int = DEFAULT_NPROBE):
+        """
+        Initialize the index, recovering from an interrupted append.
+
+        Args:
+            directory: Directory of the index files
+            dim: Vector dimension
+            embedder_name: Embedder the vectors come from; the index is reset
+                           if it was built with another embedder or dimension
+            block_size: Rows scored per matrix product
+            ivf_threshold: Rows at which the IVF index is trained
+            nprobe: Clusters searched per query once the IVF index exists
+        """
+        self.directory = directory
+        self.dim = dim
+        self.embedder_name = embedder_name
+        self.block_size = max(1, block_size)
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+
+        self.vectors_path = os.path.join(directory, VECTORS_FILENAME)
+        self.meta_path = os.path.join(directory, META_FILENAME)
+        self.centroids_path = os.path.join(directory, CENTROIDS_FILENAME)
+        self.assignments_path = os.path.join(directory, ASSIGNMENTS_FILENAME)
+        self.ids = ConversationLog(os.path.join(directory, IDS_FILENAME), fsync_interval=None)
+
+        self._lock = threading.RLock()
+        self._vector_file = None
+        self._assignments_file = None
+        self._memmap: Optional["np.memmap"] = None
+        self._count = 0
+        self._meta: Dict[str, Any] = {}
+        self._centroids: Optional["np.ndarray"] = None
+        self._lists: List["np.ndarray"] = []
+
+        os.makedirs(directory, exist_ok=True)
+        self._recover()
+
+    @property
+    def row_bytes(self) -> int:
+        """Bytes per stored vector."""
+        return self.dim * 2
+
+    @property
+    def ivf_enabled(self) -> bool:
+        """Whether searches use the IVF index."""
+        return self._centroids is not None
+
+    def _recover(self) -> None:
+        """Check the files against each other and trim rows from a torn append."""
+        meta = {}
+        if os.path.exists(self.meta_path):
+            try:
+                with open(self.meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (json.JSONDecodeError, OSError) as e:
+                logger.error(f"Error loading vector index metadata: {e}")
+        if not meta and not os.path.exists(self.vectors_path) and not len(self.ids):
+            # A new index; files are created on the first append
+            return
+        if meta.get("dim") != self.dim or meta.get("embedder") != self.embedder_name:
+            if meta:
+                logger.warning(f"Vector index in {self.directory} was built with {meta.get('embedder')} "
+                               f"({meta.get('dim')} dims), rebuilding it")
+            self.reset()
+            return
+        self._meta = meta
+
+        # Vectors are written before their ids, so either may be a few rows ahead
+        rows = os.path.getsize(self.vectors_path) // self.row_bytes if os.path.exists(self.vectors_path) else 0
+        self._count = min(rows, len(self.ids))
+        if os.path.exists(self.vectors_path) and os.path.getsize(self.vectors_path) != self._count * self.row_bytes:
+            logger.warning(f"Trimming {self.vectors_path} to {self._count} vectors")
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(self._count * self.row_bytes)
+        if len(self.ids) > self._count:
+            logger.warning(f"Trimming {self.ids.path} to {self._count} entries")
+            self.ids.rewrite(itertools.islice(self.ids.iter_entries(), self._count))
+
+        if os.path.exists(self.centroids_path):
+            self._load_ivf()
+
+    def _write_meta(self) -> None:
+        """Write the index metadata atomically."""
+        self._meta.update(dim=self.dim, embedder=self.embedder_name, dtype="float16")
+        atomic_write_json(self.meta_path, self._meta)
+
+    def _close_files(self) -> None:
+        """Close the append handles and drop the memory map."""
+        for handle in (self._vector_file, self._assignments_file):
+            if handle is not None:
+                handle.close()
+        self._vector_file = self._assignments_file = None
+        self._memmap = None
+
+    def reset(self) -> None:
+        """Remove every vector."""
+        with self._lock:
+            self._close_files()
+            for path in (self.vectors_path, self.centroids_path, self.assignments_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.ids.clear()
+            self._count = 0
+            self._centroids = None
+            self._lists = []
+            self._meta = {}
+            self._write_meta()
+
+    def _matrix(self) -> Optional["np.memmap"]:
+        """Map the stored vectors read-only, remapping after appends."""
+        if self._count == 0:
+            return None
+        if self._memmap is None or self._memmap.shape[0] != self._count:
+            self._memmap = np.memmap(self.vectors_path, dtype=np.float16, mode="r", shape=(self._count, self.dim))
+        return self._memmap
+
+    def add(self, vectors: "np.ndarray", entries: List[Dict[str, Any]]) -> None:
+        """
+        Append vectors and the entries they were computed from.
+
+        Args:
+            vectors: Array of shape (len(entries), dim) with L2-normalized rows
+            entries: Conversation entries, one per row
+        """
+        if len(entries) == 0:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(entries), self.dim)
+        with self._lock:
+            if "dim" not in self._meta:
+                self._write_meta()
+            if self._vector_file is None:
+                self._vector_file = open(self.vectors_path, "ab")
+            self._vector_file.write(vectors.astype(np.float16).tobytes())
+            self._vector_file.flush()
+            for entry in entries:
+                self.ids.append(entry)
+            self.ids.flush()
+
+            first_row = self._count
+            self._count += len(entries)
+            if self._centroids is not None:
+                self._append_assignments(self._assign(vectors), first_row)
+
+            trained_rows = self._meta.get("ivf_trained_rows", 0)
+            if self._count >= self.ivf_threshold and (self._centroids is None or self._count >= 2 * trained_rows):
+                self._train_ivf()
+
+    def _assign(self, vectors: "np.ndarray") -> "np.ndarray":
+        """Find the nearest cluster of each vector."""
+        return np.argmax(vectors.astype(np.float32) @ self._centroids.T, axis=1).astype(np.int32)
+
+    def _append_assignments(self, assignments: "np.ndarray", first_row: int) -> None:
+        """Record the clusters of newly added rows."""
+        if self._assignments_file is None:
+            self._assignments_file = open(self.assignments_path, "ab")
+        self._assignments_file.write(assignments.tobytes())
+        self._assignments_file.flush()
+        rows = np.arange(first_row, first_row + len(assignments), dtype=np.int64)
+        for cluster in np.unique(assignments):
+            self._lists[cluster] = np.concatenate([self._lists[cluster], rows[assignments == cluster]])
+
+    def _build_lists(self, assignments: "np.ndarray") -> None:
+        """Group row numbers by cluster."""
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(len(self._centroids) + 1))
+        self._lists = [order[bounds[i]:bounds[i + 1]].astype(np.int64) for i in range(len(self._centroids))]
+
+    def _load_ivf(self) -> None:
+        """Load the IVF index, assigning rows added after it was written."""
+        try:
+            self._centroids = np.load(self.centroids_path)
+            assignments = (np.fromfile(self.assignments_path, dtype=np.int32)
+                           if os.path.exists(self.assignments_path) else np.empty(0, dtype=np.int32))
+        except (OSError, ValueError) as e:
+            logger.error(f"Error loading IVF index, falling back to full scans: {e}")
+            self._centroids = None
+            return
+
+        stored = len(assignments)
+        assignments = assignments[:self._count]
+        matrix = self._matrix()
+        missing = [self._assign(matrix[start:min(start + self.block_size, self._count)])
+                   for start in range(len(assignments), self._count, self.block_size)]
+        assignments = np.concatenate([assignments] + missing) if missing else assignments
+        if len(assignments) != stored:
+            self._write_assignments(assignments)
+        self._build_lists(assignments)
+
+    def _write_assignments(self, assignments: "np.ndarray") -> None:
+        """Replace the assignments file."""
+        if self._assignments_file is not None:
+            self._assignments_file.close()
+            self._assignments_file = None
+        tmp_path = self.assignments_path + ".tmp"
+        assignments.astype(np.int32).tofile(tmp_path)
+        os.replace(tmp_path, self.assignments_path)
+
+    def _train_ivf(self) -> None:
+        """Cluster the vectors with spherical k-means and assign every row."""
+        start_time = time.perf_counter()
+        matrix = self._matrix()
+        lists = int(min(MAX_LISTS, max(MIN_LISTS, math.sqrt(self._count))))
+        rng = np.random.default_rng(0)
+        sample_rows = np.sort(rng.choice(self._count, size=min(self._count, lists * SAMPLE_PER_LIST), replace=False))
+        sample = np.asarray(matrix[sample_rows], dtype=np.float32)
+        centroids = sample[rng.choice(len(sample), size=lists, replace=False)].copy()
+
+        for _ in range(KMEANS_ITERATIONS):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            # Empty clusters keep their previous centroid
+            filled = np.bincount(assignments, minlength=lists) > 0
+            centroids[filled] = sums[filled]
+            centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+
+        self._centroids = centroids
+        assignments = np.concatenate([self._assign(matrix[start:min(start + self.block_size, self._count)])
+                                      for start in range(0, self._count, self.block_size)])
+        tmp_path = self.centroids_path + ".tmp.npy"
+        np.save(tmp_path, centroids)
+        os.replace(tmp_path, self.centroids_path)
+        self._write_assignments(assignments)
+        self._build_lists(assignments)
+        self._meta["ivf_trained_rows"] = self._count
+        self._write_meta()
+        logger.info(f"Trained IVF index with {lists} clusters over {self._count} vectors "
+                    f"in {(time.perf_counter() - start_time) * 1000:.0f} ms")
+
+    def _blocks(self, query: "np.ndarray") -> Iterator[Tuple["np.ndarray", "np.ndarray"]]:
+        """Yield row numbers and their stored vectors, one block at a time."""
+        matrix = self._matrix()
+        if self._centroids is None:
+            for start in range(0, self._count, self.block_size):
+                end = min(start + self.block_size, self._count)
+                yield np.arange(start, end), matrix[start:end]
+            return
+
+        probes = np.argsort(-(self._centroids @ query))[:self.nprobe]
+        rows = np.sort(np.concatenate([self._lists[cluster] for cluster in probes]))
+        for start in range(0, len(rows), self.block_size):
+            block_rows = rows[start:start + self.block_size]
+            yield block_rows, matrix[block_rows]
+
+    def search(self, query: "np.ndarray", k: int = 5) -> List[Tuple[int, float]]:
+        """
+        Find the rows most similar to a query vector.
+
+        Args:
+            query: L2-normalized query vector
+            k: Number of rows to return
+
+        Returns:
+            (row, cosine similarity) pairs, most similar first
+        """
+        query = np.asarray(query, dtype=np.float32).reshape(self.dim)
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        with self._lock:
+            if self._count == 0 or k <= 0:
+                return []
+            for rows, block in self._blocks(query):
+                scores = np.asarray(block, dtype=np.float32) @ query
+                best_rows = np.concatenate([best_rows, rows])
+                best_scores = np.concatenate([best_scores, scores])
+                if len(best_scores) > k:
+                    keep = np.argpartition(best_scores, -k)[-k:]
+                    best_rows, best_scores = best_rows[keep], best_scores[keep]
+
+        order = np.argsort(-best_scores, kind="stable")
+        return [(int(best_rows[i]), float(best_scores[i])) for i in order]
+
+    def entries(self, rows: List[int]) -> List[Dict[str, Any]]:
+        """Get the entries stored for rows."""
+        return self.ids.read_at(rows)
+
+    def last_entry(self) -> Optional[Dict[str, Any]]:
+        """Get the most recently indexed entry."""
+        with self._lock:
+            if self._count == 0:
+                return None
+            return self.ids.read_at([self._count - 1])[0]
+
+    def _entry_blocks(self) -> Iterator[List[Dict[str, Any]]]:
+        """Read the row-to-entry map in blocks of block_size rows."""
+        entries = itertools.islice(self.ids.iter_entries(), self._count)
+        while True:
+            block = list(itertools.islice(entries, self.block_size))
+            if not block:
+                return
+            yield block
+
+    def prune(self, keep: Callable[[Dict[str, Any]], bool]) -> int:
+        """
+        Remove the rows whose entries fail a test, rewriting the files.
+
+        The row-to-entry map is streamed in blocks like the matrix, so only
+        a boolean per row is held in memory.
+
+        Args:
+            keep: Returns True for entries to keep
+
+        Returns:
+            Number of rows removed
+        """
+        with self._lock:
+            if self._count == 0:
+                return 0
+            mask = np.concatenate([np.fromiter((keep(entry) for entry in block), dtype=bool, count=len(block))
+                                   for block in self._entry_blocks()])
+            removed = int(len(mask) - mask.sum())
+            if not removed:
+                return 0
+
+            matrix = self._matrix()
+            tmp_path = self.vectors_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                for start in range(0, self._count, self.block_size):
+                    end = min(start + self.block_size, self._count)
+                    f.write(np.ascontiguousarray(matrix[start:end][mask[start:end]]).tobytes())
+            del matrix
+            self._close_files()
+            os.replace(tmp_path, self.vectors_path)
+            self.ids.rewrite(itertools.compress(self.ids.iter_entries(), mask))
+            self._count -= removed
+
+            # Clusters are retrained from the remaining rows
+            self._centroids = None
+            self._lists = []
+            for path in (self.centroids_path, self.assignments_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._meta.pop("ivf_trained_rows", None)
+            if self._count >= self.ivf_threshold:
+                self._train_ivf()
+            else:
+                self._write_meta()
+            return removed
+
+    def sync(self) -> None:
+        """Flush the index files to disk."""
+        with self._lock:
+            for handle in (self._vector_file, self._assignments_file):
+                if handle is not None:
+                    handle.flush()
+                    os.fsync(handle.fileno())
+            self.ids.sync()
+
+    def close(self) -> None:
+        """Sync and close the index files."""
+        with self._lock:
+            self.sync()
+            self._close_files()
+            self.ids.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class SemanticMemory:
+    """
+    Embeds conversation entries in the background and recalls the ones
+    most similar to a query.
+    """
+
+    def __init__(self, directory: str, embedder=None, batch_size: int = DEFAULT_EMBED_BATCH_SIZE,
+                 **index_options):
+        """
+        Initialize semantic memory.
+
+        Args:
+            directory: Directory of the index files
+            embedder: Embedder with name, dim and embed(texts); defaults to HashingEmbedder
+            batch_size: Entries embedded per batch
+            **index_options: block_size, ivf_threshold and nprobe for the VectorIndex
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("numpy is required for semantic memory")
+        self.embedder = embedder or HashingEmbedder()
+        self.batch_size = max(1, batch_size)
+        self.index = VectorIndex(directory, self.embedder.dim, self.embedder.name, **index_options)
+
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    def start(self) -> None:
+        """Start the background embedding thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="memory-embedder", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, entries: List[Dict[str, Any]]) -> None:
+        """
+        Schedule entries to be embedded and indexed.
+
+        Args:
+            entries: Conversation entries in the order they were added
+        """
+        for entry in entries:
+            self._queue.put(entry)
+        if entries:
+            self.start()
+
+    def _run(self) -> None:
+        """Embed queued entries in batches until stopped."""
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                self._queue.task_done()
+                return
+            batch = [entry]
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    entry = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stop = True
+                    break
+                batch.append(entry)
+
+            self._index_batch(batch)
+            for _ in range(len(batch) + stop):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _index_batch(self, batch: List[Dict[str, Any]]) -> None:
+        """Embed and index one batch."""
+        start = time.perf_counter()
+        try:
+            vectors = self.embedder.embed([entry.get("text", "") for entry in batch])
+            self.index.add(vectors, batch)
+        except Exception as e:
+            logger.error(f"Failed to index {len(batch)} conversation entries: {e}")
+            with self._stats_lock:
+                self.failed += len(batch)
+            return
+        with self._stats_lock:
+            self.embedded += len(batch)
+            self.batches += 1
+            self.embed_time += time.perf_counter() - start
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued entry is indexed.
+
+        Args:
+            timeout: Seconds to wait, or None to wait indefinitely
+
+        Returns:
+            True if the queue drained in time
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def catch_up(self, range_entries: Callable[..., List[Dict[str, Any]]]) -> int:
+        """
+        Queue the stored entries the index has not seen yet.
+
+        The index is rebuilt if its last entry is no longer stored, as
+        happens when the history was cleared or replaced.
+
+        Args:
+            range_entries: Function returning the stored entries from an
+                           optional start timestamp, oldest first
+
+        Returns:
+            Number of entries queued
+        """
+        last = self.index.last_entry()
+        if last is None:
+            entries = range_entries()
+        else:
+            entries = range_entries(last.get("timestamp"))
+            for position in range(len(entries) - 1, -1, -1):
+                if entries[position] == last:
+                    entries = entries[position + 1:]
+                    break
+            else:
+                logger.info("Conversation history changed since it was indexed, rebuilding vector index")
+                self.index.reset()
+                entries = range_entries()
+        self.enqueue(entries)
+        return len(entries)
+
+    def rebuild(self, entries: List[Dict[str, Any]]) -> None:
+        """
+        Replace the index with one over the given entries.
+
+        Args:
+            entries: Entries to index, oldest first
+        """
+        self.wait()
+        self.index.reset()
+        self.enqueue(entries)
+
+    def forget_before(self, timestamp: str) -> int:
+        """
+        Remove entries older than a timestamp from the index.
+
+        Args:
+            timestamp: ISO timestamp of the oldest entry to keep
+
+        Returns:
+            Number of entries removed
+        """
+        self.wait()
+        return self.index.prune(lambda entry: entry.get("timestamp", "") >= timestamp)
+
+    def recall(self, query: str, k: int = 5, speaker: Optional[str] = None,
+               min_score: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Find the entries most similar to a query.
+
+        Args:
+            query: Text to compare against
+            k: Number of entries to return
+            speaker: Only return entries by this speaker
+            min_score: Lowest cosine similarity to return
+
+        Returns:
+            Entries copied with a "score", most similar first
+        """
+        vector = self.embedder.embed([query])[0]
+        # Over-fetch when filtering by speaker so k entries usually remain
+        hits = [(row, score) for row, score in self.index.search(vector, k if speaker is None else k * 4)
+                if score >= min_score]
+        entries = self.index.entries([row for row, _ in hits])
+        results = [dict(entry, score=score) for entry, (_, score) in zip(entries, hits)
+                   if speaker is None or entry.get("speaker") == speaker]
+        return results[:k]
+
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        Index what is queued, stop the thread and close the index.
+
+        Args:
+            timeout: Seconds to wait for the queue to drain
+        """
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=timeout)
+        self._thread = None
+        self.index.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get embedding counters.
+
+        Returns:
+            Dictionary with entries indexed, entries queued, failed entries,
+            batches, average embedding time per batch in milliseconds and
+            whether the IVF index is in use
+        """
+        with self._stats_lock:
+            return {
+                "indexed": len(self.index),
+                "embedded": self.embedded,
+                "queued": self._queue.unfinished_tasks,
+                "failed": self.failed,
+                "batches": self.batches,
+                "avg_batch_ms": self.embed_time * 1000 / self.batches if self.batches else 0.0,
+                "ivf": self.index.ivf_enabled
+            }
+
+    def reset_stats(self) -> None:
+        """Reset the counters."""
+        self.embedded = 0
+        self.failed = 0
+        self.batches = 0
+        self.embed_time = 0.0
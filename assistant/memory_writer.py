@@ -0,0 +1,390 @@
+"""
+Memory Writer Module
+
+This module provides the concurrency model of MemoryManager. All
+persistence runs on one writer thread fed by a queue, so storage is only
+ever written from one place and in the order changes were made; runs of
+queued appends are merged into one storage write. In-memory state is
+published as immutable snapshots that are replaced, never modified, on
+every change, so readers on any thread read a consistent view without
+taking a lock.
+"""
+
+import json
+import queue
+import random
+import logging
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from types import MappingProxyType
+from typing import Dict, List, Any, Optional, Callable, Mapping, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Queued operations run per batch; consecutive appends in a batch are merged
+DEFAULT_MAX_BATCH = 256
+
+# Seconds close() waits for queued writes
+DEFAULT_CLOSE_TIMEOUT = 10.0
+
+
+class MemorySnapshot:
+    """
+    Immutable view of MemoryManager's in-memory state at one version.
+    """
+
+    __slots__ = ("version", "history", "preferences", "context", "entry_count")
+
+    def __init__(self, version: int, history: Tuple[Any, ...], preferences: Dict[str, Any],
+                 context: Dict[str, Any], entry_count: int):
+        """
+        Initialize a snapshot.
+
+        Args:
+            version: Number of changes published before this snapshot
+            history: Entries of the history window, oldest first
+            preferences: User preferences; must not be modified afterwards
+            context: Context data; must not be modified afterwards
+            entry_count: Number of entries in the whole history
+        """
+        self.version = version
+        self.history = history
+        self.preferences: Mapping[str, Any] = MappingProxyType(preferences)
+        self.context: Mapping[str, Any] = MappingProxyType(context)
+        self.entry_count = entry_count
+
+    @property
+    def history_complete(self) -> bool:
+        """Whether the window holds every entry of the history."""
+        return len(self.history) >= self.entry_count
+
+    def __repr__(self) -> str:
+        return (f"MemorySnapshot(version={self.version}, entries={self.entry_count}, "
+                f"window={len(self.history)})")
+
+
+class MemoryWriter:
+    """
+    Runs write operations in order on a single background thread.
+    """
+
+    def __init__(self, name: str = "memory-writer", max_batch: int = DEFAULT_MAX_BATCH):
+        """
+        Initialize the writer. The thread starts on the first submitted operation.
+
+        Args:
+            name: Name of the writer thread
+            max_batch: Most queued operations taken per batch
+        """
+        self.name = name
+        self.max_batch = max(1, max_batch)
+        self._queue: "queue.Queue[Optional[Tuple[Callable, tuple, Future, bool]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    def start(self) -> None:
+        """Start the writer thread."""
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def on_writer_thread(self) -> bool:
+        """Whether the calling thread is the writer thread."""
+        return self._thread is threading.current_thread()
+
+    def _put(self, fn: Callable, args: tuple, merge: bool) -> Future:
+        """Queue an operation, starting the thread if needed."""
+        future: Future = Future()
+        self.start()
+        self._queue.put((fn, args, future, merge))
+        with self._stats_lock:
+            self.submitted += 1
+            self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return future
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """
+        Queue an operation.
+
+        Args:
+            fn: Function to run on the writer thread
+            *args: Arguments for fn
+
+        Returns:
+            Future resolved with fn's result or exception
+        """
+        return self._put(fn, args, False)
+
+    def append(self, fn: Callable[[List[Any]], Any], items: List[Any]) -> Future:
+        """
+        Queue an append. Consecutive queued appends to the same function
+        are merged into one call with all their items, in order.
+
+        Args:
+            fn: Function called with a list of items
+            items: Items to pass to fn
+
+        Returns:
+            Future resolved once the items have been handed to fn
+        """
+        return self._put(fn, (list(items),), True)
+
+    def call(self, fn: Callable, *args) -> Any:
+        """
+        Run an operation on the writer thread and wait for its result.
+
+        Called from the writer thread itself, fn runs immediately.
+
+        Args:
+            fn: Function to run
+            *args: Arguments for fn
+
+        Returns:
+            fn's result
+
+        Raises:
+            Whatever fn raised
+        """
+        if self.on_writer_thread():
+            return fn(*args)
+        return self.submit(fn, *args).result()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every operation queued before this call has run.
+
+        Args:
+            timeout: Seconds to wait, or None to wait indefinitely
+
+        Returns:
+            True if the operations ran in time
+        """
+        if self.on_writer_thread() or (self._thread is None and self._queue.empty()):
+            return True
+        try:
+            self.submit(_barrier).result(timeout)
+            return True
+        except TimeoutError:
+            return False
+
+    def _run(self) -> None:
+        """Run queued operations in batches until stopped."""
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            while item is not None and len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+
+            stop = batch[-1] is None
+            self._run_batch([item for item in batch if item is not None])
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _run_batch(self, batch: List[Tuple[Callable, tuple, Future, bool]]) -> None:
+        """Run one batch of operations, merging consecutive appends."""
+        start = time.perf_counter()
+        i = 0
+        while i < len(batch):
+            fn, args, future, merge = batch[i]
+            if not merge:
+                self._resolve([future], fn, args)
+                i += 1
+                continue
+
+            j = i + 1
+            while j < len(batch) and batch[j][3] and batch[j][0] == fn:
+                j += 1
+            items = [value for _, (values,), _, _ in batch[i:j] for value in values]
+            self._resolve([future for _, _, future, _ in batch[i:j]], fn, (items,))
+            with self._stats_lock:
+                self.merged += j - i - 1
+            i = j
+
+        with self._stats_lock:
+            self.batches += 1
+            self.busy_time += time.perf_counter() - start
+
+    def _resolve(self, futures: List[Future], fn: Callable, args: tuple) -> None:
+        """Run fn and resolve its futures."""
+        try:
+            result = fn(*args)
+        except Exception as e:
+            logger.error(f"Memory write failed: {e}")
+            with self._stats_lock:
+                self.errors += 1
+                self.completed += len(futures)
+            for future in futures:
+                future.set_exception(e)
+            return
+        with self._stats_lock:
+            self.completed += len(futures)
+        for future in futures:
+            future.set_result(result)
+
+    def close(self, timeout: float = DEFAULT_CLOSE_TIMEOUT) -> None:
+        """
+        Run what is queued and stop the thread. Later operations restart it.
+
+        Args:
+            timeout: Seconds to wait for the queue to drain
+        """
+        with self._start_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            if thread is not threading.current_thread():
+                thread.join(timeout=timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get writer counters.
+
+        Returns:
+            Dictionary with operations submitted and completed, operations
+            queued, the deepest the queue has been, batches, appends merged
+            into an earlier one, failed operations and the average batch time
+            in milliseconds
+        """
+        with self._stats_lock:
+            return {
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "queued": self._queue.qsize(),
+                "max_queue_depth": self.max_queue_depth,
+                "batches": self.batches,
+                "merged": self.merged,
+                "errors": self.errors,
+                "avg_batch_ms": self.busy_time * 1000 / self.batches if self.batches else 0.0
+            }
+
+    def reset_stats(self) -> None:
+        """Reset writer counters."""
+        with self._stats_lock:
+            self.submitted = 0
+            self.completed = 0
+            self.max_queue_depth = 0
+            self.batches = 0
+            self.merged = 0
+            self.errors = 0
+            self.busy_time = 0.0
+
+
+def _barrier() -> None:
+    """No-op queued by wait()."""
+
+
+def stress_test(memory, threads: int = 8, operations: int = 2000,
+                write_ratio: float = 0.2, seed: int = 0) -> Dict[str, Any]:
+    """
+    Hammer a MemoryManager from many threads at once and measure throughput.
+
+    Each thread mixes conversation appends and preference and context
+    updates with snapshot reads, history reads and counts. Afterwards every
+    thread's entries must be stored, in the order it added them.
+
+    Args:
+        memory: MemoryManager to exercise
+        threads: Number of threads
+        operations: Operations per thread
+        write_ratio: Fraction of operations that are writes
+        seed: Random seed
+
+    Returns:
+        Dictionary with operations, reads, writes, errors, elapsed seconds,
+        operations per second, whether the stored history is consistent and
+        the writer's stats
+    """
+    errors: List[str] = []
+    counts = {"reads": 0, "writes": 0}
+    counts_lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+    entries_before = memory.get_conversation_count()
+
+    def worker(index: int) -> None:
+        rng = random.Random(seed + index)
+        reads = writes = 0
+        barrier.wait()
+        try:
+            for i in range(operations):
+                if rng.random() < write_ratio:
+                    kind = rng.random()
+                    if kind < 0.6:
+                        memory.add_conversation_entry(f"thread-{index}", str(i))
+                    elif kind < 0.8:
+                        memory.set_user_preference(f"thread-{index}", i)
+                    else:
+                        memory.set_context_data(f"thread-{index}", i)
+                    writes += 1
+                else:
+                    kind = rng.random()
+                    if kind < 0.5:
+                        snapshot = memory.snapshot()
+                        if len(snapshot.history) > snapshot.entry_count:
+                            errors.append(f"snapshot {snapshot.version} has more entries than its count")
+                        for entry in snapshot.history:
+                            entry["text"]
+                    elif kind < 0.8:
+                        memory.get_conversation_history(10)
+                    elif kind < 0.9:
+                        memory.get_user_preference(f"thread-{index}")
+                    else:
+                        memory.get_conversation_count()
+                    reads += 1
+        except Exception as e:
+            errors.append(f"thread-{index}: {e!r}")
+        with counts_lock:
+            counts["reads"] += reads
+            counts["writes"] += writes
+
+    workers = [threading.Thread(target=worker, args=(i,), name=f"memory-stress-{i}") for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    memory.flush()
+    elapsed = time.perf_counter() - start
+
+    # Each thread's entries are stored in the order it added them
+    stored: Dict[str, List[int]] = {}
+    for entry in memory.storage.iter_entries():
+        if entry["speaker"].startswith("thread-"):
+            stored.setdefault(entry["speaker"], []).append(int(entry["text"]))
+    ordered = all(texts == sorted(texts) for texts in stored.values())
+    added = sum(len(texts) for texts in stored.values())
+    consistent = (ordered and memory.get_conversation_count() == entries_before + added and
+                  memory.storage.count_entries() == memory.get_conversation_count())
+
+    total = counts["reads"] + counts["writes"]
+    return {
+        "threads": threads,
+        "operations": total,
+        "reads": counts["reads"],
+        "writes": counts["writes"],
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "ops_per_second": total / elapsed if elapsed else 0.0,
+        "consistent": consistent,
+        "writer": memory.get_writer_stats()
+    }
+
+
+if __name__ == "__main__":
+    from assistant.memory_manager import MemoryManager
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = MemoryManager(data_dir=temp_dir)
+        print(json.dumps(stress_test(manager), indent=2))
+        manager.close()
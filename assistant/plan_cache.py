@@ -0,0 +1,167 @@
+"""
+Plan Cache Module
+
+This module caches the fully resolved plan of a command: its steps, their
+categories, dependencies and extracted entities, the intent, the system
+prompt context and the handler targets. Users repeat the same few commands all day, so a repeated
+command skips straight to execution. Each plan records the versions of the
+intents, prompts and handlers it was resolved against and is discarded once
+any of them changes.
+"""
+
+import re
+from typing import Dict, List, Any, Optional, Tuple, Callable, Hashable
+
+from assistant.lru_cache import LRUCache
+from assistant.command_grammar import CommandStep
+from assistant.step_planner import PlannedStep
+from assistant.entity_extractor import Entities
+
+
+# Default number of command plans kept in the cache
+DEFAULT_PLAN_CACHE_SIZE = 256
+
+
+def plan_key(text: str, wake_words: List[str] = ()) -> str:
+    """
+    Normalize a command into its plan cache key.
+
+    Collapses whitespace and strips a leading wake word. Case and
+    punctuation are kept, since step separators and handler arguments such
+    as message text depend on them.
+
+    Args:
+        text: Raw user input
+        wake_words: Wake words to strip from the start of the text
+
+    Returns:
+        Cache key, which is also the text the plan is resolved from
+    """
+    text = " ".join(text.split())
+
+    # Try longer wake words first so "hey samantha" wins over "samantha"
+    for wake_word in sorted(wake_words, key=len, reverse=True):
+        match = re.match(re.escape(wake_word) + r"\b[\s,.!?:;]*", text, re.IGNORECASE)
+        if match and match.end() < len(text):
+            return text[match.end():]
+
+    return text
+
+
+class CommandPlan:
+    """
+    Everything resolved about a command before its handlers run.
+    """
+
+    __slots__ = ("text", "category", "handler", "intent", "confidence",
+                 "prompt_context", "steps", "planned", "entities", "versions")
+
+    def __init__(self, text: str, category: str, handler: Callable, intent: str, confidence: float,
+                 prompt_context: str, steps: List[CommandStep], planned: List[PlannedStep],
+                 entities: Entities, versions: Tuple[Hashable, ...]):
+        """
+        Initialize a plan.
+
+        Args:
+            text: Command text the plan was resolved from
+            category: Command category of the whole command
+            handler: Handler target of the whole command
+            intent: Intent of the whole command
+            confidence: Confidence of the intent
+            prompt_context: System prompt context for the intent
+            steps: Parsed steps of the command
+            planned: Steps with their categories, dependencies and entities
+            entities: Entities of the lowercased command text
+            versions: Versions of the intents, prompts and handlers used
+        """
+        self.text = text
+        self.category = category
+        self.handler = handler
+        self.intent = intent
+        self.confidence = confidence
+        self.prompt_context = prompt_context
+        self.steps = steps
+        self.planned = planned
+        self.entities = entities
+        self.versions = versions
+
+    @property
+    def is_multi_step(self) -> bool:
+        """Whether the command has more than one step."""
+        return len(self.steps) > 1
+
+    def __repr__(self) -> str:
+        return f"CommandPlan({self.text!r}, {self.category!r}, {self.intent!r}, steps={len(self.steps)})"
+
+
+class PlanCache:
+    """
+    Bounded cache of command plans, validated against component versions.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_PLAN_CACHE_SIZE):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of plans kept. 0 disables caching.
+        """
+        self.cache = LRUCache(maxsize)
+        self.stale = 0
+
+    def get(self, key: str, versions: Tuple[Hashable, ...]) -> Optional[CommandPlan]:
+        """
+        Get the plan of a command if it is still valid.
+
+        Args:
+            key: Plan cache key
+            versions: Current versions of the intents, prompts and handlers
+
+        Returns:
+            Cached plan, or None if missing or resolved against older versions
+        """
+        plan = self.cache.get(key)
+        if plan is not None and plan.versions != versions:
+            # Resolved against an older configuration; the caller's new plan replaces it
+            self.stale += 1
+            return None
+        return plan
+
+    def put(self, key: str, plan: CommandPlan) -> None:
+        """
+        Store the plan of a command.
+
+        Args:
+            key: Plan cache key
+            plan: Resolved plan
+        """
+        self.cache.put(key, plan)
+
+    def clear(self) -> None:
+        """Drop all plans."""
+        self.cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get hit and miss counters of the plan cache.
+
+        Returns:
+            Dictionary with cache size, hits, misses, hit rate, evictions,
+            invalidations and stale plans found
+        """
+        stats = self.cache.get_stats()
+        # A stale plan is a hit for the underlying cache but a miss here
+        stats["hits"] -= self.stale
+        stats["misses"] += self.stale
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["stale"] = self.stale
+        return stats
+
+    def reset_stats(self) -> None:
+        """Reset the counters without dropping plans."""
+        self.cache.reset_stats()
+        self.stale = 0
+
+    def __len__(self) -> int:
+        return len(self.cache)
@@ -0,0 +1,255 @@
+"""
+Speculation Module
+
+This module warms up command handlers while the user is still speaking.
+Partial transcripts are classified with the cheap keyword index and the
+handler of the likely category is warmed up (resolving the browser,
+opening HTTP sessions, prefetching searches) in the background. When the
+final transcript arrives the guess is confirmed or cancelled. A handler
+that reuses what a confirmed warm-up prepared claims it with use(), and
+only then is the warm-up time counted as latency saved.
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Any, Optional, Callable
+
+
+logger = logging.getLogger(__name__)
+
+# Partial transcripts shorter than this are too ambiguous to act on
+DEFAULT_MIN_WORDS = 1
+
+# A warm-up function receives the partial text and an event set when the
+# guess is abandoned, and may return a value (e.g. prefetched results)
+WarmupFunction = Callable[[str, threading.Event], Any]
+
+
+class Speculation:
+    """
+    A warm-up started for a guessed category.
+    """
+
+    def __init__(self, category: str, text: str, future: Future, cancel_event: threading.Event):
+        """
+        Initialize a speculation.
+
+        Args:
+            category: Guessed command category
+            text: Partial text the guess was made on
+            future: Future of the running warm-up
+            cancel_event: Event set when the guess is abandoned
+        """
+        self.category = category
+        self.text = text
+        self.future = future
+        self.cancel_event = cancel_event
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        future.add_done_callback(self._mark_finished)
+
+    def _mark_finished(self, future: Future) -> None:
+        """Record when the warm-up finished."""
+        self.finished = time.perf_counter()
+
+    def cancel(self) -> None:
+        """Abandon the warm-up."""
+        self.cancel_event.set()
+        self.future.cancel()
+
+    @property
+    def result(self) -> Any:
+        """Value returned by the warm-up, or None if it has not finished or failed."""
+        if not self.future.done() or self.future.cancelled() or self.future.exception() is not None:
+            return None
+        return self.future.result()
+
+    def __repr__(self) -> str:
+        return f"Speculation({self.category!r}, {self.text!r}, done={self.future.done()})"
+
+
+class SpeculativeWarmer:
+    """
+    Guesses the command category from partial transcripts and warms up its handler.
+    """
+
+    def __init__(self, classify_fn: Callable[[str], Optional[str]],
+                 min_words: int = DEFAULT_MIN_WORDS, max_workers: int = 2):
+        """
+        Initialize the warmer.
+
+        Args:
+            classify_fn: Cheap classifier returning a category or None
+            min_words: Minimum number of words before guessing
+            max_workers: Maximum number of warm-ups running at once
+        """
+        self.classify_fn = classify_fn
+        self.min_words = min_words
+        self.max_workers = max_workers
+        self.warmups: Dict[str, WarmupFunction] = {}
+        self._current: Optional[Speculation] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def register_warmup(self, category: str, warmup: WarmupFunction) -> None:
+        """
+        Register the warm-up function of a category.
+
+        Args:
+            category: Command category
+            warmup: Function of (partial text, cancel event)
+        """
+        self.warmups[category] = warmup
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Get the warm-up pool, creating it on first use."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="warmup")
+        return self._executor
+
+    def _run_warmup(self, warmup: WarmupFunction, text: str, cancel_event: threading.Event) -> Any:
+        """Run a warm-up unless it was abandoned while queued."""
+        if cancel_event.is_set():
+            return None
+        return warmup(text, cancel_event)
+
+    def on_partial(self, text: str) -> Optional[str]:
+        """
+        Handle a partial transcript.
+
+        Starts a warm-up for the guessed category, replacing a running guess
+        for a different category. A guess for the same category keeps its
+        running warm-up.
+
+        Args:
+            text: Partial transcript so far
+
+        Returns:
+            Guessed category, or None if there is no guess yet
+        """
+        if len(text.split()) < self.min_words:
+            return None
+        category = self.classify_fn(text)
+        if category is None or category not in self.warmups:
+            return self._current.category if self._current else None
+
+        with self._lock:
+            current = self._current
+            if current is not None and current.category == category:
+                return category
+            if current is not None:
+                current.cancel()
+                self.cancelled += 1
+                logger.debug(f"Speculation changed from {current.category} to {category}")
+
+            cancel_event = threading.Event()
+            future = self._get_executor().submit(self._run_warmup, self.warmups[category], text, cancel_event)
+            self._current = Speculation(category, text, future, cancel_event)
+            self.speculations += 1
+            return category
+
+    def on_final(self, text: str, category: Optional[str] = None) -> Optional[Speculation]:
+        """
+        Handle the final transcript, confirming or cancelling the guess.
+
+        Args:
+            text: Final transcript
+            category: Category the command resolved to; classified if omitted
+
+        Returns:
+            The speculation if it guessed right, otherwise None
+        """
+        if category is None:
+            category = self.classify_fn(text)
+
+        with self._lock:
+            current, self._current = self._current, None
+            if current is None:
+                self.no_guess += 1
+                return None
+
+            if current.category != category:
+                current.cancel()
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return current
+
+    def use(self, speculation: Optional[Speculation], category: str) -> Any:
+        """
+        Claim the result of a confirmed warm-up for the handler to reuse.
+
+        Args:
+            speculation: Speculation returned by on_final, or None
+            category: Category of the handler claiming the result
+
+        Returns:
+            The warm-up's result, or None if there is none for this handler
+        """
+        if speculation is None or speculation.category != category:
+            return None
+        result = speculation.result
+        if result is None:
+            return None
+        with self._lock:
+            # Warm-up work the handler reuses is time it no longer spends
+            self.used += 1
+            self.latency_saved += (speculation.finished or time.perf_counter()) - speculation.started
+        return result
+
+    def cancel(self) -> None:
+        """Abandon the current guess, e.g. when recognition fails."""
+        with self._lock:
+            if self._current is not None:
+                self._current.cancel()
+                self._current = None
+                self.cancelled += 1
+
+    @property
+    def current(self) -> Optional[Speculation]:
+        """The running guess, if any."""
+        return self._current
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get speculation counters.
+
+        Returns:
+            Dictionary with speculations started, hits, misses, guesses
+            replaced or cancelled, finals without a guess, warm-up results
+            reused by handlers, hit rate and latency saved in milliseconds
+        """
+        with self._lock:
+            guesses = self.hits + self.misses
+            return {
+                "speculations": self.speculations,
+                "hits": self.hits,
+                "misses": self.misses,
+                "cancelled": self.cancelled,
+                "no_guess": self.no_guess,
+                "used": self.used,
+                "hit_rate": self.hits / guesses if guesses else 0.0,
+                "latency_saved_ms": self.latency_saved * 1000,
+                "avg_latency_saved_ms": self.latency_saved * 1000 / self.used if self.used else 0.0
+            }
+
+    def reset_stats(self) -> None:
+        """Reset the counters."""
+        self.speculations = 0
+        self.hits = 0
+        self.misses = 0
+        self.cancelled = 0
+        self.no_guess = 0
+        self.used = 0
+        self.latency_saved = 0.0
+
+    def shutdown(self) -> None:
+        """Cancel the current guess and stop the warm-up pool."""
+        self.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -71,6 +71,7 @@ class SpeechRecognitionService:
         self._continuous_thread = None
         self._result_queue = queue.Queue()
         self._callbacks = []
+        self._partial_callbacks: List[Callable[[str], None]] = []
 
         # Initialize recognizer
         self._initialize()
@@ -281,6 +282,44 @@ class SpeechRecognitionService:
         logger.info("Stopped continuous listening")
         return True
 
+    def add_partial_callback(self, callback: Callable[[str], None]) -> None:
+        """
+        Register a function called with partial transcripts while the user speaks.
+
+        Args:
+            callback: Function taking the transcript so far
+        """
+        if callback not in self._partial_callbacks:
+            self._partial_callbacks.append(callback)
+
+    def remove_partial_callback(self, callback: Callable[[str], None]) -> None:
+        """
+        Unregister a partial transcript callback.
+
+        Args:
+            callback: Previously registered function
+        """
+        if callback in self._partial_callbacks:
+            self._partial_callbacks.remove(callback)
+
+    def emit_partial_result(self, text: str) -> None:
+        """
+        Pass a partial transcript to the registered callbacks.
+
+        Called by streaming engines as recognition progresses; engines that
+        only produce a final transcript never call it.
+
+        Args:
+            text: Transcript so far
+        """
+        if not text.strip():
+            return
+        for callback in list(self._partial_callbacks):
+            try:
+                callback(text)
+            except Exception as e:
+                logger.error(f"Error in partial result callback: {e}")
+
     def _continuous_listen_thread(self) -> None:
         """Background thread function for continuous listening."""
         logger.debug("Continuous listening thread started")
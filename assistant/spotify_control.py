@@ -17,21 +17,25 @@ This is a partial update showing only the integration of system prompts.
 
 # Existing imports...
 from assistant.system_prompts import prompt_manager
+from assistant.entity_extractor import Entities, resolve_entities, QUOTED, MEDIA, ARTIST, NUMBER, PERCENT, QUERY
 
 class SpotifyControl:
     def __init__(self):
         """Initialize Spotify Control with authentication."""
         # Initialize system prompt
         self.system_prompt = prompt_manager.get_prompt("spotify.general")
+        # Current playback state and its device, fetched on connect
+        self.playback = None
 
         # Initialize Spotify controller and auth with better error handling
         try:
             self.spotify_auth = SpotifyAuth()
             self.spotify = SpotifyController(self.spotify_auth)
 
-            # Test the connection with a simple request
+            # Test the connection with a simple request, which also finds
+            # the active device
             try:
-                test_result = self.spotify.get_current_playback()
+                self.playback = self.spotify.get_current_playback()
                 print("✅ Successfully connected to Spotify API")
             except Exception as conn_err:
                 print(f"⚠️ Connected to Spotify API but encountered an error: {str(conn_err)}")
@@ -537,12 +541,13 @@ class SpotifyControl:
         except Exception as e:
             return f"❌ Error searching songs: {str(e)}"
 
-    def analyze_voice_command(self, command: str) -> Dict:
+    def analyze_voice_command(self, command: str, entities: Optional[Entities] = None) -> Dict:
         """
         Analyze a natural language voice command to extract intent and parameters.
 
         Args:
             command: Natural language voice command
+            entities: Entities of the command from its plan; extracted here if None
 
         Returns:
             Dict with command intent and extracted parameters
@@ -551,26 +556,28 @@ class SpotifyControl:
         intent = "unknown"
         params = {}
 
+        entities = resolve_entities(command, entities)
+
         # Play commands
         if any(word in command for word in ["play", "start", "resume"]):
             intent = "play"
             # Extract song name if present
-            song_match = re.search(r"(?:play|start) (?:song |track )?[\"']?([^\"']+)[\"']?", command)
-            if song_match:
-                params["song_name"] = song_match.group(1).strip()
+            song_name = entities.first(QUOTED) or entities.first(MEDIA)
+            if song_name:
+                params["song_name"] = song_name
 
             # Extract artist if present
-            artist_match = re.search(r"by ([^,\.]+)", command)
-            if artist_match:
-                params["artist"] = artist_match.group(1).strip()
+            artist = entities.first(ARTIST)
+            if artist:
+                params["artist"] = artist
 
         # Volume commands with more flexible patterns
         elif re.search(r"volume up|increase volume|louder|turn (?:it |the volume )?up", command):
             intent = "volume_up"
             # Extract increment if specified
-            increment_match = re.search(r"by (\d+)", command)
-            if increment_match:
-                params["increment"] = int(increment_match.group(1))
+            increment = entities.first(PERCENT, entities.first(NUMBER))
+            if increment is not None:
+                params["increment"] = int(increment)
 
         return {"intent": intent, "params": params}
 
@@ -668,12 +675,14 @@ class SpotifyControl:
         except Exception as e:
             return f"❌ Error getting recommendations: {str(e)}"
 
-    def analyze_voice_transcription(self, transcription: str) -> Dict:
+    def analyze_voice_transcription(self, transcription: str, entities: Optional[Entities] = None) -> Dict:
         """
         Analyze voice transcription using NLP to determine user intent.
 
         Args:
             transcription: Transcribed voice command
+            entities: Entities of the lowercased transcription from its plan;
+                      extracted here if None
 
         Returns:
             Dict with intent and extracted entities
@@ -706,25 +715,18 @@ class SpotifyControl:
             intent = "unknown"
 
         # Extract entities
+        found = resolve_entities(text, entities)
         entities = {}
 
         # Extract song name
-        song_patterns = [
-            r"play (?:the song |track )?[\"']?([^\"']+)[\"']",
-            r"listen to [\"']?([^\"']+)[\"']",
-            r"start [\"']?([^\"']+)[\"']"
-        ]
-
-        for pattern in song_patterns:
-            match = re.search(pattern, text)
-            if match:
-                entities["song"] = match.group(1)
-                break
+        song = found.first(QUOTED) or found.first(MEDIA)
+        if song:
+            entities["song"] = song
 
         # Extract volume level
-        volume_match = re.search(r"volume (?:to |at )?(\d+)(?: percent)?", text)
-        if volume_match:
-            entities["volume"] = int(volume_match.group(1))
+        volume = found.first(PERCENT, found.first(NUMBER))
+        if volume is not None and "volume" in text:
+            entities["volume"] = int(volume)
 
         return {
             "intent": intent,
@@ -764,19 +766,41 @@ class SpotifyControl:
         context_msg = f" while {context}" if context else ""
         return f"❌ Spotify error{context_msg}: {error_str}"
 
+def prepare_spotify(text: str = "", cancel_event=None) -> Optional[SpotifyControl]:
+    """
+    Connect to Spotify ahead of a media command, e.g. while it is still spoken.
+
+    Authenticates, opens the connection to the Web API and fetches the
+    current playback and its device; control_spotify reuses the connection
+    when given the result.
+
+    Args:
+        text: Partial command text
+        cancel_event: Event set when the command turns out not to be for Spotify
+
+    Returns:
+        Connected SpotifyControl, or None if Spotify is not available
+    """
+    spotify_control = SpotifyControl()
+    return spotify_control if spotify_control.is_connected() else None
+
 # Enhanced control function
-def enhanced_control_spotify(command: str, *args, **kwargs) -> str:
+def enhanced_control_spotify(command: str, *args, entities: Optional[Entities] = None,
+                             spotify: Optional[SpotifyControl] = None, **kwargs) -> str:
     """
     Enhanced control function with better command parsing and error handling.
 
     Args:
         command: Natural language command
         *args, **kwargs: Additional arguments
+        entities: Entities of the lowercased command from its plan; extracted
+                  here if None
+        spotify: Connected SpotifyControl from prepare_spotify; connects here if None
 
     Returns:
         str: Response message
     """
-    spotify_control = SpotifyControl()
+    spotify_control = spotify or SpotifyControl()
 
     if not spotify_control.is_connected():
         return ("❌ Spotify not connected. Please check your authentication settings.\n"
@@ -786,7 +810,7 @@ def enhanced_control_spotify(command: str, *args, **kwargs) -> str:
     command = command.lower().strip()
 
     # Use our enhanced command analyzer
-    analysis = spotify_control.analyze_voice_transcription(command)
+    analysis = spotify_control.analyze_voice_transcription(command, entities)
 
     try:
         # Handle based on intent
@@ -827,31 +851,36 @@ def enhanced_control_spotify(command: str, *args, **kwargs) -> str:
 
         else:
             # Fall back to the existing command parser for other commands
-            return control_spotify(command, *args, **kwargs)
+            return control_spotify(command, *args, entities=entities, spotify=spotify_control, **kwargs)
 
     except Exception as e:
         return spotify_control.handle_spotify_error(e, f"processing command '{command}'")
 
 # Main control function for voice commands
-def control_spotify(command: str, *args, **kwargs) -> str:
+def control_spotify(command: str, *args, entities: Optional[Entities] = None,
+                    spotify: Optional[SpotifyControl] = None, **kwargs) -> str:
     """
     Main function to control Spotify based on natural language commands.
 
     Args:
         command (str): Voice/text command
         *args: Additional arguments
+        entities: Entities of the lowercased command from its plan; extracted
+                  here if None
+        spotify: Connected SpotifyControl from prepare_spotify; connects here if None
         **kwargs: Additional keyword arguments
 
     Returns:
         str: Response message
     """
-    spotify_control = SpotifyControl()
+    spotify_control = spotify or SpotifyControl()
 
     if not spotify_control.is_connected():
         return ("❌ Spotify not connected. Please check your authentication settings.\n"
                 "Make sure you have valid Spotify API credentials and a Premium account.")
 
     command = command.lower().strip()
+    entities = resolve_entities(command, entities)
 
     # Parse command and execute appropriate action
     try:
@@ -859,9 +888,8 @@ def control_spotify(command: str, *args, **kwargs) -> str:
         if any(word in command for word in ["play", "start", "resume"]):
             if "song" in command or "track" in command:
                 # Extract song name from command
-                song_match = re.search(r"play (?:song |track )?[\"']?([^\"']+)[\"']?", command)
-                if song_match:
-                    song_name = song_match.group(1)
+                song_name = entities.first(QUOTED) or entities.first(MEDIA)
+                if song_name:
                     return spotify_control.play_music(song_name)
             return spotify_control.play_music()
 
@@ -884,10 +912,9 @@ def control_spotify(command: str, *args, **kwargs) -> str:
             return spotify_control.volume_down()
         elif "volume" in command:
             # Extract volume level
-            volume_match = re.search(r"volume (?:to )?(\d+)", command)
-            if volume_match:
-                volume = int(volume_match.group(1))
-                return spotify_control.set_volume(volume)
+            volume = entities.first(PERCENT, entities.first(NUMBER))
+            if volume is not None:
+                return spotify_control.set_volume(int(volume))
 
         # Like/Unlike commands
         elif "like" in command and "current" in command:
@@ -896,9 +923,8 @@ def control_spotify(command: str, *args, **kwargs) -> str:
             return spotify_control.unlike_current_song()
         elif "like" in command:
             # Extract song name
-            song_match = re.search(r"like [\"']?([^\"']+)[\"']?", command)
-            if song_match:
-                song_name = song_match.group(1)
+            song_name = entities.first(QUOTED) or command.split("like", 1)[1].strip(" \"'")
+            if song_name:
                 return spotify_control.like_song(song_name)
 
         # Playlist commands
@@ -912,9 +938,8 @@ def control_spotify(command: str, *args, **kwargs) -> str:
 
         # Search commands
         elif "search" in command:
-            search_match = re.search(r"search (?:for )?[\"']?([^\"']+)[\"']?", command)
-            if search_match:
-                query = search_match.group(1)
+            query = entities.first(QUOTED) or entities.first(QUERY)
+            if query:
                 return spotify_control.search_songs(query)
 
         else:
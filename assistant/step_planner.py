@@ -0,0 +1,299 @@
+"""
+Step Planner Module
+
+This module plans and runs the steps of a multi-step command. The planner
+finds ordering dependencies between steps (steps for the same app, steps
+introduced by "then", steps referring to an earlier step's result) and the
+executor runs independent steps concurrently on a bounded worker pool with
+per-step timeouts, returning results in the original step order.
+"""
+
+import re
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Dict, List, Optional, Callable
+
+from assistant.command_grammar import CommandStep
+from assistant.entity_extractor import Entities
+
+
+logger = logging.getLogger(__name__)
+
+# Dependency reasons
+DEPENDS_SAME_APP = "same_app"
+DEPENDS_THEN = "then"
+DEPENDS_REFERENCE = "reference"
+
+# Step result statuses
+STEP_OK = "ok"
+STEP_ERROR = "error"
+STEP_TIMEOUT = "timeout"
+STEP_SKIPPED = "skipped"
+STEP_CANCELLED = "cancelled"
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_STEP_TIMEOUT = 15.0
+
+# Words that point back at the outcome of an earlier step
+REFERENCE_PATTERN = re.compile(
+    r"\b(?:it|them|that|this|those|there|the result|the results|the same|the link|the file)\b",
+    re.IGNORECASE
+)
+
+
+class PlannedStep:
+    """
+    A step together with the steps it has to wait for.
+    """
+
+    def __init__(self, index: int, text: str, category: str,
+                 depends_on: Optional[Dict[int, str]] = None, entities: Optional[Entities] = None):
+        """
+        Initialize a planned step.
+
+        Args:
+            index: Position of the step in the command
+            text: Step text
+            category: Command category of the step
+            depends_on: Mapping of earlier step indices to the dependency reason
+            entities: Entities of the lowercased step text, once resolved
+        """
+        self.index = index
+        self.text = text
+        self.category = category
+        self.depends_on = depends_on or {}
+        self.entities = entities
+
+    def __repr__(self) -> str:
+        return f"PlannedStep({self.index}, {self.text!r}, {self.category!r}, {self.depends_on!r})"
+
+
+class StepResult:
+    """
+    Outcome of running one step.
+    """
+
+    def __init__(self, index: int, text: str, category: str, response: str,
+                 status: str = STEP_OK, elapsed: float = 0.0):
+        """
+        Initialize a step result.
+
+        Args:
+            index: Position of the step in the command
+            text: Step text
+            category: Command category of the step
+            response: Handler response or error message
+            status: One of "ok", "error", "timeout", "cancelled" or "skipped"
+            elapsed: Seconds the step ran for
+        """
+        self.index = index
+        self.text = text
+        self.category = category
+        self.response = response
+        self.status = status
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        """Whether the step completed successfully."""
+        return self.status == STEP_OK
+
+    def __repr__(self) -> str:
+        return f"StepResult({self.index}, {self.category!r}, {self.status!r}, {self.response!r})"
+
+
+class StepPlanner:
+    """
+    Finds the ordering dependencies between the steps of a command.
+    """
+
+    def __init__(self, classify_fn: Callable[[str], str]):
+        """
+        Initialize the planner.
+
+        Args:
+            classify_fn: Function returning the command category of a step
+        """
+        self.classify_fn = classify_fn
+
+    def plan(self, steps: List[CommandStep]) -> List[PlannedStep]:
+        """
+        Plan the steps of a command.
+
+        A step waits for:
+          - the previous step of the same category, since both drive the same app
+          - every step before it if it is introduced by "then", and steps after
+            it wait for the same steps
+          - the previous step if it refers to an earlier result ("open it")
+
+        Args:
+            steps: Parsed steps of the command
+
+        Returns:
+            Planned steps in the original order
+        """
+        planned: List[PlannedStep] = []
+        last_by_category: Dict[str, int] = {}
+        barrier = 0  # steps before this index must finish first
+
+        for index, step in enumerate(steps):
+            category = self.classify_fn(step.text)
+            depends_on: Dict[int, str] = {}
+
+            if step.separator == "then":
+                barrier = index
+            for earlier in range(barrier):
+                depends_on[earlier] = DEPENDS_THEN
+
+            if category in last_by_category:
+                depends_on[last_by_category[category]] = DEPENDS_SAME_APP
+
+            if index > 0 and REFERENCE_PATTERN.search(step.text):
+                depends_on[index - 1] = DEPENDS_REFERENCE
+
+            last_by_category[category] = index
+            planned.append(PlannedStep(index, step.text, category, depends_on))
+
+        return planned
+
+
+class StepExecutor:
+    """
+    Runs planned steps concurrently while respecting their dependencies.
+    """
+
+    def __init__(self, run_step: Callable[[PlannedStep], str],
+                 max_workers: int = DEFAULT_MAX_WORKERS,
+                 step_timeout: Optional[float] = DEFAULT_STEP_TIMEOUT):
+        """
+        Initialize the executor.
+
+        Args:
+            run_step: Function running one step and returning its response, or
+                      an object with response and status attributes
+            max_workers: Maximum number of steps running at once
+            step_timeout: Seconds a step may take, or None for no limit
+        """
+        self.run_step = run_step
+        self.max_workers = max_workers
+        self.step_timeout = step_timeout
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        """Get the worker pool, creating it on first use."""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="command-step")
+            return self._pool
+
+    def _timed_run(self, step: PlannedStep) -> StepResult:
+        """Run one step and wrap its response or error in a result."""
+        start = time.perf_counter()
+        try:
+            response = self.run_step(step)
+            status = getattr(response, "status", STEP_OK)
+            response = getattr(response, "message", response)
+        except Exception as e:
+            logger.error(f"Error running step {step.index + 1} ({step.text!r}): {e}")
+            response = f"Sorry, I couldn't {step.text}."
+            status = STEP_ERROR
+        return StepResult(step.index, step.text, step.category, response, status, time.perf_counter() - start)
+
+    def execute(self, planned: List[PlannedStep]) -> List[StepResult]:
+        """
+        Run planned steps and collect their results.
+
+        A step starts once all its dependencies have finished. A step that
+        refers to an earlier result is skipped if that step failed. A step that
+        exceeds the timeout is reported as timed out; Python threads cannot be
+        interrupted, so it keeps its worker until the handler returns.
+
+        Args:
+            planned: Steps from StepPlanner.plan
+
+        Returns:
+            One result per step, in the original order
+        """
+        results: Dict[int, StepResult] = {}
+        pending = {step.index: step for step in planned}
+        running: Dict[Future, PlannedStep] = {}
+        deadlines: Dict[Future, float] = {}
+
+        while pending or running:
+            # Start every step whose dependencies have all finished
+            for index in sorted(pending):
+                step = pending[index]
+                if not all(dep in results for dep in step.depends_on):
+                    continue
+                del pending[index]
+
+                failed_reference = [
+                    dep for dep, reason in step.depends_on.items()
+                    if reason == DEPENDS_REFERENCE and not results[dep].ok
+                ]
+                if failed_reference:
+                    results[index] = StepResult(
+                        index, step.text, step.category,
+                        f"Skipped because step {failed_reference[0] + 1} did not complete.", STEP_SKIPPED
+                    )
+                    continue
+
+                future = self._get_pool().submit(self._timed_run, step)
+                running[future] = step
+                if self.step_timeout is not None:
+                    deadlines[future] = time.monotonic() + self.step_timeout
+
+            if not running:
+                continue
+
+            timeout = None
+            if deadlines:
+                timeout = max(0.0, min(deadlines.values()) - time.monotonic())
+            done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                step = running.pop(future)
+                deadlines.pop(future, None)
+                results[step.index] = future.result()
+
+            now = time.monotonic()
+            for future, deadline in list(deadlines.items()):
+                if now >= deadline:
+                    step = running.pop(future)
+                    del deadlines[future]
+                    future.cancel()
+                    logger.warning(f"Step {step.index + 1} ({step.text!r}) timed out after {self.step_timeout}s")
+                    results[step.index] = StepResult(
+                        step.index, step.text, step.category,
+                        f"Step {step.index + 1} is taking too long, moving on.", STEP_TIMEOUT, self.step_timeout
+                    )
+
+        return [results[step.index] for step in planned]
+
+    def shutdown(self) -> None:
+        """Stop the worker pool without waiting for running steps."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+
+
+def summarize_results(results: List[StepResult]) -> str:
+    """
+    Build one spoken response from step results in their original order.
+
+    Args:
+        results: Step results
+
+    Returns:
+        Response text
+    """
+    # Assistant handlers return (response, action) tuples
+    texts = [result.response[0] if isinstance(result.response, tuple) else result.response
+             for result in results]
+    if len(texts) == 1:
+        return texts[0]
+    return " ".join(f"Step {result.index + 1}: {text}" for result, text in zip(results, texts))
@@ -1,6 +1,8 @@
 import os
 import subprocess
 
+from assistant.entity_extractor import extract_entities, TARGET, PERCENT
+
 def system_action(command: str, system_prompt: str = "") -> tuple:
     """
     Execute system actions based on natural language commands.
@@ -13,10 +15,11 @@ def system_action(command: str, system_prompt: str = "") -> tuple:
         tuple: (response message, action identifier)
     """
     command = command.lower()
+    entities = extract_entities(command)
 
     # Opening applications
     if "open" in command:
-        app_name = command.replace("open", "").strip().title()
+        app_name = entities.first(TARGET, command.replace("open", "").strip()).title()
         try:
             # Use subprocess.Popen and check if it raises an exception
             process = subprocess.Popen(['open', '-a', app_name])
@@ -29,7 +32,7 @@ def system_action(command: str, system_prompt: str = "") -> tuple:
 
     # Closing applications
     elif "close" in command:
-        app_name = command.replace("close", "").strip().title()
+        app_name = entities.first(TARGET, command.replace("close", "").strip()).title()
         try:
             # Use subprocess.run with check=True to raise an exception on non-zero exit codes
             result = subprocess.run(['osascript', '-e', f'tell application "{app_name}" to quit'], check=False)
@@ -42,14 +45,10 @@ def system_action(command: str, system_prompt: str = "") -> tuple:
     # Volume control
     elif "volume" in command:
         try:
-            volume_level = None
             # Extract volume percentage if present
-            if "percent" in command:
-                parts = command.split()
-                for i, part in enumerate(parts):
-                    if part.isdigit() and i+1 < len(parts) and "percent" in parts[i+1]:
-                        volume_level = int(part)
-                        break
+            volume_level = entities.first(PERCENT)
+            if volume_level is not None:
+                volume_level = int(volume_level)
 
             if volume_level is not None:
                 # Volume level should be between 0 and 100
@@ -68,14 +67,10 @@ def system_action(command: str, system_prompt: str = "") -> tuple:
     # Brightness control
     elif "brightness" in command:
         try:
-            brightness_level = None
             # Extract brightness percentage if present
-            if "percent" in command:
-                parts = command.split()
-                for i, part in enumerate(parts):
-                    if part.isdigit() and i+1 < len(parts) and "percent" in parts[i+1]:
-                        brightness_level = int(part)
-                        break
+            brightness_level = entities.first(PERCENT)
+            if brightness_level is not None:
+                brightness_level = int(brightness_level)
 
             if brightness_level is not None:
                 # Brightness level should be between 0 and 100
@@ -38,6 +38,9 @@ class SystemPromptManager:
         # Core prompts dictionary
         self.prompts: Dict[str, str] = {}
 
+        # Incremented whenever prompts are loaded or changed
+        self.version = 0
+
         # Load prompts from files
         self._load_prompts()
 
@@ -51,6 +54,7 @@ class SystemPromptManager:
                         self.prompts[key] = value
         except Exception as e:
             print(f"Error loading prompts: {e}")
+        self.version += 1
 
     def get_prompt(self, context: str, parameters: Optional[Dict[str, Any]] = None) -> str:
         """
@@ -88,6 +92,7 @@ class SystemPromptManager:
             save: Whether to save to disk
         """
         self.prompts[context] = prompt_text
+        self.version += 1
 
         if save:
             self._save_prompt(context, prompt_text)
@@ -113,6 +118,18 @@ class SystemPromptManager:
         with open(file_path, "w", encoding="utf-8") as f:
             json.dump(prompts_data, f, indent=2)
 
+    def resolve_context(self, context: str) -> str:
+        """
+        Get the context whose prompt get_prompt would use.
+
+        Args:
+            context: The context identifier
+
+        Returns:
+            The context itself if it has a prompt, otherwise "default"
+        """
+        return context if context in self.prompts else "default"
+
     def list_contexts(self) -> List[str]:
         """List all available prompt contexts."""
         return list(self.prompts.keys())
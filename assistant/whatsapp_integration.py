@@ -9,13 +9,18 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
-def whatsapp_action(command: str):
+from assistant.entity_extractor import Entities, resolve_entities, CONTACT, QUOTED, MESSAGE
+
+def whatsapp_action(command: str, entities: Entities = None):
     """
-    Handle WhatsApp Desktop automation commands
+    Handle WhatsApp Desktop automation commands, reading contacts and
+    messages from entities of the lowercased command if given
     """
     command_lower = command.lower()
 
     try:
+        entities = resolve_entities(command_lower, entities)
+
         # Open WhatsApp Desktop
         if "open whatsapp" in command_lower or "launch whatsapp" in command_lower:
             return open_whatsapp()
@@ -26,37 +31,35 @@ def whatsapp_action(command: str):
 
         # Message someone
         elif "message" in command_lower or "send message" in command_lower:
-            # Extract contact name and message
-            if "message" in command_lower:
-                parts = command_lower.split("message", 1)[1].strip()
-                if " " in parts:
-                    # Try to find contact and message
-                    words = parts.split()
-                    # Last word is likely the message, everything before is contact
-                    if len(words) >= 2:
-                        message = words[-1]
-                        contact = " ".join(words[:-1])
-                    else:
-                        contact = words[0] if words else ""
-                        message = "Hello"
+            # Extract contact name and message; a quoted message wins, then
+            # text after "saying", "that says", "to say" or a colon
+            contact = entities.first(CONTACT, "")
+            message = entities.first(QUOTED) or entities.first(MESSAGE)
+            if message is None:
+                words = contact.split()
+                # Without a separator, the first word is the contact and the
+                # rest the message, which is usually the longer part
+                if len(words) >= 2:
+                    contact = words[0]
+                    message = " ".join(words[1:])
                 else:
-                    contact = ""
-                    message = parts
+                    message = "Hello"
             return send_message(contact, message)
 
         # Voice call someone
         elif "call" in command_lower and "video" not in command_lower:
-            contact = extract_contact_name(command_lower, "call")
+            contact = extract_contact_name(command_lower, "call", entities)
             return make_voice_call(contact)
 
         # Video call someone
         elif "video call" in command_lower:
-            contact = extract_contact_name(command_lower, "video call")
+            contact = extract_contact_name(command_lower, "video call", entities)
             return make_video_call(contact)
 
         # Share file
         elif "share file" in command_lower or "send file" in command_lower:
-            contact = extract_contact_name(command_lower, "share file")
+            contact = extract_contact_name(command_lower, "share file" if "share file" in command_lower else "send file",
+                                           entities)
             file_path = extract_file_path(command_lower)
             return share_file(contact, file_path)
 
@@ -204,17 +207,13 @@ def open_chat(contact_name: str):
     pyautogui.press('enter')
     time.sleep(1)
 
-def extract_contact_name(command: str, action: str):
-    """Extract contact name from command"""
-    try:
-        parts = command.split(action, 1)[1].strip()
-        # Remove common words and get the contact name
-        words = parts.split()
-        # Filter out common words
-        contact_words = [word for word in words if word not in ['to', 'with', 'the', 'a', 'an']]
-        return " ".join(contact_words) if contact_words else "Unknown"
-    except:
-        return "Unknown"
+def extract_contact_name(command: str, action: str, entities: Entities = None):
+    """Extract the contact name following the action, e.g. "video call", from command or its entities"""
+    position = command.find(action)
+    for entity in resolve_entities(command, entities).all(CONTACT):
+        if position == -1 or entity.start >= position + len(action):
+            return entity.value
+    return "Unknown"
 
 def extract_file_path(command: str):
     """Extract file path from command if provided"""
@@ -0,0 +1,219 @@
+"""
+Write-Behind Module
+
+This module defers and coalesces writes of small data files. Callers mark a
+file dirty together with the function that writes it; a background thread
+writes every dirty file once per interval, so a burst of updates to the
+same file costs one write. Pending writes are flushed on demand, when the
+file is read back, at interpreter exit and on SIGTERM.
+"""
+
+import os
+import time
+import atexit
+import signal
+import logging
+import threading
+from typing import Dict, Any, Optional, Callable, Tuple
+
+from assistant.config_manager import config_manager
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+
+class WriteBehindFlusher:
+    """
+    Coalesces writes of dirty files and performs them in the background.
+    """
+
+    def __init__(self, flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        """
+        Initialize the flusher. The background thread starts on first use.
+
+        Args:
+            flush_interval: Seconds between background flushes
+        """
+        self.flush_interval = flush_interval
+        # Dirty files by key, with their write function and when they became dirty
+        self._dirty: Dict[str, Tuple[Callable[[], None], float]] = {}
+        self._lock = threading.Lock()
+        # Held for a whole flush, so an older snapshot never replaces a newer one
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._exit_hooks_installed = False
+        self._sigterm_checked = False
+        self.reset_stats()
+
+    def mark_dirty(self, key: str, write_fn: Callable[[], None]) -> None:
+        """
+        Schedule a file to be written.
+
+        Args:
+            key: File key, usually its path; marks for the same key coalesce
+            write_fn: Function writing the file's current contents
+        """
+        with self._lock:
+            self.mutations += 1
+            _, dirty_since = self._dirty.get(key, (None, time.perf_counter()))
+            self._dirty[key] = (write_fn, dirty_since)
+        self._ensure_started()
+
+    def is_dirty(self, key: str) -> bool:
+        """Whether a file has writes pending."""
+        return key in self._dirty
+
+    def flush(self, key: Optional[str] = None) -> int:
+        """
+        Write dirty files now.
+
+        Args:
+            key: File to write, or None for every dirty file
+
+        Returns:
+            Number of files written
+        """
+        with self._flush_lock:
+            with self._lock:
+                if key is None:
+                    items = list(self._dirty.items())
+                    self._dirty.clear()
+                elif key in self._dirty:
+                    items = [(key, self._dirty.pop(key))]
+                else:
+                    items = []
+
+            written = 0
+            for item_key, (write_fn, dirty_since) in items:
+                start = time.perf_counter()
+                try:
+                    write_fn()
+                except Exception as e:
+                    logger.error(f"Write-behind flush of {item_key} failed: {e}")
+                    with self._lock:
+                        self.failed += 1
+                        # Retry on the next flush unless newer data is already pending
+                        self._dirty.setdefault(item_key, (write_fn, dirty_since))
+                    continue
+
+                end = time.perf_counter()
+                written += 1
+                with self._lock:
+                    self.writes += 1
+                    self.flush_time += end - start
+                    self.max_flush_time = max(self.max_flush_time, end - start)
+                    self.last_flush_time = end - start
+                    self.dirty_time += end - dirty_since
+            return written
+
+    def _run(self) -> None:
+        """Flush dirty files every interval until stopped."""
+        while not self._stop.wait(self.flush_interval):
+            if self._dirty:
+                self.flush()
+
+    def _ensure_started(self) -> None:
+        """Start the background thread and exit hooks on first use."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="memory-write-behind", daemon=True)
+            self._thread.start()
+        self.install_exit_hooks()
+
+    def install_exit_hooks(self) -> None:
+        """
+        Flush pending writes at exit and on SIGTERM.
+
+        Done on first use, but only the main thread can install the signal
+        handler, so callers whose writes start on other threads install the
+        hooks from the main thread beforehand.
+        """
+        with self._lock:
+            if not self._exit_hooks_installed:
+                self._exit_hooks_installed = True
+                atexit.register(self.shutdown)
+            if not self._sigterm_checked:
+                self._install_sigterm_handler()
+
+    def _install_sigterm_handler(self) -> None:
+        """Flush on SIGTERM unless the application handles the signal itself."""
+        if threading.current_thread() is not threading.main_thread():
+            return
+        self._sigterm_checked = True
+        try:
+            if signal.getsignal(signal.SIGTERM) is signal.SIG_DFL:
+                signal.signal(signal.SIGTERM, self._handle_sigterm)
+        except (ValueError, OSError) as e:
+            logger.debug(f"Could not install SIGTERM handler: {e}")
+
+    def _handle_sigterm(self, signum, frame) -> None:
+        """
+        Flush pending writes on another thread, then terminate as the
+        default handler would.
+
+        The handler runs on the main thread between two bytecodes, possibly
+        while that thread holds the flusher's locks, so it must not take
+        them itself; it returns at once and lets the main thread carry on
+        until the flush thread can lock. A second SIGTERM terminates at once.
+        """
+        signal.signal(signum, signal.SIG_DFL)
+        threading.Thread(target=self._terminate, args=(signum,), name="memory-write-behind-exit",
+                         daemon=True).start()
+
+    def _terminate(self, signum: int) -> None:
+        """Flush pending writes, then re-raise the signal with its default action."""
+        try:
+            self.shutdown()
+        finally:
+            os.kill(os.getpid(), signum)
+
+    def shutdown(self) -> None:
+        """Stop the background thread and write everything still pending."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=max(1.0, self.flush_interval))
+        self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get write-behind counters.
+
+        Returns:
+            Dictionary with mutations, files written, writes saved by
+            coalescing, failed writes, files pending, and write and
+            dirty-to-disk latencies in milliseconds
+        """
+        with self._lock:
+            return {
+                "mutations": self.mutations,
+                "writes": self.writes,
+                "coalesced": max(0, self.mutations - self.writes - len(self._dirty)),
+                "failed": self.failed,
+                "pending": len(self._dirty),
+                "last_flush_ms": self.last_flush_time * 1000,
+                "avg_flush_ms": self.flush_time * 1000 / self.writes if self.writes else 0.0,
+                "max_flush_ms": self.max_flush_time * 1000,
+                "avg_dirty_ms": self.dirty_time * 1000 / self.writes if self.writes else 0.0
+            }
+
+    def reset_stats(self) -> None:
+        """Reset the counters."""
+        self.mutations = 0
+        self.writes = 0
+        self.failed = 0
+        self.flush_time = 0.0
+        self.max_flush_time = 0.0
+        self.last_flush_time = 0.0
+        self.dirty_time = 0.0
+
+
+# Create an instance for easy importing
+write_behind_flusher = WriteBehindFlusher(config_manager.get('memory.write_behind_interval', DEFAULT_FLUSH_INTERVAL))
@@ -21,6 +21,8 @@ class SpotifyController:
             "Authorization": f"Bearer {self.access_token}",
             "Content-Type": "application/json"
         }
+        # Requests after the first reuse the session's open connection
+        self.session = requests.Session()
 
     def _make_request(self, endpoint: str, method: str = "GET", data: Optional[Dict] = None) -> Optional[Dict]:
         """Make a request to the Spotify Web API."""
@@ -28,13 +30,13 @@ class SpotifyController:
 
         try:
             if method.upper() == "GET":
-                response = requests.get(url, headers=self.headers)
+                response = self.session.get(url, headers=self.headers)
             elif method.upper() == "POST":
-                response = requests.post(url, headers=self.headers, json=data)
+                response = self.session.post(url, headers=self.headers, json=data)
             elif method.upper() == "PUT":
-                response = requests.put(url, headers=self.headers, json=data)
+                response = self.session.put(url, headers=self.headers, json=data)
             elif method.upper() == "DELETE":
-                response = requests.delete(url, headers=self.headers, json=data)
+                response = self.session.delete(url, headers=self.headers, json=data)
             else:
                 raise ValueError(f"Unsupported HTTP method: {method}")
 
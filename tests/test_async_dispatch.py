@@ -0,0 +1,205 @@
+"""
+Test module for the AsyncDispatcher class.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+import unittest
+import pytest
+from unittest.mock import patch
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+# Import the module to test
+from assistant.async_dispatch import (
+    AsyncDispatcher, DispatchResult,
+    DISPATCH_OK, DISPATCH_ERROR, DISPATCH_TIMEOUT, DISPATCH_CANCELLED
+)
+
+
+class TestAsyncDispatcher(unittest.TestCase):
+    """Test cases for AsyncDispatcher."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.dispatcher = AsyncDispatcher(max_workers=4)
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.dispatcher.shutdown()
+
+    def test_sync_handler(self):
+        """Test synchronous handlers run off the caller's thread."""
+        caller = threading.current_thread()
+        threads = []
+
+        def handler(text):
+            threads.append(threading.current_thread())
+            return f"Handled: {text}"
+
+        result = self.dispatcher.dispatch("Media", handler, "play music")
+        self.assertEqual(result.status, DISPATCH_OK)
+        self.assertEqual(result.message, "Handled: play music")
+        self.assertIsNot(threads[0], caller)
+
+    def test_coroutine_handler(self):
+        """Test coroutine handlers are awaited on the dispatcher's loop."""
+        async def handler(text):
+            await asyncio.sleep(0.01)
+            return text.upper()
+
+        result = self.dispatcher.dispatch("Browsing", handler, "open github")
+        self.assertTrue(result.ok)
+        self.assertEqual(result.response, "OPEN GITHUB")
+
+    def test_timeout(self):
+        """Test a slow handler yields a spoken timeout result."""
+        release = threading.Event()
+
+        start = time.perf_counter()
+        result = self.dispatcher.dispatch("Media", lambda text: release.wait(2.0), "play music", timeout=0.1)
+        elapsed = time.perf_counter() - start
+        release.set()
+
+        self.assertEqual(result.status, DISPATCH_TIMEOUT)
+        self.assertIsNone(result.response)
+        self.assertIn("took too long", result.message)
+        self.assertLess(elapsed, 1.0)
+
+    def test_coroutine_timeout(self):
+        """Test a slow coroutine handler is interrupted at its deadline."""
+        finished = []
+
+        async def handler(text):
+            await asyncio.sleep(2.0)
+            finished.append(text)
+
+        result = self.dispatcher.dispatch("Browsing", handler, "open github", timeout=0.1)
+        self.assertEqual(result.status, DISPATCH_TIMEOUT)
+        self.assertEqual(finished, [])
+
+    def test_error(self):
+        """Test handler exceptions become error results."""
+        def handler(text):
+            raise RuntimeError("spotify unavailable")
+
+        result = self.dispatcher.dispatch("Media", handler, "play music")
+        self.assertEqual(result.status, DISPATCH_ERROR)
+        self.assertEqual(result.error, "spotify unavailable")
+        self.assertIn("problem", result.message)
+
+    def test_cancel_pending(self):
+        """Test running handlers of a group can be cancelled."""
+        started = threading.Event()
+
+        async def handler(text):
+            started.set()
+            await asyncio.sleep(5.0)
+
+        future = self.dispatcher.submit("Communication", handler, "send a message", timeout=None, group="a")
+        other = self.dispatcher.submit("Communication", handler, "send another", timeout=None, group="b")
+        self.assertTrue(started.wait(1.0))
+        time.sleep(0.05)
+
+        self.assertEqual(self.dispatcher.pending_count("a"), 1)
+        self.assertEqual(self.dispatcher.cancel_pending(group="a"), 1)
+        self.assertEqual(future.result(timeout=1.0).status, DISPATCH_CANCELLED)
+        self.assertFalse(other.done())
+
+        self.assertEqual(self.dispatcher.cancel_pending(all_groups=True), 1)
+        self.assertEqual(other.result(timeout=1.0).status, DISPATCH_CANCELLED)
+
+    def test_dispatch_async(self):
+        """Test dispatching from another event loop."""
+        result = asyncio.run(self.dispatcher.dispatch_async("Weather", lambda text: "Sunny", "weather"))
+        self.assertEqual(result.response, "Sunny")
+
+
+# Additional tests with pytest
+
+def test_loop_starts_lazily():
+    """Test the event loop thread only starts on first dispatch."""
+    dispatcher = AsyncDispatcher()
+    assert not dispatcher.is_running
+    assert dispatcher.cancel_pending() == 0
+
+    dispatcher.dispatch("Media", lambda text: "ok", "play")
+    assert dispatcher.is_running
+    dispatcher.shutdown()
+    assert not dispatcher.is_running
+
+
+def test_shutdown_resolves_waiting_callers():
+    """Test callers waiting on a cancelled handler get a result at shutdown."""
+    dispatcher = AsyncDispatcher()
+
+    async def handler(text):
+        await asyncio.sleep(5.0)
+
+    future = dispatcher.submit("Media", handler, "play", timeout=None)
+    time.sleep(0.05)
+    dispatcher.shutdown()
+    assert future.result(timeout=1.0).status == DISPATCH_CANCELLED
+
+
+def test_processor_reports_timeouts():
+    """Test the command processor speaks a timeout instead of blocking."""
+    from assistant.command_processor import CommandProcessor
+
+    with patch('assistant.command_processor.config_manager') as mock_config:
+        mock_config.get_section.return_value = {"handler_timeouts": {"Media": 0.1}}
+        processor = CommandProcessor(dispatcher=AsyncDispatcher())
+
+    release = threading.Event()
+    processor.register_command_handler("Media", lambda command: release.wait(2.0))
+    category, response = processor.process_command("play music")
+    release.set()
+    processor.dispatcher.shutdown()
+
+    assert category == "Media"
+    assert "took too long" in response
+
+
+def test_processor_steps_report_timeouts():
+    """Test a timed out step is reported with its status."""
+    from assistant.command_processor import CommandProcessor
+    from assistant.step_planner import STEP_OK, STEP_TIMEOUT
+
+    with patch('assistant.command_processor.config_manager') as mock_config:
+        mock_config.get_section.return_value = {"handler_timeouts": {"Media": 0.1}}
+        processor = CommandProcessor(dispatcher=AsyncDispatcher())
+
+    release = threading.Event()
+    processor.register_command_handler("Media", lambda command: release.wait(2.0))
+    processor.register_command_handler("Browsing", lambda command: "Opened")
+    results = processor.run_steps(processor.parse_steps_from_text("play music and open github"))
+    release.set()
+    processor.dispatcher.shutdown()
+
+    assert [result.status for result in results] == [STEP_TIMEOUT, STEP_OK]
+    assert results[1].response == "Opened"
+
+
+def test_processor_accepts_coroutine_handlers():
+    """Test coroutine handlers can be registered on the processor."""
+    from assistant.command_processor import CommandProcessor
+
+    async def handler(command):
+        return f"Async: {command}"
+
+    with patch('assistant.command_processor.config_manager') as mock_config:
+        mock_config.get_section.return_value = {}
+        processor = CommandProcessor(dispatcher=AsyncDispatcher())
+
+    processor.register_command_handler("Media", handler)
+    assert processor.process_command("play music") == ("Media", "Async: play music")
+    processor.dispatcher.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -15,7 +15,7 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
 # Import the modules to test
-from assistant.browser_control import browser_action
+from assistant.browser_control import browser_action, prepare_browser, prefetch_hosts
 
 
 class TestBrowserControl(unittest.TestCase):
@@ -192,5 +192,36 @@ def test_browser_error_handling():
         assert action == "browser_error"
 
 
+
+def test_prepared_browser_is_used():
+    """Test pages open with a browser resolved ahead of time instead of the default one."""
+    browser = MagicMock()
+    with patch('webbrowser.open') as mock_open:
+        response, action = browser_action("open github.com", browser=browser)
+
+    mock_open.assert_not_called()
+    browser.open.assert_called_once()
+    assert "github.com" in browser.open.call_args[0][0]
+    assert action == "browser_open"
+
+
+def test_prefetch_hosts():
+    """Test the sites a command names are prefetched before the search engine."""
+    assert prefetch_hosts("go to YouTube.com and search for lofi") == ["youtube.com", "www.google.com"]
+    assert prefetch_hosts("open https://www.google.com/maps") == ["www.google.com"]
+    assert prefetch_hosts("search for") == ["www.google.com"]
+
+
+def test_prepare_browser():
+    """Test the warm-up resolves the browser and looks up the hosts until cancelled."""
+    browser = MagicMock()
+    cancel_event = MagicMock()
+    cancel_event.is_set.side_effect = [False, True]
+    with patch('webbrowser.get', return_value=browser), \
+         patch('socket.getaddrinfo', side_effect=OSError("offline")) as lookup:
+        assert prepare_browser("open github.com", cancel_event) is browser
+
+    assert [call.args[0] for call in lookup.call_args_list] == ["github.com"]
+
 if __name__ == '__main__':
     unittest.main()
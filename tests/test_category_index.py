@@ -0,0 +1,90 @@
+"""
+Test module for the CategoryIndex class.
+"""
+
+import os
+import sys
+import unittest
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+# Import the module to test
+from assistant.category_index import CategoryIndex, tokenize
+
+
+CATEGORIES = {
+    "Browsing": ["open", "github", "youtube"],
+    "Media": ["play", "youtube", "music"],
+    "Files": ["open", "folder", "text file"],
+    "Timer": ["timer", "set timer", "remind me"]
+}
+
+
+class TestCategoryIndex(unittest.TestCase):
+    """Test cases for CategoryIndex."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.index = CategoryIndex(CATEGORIES)
+
+    def test_tokenize(self):
+        """Test tokenization matches whole words only."""
+        self.assertEqual(tokenize("Open GitHub, now!"), ["open", "github", "now"])
+
+    def test_specificity_weights(self):
+        """Test shared keywords count less than specific ones."""
+        scores = self.index.score("open github")
+        self.assertEqual(scores, {"Browsing": 1.5, "Files": 0.5})
+
+    def test_phrases(self):
+        """Test multi-word phrases match as a unit."""
+        self.assertIn(("text", "file"), self.index.match("create a text file"))
+        self.assertEqual(self.index.classify("create a text file"), "Files")
+        self.assertEqual(self.index.classify("remind me later"), "Timer")
+        self.assertIsNone(self.index.classify("text me a file"))
+
+    def test_whole_words(self):
+        """Test keywords do not match inside other words."""
+        self.assertIsNone(self.index.classify("the timers are opening"))
+
+    def test_repeated_keywords_count_once(self):
+        """Test a keyword repeated in a command does not dominate the score."""
+        self.assertEqual(self.index.score("play play play"), {"Media": 1.0})
+
+    def test_no_match(self):
+        """Test commands without keywords are not classified."""
+        self.assertIsNone(self.index.classify("something random"))
+        self.assertEqual(self.index.score(""), {})
+
+
+# Additional tests with pytest
+
+def test_ties_resolved_by_definition_order():
+    """Test equal scores fall back to the order categories were defined in."""
+    index = CategoryIndex(CATEGORIES)
+    assert index.classify("youtube") == "Browsing"
+    assert index.classify("open") == "Browsing"
+
+
+def test_ties_resolved_by_weight():
+    """Test category weights take precedence over definition order on ties."""
+    index = CategoryIndex(CATEGORIES, {"Media": 2.0, "Files": 1.5})
+    assert index.classify("youtube") == "Media"
+    assert index.classify("open") == "Files"
+
+    # Weights only break ties; a higher score still wins
+    assert index.classify("open github") == "Browsing"
+
+
+def test_index_size():
+    """Test shared keywords are indexed once."""
+    index = CategoryIndex(CATEGORIES)
+    assert len(index) == 10
+    assert index.max_phrase_length == 2
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,182 @@
+"""
+Test module for the classifier cascade.
+"""
+
+import os
+import sys
+import time
+import unittest
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+# Import the module to test
+from assistant.classifier_cascade import ClassifierCascade, CascadeTier
+
+
+class RecordingTier:
+    """Tier function that returns canned results and counts calls."""
+
+    def __init__(self, results, delay=0.0):
+        self.results = results
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self, text):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return self.results.get(text)
+
+
+class TestClassifierCascade(unittest.TestCase):
+    """Test cases for ClassifierCascade."""
+
+    def setUp(self):
+        """Set up a three tier cascade."""
+        self.rules = RecordingTier({"hello": ("greeting", 0.9)})
+        self.stats_model = RecordingTier({"hiya": ("greeting", 0.8), "meh": ("farewell", 0.3)})
+        self.neural = RecordingTier({"meh": ("farewell", 0.7)})
+        self.cascade = ClassifierCascade(
+            [
+                CascadeTier("rules", self.rules, threshold=0.85),
+                CascadeTier("statistical", self.stats_model, threshold=0.6),
+                CascadeTier("neural", self.neural, threshold=0.5),
+            ],
+            fallback=lambda text: ("default", 0.5),
+            fallback_name="keyword"
+        )
+
+    def test_early_exit(self):
+        """Test the cascade stops at the first confident tier."""
+        self.assertEqual(self.cascade.classify("hello"), ("greeting", 0.9, "rules"))
+        self.assertEqual(self.stats_model.calls, 0)
+        self.assertEqual(self.neural.calls, 0)
+
+        self.assertEqual(self.cascade.classify("hiya"), ("greeting", 0.8, "statistical"))
+        self.assertEqual(self.neural.calls, 0)
+
+    def test_threshold_gates_tiers(self):
+        """Test low confidence answers fall through to later tiers."""
+        self.assertEqual(self.cascade.classify("meh"), ("farewell", 0.7, "neural"))
+        self.assertEqual(self.cascade.classify("unknown"), ("default", 0.5, "keyword"))
+
+    def test_stats(self):
+        """Test hit rates are recorded per tier."""
+        for text in ["hello", "hiya", "meh", "unknown"]:
+            self.cascade.classify(text)
+
+        stats = self.cascade.get_stats()
+        self.assertEqual(stats["rules"]["calls"], 4)
+        self.assertEqual(stats["rules"]["hits"], 1)
+        self.assertEqual(stats["statistical"]["calls"], 3)
+        self.assertEqual(stats["statistical"]["hits"], 1)
+        self.assertEqual(stats["neural"]["hit_rate"], 0.5)
+        self.assertEqual(stats["keyword"]["calls"], 1)
+        self.assertEqual(stats["rules"]["threshold"], 0.85)
+
+        self.cascade.reset_stats()
+        self.assertEqual(self.cascade.get_stats()["rules"]["calls"], 0)
+
+    def test_configure_tier(self):
+        """Test tiers can be reconfigured and disabled."""
+        self.assertTrue(self.cascade.configure_tier("statistical", threshold=0.2))
+        self.assertEqual(self.cascade.classify("meh"), ("farewell", 0.3, "statistical"))
+
+        self.cascade.configure_tier("rules", enabled=False)
+        self.assertEqual(self.cascade.classify("hello"), ("default", 0.5, "keyword"))
+
+        self.assertFalse(self.cascade.configure_tier("missing", threshold=0.1))
+
+    def test_tier_errors_fall_through(self):
+        """Test a failing tier does not break classification."""
+        def broken(text):
+            raise RuntimeError("model crashed")
+
+        self.cascade.tiers[1].classify_fn = broken
+        self.assertEqual(self.cascade.classify("meh"), ("farewell", 0.7, "neural"))
+        self.assertEqual(self.cascade.get_stats()["statistical"]["errors"], 1)
+
+    def test_over_budget_tier_is_skipped_and_probed(self):
+        """Test a tier over its latency budget is skipped except for probes."""
+        slow = RecordingTier({}, delay=0.005)
+        cascade = ClassifierCascade(
+            [CascadeTier("slow", slow, latency_budget_ms=0.5)],
+            fallback=lambda text: ("default", 0.5),
+            probe_interval=3,
+            skip_after=1
+        )
+
+        cascade.classify("a")
+        self.assertEqual(slow.calls, 1)
+        self.assertEqual(cascade.get_stats()["slow"]["over_budget"], 1)
+
+        # Skipped twice, then probed on the third call
+        for _ in range(3):
+            cascade.classify("a")
+        self.assertEqual(slow.calls, 2)
+        self.assertEqual(cascade.get_stats()["slow"]["skipped"], 2)
+
+    def test_one_slow_call_does_not_skip_a_tier(self):
+        """Test a single over-budget call, such as a cold first call, keeps the tier running."""
+        delays = [0.01]
+
+        def rules(text):
+            if delays:
+                time.sleep(delays.pop())
+            return ("greeting", 0.9) if text == "hello" else None
+
+        cascade = ClassifierCascade(
+            [CascadeTier("rules", rules, threshold=0.85, latency_budget_ms=1.0)],
+            fallback=lambda text: ("default", 0.5)
+        )
+        self.assertEqual(cascade.classify("hello"), ("greeting", 0.9, "rules"))
+        self.assertGreater(cascade.get_stats()["rules"]["ewma_ms"], 1.0)
+        self.assertEqual(cascade.classify("hello"), ("greeting", 0.9, "rules"))
+        self.assertEqual(cascade.get_stats()["rules"]["skipped"], 0)
+
+    def test_tier_before_costlier_tier_is_never_skipped(self):
+        """Test an over-budget tier is still run when skipping it would hand off to a costlier tier."""
+        slow_rules = RecordingTier({"hello": ("greeting", 0.9)}, delay=0.005)
+        neural = RecordingTier({"hello": ("farewell", 0.9)})
+        cascade = ClassifierCascade(
+            [
+                CascadeTier("rules", slow_rules, threshold=0.85, latency_budget_ms=0.5),
+                CascadeTier("neural", neural, latency_budget_ms=250.0)
+            ],
+            fallback=lambda text: ("default", 0.5),
+            skip_after=1
+        )
+        for _ in range(5):
+            self.assertEqual(cascade.classify("hello"), ("greeting", 0.9, "rules"))
+        self.assertEqual(slow_rules.calls, 5)
+        self.assertEqual(neural.calls, 0)
+        self.assertEqual(cascade.get_stats()["rules"]["skipped"], 0)
+
+
+def test_classify_batch_matches_classify():
+    """Test batch classification uses batch functions and keeps input order."""
+    batch_calls = []
+
+    def batch_fn(texts):
+        batch_calls.append(list(texts))
+        return [("greeting", 0.8) if text == "hiya" else None for text in texts]
+
+    cascade = ClassifierCascade(
+        [
+            CascadeTier("rules", lambda text: ("greeting", 0.9) if text == "hello" else None, threshold=0.85),
+            CascadeTier("statistical", lambda text: batch_fn([text])[0], threshold=0.6, batch_fn=batch_fn),
+        ],
+        fallback=lambda text: ("default", 0.5)
+    )
+
+    results = cascade.classify_batch(["hello", "hiya", "other"])
+    assert results == [("greeting", 0.9, "rules"), ("greeting", 0.8, "statistical"), ("default", 0.5, "fallback")]
+    assert batch_calls == [["hiya", "other"]]
+    assert cascade.get_stats()["statistical"]["calls"] == 2
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+"""
+Test module for the CommandGrammar class.
+"""
+
+import os
+import sys
+import time
+import random
+import unittest
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+# Import the module to test
+from assistant.command_grammar import CommandGrammar, CommandStep, parse_steps, DEFAULT_COMMAND_CATEGORIES
+
+
+class TestCommandGrammar(unittest.TestCase):
+    """Test cases for CommandGrammar."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.grammar = CommandGrammar(handlers={"Media": lambda command: "media"})
+
+    def test_default_categories(self):
+        """Test the default categories are compiled."""
+        self.assertEqual(list(self.grammar.categories), list(DEFAULT_COMMAND_CATEGORIES))
+        self.assertEqual(self.grammar.classify("Open GitHub"), "Browsing")
+        self.assertIsNone(self.grammar.classify("something random"))
+
+    def test_immutable(self):
+        """Test the grammar and its tables cannot be modified."""
+        with self.assertRaises(AttributeError):
+            self.grammar.categories = {}
+        with self.assertRaises(TypeError):
+            self.grammar.categories["Custom"] = ("custom",)
+        with self.assertRaises(TypeError):
+            self.grammar.handlers["Media"] = None
+        with self.assertRaises(AttributeError):
+            self.grammar.categories["Media"].append("radio")
+
+    def test_with_handlers(self):
+        """Test replacing handlers keeps the original grammar and shares the index."""
+        custom = self.grammar.with_handlers({"Media": lambda command: "custom"})
+
+        self.assertEqual(custom.get_handler("Media")("play"), "custom")
+        self.assertEqual(self.grammar.get_handler("Media")("play"), "media")
+        self.assertIs(custom.category_index, self.grammar.category_index)
+
+
+# Additional tests with pytest
+
+@pytest.mark.parametrize("text, expected_steps", [
+    ("1. Play jazz 2. Open GitHub", ["Play jazz", "Open GitHub"]),
+    ("• First • Second", ["First", "Second"]),
+    ("open github; play music", ["open github", "play music"]),
+    ("open github, play music", ["open github", "play music"]),
+    ("open github and then play music", ["open github", "play music"]),
+    ("just one command", ["just one command"]),
+    # Newlines do not hide numbered steps
+    ("1. Do this\n2. Do that", ["Do this", "Do that"]),
+    # Hyphens and decimals inside words are not separators
+    ("set a timer for twenty-five minutes", ["set a timer for twenty-five minutes"]),
+    ("set the volume to 2.5 then play music", ["set the volume to 2.5", "play music"]),
+    ("- open github\n- play music", ["open github", "play music"]),
+    # Commas and conjunctions split together
+    ("check the weather, send an email, and set a reminder",
+     ["check the weather", "send an email", "set a reminder"]),
+    ("Open GitHub AND play music", ["Open GitHub", "play music"]),
+    ("", [""]),
+])
+def test_extract_steps(text, expected_steps):
+    """Test step extraction with the single-pass parser."""
+    assert CommandGrammar().extract_steps(text) == expected_steps
+
+
+def test_parse_steps_spans_and_separators():
+    """Test steps carry their spans and the separator before them."""
+    text = "open github, and then play music; check mail"
+    assert parse_steps(text) == [
+        CommandStep("open github, and then play music", 0, 32, None),
+        CommandStep("check mail", 34, 44, "semicolon"),
+    ]
+
+    text = "open github, and then play music and check mail"
+    steps = parse_steps(text)
+    assert [step.separator for step in steps] == [None, "then", "and"]
+    assert all(text[step.start:step.end] == step.text for step in steps)
+
+
+def test_parse_steps_drops_text_before_list_markers():
+    """Test text before the first list marker is not a step."""
+    steps = parse_steps("Please do these: 1. open github 2. play music")
+    assert [step.text for step in steps] == ["open github", "play music"]
+    assert [step.separator for step in steps] == ["numbered", "numbered"]
+
+
+FUZZ_PIECES = ["open", "github", "play", "music", "and", "then", "1.", "22.", "-", "*", "•",
+               ";", ",", " ", "  ", "\n", "\t", "2.5", "twenty-five", "AND", "Then", "x"]
+
+
+def test_parse_steps_fuzz():
+    """Test parser invariants on random mixes of words and separators."""
+    rng = random.Random(1234)
+    for _ in range(2000):
+        text = "".join(rng.choice(FUZZ_PIECES) for _ in range(rng.randint(0, 30)))
+        steps = parse_steps(text)
+
+        previous_end = 0
+        for step in steps:
+            assert step.text and step.text == step.text.strip()
+            assert text[step.start:step.end] == step.text
+            assert step.start >= previous_end
+            previous_end = step.end
+
+        extracted = CommandGrammar().extract_steps(text)
+        assert extracted == ([step.text for step in steps] or [text])
+
+
+def _parse_time(text, repeats=5):
+    """Best time of several parses of a text."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        parse_steps(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@pytest.mark.parametrize("unit", [
+    "open github and then play music, ",
+    "1. open github 2. play music ",
+    "a" + " " * 50,
+    "word ",
+    "- " * 10 + "and ",
+])
+def test_parse_steps_scales_linearly(unit):
+    """Test parse time grows linearly from 1KB to 16KB of dictated text."""
+    small = unit * (1024 // len(unit) + 1)
+    large = unit * (16 * 1024 // len(unit) + 1)
+
+    ratio = _parse_time(large) / max(_parse_time(small), 1e-6)
+    # 16x the input; allow generous slack for timer noise, far below quadratic (256x)
+    assert ratio < 48
+
+
+def test_custom_categories():
+    """Test a grammar can be compiled from custom categories."""
+    grammar = CommandGrammar({"Lights": ["lights", "lamp"]}, {"Lights": 1.0})
+    assert grammar.classify("turn on the lamp") == "Lights"
+    assert grammar.classify("open github") is None
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,186 @@
+"""
+Test module for the append-only conversation log.
+"""
+
+import os
+import sys
+import json
+import unittest
+import tempfile
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+# Import the module to test
+from assistant.conversation_log import ConversationLog, OFFSET_SIZE, MIGRATED_SUFFIX
+from assistant.memory_manager import MemoryManager
+
+
+def make_entry(i):
+    """Create a conversation entry."""
+    return {"speaker": "user" if i % 2 == 0 else "assistant", "text": f"Message {i}",
+            "timestamp": f"2024-01-01T00:00:{i:02d}"}
+
+
+class TestConversationLog(unittest.TestCase):
+    """Test cases for ConversationLog."""
+
+    def setUp(self):
+        """Set up a log in a temporary directory."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "history.jsonl")
+        self.log = ConversationLog(self.path)
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.log.close()
+        self.temp_dir.cleanup()
+
+    def test_no_files_until_first_write(self):
+        """Test an unused log creates nothing on disk."""
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(self.log.read_all(), [])
+        self.assertEqual(len(self.log), 0)
+
+    def test_append_writes_one_line_per_entry(self):
+        """Test entries are appended as single lines with an index offset each."""
+        for i in range(3):
+            self.log.append(make_entry(i))
+
+        with open(self.path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [make_entry(i) for i in range(3)])
+        self.assertEqual(os.path.getsize(self.log.index_path), 3 * OFFSET_SIZE)
+        self.assertEqual(len(self.log), 3)
+
+    def test_buffered_entries_are_written_on_flush(self):
+        """Test entries stay buffered until the batch fills or the log is flushed."""
+        log = ConversationLog(self.path, buffer_entries=10, fsync_interval=None)
+        log.append(make_entry(0))
+        self.assertFalse(os.path.exists(self.path))
+
+        log.flush()
+        self.assertEqual(ConversationLog(self.path).read_all(), [make_entry(0)])
+        log.close()
+
+    def test_tail(self):
+        """Test the most recent entries are read through the index."""
+        for i in range(20):
+            self.log.append(make_entry(i))
+        self.assertEqual(self.log.tail(3), [make_entry(i) for i in range(17, 20)])
+        self.assertEqual(self.log.tail(50), [make_entry(i) for i in range(20)])
+        self.assertEqual(self.log.tail(0), [])
+
+    def test_reopen(self):
+        """Test a reopened log keeps its entries and index."""
+        for i in range(5):
+            self.log.append(make_entry(i))
+        self.log.close()
+
+        reopened = ConversationLog(self.path)
+        self.assertEqual(len(reopened), 5)
+        reopened.append(make_entry(5))
+        self.assertEqual(reopened.tail(2), [make_entry(4), make_entry(5)])
+        reopened.close()
+
+    def test_torn_write_is_dropped(self):
+        """Test a partial last line left by a crash is removed on open."""
+        for i in range(3):
+            self.log.append(make_entry(i))
+        self.log.close()
+        with open(self.path, "ab") as f:
+            f.write(b'{"speaker": "us')
+
+        reopened = ConversationLog(self.path)
+        self.assertEqual(len(reopened), 3)
+        self.assertEqual(reopened.read_all(), [make_entry(i) for i in range(3)])
+        reopened.append(make_entry(3))
+        self.assertEqual(reopened.tail(1), [make_entry(3)])
+        reopened.close()
+
+    def test_missing_index_is_rebuilt(self):
+        """Test the index is rebuilt when it is missing."""
+        for i in range(4):
+            self.log.append(make_entry(i))
+        self.log.close()
+        os.remove(self.log.index_path)
+
+        reopened = ConversationLog(self.path)
+        self.assertEqual(len(reopened), 4)
+        self.assertEqual(reopened.tail(2), [make_entry(2), make_entry(3)])
+
+    def test_rewrite_and_clear(self):
+        """Test the log can be replaced and emptied."""
+        self.log.append(make_entry(0))
+        self.log.rewrite([make_entry(5), make_entry(6)])
+        self.assertEqual(self.log.read_all(), [make_entry(5), make_entry(6)])
+        self.assertEqual(self.log.tail(1), [make_entry(6)])
+
+        self.log.clear()
+        self.assertEqual(self.log.read_all(), [])
+        self.assertEqual(len(self.log), 0)
+
+
+# Additional tests with pytest
+
+def test_migrate_legacy_json(tmp_path):
+    """Test a legacy JSON history is migrated once."""
+    legacy = tmp_path / "conversation_history.json"
+    legacy.write_text(json.dumps([make_entry(0), make_entry(1)], indent=2), encoding="utf-8")
+
+    manager = MemoryManager(data_dir=str(tmp_path))
+    assert list(manager.conversation_history) == [make_entry(0), make_entry(1)]
+    assert not legacy.exists()
+    assert (tmp_path / ("conversation_history.json" + MIGRATED_SUFFIX)).exists()
+
+    manager.add_conversation_entry("user", "After migration")
+    manager.close()
+    reloaded = MemoryManager(data_dir=str(tmp_path))
+    assert [entry["text"] for entry in reloaded.conversation_history] == ["Message 0", "Message 1", "After migration"]
+
+
+def test_corrupt_legacy_json_is_kept(tmp_path):
+    """Test a legacy history that cannot be parsed is left in place."""
+    legacy = tmp_path / "conversation_history.json"
+    legacy.write_text("[{not json", encoding="utf-8")
+
+    manager = MemoryManager(data_dir=str(tmp_path))
+    assert len(manager.conversation_history) == 0
+    assert legacy.exists()
+
+
+def test_add_entry_does_not_rewrite_history(tmp_path):
+    """Test adding an entry appends to the log instead of rewriting it."""
+    manager = MemoryManager(data_dir=str(tmp_path))
+    for i in range(50):
+        manager.add_conversation_entry("user", f"Message {i}")
+    manager.flush()
+
+    log_path = manager.history_log_path
+    size = os.path.getsize(log_path)
+    inode = os.stat(log_path).st_ino
+    manager.add_conversation_entry("assistant", "One more")
+    manager.flush()
+
+    assert os.stat(log_path).st_ino == inode
+    with open(log_path, "rb") as f:
+        f.seek(size)
+        assert json.loads(f.read())["text"] == "One more"
+
+
+def test_read_at_positions(tmp_path):
+    """Test entries are read by position through the index."""
+    log = ConversationLog(str(tmp_path / "log.jsonl"), buffer_entries=4)
+    for i in range(10):
+        log.append({"n": i})
+    assert [entry["n"] for entry in log.read_at([7, 2, 9])] == [7, 2, 9]
+    assert log.read_at([]) == []
+    with pytest.raises(IndexError):
+        log.read_at([10])
+    log.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
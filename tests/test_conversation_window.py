@@ -0,0 +1,114 @@
+"""
+Test module for compact conversation entries and the in-memory window.
+"""
+
+import os
+import sys
+import unittest
+import tempfile
+import pytest
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+# Import the module to test
+from assistant.conversation_window import (
+    ConversationEntry, make_window, speaker_table, measure_entry_memory
+)
+from assistant.memory_manager import MemoryManager
+from assistant.memory_export import MemoryExportReader
+
+
+START = datetime(2024, 1, 1, 12, 0, 0)
+
+
+class TestConversationEntry(unittest.TestCase):
+    """Test cases for ConversationEntry."""
+
+    def test_reads_like_a_dict(self):
+        """Test entries answer the dict operations callers use."""
+        entry = ConversationEntry("user", "Play some jazz", START)
+        self.assertEqual(entry["speaker"], "user")
+        self.assertEqual(entry["text"], "Play some jazz")
+        self.assertEqual(entry["timestamp"], "2024-01-01T12:00:00")
+        self.assertIn("timestamp", entry)
+        self.assertNotIn("intent", entry)
+        self.assertIsNone(entry.get("intent"))
+        self.assertEqual(dict(entry), {"speaker": "user", "text": "Play some jazz", "timestamp": "2024-01-01T12:00:00"})
+        with self.assertRaises(KeyError):
+            entry["missing"]
+
+    def test_has_no_instance_dict(self):
+        """Test entries are slotted."""
+        entry = ConversationEntry("user", "hello", START)
+        self.assertFalse(hasattr(entry, "__dict__"))
+        self.assertIsInstance(entry.time, float)
+
+    def test_speakers_are_interned(self):
+        """Test each speaker name is stored once as an id."""
+        first = ConversationEntry("assistant", "one", START)
+        second = ConversationEntry("assistant", "two", START)
+        self.assertEqual(first.speaker_id, second.speaker_id)
+        self.assertEqual(speaker_table.name(first.speaker_id), "assistant")
+
+    def test_timestamp_round_trip(self):
+        """Test ISO timestamps come back exactly, and others are kept as given."""
+        for timestamp in ["2024-01-01T12:00:00", "2024-01-01T12:00:00.123456", "1969-07-20T20:17:40.000001"]:
+            self.assertEqual(ConversationEntry("user", "x", timestamp).timestamp, timestamp)
+        aware = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc).isoformat()
+        for timestamp in [aware, "2024-01-01 12:00:00", "not a time", ""]:
+            self.assertEqual(ConversationEntry("user", "x", timestamp).timestamp, timestamp)
+
+    def test_dict_round_trip_with_extra_fields(self):
+        """Test fields without a slot are kept."""
+        data = {"speaker": "user", "text": "hi", "timestamp": START.isoformat(), "intent": "greeting"}
+        entry = ConversationEntry.from_dict(data)
+        self.assertEqual(entry.to_dict(), data)
+        self.assertEqual(entry, data)
+        self.assertEqual(entry["intent"], "greeting")
+
+
+# Additional tests with pytest
+
+def test_window_is_bounded():
+    """Test the window keeps only the most recent entries."""
+    window = make_window([{"speaker": "user", "text": str(i), "timestamp": START.isoformat()} for i in range(10)], 3)
+    assert isinstance(window, deque)
+    assert [entry["text"] for entry in window] == ["7", "8", "9"]
+    window.append(ConversationEntry("user", "10", START))
+    assert [entry["text"] for entry in window] == ["8", "9", "10"]
+
+
+def test_memory_manager_window(tmp_path):
+    """Test the memory manager keeps a bounded window and reads older entries from disk."""
+    manager = MemoryManager(data_dir=str(tmp_path), history_window=4)
+    for i in range(10):
+        manager.add_conversation_entry("user", f"Message {i}", START + timedelta(minutes=i))
+
+    assert len(manager.conversation_history) == 4
+    assert manager.conversation_history[0]["text"] == "Message 6"
+    history = manager.get_conversation_history()
+    assert len(history) == 10
+    assert all(isinstance(entry, dict) for entry in history)
+    assert [entry["text"] for entry in manager.get_conversation_history(2)] == ["Message 8", "Message 9"]
+    assert manager.get_conversation_history(6)[0]["text"] == "Message 4"
+
+    # Exports hold the whole history, not just the window
+    export_path = str(tmp_path / "export.jsonl")
+    assert manager.export_memory(export_path)
+    with MemoryExportReader(export_path) as export:
+        assert len(list(export.entries())) == 10
+    manager.close()
+
+
+def test_compact_entries_use_less_memory():
+    """Test compact entries take well under the memory of dicts."""
+    report = measure_entry_memory(20000)
+    assert report["compact_bytes"] < report["dict_bytes"] * 0.6
+
+
+if __name__ == "__main__":
+    unittest.main()
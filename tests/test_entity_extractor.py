@@ -0,0 +1,166 @@
+"""
+Test module for the entity extractor.
+"""
+
+import os
+import sys
+import unittest
+import pytest
+from unittest.mock import patch
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+# Import the module to test
+from assistant.entity_extractor import (
+    EntityExtractor, Entity, extract_entities, resolve_entities,
+    DURATION, PERCENT, NUMBER, URL, QUOTED, BROWSER,
+    ARTIST, CONTACT, TARGET, QUERY, MEDIA, LOCATION, MESSAGE
+)
+from assistant.browser_control import browser_action
+from assistant.command_processor import CommandProcessor
+
+
+class TestEntityExtractor(unittest.TestCase):
+    """Test cases for EntityExtractor."""
+
+    def setUp(self):
+        """Set up a fresh extractor for each test."""
+        self.extractor = EntityExtractor()
+
+    def test_durations(self):
+        """Test durations are converted to seconds and keep their spoken form."""
+        entity = self.extractor.extract("set a timer for 5 minutes").get(DURATION)
+        self.assertEqual(entity.value, 300)
+        self.assertEqual(entity.describe(), "5 minutes")
+
+        entity = self.extractor.extract("remind me in 1 hr").get(DURATION)
+        self.assertEqual(entity.value, 3600)
+        self.assertEqual(entity.describe(), "1 hour")
+
+        self.assertEqual(self.extractor.extract("wait 1.5 sec").first(DURATION), 1.5)
+
+    def test_percent_and_numbers(self):
+        """Test percentages are told apart from plain numbers."""
+        entities = self.extractor.extract("set volume to 50 percent")
+        self.assertEqual(entities.first(PERCENT), 50)
+        self.assertNotIn(NUMBER, entities)
+
+        self.assertEqual(self.extractor.extract("set brightness to 80%").first(PERCENT), 80)
+        self.assertEqual(self.extractor.extract("volume up by 10").first(NUMBER), 10)
+
+    def test_urls(self):
+        """Test domains and URLs are found without trailing punctuation."""
+        self.assertEqual(self.extractor.extract("open github.com.").first(URL), "github.com")
+        self.assertEqual(self.extractor.extract("go to https://example.com/path?x=1 now").first(URL),
+                         "https://example.com/path?x=1")
+        self.assertNotIn(URL, self.extractor.extract("open github"))
+
+    def test_quoted_and_browser(self):
+        """Test quoted text and browser names."""
+        entities = self.extractor.extract('message john "see you soon"')
+        self.assertEqual(entities.first(QUOTED), "see you soon")
+        self.assertEqual(entities.first(CONTACT), "john")
+
+        self.assertEqual(self.extractor.extract("open brave browser").first(BROWSER), "brave")
+
+    def test_phrases_stop_at_stop_words(self):
+        """Test phrase entities end at their stop words."""
+        self.assertEqual(self.extractor.extract("search for python tutorials on youtube").first(QUERY),
+                         "python tutorials")
+        entities = self.extractor.extract("play hello by adele on spotify")
+        self.assertEqual(entities.first(MEDIA), "hello")
+        self.assertEqual(entities.first(ARTIST), "adele")
+        self.assertEqual(self.extractor.extract("send an email to John about the meeting").first(CONTACT), "John")
+        self.assertEqual(self.extractor.extract("close visual studio code").first(TARGET), "visual studio code")
+        self.assertEqual(self.extractor.extract("what's the weather like in New York").first(LOCATION), "New York")
+
+    def test_tokens_inside_phrases(self):
+        """Test tokens inside a phrase entity are still extracted."""
+        entities = self.extractor.extract("call mom in 5 minutes")
+        self.assertEqual(entities.first(CONTACT), "mom")
+        self.assertEqual(entities.first(DURATION), 300)
+
+        entities = self.extractor.extract("open github.com")
+        self.assertEqual(entities.first(TARGET), "github.com")
+        self.assertEqual(entities.get(TARGET).start, entities.get(URL).start)
+
+    def test_order_and_dict(self):
+        """Test entities come in order of appearance."""
+        entities = self.extractor.extract("email bob in 2 minutes about 3 files")
+        self.assertEqual([entity.kind for entity in entities], [CONTACT, DURATION, NUMBER])
+        self.assertEqual(entities.as_dict(), {CONTACT: ["bob"], DURATION: [120], NUMBER: [3]})
+        self.assertEqual(len(self.extractor.extract("hello there")), 0)
+
+    def test_cache(self):
+        """Test repeated commands are scanned once."""
+        first = self.extractor.extract("set a timer for 5 minutes")
+        second = self.extractor.extract("set a timer for 5 minutes")
+        self.assertIs(first, second)
+        stats = self.extractor.get_cache_stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+
+
+# Additional tests with pytest
+
+@pytest.mark.parametrize("text,kind,value", [
+    ("start a timer for 10 seconds", DURATION, 10),
+    ("turn the volume to 30 percent", PERCENT, 30),
+    ("visit docs.python.org/3/library", URL, "docs.python.org/3/library"),
+    ("play the song 'yesterday'", MEDIA, "yesterday"),
+    ("video call sarah", CONTACT, "sarah"),
+    ("share file with bob /tmp/report.pdf", CONTACT, "bob"),
+    ("send message to john saying hello there", MESSAGE, "hello there"),
+    ("message mom: running late", MESSAGE, "running late"),
+])
+def test_extract_entities(text, kind, value):
+    """Test the shared extractor on common commands."""
+    assert extract_entities(text).first(kind) == value
+
+
+def test_entity_equality():
+    """Test entities compare by kind, value and span."""
+    assert Entity(NUMBER, 5, "5", 0, 1) == Entity(NUMBER, 5, "five", 0, 1)
+    assert Entity(NUMBER, 5, "5", 0, 1) != Entity(PERCENT, 5, "5", 0, 1)
+
+
+def test_handlers_use_entities():
+    """Test handlers read their arguments from the extracted entities."""
+    assert CommandProcessor._handle_timer_command("set a timer for 1 hour") == "Setting a timer for 1 hour."
+    assert CommandProcessor._handle_weather_command("weather in paris") == "I'll check the weather in paris for you."
+    assert CommandProcessor._handle_media_command("play jazz on spotify") == "Playing jazz now."
+
+
+def test_resolve_entities():
+    """Test entities resolved for the same text are reused and others are extracted again."""
+    entities = EntityExtractor().extract("weather in paris")
+    assert resolve_entities("weather in paris", entities) is entities
+    assert resolve_entities("weather in rome", entities).first(LOCATION) == "rome"
+    assert resolve_entities("weather in rome").first(LOCATION) == "rome"
+
+
+def test_handlers_take_resolved_entities():
+    """Test handlers read entities passed in instead of scanning the command again."""
+    entities = extract_entities("weather in paris")
+    with patch("assistant.entity_extractor.extract_entities") as extract:
+        response = CommandProcessor._handle_weather_command("Weather in Paris", entities=entities)
+        extract.assert_not_called()
+    assert response == "I'll check the weather in paris for you."
+
+
+def test_browser_action_uses_entities(monkeypatch):
+    """Test the browser handler finds websites and searches through the extractor."""
+    opened = []
+    monkeypatch.setattr("webbrowser.open", opened.append)
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+
+    response, action = browser_action("open brave browser and go to youtube.com and search for lofi")
+    assert action == "browser_search"
+    assert opened[1:] == ["https://youtube.com", "https://www.youtube.com/results?search_query=lofi"]
+    assert "lofi" in response
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+"""
+Test module for the FileWatcher class and atomic file writes.
+"""
+
+import os
+import sys
+import json
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+# Import the modules to test
+from assistant.file_watcher import FileWatcher
+from assistant.file_utils import atomic_write_json
+
+
+class TestFileWatcher(unittest.TestCase):
+    """Test cases for FileWatcher."""
+
+    def setUp(self):
+        """Set up test environment."""
+        import tempfile
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "watched.json")
+        with open(self.path, "w") as f:
+            f.write("{}")
+        self.callback = MagicMock()
+        self.watcher = FileWatcher(self.path, self.callback, interval=0.01, debounce=0.0)
+
+    def tearDown(self):
+        """Clean up test environment."""
+        self.watcher.stop()
+        self.temp_dir.cleanup()
+
+    def test_no_change(self):
+        """Test nothing is reported while the file is unchanged."""
+        self.assertFalse(self.watcher.check())
+        self.callback.assert_not_called()
+
+    def test_change_detected(self):
+        """Test a change calls back once."""
+        with open(self.path, "w") as f:
+            f.write('{"a": 1}')
+
+        self.assertTrue(self.watcher.check())
+        self.callback.assert_called_once_with(self.path)
+        self.assertFalse(self.watcher.check())
+
+    def test_ignore_current(self):
+        """Test writes marked as seen do not call back."""
+        with open(self.path, "w") as f:
+            f.write('{"a": 1}')
+        self.watcher.ignore_current()
+
+        self.assertFalse(self.watcher.check())
+        self.callback.assert_not_called()
+
+    def test_background_polling(self):
+        """Test the polling thread reports changes."""
+        self.watcher.start()
+        self.assertTrue(self.watcher.is_running)
+
+        with open(self.path, "w") as f:
+            f.write('{"b": 2}')
+
+        deadline = time.time() + 5
+        while not self.callback.called and time.time() < deadline:
+            time.sleep(0.01)
+        self.callback.assert_called_with(self.path)
+
+        self.watcher.stop()
+        self.assertFalse(self.watcher.is_running)
+
+
+# Additional tests with pytest
+
+def test_debounce(tmp_path):
+    """Test the callback waits until the file stops changing."""
+    path = tmp_path / "watched.json"
+    path.write_text("{}")
+    callback = MagicMock()
+    watcher = FileWatcher(str(path), callback, debounce=0.1)
+
+    path.write_text('{"a": 1}')
+    assert not watcher.check()
+    path.write_text('{"a": 12}')
+    assert not watcher.check()
+
+    time.sleep(0.15)
+    assert watcher.check()
+    callback.assert_called_once()
+
+
+def test_callback_errors_are_contained(tmp_path):
+    """Test a failing callback does not break the watcher."""
+    path = tmp_path / "watched.json"
+    path.write_text("{}")
+    watcher = FileWatcher(str(path), MagicMock(side_effect=ValueError("bad")), debounce=0.0)
+
+    path.write_text('{"a": 1}')
+    assert watcher.check()
+
+
+def test_atomic_write_json(tmp_path):
+    """Test JSON is written completely and no temporary files are left behind."""
+    path = tmp_path / "data" / "intents.json"
+    atomic_write_json(str(path), {"greeting": {"patterns": ["hello"]}})
+
+    assert json.loads(path.read_text()) == {"greeting": {"patterns": ["hello"]}}
+    assert os.listdir(path.parent) == ["intents.json"]
+
+
+def test_atomic_write_failure_keeps_original(tmp_path):
+    """Test a failed write leaves the original file untouched."""
+    path = tmp_path / "intents.json"
+    path.write_text('{"old": true}')
+
+    with pytest.raises(TypeError):
+        atomic_write_json(str(path), {"bad": object()})
+
+    assert json.loads(path.read_text()) == {"old": True}
+    assert os.listdir(tmp_path) == ["intents.json"]
+
+
+if __name__ == "__main__":
+    unittest.main()
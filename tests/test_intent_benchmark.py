@@ -0,0 +1,139 @@
+"""
+Test module for the intent classification benchmark.
+"""
+
+import os
+import sys
+import copy
+import json
+import unittest
+from unittest.mock import patch
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+# Import the module to test
+from assistant.intent_benchmark import (
+    load_corpus, held_out, percentile, evaluate, run_benchmark, compare_to_baseline,
+    load_report, DEFAULT_BASELINE_PATH
+)
+from assistant.intent_classifier import IntentClassifier, normalize_command_text
+from assistant.intent_model import DEFAULT_INTENTS_PATH
+
+
+INTENTS = {
+    "greeting": {"patterns": ["hello", "hi"], "responses": ["Hello!"]},
+    "music": {"patterns": ["play music", "song"], "responses": ["Playing."]},
+    "default": {"patterns": [], "responses": ["Sorry?"]}
+}
+
+WAKE_WORDS = ["samantha", "hey samantha"]
+
+CORPUS = [
+    ("Hello there", "greeting"), ("hiya", "greeting"), ("good morning", "greeting"),
+    ("put on some jazz", "music"), ("play a song by adele", "music"), ("next track", "music"),
+    ("tell me a joke", "default"), ("what time is it", "default")
+] * 10
+
+
+class TestBenchmarkMetrics(unittest.TestCase):
+    """Test cases for the benchmark metrics."""
+
+    def test_committed_corpus_is_held_out(self):
+        """Test the committed corpus covers every intent and contains no training pattern."""
+        with open(DEFAULT_INTENTS_PATH, "r", encoding="utf-8") as f:
+            intents = json.load(f)
+        corpus = load_corpus()
+        normalized = [(normalize_command_text(text, WAKE_WORDS), label) for text, label in corpus]
+        patterns = {normalize_command_text(pattern, WAKE_WORDS)
+                    for data in intents.values() for pattern in data["patterns"]}
+
+        self.assertEqual({label for _, label in corpus}, set(intents))
+        self.assertFalse([text for text, _ in normalized if text in patterns])
+        self.assertEqual(held_out(corpus, intents, WAKE_WORDS), normalized)
+
+    def test_held_out_drops_training_patterns(self):
+        """Test utterances equal to a pattern and unknown labels are dropped."""
+        corpus = [("Play Music!", "music"), ("Hey Samantha, hi", "greeting"),
+                  ("put on some jazz", "music"), ("what's up", "chitchat")]
+        self.assertEqual(held_out(corpus, INTENTS, WAKE_WORDS), [("put on some jazz", "music")])
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_evaluate(self):
+        """Test precision, recall and confusion matrix."""
+        labels = ["a", "a", "b", "b"]
+        predictions = ["a", "b", "b", "b"]
+        report = evaluate(labels, predictions)
+
+        self.assertEqual(report["accuracy"], 0.75)
+        self.assertEqual(report["per_intent"]["a"]["precision"], 1.0)
+        self.assertEqual(report["per_intent"]["a"]["recall"], 0.5)
+        self.assertAlmostEqual(report["per_intent"]["b"]["precision"], 0.6667)
+        self.assertEqual(report["confusion_matrix"]["a"], {"a": 1, "b": 1})
+
+
+# Additional tests with pytest
+
+@pytest.fixture
+def classifier():
+    """Fixture for creating an IntentClassifier with test intents."""
+    with patch('assistant.intent_classifier.ML_AVAILABLE', False):
+        classifier = IntentClassifier()
+    classifier.statistical_model = None
+    classifier.intents = copy.deepcopy(INTENTS)
+    return classifier
+
+
+def test_run_benchmark_smoke(classifier):
+    """Test a small benchmark run reports every tier."""
+    report = run_benchmark(classifier, corpus=CORPUS, threads=2)
+
+    # "good morning" is not a pattern of the test intents, so it is kept
+    assert report["meta"]["corpus_size"] == 80
+    assert report["tiers"]["statistical"] == {"skipped": "model not loaded"}
+    assert report["tiers"]["neural"] == {"skipped": "model not loaded"}
+
+    for name in ("rules", "keyword", "cascade"):
+        tier = report["tiers"][name]
+        assert 0.0 <= tier["accuracy"] <= 1.0
+        assert tier["latency_ms"]["p50"] <= tier["latency_ms"]["p99"]
+        assert tier["throughput_per_s"]["single_thread"] > 0
+        assert tier["throughput_per_s"]["multi_thread"] > 0
+        assert set(tier["per_intent"]) >= {"greeting", "music", "default"}
+
+    # Rules only answer texts containing a pattern
+    assert report["tiers"]["rules"]["coverage"] < 1.0
+    assert report["tiers"]["cascade"]["coverage"] == 1.0
+
+
+def test_compare_to_baseline(classifier):
+    """Test accuracy and latency regressions are reported."""
+    report = run_benchmark(classifier, corpus=CORPUS, threads=1, tiers=["keyword"])
+    assert compare_to_baseline(report, report) == []
+
+    worse = copy.deepcopy(report)
+    worse["tiers"]["keyword"]["accuracy"] -= 0.05
+    worse["tiers"]["keyword"]["latency_ms"]["p99"] += 10.0
+    regressions = compare_to_baseline(worse, report)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("keyword: accuracy")
+
+
+def test_committed_baseline_is_valid():
+    """Test the committed baseline can be compared against."""
+    baseline = load_report(DEFAULT_BASELINE_PATH)
+    assert baseline is not None
+    assert "accuracy" in baseline["tiers"]["cascade"]
+    assert compare_to_baseline(baseline, baseline) == []
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,7 +4,10 @@ Test module for the IntentClassifier class.
 
 import os
 import sys
+import json
+import time
 import unittest
+from types import SimpleNamespace
 from unittest.mock import patch, MagicMock, call
 import pytest
 
@@ -13,7 +16,9 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
 # Import the module to test
-from assistant.intent_classifier import IntentClassifier
+from assistant.intent_classifier import IntentClassifier, normalize_command_text, diff_intents
+from assistant.intent_model import StatisticalIntentModel, intents_fingerprint, intent_fingerprints
+from assistant.lru_cache import LRUCache
 
 
 class TestIntentClassifier(unittest.TestCase):
@@ -208,6 +213,350 @@ def test_simple_keyword_match(classifier):
     assert best_intent[0] == "default"
 
 
+class FakeStatisticalModel:
+    """Stand-in for a trained statistical intent model."""
+
+    def __init__(self, predictions):
+        self.predictions = predictions
+        self.batch_calls = 0
+
+    def predict(self, text):
+        return self.predictions.get(text, ("default", 0.2))
+
+    def predict_batch(self, texts):
+        self.batch_calls += 1
+        return [self.predict(text) for text in texts]
+
+
+def test_statistical_tier(classifier):
+    """Test the statistical model answers between rules and keyword matching."""
+    classifier.statistical_model = FakeStatisticalModel({
+        "what's up": ("greeting", 0.8),
+        "maybe later": ("farewell", 0.4),
+        "open the pod bay doors": ("launch_pods", 0.95),
+    })
+    classifier.cascade.configure_tier("statistical", threshold=0.6)
+
+    # Rules still win
+    assert classifier.classify("hello there") == ("greeting", 0.9)
+
+    # Confident statistical prediction is used
+    assert classifier.classify("what's up") == ("greeting", 0.8)
+
+    # Low confidence and unknown intents fall through to keyword matching
+    assert classifier.classify("maybe later")[0] == "default"
+    assert classifier.classify("open the pod bay doors")[0] == "default"
+
+
+def test_classify_batch(classifier):
+    """Test batch classification matches single classification."""
+    model = FakeStatisticalModel({"what's up": ("greeting", 0.8)})
+    classifier.statistical_model = model
+
+    texts = ["Hello there", "what's up", "quantum physics", "time to say bye"]
+    results = classifier.classify_batch(texts)
+
+    assert results == [classifier.classify(text) for text in texts]
+    assert results[1] == ("greeting", 0.8)
+
+    # Statistical tier ran once for the texts the rules did not answer
+    assert model.batch_calls == 1
+
+
+def test_cascade_stats(classifier):
+    """Test each tier records hits so thresholds can be tuned."""
+    classifier.cascade.reset_stats()
+    classifier.classify("hello there")
+    classifier.classify("quantum physics")
+
+    stats = classifier.get_cascade_stats()
+    assert stats["rules"]["calls"] == 2
+    assert stats["rules"]["hits"] == 1
+    assert stats["rules"]["hit_rate"] == 0.5
+    assert stats["keyword"]["calls"] == 1
+
+    # Tiers without a loaded model never answer
+    assert stats["statistical"]["hits"] == 0
+    assert stats["neural"]["hits"] == 0
+
+
+@pytest.mark.parametrize("raw_text, normalized", [
+    ("Open Brave Browser", "open brave browser"),
+    ("  open   brave browser!! ", "open brave browser"),
+    ("Hey Samantha, open brave browser.", "open brave browser"),
+    ("samantha what's the weather?", "what's the weather"),
+    ("hey samantha", "hey samantha"),
+])
+def test_normalize_command_text(raw_text, normalized):
+    """Test case, punctuation, whitespace and wake words are normalized."""
+    wake_words = ["samantha", "hey samantha", "hello samantha"]
+    assert normalize_command_text(raw_text, wake_words) == normalized
+
+
+def test_classification_cache(classifier):
+    """Test equivalent commands are classified once and served from the cache."""
+    classifier.wake_words = ["samantha", "hey samantha"]
+    classifier.cache.reset_stats()
+
+    with patch.object(classifier.cascade, 'classify', wraps=classifier.cascade.classify) as cascade:
+        first = classifier.classify("Goodbye now")
+        assert classifier.classify("goodbye   now!") == first
+        assert classifier.classify("Hey Samantha, goodbye now") == first
+        assert cascade.call_count == 1
+
+    stats = classifier.get_cache_stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["size"] == 1
+
+
+def test_classify_batch_uses_cache(classifier):
+    """Test batch classification only runs the cascade for uncached texts."""
+    classifier.classify("hello there")
+
+    with patch.object(classifier.cascade, 'classify_batch', wraps=classifier.cascade.classify_batch) as cascade:
+        results = classifier.classify_batch(["Hello there", "bye", "Bye!"])
+        cascade.assert_called_once_with(["bye"])
+
+    assert results == [("greeting", 0.9), ("farewell", 0.9), ("farewell", 0.9)]
+
+
+def test_cache_invalidated_on_intent_changes(classifier, tmp_path):
+    """Test adding an intent drops results cached under the old intents."""
+    classifier.intents_path = str(tmp_path / "intents.json")
+    assert classifier.classify("play some music")[0] == "default"
+
+    classifier.add_intent("music", ["play some music"], ["Playing music."])
+
+    assert classifier.classify("play some music")[0] == "music"
+    assert classifier.get_cache_stats()["invalidations"] >= 1
+
+
+def test_pattern_with_punctuation(classifier, tmp_path):
+    """Test patterns are normalized like commands, so punctuation does not stop a rules match."""
+    classifier.intents_path = str(tmp_path / "intents.json")
+    classifier.add_intent("status", ["how are you?", "what's up?"], ["All good."])
+
+    assert classifier.classify("how are you?") == ("status", 0.9)
+    assert classifier.classify("What's up") == ("status", 0.9)
+
+
+def test_cache_bounded(classifier):
+    """Test the cache evicts the least recently used results."""
+    classifier.cache = LRUCache(maxsize=2)
+    for text in ["hello", "bye", "weather"]:
+        classifier.classify(text)
+
+    stats = classifier.get_cache_stats()
+    assert stats["size"] == 2
+    assert stats["evictions"] == 1
+    assert "hello" not in classifier.cache
+
+
+@pytest.fixture
+def file_classifier(tmp_path):
+    """Fixture for a classifier backed by a temporary intents file."""
+    intents_path = tmp_path / "intents.json"
+    intents_path.write_text(json.dumps({
+        "weather": {"patterns": ["weather", "forecast"], "responses": ["Here's the weather."]}
+    }))
+
+    with patch('assistant.intent_classifier.config_manager') as mock_config:
+        mock_config.get_section.return_value = {
+            "intents_file": str(intents_path),
+            "use_ml_model": False,
+            "use_statistical_model": False,
+            "save_debounce_s": 0.05
+        }
+        mock_config.get.side_effect = lambda key, default=None: default
+        classifier = IntentClassifier()
+
+    yield classifier
+    classifier.stop_watching_intents()
+
+
+def test_diff_intents():
+    """Test added, removed and changed intents are detected."""
+    old = {"a": {"patterns": ["x"]}, "b": {"patterns": ["y"]}, "c": {"patterns": ["z"]}}
+    new = {"a": {"patterns": ["x"]}, "b": {"patterns": ["y", "w"]}, "d": {"patterns": ["v"]}}
+    assert diff_intents(old, new) == ({"d"}, {"c"}, {"b"})
+
+
+def test_reload_intents_incrementally(file_classifier):
+    """Test reloading only re-indexes and invalidates what changed."""
+    weather_entry = file_classifier._intent_index["weather"]
+    file_classifier.classify("hello there")
+    file_classifier.classify("will it snow")
+
+    intents = json.loads(open(file_classifier.intents_path).read())
+    intents["snow"] = {"patterns": ["snow"], "responses": ["Snow!"]}
+    with open(file_classifier.intents_path, "w") as f:
+        json.dump(intents, f)
+
+    summary = file_classifier.reload_intents()
+    assert summary == {"added": ["snow"], "removed": [], "changed": []}
+
+    # Unchanged intents keep their matcher entries
+    assert file_classifier._intent_index["weather"] is weather_entry
+
+    # Only results the new intent can affect were dropped
+    assert "hello there" in file_classifier.cache
+    assert "will it snow" not in file_classifier.cache
+    assert file_classifier.classify("will it snow")[0] == "snow"
+
+
+def test_reload_keeps_intents_on_invalid_file(file_classifier):
+    """Test a half-written intents file does not wipe the current intents."""
+    with open(file_classifier.intents_path, "w") as f:
+        f.write('{"weather": ')
+
+    assert file_classifier.reload_intents() == {"added": [], "removed": [], "changed": []}
+    assert "weather" in file_classifier.intents
+
+
+def test_reload_marks_statistical_intents_stale(file_classifier):
+    """Test statistical predictions for intents edited after training are ignored."""
+    file_classifier.statistical_model = FakeStatisticalModel({"is it sunny": ("weather", 0.9)})
+    assert file_classifier.classify("is it sunny") == ("weather", 0.9)
+
+    with open(file_classifier.intents_path, "w") as f:
+        json.dump({"weather": {"patterns": ["rain"], "responses": ["Rain."]}}, f)
+    assert file_classifier.reload_intents()["changed"] == ["weather"]
+
+    assert file_classifier.classify("is it sunny")[0] == "default"
+
+
+def test_load_checks_intents_fingerprint(file_classifier):
+    """Test a loaded model is checked against the intents it was trained on."""
+    trained = {"weather": {"patterns": ["rain"], "responses": ["Rain."]}}
+    model = StatisticalIntentModel(SimpleNamespace(classes_=["weather"]), {
+        "intents_fingerprint": intents_fingerprint(trained),
+        "intent_fingerprints": intent_fingerprints(trained)
+    })
+
+    with patch.object(StatisticalIntentModel, 'load', return_value=model):
+        file_classifier._load_statistical_model()
+    assert file_classifier.statistical_model is model
+    assert file_classifier._stale_statistical_intents == {"weather"}
+
+    # Without per-intent fingerprints the model is skipped until retrained
+    file_classifier.statistical_model = None
+    del model.metadata["intent_fingerprints"]
+    with patch.object(StatisticalIntentModel, 'load', return_value=model):
+        file_classifier._load_statistical_model()
+    assert file_classifier.statistical_model is None
+
+
+def test_add_intent_debounced_atomic_save(file_classifier):
+    """Test a burst of add_intent calls is written once, atomically."""
+    with patch('assistant.intent_classifier.atomic_write_json') as write:
+        file_classifier.add_intent("music", ["play music"], ["Playing."])
+        file_classifier.add_intent("news", ["news"], ["Here's the news."])
+        write.assert_not_called()
+
+        time.sleep(0.3)
+        write.assert_called_once()
+        saved = write.call_args[0][1]
+        assert "music" in saved and "news" in saved
+
+    assert not file_classifier.flush_intents()
+
+
+def test_hot_reload_from_file_watcher(file_classifier):
+    """Test edits to the intents file are picked up while running."""
+    file_classifier.watch_intents(interval=0.02)
+    file_classifier.intents_watcher.debounce = 0.0
+
+    # The classifier's own saves are not reloaded
+    file_classifier.add_intent("music", ["play music"], ["Playing."])
+    assert file_classifier.flush_intents()
+    with patch.object(file_classifier, 'reload_intents') as reload:
+        time.sleep(0.1)
+        reload.assert_not_called()
+
+    intents = json.loads(open(file_classifier.intents_path).read())
+    intents["timer"] = {"patterns": ["set a timer"], "responses": ["Timer set."]}
+    with open(file_classifier.intents_path, "w") as f:
+        json.dump(intents, f)
+
+    deadline = time.time() + 5
+    while "timer" not in file_classifier.intents and time.time() < deadline:
+        time.sleep(0.02)
+    assert file_classifier.classify("set a timer please")[0] == "timer"
+    assert "music" in file_classifier.intents
+
+
+def _slow_load(classifier_self, delay=0.2):
+    """Fake _load_model that takes a while and publishes a model."""
+    time.sleep(delay)
+    classifier_self.tokenizer = MagicMock()
+    classifier_self.model = MagicMock()
+
+
+@pytest.fixture
+def ml_patches():
+    """Pretend ML libraries are installed without importing them."""
+    with patch('assistant.intent_classifier.ML_AVAILABLE', True), \
+         patch('assistant.intent_classifier.torch', MagicMock(), create=True):
+        yield
+
+
+def test_background_model_loading(ml_patches):
+    """Test the model loads in the background while fast tiers answer."""
+    with patch.object(IntentClassifier, '_load_model', _slow_load), \
+         patch.object(IntentClassifier, '_classify_with_model', return_value=("greeting", 0.7)) as neural:
+        start = time.perf_counter()
+        classifier = IntentClassifier()
+        assert time.perf_counter() - start < 0.2
+        assert classifier.model_state == "loading"
+        assert not classifier.is_model_ready
+
+        # Fast tiers answer while loading; the neural tier is not used yet
+        assert classifier.classify("hello there")[0] == "greeting"
+        classifier.classify("quantum physics")
+        neural.assert_not_called()
+
+        assert classifier.wait_for_model(timeout=5)
+        status = classifier.get_model_status()
+        assert status["state"] == "ready"
+        assert status["load_time_s"] >= 0.2
+
+        assert classifier.classify("quantum physics") == ("greeting", 0.7)
+
+
+def test_lazy_model_loading(ml_patches):
+    """Test lazy loading starts on the first miss of the fast tiers."""
+    with patch.object(IntentClassifier, '_load_model', lambda self: _slow_load(self, 0.01)), \
+         patch('assistant.intent_classifier.config_manager') as mock_config:
+        mock_config.get_section.return_value = {"model_loading": "lazy", "use_statistical_model": False}
+        classifier = IntentClassifier()
+        assert classifier.model_state == "not_loaded"
+
+        classifier.classify("hello there")
+        assert classifier.model_state == "not_loaded"
+
+        classifier.classify("quantum physics")
+        assert classifier.model_state in ("loading", "ready")
+        assert classifier.wait_for_model(timeout=5)
+
+
+def test_failed_model_loading(ml_patches):
+    """Test a failed load is reported and classification keeps working."""
+    with patch.object(IntentClassifier, '_load_model', lambda self: None):
+        classifier = IntentClassifier()
+        assert not classifier.wait_for_model(timeout=5)
+        assert classifier.model_state == "failed"
+        assert classifier.classify("goodbye")[0] == "farewell"
+
+
+def test_model_disabled_without_ml():
+    """Test the model state is disabled without ML libraries."""
+    with patch('assistant.intent_classifier.ML_AVAILABLE', False):
+        classifier = IntentClassifier()
+    assert classifier.model_state == "disabled"
+    assert not classifier.wait_for_model(timeout=0)
+
+
 def test_error_handling():
     """Test error handling during initialization."""
     # Test with missing dependencies
@@ -0,0 +1,156 @@
+"""
+Test module for the statistical intent model.
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import unittest
+from types import SimpleNamespace
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+# Import the module to test
+from assistant.intent_model import (
+    SKLEARN_AVAILABLE, StatisticalIntentModel, build_training_data, intent_fingerprints,
+    intents_fingerprint, load_logged_commands, match_intent_patterns, train_intent_model
+)
+
+
+TEST_INTENTS = {
+    "greeting": {
+        "patterns": ["hello", "hi there", "good morning"],
+        "responses": ["Hello!"]
+    },
+    "weather": {
+        "patterns": ["weather", "temperature", "forecast", "rain"],
+        "responses": ["Here's the weather."]
+    },
+    "music": {
+        "patterns": ["play music", "song", "playlist"],
+        "responses": ["Playing music."]
+    },
+    "default": {
+        "patterns": [],
+        "responses": ["I'm not sure."]
+    }
+}
+
+
+class TestTrainingData(unittest.TestCase):
+    """Test cases for building the training set."""
+
+    def test_match_intent_patterns(self):
+        """Test weak labeling with intent patterns."""
+        self.assertEqual(match_intent_patterns("what's the weather", TEST_INTENTS), "weather")
+        self.assertEqual(match_intent_patterns("play a song", TEST_INTENTS), "music")
+        self.assertIsNone(match_intent_patterns("open brave browser", TEST_INTENTS))
+
+    def test_build_training_data(self):
+        """Test patterns and logged commands become labeled examples."""
+        commands = ["Play a song please", "open brave browser", "open brave browser", "hello"]
+        texts, labels = build_training_data(TEST_INTENTS, commands)
+
+        examples = dict(zip(texts, labels))
+        self.assertEqual(examples["forecast"], "weather")
+        self.assertEqual(examples["play a song please"], "music")
+        self.assertEqual(examples["open brave browser"], "default")
+
+        # Duplicates are dropped
+        self.assertEqual(texts.count("open brave browser"), 1)
+        self.assertEqual(texts.count("hello"), 1)
+
+    def test_build_training_data_without_default(self):
+        """Test unmatched commands can be skipped."""
+        texts, _ = build_training_data(TEST_INTENTS, ["open brave"], label_unmatched_as_default=False)
+        self.assertNotIn("open brave", texts)
+
+    def test_load_logged_commands(self):
+        """Test loading commands from log files."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            log_path = os.path.join(temp_dir, "log.json")
+            with open(log_path, "w", encoding="utf-8") as f:
+                json.dump([{"command": "open spotify", "response": "Opening"}, {"response": "x"}], f)
+
+            commands = load_logged_commands([log_path, os.path.join(temp_dir, "missing.json")])
+            self.assertEqual(commands, ["open spotify"])
+
+
+@unittest.skipUnless(SKLEARN_AVAILABLE, "scikit-learn not installed")
+class TestStatisticalIntentModel(unittest.TestCase):
+    """Test cases for training, persisting and loading the model."""
+
+    def setUp(self):
+        """Train a small model into a temporary directory."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.model_path = os.path.join(self.temp_dir.name, "intent_model.joblib")
+        commands = ["is it going to rain tomorrow", "play my playlist", "open brave browser",
+                    "open github", "hello samantha"]
+        log_path = os.path.join(self.temp_dir.name, "log.json")
+        with open(log_path, "w", encoding="utf-8") as f:
+            json.dump([{"command": c} for c in commands], f)
+
+        self.model = train_intent_model(TEST_INTENTS, log_paths=[log_path], output_path=self.model_path)
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.temp_dir.cleanup()
+
+    def test_predict(self):
+        """Test single predictions."""
+        intent, confidence = self.model.predict("will it rain")
+        self.assertEqual(intent, "weather")
+        self.assertGreater(confidence, 0.0)
+
+    def test_predict_batch_matches_predict(self):
+        """Test batch predictions agree with single predictions."""
+        texts = ["will it rain", "play a song", "open github please"]
+        batch = self.model.predict_batch(texts)
+        self.assertEqual(len(batch), 3)
+        for text, result in zip(texts, batch):
+            self.assertEqual(result[0], self.model.predict(text)[0])
+
+    def test_save_and_load(self):
+        """Test the artifact round-trips and loads quickly."""
+        start = time.perf_counter()
+        loaded = StatisticalIntentModel.load(self.model_path)
+        elapsed = time.perf_counter() - start
+
+        self.assertIsNotNone(loaded)
+        self.assertEqual(loaded.labels, self.model.labels)
+        self.assertEqual(loaded.predict("forecast for today")[0], self.model.predict("forecast for today")[0])
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(loaded.stale_intents(TEST_INTENTS), set())
+
+
+def test_stale_intents():
+    """Test intents edited after training are detected from the artifact fingerprints."""
+    model = StatisticalIntentModel(SimpleNamespace(classes_=["greeting", "weather"]), {
+        "intents_fingerprint": intents_fingerprint(TEST_INTENTS),
+        "intent_fingerprints": intent_fingerprints(TEST_INTENTS)
+    })
+    assert model.stale_intents(TEST_INTENTS) == set()
+
+    edited = json.loads(json.dumps(TEST_INTENTS))
+    edited["weather"]["patterns"].append("snow")
+    edited["news"] = {"patterns": ["news"], "responses": ["News."]}
+    del edited["music"]
+    assert model.stale_intents(edited) == {"weather"}
+
+    # Artifacts without per-intent fingerprints cannot tell what changed
+    del model.metadata["intent_fingerprints"]
+    assert model.stale_intents(edited) is None
+
+
+def test_load_missing_artifact():
+    """Test loading a missing artifact returns None."""
+    assert StatisticalIntentModel.load("/nonexistent/intent_model.joblib") is None
+
+
+if __name__ == "__main__":
+    unittest.main()
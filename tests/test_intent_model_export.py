@@ -0,0 +1,131 @@
+"""
+Test module for the quantized intent model export and CPU backend.
+"""
+
+import os
+import sys
+import json
+import unittest
+from unittest.mock import patch, MagicMock
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+# Import the modules to test
+from assistant.intent_model_export import (
+    TORCH_AVAILABLE, QuantizedIntentBackend, current_rss_mb, micro_batches,
+    configured_model_name, export_quantized_model, DEFAULT_MODEL_NAME
+)
+from assistant.intent_classifier import IntentClassifier
+
+
+class TestHelpers(unittest.TestCase):
+    """Test cases for backend helpers."""
+
+    def test_micro_batches(self):
+        """Test texts are split into fixed-size micro-batches."""
+        batches = list(micro_batches(list("abcdefg"), 3))
+        self.assertEqual(batches, [["a", "b", "c"], ["d", "e", "f"], ["g"]])
+        self.assertEqual(list(micro_batches([], 3)), [])
+
+    def test_current_rss(self):
+        """Test RSS measurement returns a positive number."""
+        self.assertGreater(current_rss_mb(), 0)
+
+    def test_configured_model_name(self):
+        """Test the export defaults to the model the classifier serves."""
+        with patch('assistant.intent_model_export.config_manager') as mock_config:
+            mock_config.get_section.return_value = {"model": "distilgpt2"}
+            self.assertEqual(configured_model_name(), "distilgpt2")
+            mock_config.get_section.assert_called_with("intent_classifier")
+            mock_config.get_section.return_value = {}
+            self.assertEqual(configured_model_name(), DEFAULT_MODEL_NAME)
+
+
+class TestQuantizedRouting(unittest.TestCase):
+    """Test the classifier uses the quantized backend when configured."""
+
+    def test_classify_with_quantized_backend(self):
+        """Test next-token probabilities from the backend are scored per intent."""
+        with patch('assistant.intent_classifier.ML_AVAILABLE', False):
+            classifier = IntentClassifier()
+        classifier.intents = {"greeting": {"patterns": []}, "farewell": {"patterns": []}}
+
+        backend = MagicMock(spec=QuantizedIntentBackend)
+        backend.next_token_probs.return_value = [[0.1, 0.7, 0.2]]
+        classifier.model = backend
+        classifier.tokenizer = MagicMock()
+        classifier.tokenizer.encode.side_effect = lambda name: [1] if name == "greeting" else [0, 2]
+
+        self.assertEqual(classifier._classify_with_model("hi"), ("greeting", 0.7))
+        backend.next_token_probs.assert_called_once_with(["hi"])
+
+    def test_quantized_backend_uses_cpu(self):
+        """Test the quantized backend never selects an accelerator."""
+        with patch('assistant.intent_classifier.ML_AVAILABLE', True), \
+             patch('assistant.intent_classifier.torch', MagicMock(), create=True), \
+             patch.object(IntentClassifier, '_load_model'), \
+             patch('assistant.intent_classifier.config_manager') as mock_config:
+            mock_config.get_section.return_value = {"neural_backend": "quantized", "use_gpu": True}
+            classifier = IntentClassifier()
+        self.assertEqual(classifier.device, "cpu")
+
+
+@pytest.mark.skipif(not TORCH_AVAILABLE, reason="torch not installed")
+def test_backend_requires_export(tmp_path):
+    """Test loading a backend from an empty directory fails clearly."""
+    with pytest.raises(FileNotFoundError):
+        QuantizedIntentBackend(str(tmp_path))
+
+
+def make_tiny_model(directory):
+    """Save a one-layer GPT-2 with a character-level tokenizer, so no download is needed."""
+    from transformers import GPT2Config, GPT2LMHeadModel, GPT2Tokenizer
+    import torch
+
+    # Byte-level BPE spells a space as "\u0120"; without merges every character is a token
+    tokens = ["<|endoftext|>", "\u0120"] + [chr(c) for c in range(ord("a"), ord("z") + 1)] + list("0123456789'")
+    with open(os.path.join(directory, "vocab.json"), "w", encoding="utf-8") as f:
+        json.dump({token: i for i, token in enumerate(tokens)}, f)
+    with open(os.path.join(directory, "merges.txt"), "w", encoding="utf-8") as f:
+        f.write("#version: 0.2\n")
+
+    torch.manual_seed(0)
+    config = GPT2Config(vocab_size=len(tokens), n_positions=64, n_embd=32, n_layer=1, n_head=2,
+                        bos_token_id=0, eos_token_id=0)
+    GPT2LMHeadModel(config).save_pretrained(directory)
+    GPT2Tokenizer(os.path.join(directory, "vocab.json"), os.path.join(directory, "merges.txt")).save_pretrained(directory)
+
+
+@pytest.mark.skipif(not TORCH_AVAILABLE, reason="torch not installed")
+def test_export_smoke(tmp_path):
+    """Test a tiny model exports, loads on CPU and agrees with eager inference."""
+    import numpy as np
+    import torch
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    model_dir, export_dir = tmp_path / "model", tmp_path / "export"
+    model_dir.mkdir()
+    make_tiny_model(str(model_dir))
+    model_path = export_quantized_model(str(model_dir), str(export_dir), max_length=16, micro_batch_size=4)
+    assert os.path.exists(model_path)
+
+    texts = ["play some music", "open github", "set a timer for 5 minutes", "hello", "what's the weather"]
+    backend = QuantizedIntentBackend(str(export_dir), intra_op_threads=1)
+    probs = backend.next_token_probs(texts)
+    assert probs.shape == (len(texts), len(AutoTokenizer.from_pretrained(str(model_dir))))
+    assert np.allclose(probs.sum(axis=1), 1.0, atol=1e-4)
+
+    # Quantization keeps the eager model's distribution
+    tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+    model = AutoModelForCausalLM.from_pretrained(str(model_dir)).eval()
+    for text, row in zip(texts, probs):
+        with torch.no_grad():
+            eager = torch.softmax(model(**tokenizer(text, return_tensors="pt")).logits[0, -1], dim=-1).numpy()
+        assert np.abs(eager - row).max() < 0.05
+
+
+if __name__ == "__main__":
+    unittest.main()
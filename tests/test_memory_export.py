@@ -0,0 +1,259 @@
+"""
+Test module for streaming, compressed memory export and import.
+"""
+
+import os
+import sys
+import json
+import gzip
+import unittest
+import tempfile
+import tracemalloc
+import pytest
+from datetime import datetime, timedelta
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+# Import the module to test
+from assistant.memory_export import (
+    MemoryExportReader, write_memory_export, detect_compression, batched, ZSTD_AVAILABLE,
+    COMPRESSION_GZIP, COMPRESSION_NONE, COMPRESSION_ZSTD
+)
+from assistant.memory_manager import MemoryManager
+from assistant.memory_storage import BACKEND_JSON, BACKEND_SQLITE
+
+
+START = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def make_entries(count, start=0):
+    """Create alternating user and assistant entries a minute apart."""
+    return [{"speaker": ("user", "assistant")[i % 2], "text": f"Message {i}",
+             "timestamp": (START + timedelta(minutes=i)).isoformat()} for i in range(start, start + count)]
+
+
+class TestMemoryExport(unittest.TestCase):
+    """Test cases for writing and reading exports."""
+
+    def setUp(self):
+        """Set up a temporary directory."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.temp_dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.temp_dir.name, name)
+
+    def test_round_trip(self):
+        """Test entries, preferences and context come back as written."""
+        entries = make_entries(25)
+        entries[3]["intent"] = "greeting"
+        progress = []
+        written = write_memory_export(self.path("export.jsonl"), iter(entries), {"theme": "dark"},
+                                      {"session_id": "abc"}, entry_count=25,
+                                      progress=lambda done, total: progress.append((done, total)),
+                                      progress_interval=10)
+        self.assertEqual(written, 25)
+        self.assertEqual(progress, [(10, 25), (20, 25), (25, 25)])
+
+        with MemoryExportReader(self.path("export.jsonl")) as export:
+            self.assertFalse(export.legacy)
+            self.assertEqual(export.entry_count, 25)
+            self.assertEqual(export.user_preferences, {"theme": "dark"})
+            self.assertEqual(export.context_data, {"session_id": "abc"})
+            self.assertEqual(list(export.entries()), entries)
+
+    def test_one_record_per_line(self):
+        """Test the export is line-delimited JSON."""
+        write_memory_export(self.path("export.jsonl"), make_entries(3), {}, {})
+        with open(self.path("export.jsonl"), encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([next(iter(record)) for record in records],
+                         ["header", "user_preferences", "context_data", "entry", "entry", "entry", "end"])
+
+    def test_gzip_chosen_by_extension(self):
+        """Test a .gz export is gzip-compressed and read back transparently."""
+        entries = make_entries(200)
+        write_memory_export(self.path("export.jsonl.gz"), entries, {}, {})
+        self.assertEqual(detect_compression(self.path("export.jsonl.gz")), COMPRESSION_GZIP)
+        with gzip.open(self.path("export.jsonl.gz"), "rt", encoding="utf-8") as f:
+            self.assertIn("header", json.loads(f.readline()))
+
+        # Compression is detected from the content, not the name
+        os.rename(self.path("export.jsonl.gz"), self.path("renamed.jsonl"))
+        with MemoryExportReader(self.path("renamed.jsonl")) as export:
+            self.assertEqual(list(export.entries()), entries)
+
+    def test_explicit_compression(self):
+        """Test compression can be chosen regardless of the extension."""
+        write_memory_export(self.path("export.jsonl.gz"), make_entries(2), {}, {}, compression=COMPRESSION_NONE)
+        self.assertEqual(detect_compression(self.path("export.jsonl.gz")), COMPRESSION_NONE)
+
+    def test_truncated_export_is_rejected(self):
+        """Test an export cut off before its end record raises."""
+        write_memory_export(self.path("export.jsonl"), make_entries(10), {}, {})
+        with open(self.path("export.jsonl"), encoding="utf-8") as f:
+            lines = f.readlines()
+        with open(self.path("truncated.jsonl"), "w", encoding="utf-8") as f:
+            f.writelines(lines[:-3])
+
+        with MemoryExportReader(self.path("truncated.jsonl")) as export:
+            with self.assertRaises(ValueError):
+                list(export.entries())
+
+    def test_failed_export_leaves_no_file(self):
+        """Test an export interrupted by an error is not left half-written."""
+        def failing_entries():
+            yield from make_entries(5)
+            raise RuntimeError("storage went away")
+
+        with self.assertRaises(RuntimeError):
+            write_memory_export(self.path("export.jsonl"), failing_entries(), {}, {})
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
+
+    def test_legacy_export(self):
+        """Test exports written as one JSON document are still read."""
+        entries = make_entries(4)
+        with open(self.path("legacy.json"), "w", encoding="utf-8") as f:
+            json.dump({"conversation_history": entries, "user_preferences": {"theme": "dark"},
+                       "context_data": {}, "exported_at": START.isoformat()}, f, indent=2)
+
+        with MemoryExportReader(self.path("legacy.json")) as export:
+            self.assertTrue(export.legacy)
+            self.assertTrue(export.has_history)
+            self.assertEqual(export.entry_count, 4)
+            self.assertEqual(export.user_preferences, {"theme": "dark"})
+            self.assertEqual(list(export.entries()), entries)
+
+    def test_not_an_export(self):
+        """Test files that are not exports are rejected."""
+        with open(self.path("list.json"), "w", encoding="utf-8") as f:
+            json.dump([1, 2, 3], f)
+        with self.assertRaises(ValueError):
+            MemoryExportReader(self.path("list.json"))
+
+    @unittest.skipUnless(ZSTD_AVAILABLE, "zstandard not installed")
+    def test_zstd_round_trip(self):
+        """Test a .zst export is zstd-compressed and read back."""
+        entries = make_entries(50)
+        write_memory_export(self.path("export.jsonl.zst"), entries, {}, {})
+        self.assertEqual(detect_compression(self.path("export.jsonl.zst")), COMPRESSION_ZSTD)
+        with MemoryExportReader(self.path("export.jsonl.zst")) as export:
+            self.assertEqual(list(export.entries()), entries)
+
+    @unittest.skipIf(ZSTD_AVAILABLE, "zstandard installed")
+    def test_zstd_unavailable(self):
+        """Test asking for zstd without zstandard fails clearly."""
+        with self.assertRaises(ValueError):
+            write_memory_export(self.path("export.jsonl.zst"), [], {}, {})
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
+
+
+# Additional tests with pytest
+
+def test_batched():
+    """Test iterables are split into lists of at most the batch size."""
+    assert list(batched(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(batched([], 3)) == []
+
+
+@pytest.mark.parametrize("backend", [BACKEND_JSON, BACKEND_SQLITE])
+def test_storage_iterates_entries(tmp_path, backend):
+    """Test both backends iterate the whole history, oldest first."""
+    manager = MemoryManager(data_dir=str(tmp_path), storage_backend=backend, history_window=3)
+    manager.storage.append_entries(make_entries(2500))
+    assert [entry["text"] for entry in manager.storage.iter_entries()] == [f"Message {i}" for i in range(2500)]
+    manager.close()
+
+
+@pytest.mark.parametrize("backend", [BACKEND_JSON, BACKEND_SQLITE])
+def test_memory_manager_round_trip(tmp_path, backend):
+    """Test exporting from one memory and importing into another."""
+    source = MemoryManager(data_dir=str(tmp_path / "source"), storage_backend=backend, history_window=5)
+    source.storage.append_entries(make_entries(1200))
+    source.set_user_preference("theme", "dark")
+    source.set_context_data("location", "London")
+    progress = []
+    export_path = str(tmp_path / "memory.jsonl.gz")
+    assert source.export_memory(export_path, progress=lambda done, total: progress.append((done, total)))
+    assert progress == [(1000, 1200), (1200, 1200)]
+    source.close()
+
+    target = MemoryManager(data_dir=str(tmp_path / "target"), storage_backend=backend, history_window=5)
+    target.add_conversation_entry("user", "replaced by the import")
+    progress = []
+    assert target.import_memory(export_path, progress=lambda done, total: progress.append((done, total)),
+                                batch_size=500)
+    assert progress == [(1000, 1200), (1200, 1200)]
+    assert target.get_conversation_count() == 1200
+    assert [entry["text"] for entry in target.conversation_history] == [f"Message {i}" for i in range(1195, 1200)]
+    assert target.search_conversation("Message 42").results[0]["text"] == "Message 42"
+    assert target.get_user_preference("theme") == "dark"
+    assert target.get_context_data("location") == "London"
+    target.close()
+
+
+def test_import_legacy_export(tmp_path):
+    """Test the memory manager imports exports written by older versions."""
+    legacy_path = str(tmp_path / "legacy.json")
+    with open(legacy_path, "w", encoding="utf-8") as f:
+        json.dump({"conversation_history": make_entries(3), "user_preferences": {"voice": "nova"},
+                   "context_data": {"session_id": "abc"}, "exported_at": START.isoformat()}, f, indent=2)
+
+    manager = MemoryManager(data_dir=str(tmp_path / "memory"))
+    assert manager.import_memory(legacy_path)
+    assert [entry["text"] for entry in manager.get_conversation_history()] == ["Message 0", "Message 1", "Message 2"]
+    assert manager.get_user_preference("voice") == "nova"
+    assert manager.get_context_data("session_id") == "abc"
+    manager.close()
+
+
+@pytest.mark.parametrize("backend", [BACKEND_JSON, BACKEND_SQLITE])
+def test_truncated_import_keeps_history(tmp_path, backend):
+    """Test a truncated export leaves the existing history untouched."""
+    export_path = str(tmp_path / "export.jsonl")
+    write_memory_export(export_path, make_entries(20), {}, {})
+    with open(export_path, encoding="utf-8") as f:
+        lines = f.readlines()
+    with open(export_path, "w", encoding="utf-8") as f:
+        f.writelines(lines[:-5])
+
+    manager = MemoryManager(data_dir=str(tmp_path / "memory"), storage_backend=backend)
+    manager.add_conversation_entry("user", "keep me")
+    assert not manager.import_memory(export_path)
+    assert [entry["text"] for entry in manager.get_conversation_history()] == ["keep me"]
+    assert [entry["text"] for entry in manager.conversation_history] == ["keep me"]
+    manager.close()
+
+
+def test_peak_memory_is_bounded(tmp_path):
+    """Test export and import memory does not grow with the history."""
+    def peak_bytes(count):
+        directory = tmp_path / str(count)
+        source = MemoryManager(data_dir=str(directory / "source"), history_window=10)
+        source.storage.append_entries(make_entries(count))
+        target = MemoryManager(data_dir=str(directory / "target"), history_window=10)
+        export_path = str(directory / "memory.jsonl.gz")
+
+        tracemalloc.start()
+        assert source.export_memory(export_path)
+        assert target.import_memory(export_path)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert target.get_conversation_count() == count
+        source.close()
+        target.close()
+        return peak
+
+    small = peak_bytes(2000)
+    large = peak_bytes(20000)
+    assert large < small * 2
+
+
+if __name__ == "__main__":
+    unittest.main()
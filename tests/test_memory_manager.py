@@ -12,6 +12,7 @@ import tempfile
 import time
 from unittest.mock import patch, MagicMock, mock_open
 import pytest
+from collections import deque
 from datetime import datetime
 
 # Add the project root to the Python path
@@ -42,7 +43,7 @@ class TestMemoryManager(unittest.TestCase):
         """Test memory manager initialization."""
         # Check if memory structures were initialized
         self.assertIsNotNone(self.memory_manager.conversation_history)
-        self.assertIsInstance(self.memory_manager.conversation_history, list)
+        self.assertIsInstance(self.memory_manager.conversation_history, deque)
         self.assertIsNotNone(self.memory_manager.user_preferences)
         self.assertIsInstance(self.memory_manager.user_preferences, dict)
         self.assertIsNotNone(self.memory_manager.context_data)
@@ -0,0 +1,197 @@
+"""
+Test module for memory retention and compaction.
+"""
+
+import os
+import sys
+import json
+import gzip
+import unittest
+import tempfile
+import pytest
+from datetime import datetime, timedelta
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+# Import the module to test
+from assistant.memory_retention import RetentionPolicy, RetentionManager, ARCHIVE_DIRNAME
+from assistant.memory_manager import MemoryManager
+
+
+NOW = datetime(2024, 3, 1, 12, 0, 0)
+
+
+def add_conversations(manager, count, length, start):
+    """Add conversations of alternating turns, one day apart."""
+    for c in range(count):
+        for i in range(length):
+            speaker = "user" if i % 2 == 0 else "assistant"
+            manager.add_conversation_entry(speaker, f"Conversation {c} message {i}",
+                                           start + timedelta(days=c, minutes=i))
+
+
+class TestRetentionManager(unittest.TestCase):
+    """Test cases for RetentionManager."""
+
+    def setUp(self):
+        """Set up a memory manager without a policy and attach one per test."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.memory = MemoryManager(data_dir=self.temp_dir.name)
+
+    def tearDown(self):
+        """Clean up after tests."""
+        if self.memory.retention is not None:
+            self.memory.retention.stop()
+        self.memory.close()
+        self.temp_dir.cleanup()
+
+    def attach(self, **limits):
+        """Attach a retention manager with the given limits."""
+        self.memory.retention = RetentionManager(self.memory, RetentionPolicy(**limits))
+        return self.memory.retention
+
+    def test_split_conversations(self):
+        """Test idle gaps longer than the threshold start a new conversation."""
+        retention = self.attach(conversation_gap_minutes=30)
+        times = [NOW, NOW + timedelta(minutes=10), NOW + timedelta(minutes=50), NOW + timedelta(minutes=60)]
+        entries = [{"speaker": "user", "text": str(i), "timestamp": t.isoformat()} for i, t in enumerate(times)]
+        conversations = retention.split_conversations(entries, NOW)
+        self.assertEqual([[entry["text"] for entry in c] for c in conversations], [["0", "1"], ["2", "3"]])
+
+    def test_max_conversations_archives_oldest(self):
+        """Test conversations beyond the limit move to an archive with rollups."""
+        add_conversations(self.memory, 5, 4, NOW - timedelta(days=5))
+        retention = self.attach(max_conversations=2)
+
+        result = retention.compact(NOW)
+        self.assertEqual(result["archived"], 12)
+        self.assertEqual(result["kept"], 8)
+        self.assertEqual(len(self.memory.conversation_history), 8)
+        self.assertEqual(self.memory.conversation_history[0]["text"], "Conversation 3 message 0")
+
+        archives = retention.list_archives()
+        self.assertEqual(len(archives), 1)
+        archived = retention.read_archive(archives[0])
+        self.assertEqual([entry["text"] for entry in archived][:2],
+                         ["Conversation 0 message 0", "Conversation 0 message 1"])
+
+        rollups = retention.get_rollups()
+        self.assertEqual(len(rollups), 3)
+        self.assertEqual(rollups[0]["entries"], 4)
+        self.assertEqual(rollups[0]["speakers"], {"user": 2, "assistant": 2})
+        self.assertEqual(rollups[0]["preview"], "Conversation 0 message 0")
+        self.assertEqual(rollups[0]["archive"], archives[0])
+
+    def test_max_conversation_length_trims_oldest_turns(self):
+        """Test long conversations keep only their most recent entries."""
+        add_conversations(self.memory, 1, 10, NOW - timedelta(hours=1))
+        retention = self.attach(max_conversation_length=4)
+
+        result = retention.compact(NOW)
+        self.assertEqual(result["archived"], 6)
+        self.assertEqual([entry["text"] for entry in self.memory.conversation_history],
+                         [f"Conversation 0 message {i}" for i in range(6, 10)])
+
+        # The trimmed history survives a reload
+        self.memory.close()
+        reloaded = MemoryManager(data_dir=self.temp_dir.name)
+        self.assertEqual(len(reloaded.conversation_history), 4)
+        reloaded.close()
+
+    def test_old_conversations_are_forgotten(self):
+        """Test conversations past the retention period keep only a rollup."""
+        add_conversations(self.memory, 2, 2, NOW - timedelta(days=40))
+        add_conversations(self.memory, 1, 2, NOW - timedelta(days=1))
+        retention = self.attach(forget_older_than_days=30)
+
+        result = retention.compact(NOW)
+        self.assertEqual(result["forgotten"], 4)
+        self.assertEqual(result["archived"], 0)
+        self.assertEqual(len(self.memory.conversation_history), 2)
+        self.assertEqual(retention.list_archives(), [])
+        self.assertTrue(all(rollup["archive"] is None for rollup in retention.get_rollups()))
+
+    def test_archive_rotation(self):
+        """Test segments past the retention period or beyond the limit are removed."""
+        retention = self.attach(forget_older_than_days=30, max_archive_segments=2)
+        archive_dir = os.path.join(self.temp_dir.name, ARCHIVE_DIRNAME)
+        os.makedirs(archive_dir)
+        names = [
+            "conversation-20240101T000000-20240101T010000-20240102T000000.jsonl.gz",
+            "conversation-20240220T000000-20240220T010000-20240221T000000.jsonl.gz",
+            "conversation-20240222T000000-20240222T010000-20240223T000000.jsonl.gz",
+            "conversation-20240225T000000-20240225T010000-20240226T000000.jsonl.gz",
+        ]
+        for name in names:
+            with gzip.open(os.path.join(archive_dir, name), "wb") as f:
+                f.write(b"{}\n")
+
+        result = retention.compact(NOW)
+        self.assertEqual(result["segments_removed"], 2)
+        self.assertEqual(retention.list_archives(), names[2:])
+
+    def test_context_expires(self):
+        """Test context values not updated within their period are removed."""
+        retention = self.attach(context_retention_period_days=7)
+        self.memory.set_context_data("stale", "old")
+        self.memory.set_context_data("fresh", "new")
+        retention.touch_context("stale", NOW - timedelta(days=8))
+        retention.touch_context("fresh", NOW - timedelta(days=1))
+
+        result = retention.compact(NOW)
+        self.assertEqual(result["context_expired"], 1)
+        self.assertIsNone(self.memory.get_context_data("stale"))
+        self.assertEqual(self.memory.get_context_data("fresh"), "new")
+
+
+# Additional tests with pytest
+
+def test_no_changes_write_nothing(tmp_path):
+    """Test compacting a history within its limits leaves the data directory untouched."""
+    policy = RetentionPolicy(max_conversations=10, max_conversation_length=10, forget_older_than_days=30,
+                             context_retention_period_days=7)
+    manager = MemoryManager(data_dir=str(tmp_path), retention_policy=policy)
+    result = manager.compact_memory()
+    manager.close()
+
+    assert result["archived"] == 0 and result["forgotten"] == 0 and result["rollups"] == 0
+    assert not (tmp_path / ARCHIVE_DIRNAME).exists()
+    assert not (tmp_path / "retention_state.json").exists()
+
+
+def test_compaction_on_load(tmp_path):
+    """Test a manager with a policy compacts existing history when it loads."""
+    manager = MemoryManager(data_dir=str(tmp_path))
+    add_conversations(manager, 4, 2, datetime.now() - timedelta(days=4))
+    manager.close()
+
+    compacted = MemoryManager(data_dir=str(tmp_path), retention_policy=RetentionPolicy(max_conversations=1))
+    try:
+        assert len(compacted.conversation_history) == 2
+        assert compacted.conversation_history[0]["text"] == "Conversation 3 message 0"
+        stats = compacted.retention.get_stats()
+        assert stats["runs"] == 1
+        assert stats["archived"] == 6
+        assert len(compacted.retention.get_rollups(2)) == 2
+    finally:
+        compacted.close()
+
+    with open(tmp_path / "conversation_rollups.jsonl", encoding="utf-8") as f:
+        assert len([json.loads(line) for line in f]) == 3
+
+
+def test_policy_from_config():
+    """Test the policy reads the limits from the memory config section."""
+    policy = RetentionPolicy.from_config({"max_conversations": 100, "max_conversation_length": 20,
+                                          "context_retention_period_days": 7, "forget_older_than_days": 30})
+    assert policy.max_conversations == 100
+    assert policy.max_conversation_length == 20
+    assert policy.context_retention_period_days == 7
+    assert policy.forget_older_than_days == 30
+    assert policy.max_archive_segments is None
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,195 @@
+"""
+Test module for full-text search over conversation history.
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import unittest
+import tempfile
+import pytest
+from datetime import datetime, timedelta
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+# Import the module to test
+from assistant.memory_search import SearchIndex, SearchResults, parse_query, to_fts5_query, tokenize
+from assistant.memory_storage import SQLiteMemoryStorage, BACKEND_JSON, BACKEND_SQLITE, DATABASE_FILENAME
+from assistant.memory_manager import MemoryManager
+
+
+START = datetime(2024, 1, 1, 12, 0, 0)
+
+TEXTS = [
+    "What is the weather in London",
+    "It is sunny in London today",
+    "Play some jazz music",
+    "Playing jazz on Spotify",
+    "What is the weather like in Paris",
+    "Open London transport website",
+]
+
+
+def make_entries(texts=TEXTS):
+    """Create alternating user and assistant entries one hour apart."""
+    return [{"speaker": "user" if i % 2 == 0 else "assistant", "text": text,
+             "timestamp": (START + timedelta(hours=i)).isoformat()} for i, text in enumerate(texts)]
+
+
+class TestSearchIndex(unittest.TestCase):
+    """Test cases for SearchIndex."""
+
+    def setUp(self):
+        """Set up an index over the sample entries."""
+        self.index = SearchIndex(make_entries())
+
+    def texts(self, *args, **kwargs):
+        """Search and return the matching texts."""
+        results, _ = self.index.search(*args, **kwargs)
+        return [entry["text"] for entry in results]
+
+    def test_keywords_must_all_match(self):
+        """Test every keyword has to appear in a result."""
+        self.assertEqual(sorted(self.texts("weather london")), ["What is the weather in London"])
+        self.assertEqual(self.texts("weather tokyo"), [])
+
+    def test_phrase(self):
+        """Test quoted phrases match adjacent words only."""
+        self.assertEqual(sorted(self.texts('"in london"')),
+                         ["It is sunny in London today", "What is the weather in London"])
+        self.assertEqual(self.texts('"london in"'), [])
+
+    def test_ranking(self):
+        """Test entries with more occurrences of rarer terms rank first."""
+        index = SearchIndex(make_entries(["jazz", "jazz jazz jazz", "jazz and other music of every kind"]))
+        results, total = index.search("jazz")
+        self.assertEqual(total, 3)
+        self.assertEqual(results[0]["text"], "jazz jazz jazz")
+        self.assertEqual(results[-1]["text"], "jazz and other music of every kind")
+        self.assertTrue(all(results[i]["score"] >= results[i + 1]["score"] for i in range(2)))
+
+    def test_filters(self):
+        """Test speaker and time range filters."""
+        self.assertEqual(sorted(self.texts("london", speaker="assistant")),
+                         ["It is sunny in London today", "Open London transport website"])
+        start = (START + timedelta(hours=1)).isoformat()
+        end = (START + timedelta(hours=5)).isoformat()
+        self.assertEqual(sorted(self.texts("weather", start=start, end=end)), ["What is the weather like in Paris"])
+
+    def test_empty_query_lists_newest_first(self):
+        """Test an empty query returns the filtered entries newest first."""
+        start = (START + timedelta(hours=2)).isoformat()
+        self.assertEqual(self.texts("", start=start, speaker="user"),
+                         ["What is the weather like in Paris", "Play some jazz music"])
+
+    def test_pagination(self):
+        """Test pages do not overlap and the total counts every match."""
+        index = SearchIndex(make_entries([f"note number {i}" for i in range(25)]))
+        first, total = index.search("note", limit=10)
+        second, _ = index.search("note", limit=10, offset=10)
+        last, _ = index.search("note", limit=10, offset=20)
+        self.assertEqual(total, 25)
+        self.assertEqual(len(first), 10)
+        self.assertEqual(len(last), 5)
+        texts = [entry["text"] for entry in first + second + last]
+        self.assertEqual(len(set(texts)), 25)
+
+    def test_incremental_add(self):
+        """Test entries added later are searchable."""
+        self.index.add_entry({"speaker": "user", "text": "Remind me to buy milk",
+                              "timestamp": (START + timedelta(days=1)).isoformat()})
+        self.assertEqual(self.texts("milk"), ["Remind me to buy milk"])
+        self.assertEqual(len(self.index), len(TEXTS) + 1)
+
+
+# Additional tests with pytest
+
+def test_query_parsing():
+    """Test keywords, phrases and FTS5 translation."""
+    assert tokenize("What's the Weather?") == ["what", "s", "the", "weather"]
+    assert parse_query('weather "in London" "paris"') == (["weather", "paris"], [["in", "london"]])
+    # FTS5 operators in user input are quoted as plain words
+    assert to_fts5_query('jazz OR "NEAR blues" *') == '"jazz" "or" "near blues"'
+    assert to_fts5_query("  ") == ""
+
+
+def test_sqlite_fts_index(tmp_path):
+    """Test the SQLite backend searches with FTS5 and keeps it in sync."""
+    storage = SQLiteMemoryStorage(str(tmp_path / DATABASE_FILENAME))
+    assert storage.fts_enabled
+    storage.append_entries(make_entries())
+
+    results, total = storage.search_entries('"in london"')
+    assert total == 2
+    assert all(result["score"] > 0 for result in results)
+    results, total = storage.search_entries("london", speaker="assistant", limit=1)
+    assert total == 2 and len(results) == 1
+
+    storage.replace_entries(make_entries(["only jazz now"]))
+    assert storage.search_entries("london") == ([], 0)
+    assert [entry["text"] for entry in storage.search_entries("jazz")[0]] == ["only jazz now"]
+    storage.close()
+
+
+def test_sqlite_indexes_existing_database(tmp_path):
+    """Test a database created before search existed gets its entries indexed."""
+    path = str(tmp_path / DATABASE_FILENAME)
+    connection = sqlite3.connect(path)
+    connection.executescript(
+        "CREATE TABLE conversation (id INTEGER PRIMARY KEY AUTOINCREMENT, speaker TEXT NOT NULL, "
+        "text TEXT NOT NULL, timestamp TEXT NOT NULL, extra TEXT);"
+        "INSERT INTO conversation (speaker, text, timestamp) VALUES ('user', 'old jazz request', '2024-01-01');"
+    )
+    connection.commit()
+    connection.close()
+
+    storage = SQLiteMemoryStorage(path)
+    results, total = storage.search_entries("jazz")
+    assert total == 1 and results[0]["text"] == "old jazz request"
+    storage.close()
+
+
+@pytest.mark.parametrize("backend", [BACKEND_JSON, BACKEND_SQLITE])
+def test_memory_manager_search(tmp_path, backend):
+    """Test search through the memory manager on both backends."""
+    manager = MemoryManager(data_dir=str(tmp_path), storage_backend=backend)
+    for entry in make_entries():
+        manager.add_conversation_entry(entry["speaker"], entry["text"], datetime.fromisoformat(entry["timestamp"]))
+
+    results = manager.search_conversation("weather", speaker="user")
+    assert isinstance(results, SearchResults)
+    assert results.total == 2
+    assert sorted(results.texts()) == ["What is the weather in London", "What is the weather like in Paris"]
+
+    # New entries are indexed as they are added
+    manager.add_conversation_entry("user", "What is the weather in Rome", START + timedelta(days=1))
+    assert manager.search_conversation("weather rome").texts() == ["What is the weather in Rome"]
+
+    yesterday = manager.search_conversation(start=START, end=START + timedelta(hours=3), speaker="user")
+    assert yesterday.texts() == ["Play some jazz music", "What is the weather in London"]
+
+    page = manager.search_conversation("weather", limit=2)
+    assert len(page) == 2 and page.total == 3 and page.has_more
+    assert not manager.search_conversation("weather", limit=2, offset=2).has_more
+    manager.close()
+
+
+def test_search_latency_large_history(tmp_path):
+    """Test searching a large history stays fast once the index is built."""
+    words = ["weather", "music", "jazz", "london", "timer", "alarm", "email", "news", "volume", "light"]
+    entries = [{"speaker": "user", "text": f"{words[i % 10]} {words[(i * 7) % 10]} request {i}",
+                "timestamp": (START + timedelta(minutes=i)).isoformat()} for i in range(20000)]
+    index = SearchIndex(entries)
+
+    begin = time.perf_counter()
+    results, total = index.search("jazz timer", limit=10)
+    elapsed = time.perf_counter() - begin
+    assert total > 0 and len(results) == 10
+    assert elapsed < 0.5
+
+
+if __name__ == "__main__":
+    unittest.main()
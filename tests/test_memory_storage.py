@@ -0,0 +1,219 @@
+"""
+Test module for the memory storage backends.
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import threading
+import unittest
+import tempfile
+import pytest
+from datetime import datetime, timedelta
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+# Import the module to test
+from assistant.memory_storage import (
+    SQLiteMemoryStorage, JsonMemoryStorage, create_storage,
+    BACKEND_JSON, BACKEND_SQLITE, DATABASE_FILENAME
+)
+from assistant.memory_manager import MemoryManager
+from assistant.write_behind import WriteBehindFlusher
+
+
+START = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def make_entry(i, speaker=None):
+    """Create a conversation entry one minute after the previous one."""
+    return {"speaker": speaker or ("user" if i % 2 == 0 else "assistant"), "text": f"Message {i}",
+            "timestamp": (START + timedelta(minutes=i)).isoformat()}
+
+
+class TestSQLiteMemoryStorage(unittest.TestCase):
+    """Test cases for SQLiteMemoryStorage."""
+
+    def setUp(self):
+        """Set up a database in a temporary directory."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, DATABASE_FILENAME)
+        self.storage = SQLiteMemoryStorage(self.path)
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.storage.close()
+        self.temp_dir.cleanup()
+
+    def test_wal_mode(self):
+        """Test the database runs in WAL mode."""
+        mode = self.storage._connection().execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+
+    def test_recent_entries(self):
+        """Test the most recent entries come back oldest first."""
+        self.storage.append_entries([make_entry(i) for i in range(10)])
+        self.assertEqual(self.storage.recent_entries(3), [make_entry(i) for i in range(7, 10)])
+        self.assertEqual(len(self.storage.recent_entries()), 10)
+        self.assertEqual(self.storage.recent_entries(0), [])
+        self.assertEqual(self.storage.count_entries(), 10)
+
+    def test_range_entries(self):
+        """Test time ranges, speakers and limits."""
+        self.storage.append_entries([make_entry(i) for i in range(10)])
+        start = (START + timedelta(minutes=2)).isoformat()
+        end = (START + timedelta(minutes=6)).isoformat()
+
+        self.assertEqual(self.storage.range_entries(start, end), [make_entry(i) for i in range(2, 6)])
+        self.assertEqual(self.storage.range_entries(start, end, speaker="user"), [make_entry(2), make_entry(4)])
+        self.assertEqual(self.storage.range_entries(start, limit=2), [make_entry(2), make_entry(3)])
+
+    def test_range_query_uses_index(self):
+        """Test speaker and time queries are answered from an index."""
+        plan = self.storage._connection().execute(
+            "EXPLAIN QUERY PLAN SELECT speaker, text, timestamp, extra FROM conversation "
+            "WHERE speaker = ? AND timestamp >= ? ORDER BY timestamp, id", ("user", "2024")
+        ).fetchall()
+        self.assertIn("idx_conversation_speaker_timestamp", " ".join(str(row) for row in plan))
+
+    def test_extra_fields_round_trip(self):
+        """Test entry fields without their own column are kept."""
+        entry = dict(make_entry(0), intent="play_music")
+        self.storage.append_entries([entry])
+        self.assertEqual(self.storage.recent_entries(1), [entry])
+
+    def test_batched_writes(self):
+        """Test entries are written in batches but visible to reads right away."""
+        storage = SQLiteMemoryStorage(self.path, batch_size=5, flusher=WriteBehindFlusher(3600))
+        storage.append_entries([make_entry(0)])
+
+        other = sqlite3.connect(self.path)
+        self.assertEqual(other.execute("SELECT COUNT(*) FROM conversation").fetchone()[0], 0)
+        self.assertEqual(storage.count_entries(), 1)
+        self.assertEqual(other.execute("SELECT COUNT(*) FROM conversation").fetchone()[0], 1)
+        other.close()
+        storage.close()
+
+    def test_replace_entries(self):
+        """Test the history can be replaced in one transaction."""
+        self.storage.append_entries([make_entry(i) for i in range(3)])
+        self.storage.replace_entries([make_entry(7)])
+        self.assertEqual(self.storage.recent_entries(), [make_entry(7)])
+
+    def test_preferences_and_context(self):
+        """Test key-value tables persist across connections."""
+        self.storage.set_preference("theme", "dark", {"theme": "dark"})
+        self.storage.set_preference("volume", 0.5, {})
+        self.storage.set_context("last_action", {"app": "spotify"}, {})
+        self.storage.close()
+
+        reopened = SQLiteMemoryStorage(self.path)
+        self.assertEqual(reopened.load_preferences(), {"theme": "dark", "volume": 0.5})
+        self.assertEqual(reopened.load_context(), {"last_action": {"app": "spotify"}})
+
+        reopened.replace_preferences({"language": "en-US"})
+        self.assertEqual(reopened.load_preferences(), {"language": "en-US"})
+        reopened.close()
+
+    def test_concurrent_readers(self):
+        """Test readers on other threads use their own connections while writes continue."""
+        self.storage.append_entries([make_entry(i) for i in range(100)])
+        errors = []
+        counts = []
+
+        def read():
+            try:
+                for _ in range(20):
+                    counts.append(len(self.storage.recent_entries(50)))
+            except Exception as e:
+                errors.append(e)
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        self.storage.append_entries([make_entry(i) for i in range(100, 200)])
+        for reader in readers:
+            reader.join()
+
+        self.assertEqual(errors, [])
+        self.assertTrue(all(count == 50 for count in counts))
+        self.assertEqual(self.storage.count_entries(), 200)
+
+
+# Additional tests with pytest
+
+def test_unknown_backend(tmp_path):
+    """Test an unknown backend name is rejected."""
+    with pytest.raises(ValueError):
+        create_storage("redis", str(tmp_path))
+
+
+@pytest.mark.parametrize("backend", [BACKEND_JSON, BACKEND_SQLITE])
+def test_partial_batch_written_behind(tmp_path, backend):
+    """Test entries short of a full batch are left to the flusher and land before another storage reads."""
+    flusher = WriteBehindFlusher(3600)
+    storage = create_storage(backend, str(tmp_path), flusher=flusher)
+    storage.append_entries([make_entry(0), make_entry(1)])
+    path = str(tmp_path / ("conversation_history.jsonl" if backend == BACKEND_JSON else DATABASE_FILENAME))
+    assert flusher.is_dirty(path)
+
+    other = create_storage(backend, str(tmp_path), flusher=flusher)
+    assert not flusher.is_dirty(path)
+    assert other.recent_entries() == [make_entry(0), make_entry(1)]
+    storage.close()
+    other.close()
+
+
+def test_json_storage_range(tmp_path):
+    """Test the JSON backend answers range queries too."""
+    storage = create_storage(BACKEND_JSON, str(tmp_path))
+    assert isinstance(storage, JsonMemoryStorage)
+    storage.append_entries([make_entry(i) for i in range(5)])
+    assert storage.range_entries(make_entry(1)["timestamp"], make_entry(3)["timestamp"]) == [make_entry(1), make_entry(2)]
+    assert storage.count_entries() == 5
+    storage.close()
+
+
+def test_sqlite_memory_manager_window(tmp_path):
+    """Test the SQLite backend keeps only recent entries in memory."""
+    manager = MemoryManager(data_dir=str(tmp_path), storage_backend=BACKEND_SQLITE, history_window=5)
+    for i in range(12):
+        manager.add_conversation_entry("user", f"Message {i}", START + timedelta(minutes=i))
+
+    assert len(manager.conversation_history) == 5
+    assert manager.get_conversation_count() == 12
+    assert [entry["text"] for entry in manager.get_conversation_history(3)] == ["Message 9", "Message 10", "Message 11"]
+    assert [entry["text"] for entry in manager.get_conversation_history(8)][0] == "Message 4"
+    assert len(manager.get_conversation_history()) == 12
+    assert [entry["text"] for entry in manager.get_conversation_range(START + timedelta(minutes=2),
+                                                                     START + timedelta(minutes=4))] == ["Message 2", "Message 3"]
+    manager.set_user_preference("theme", "dark")
+    manager.close()
+
+    reloaded = MemoryManager(data_dir=str(tmp_path), storage_backend=BACKEND_SQLITE, history_window=5)
+    assert [entry["text"] for entry in reloaded.conversation_history] == [f"Message {i}" for i in range(7, 12)]
+    assert reloaded.get_user_preference("theme") == "dark"
+    reloaded.close()
+
+
+def test_sqlite_imports_json_memory(tmp_path):
+    """Test switching to SQLite carries over memory saved by the JSON backend."""
+    manager = MemoryManager(data_dir=str(tmp_path))
+    manager.add_conversation_entry("user", "Saved as JSON")
+    manager.set_user_preference("language", "en-US")
+    manager.set_context_data("session_id", "abc")
+    manager.close()
+
+    migrated = MemoryManager(data_dir=str(tmp_path), storage_backend=BACKEND_SQLITE)
+    assert [entry["text"] for entry in migrated.conversation_history] == ["Saved as JSON"]
+    assert migrated.get_user_preference("language") == "en-US"
+    assert migrated.get_context_data("session_id") == "abc"
+    assert os.path.exists(migrated.database_path)
+    migrated.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,224 @@
+"""
+Test module for sharing one memory directory between processes.
+"""
+
+import os
+import sys
+import unittest
+import tempfile
+import threading
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+# Import the module to test
+from assistant.memory_sync import (
+    FileLock, StoreWatcher, claim_file, release_claim, file_stamp, concurrent_writers_benchmark, FCNTL_AVAILABLE
+)
+from assistant.memory_manager import MemoryManager
+from assistant.memory_storage import BACKEND_JSON, BACKEND_SQLITE
+from assistant.memory_vectors import NUMPY_AVAILABLE
+
+
+class TestFileLock(unittest.TestCase):
+    """Test cases for FileLock."""
+
+    def setUp(self):
+        """Set up a temporary lock file path."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "memory.lock")
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.temp_dir.cleanup()
+
+    def test_reentrant(self):
+        """Test nested acquisitions take the file lock once."""
+        lock = FileLock(self.path)
+        with lock:
+            with lock:
+                self.assertTrue(os.path.exists(self.path))
+        self.assertEqual(lock.get_stats()["acquisitions"], 1)
+        lock.close()
+
+    @unittest.skipUnless(FCNTL_AVAILABLE, "fcntl not available")
+    def test_exclusive_between_instances(self):
+        """Test a second lock on the same file cannot be taken while the first is held."""
+        first, second = FileLock(self.path), FileLock(self.path)
+        with first:
+            self.assertFalse(second.acquire(blocking=False))
+        self.assertTrue(second.acquire(blocking=False))
+        second.release()
+        self.assertEqual(second.get_stats()["contended"], 1)
+        first.close()
+        second.close()
+
+    def test_blocks_other_threads(self):
+        """Test another thread waits until the lock is released."""
+        lock = FileLock(self.path)
+        order = []
+        lock.acquire()
+        thread = threading.Thread(target=lambda: (lock.acquire(), order.append("thread"), lock.release()))
+        thread.start()
+        thread.join(0.05)
+        order.append("main")
+        lock.release()
+        thread.join(5)
+        self.assertEqual(order, ["main", "thread"])
+        lock.close()
+
+    @unittest.skipUnless(FCNTL_AVAILABLE, "fcntl not available")
+    def test_claim_file(self):
+        """Test only one claim on a file is granted until it is released."""
+        fd = claim_file(self.path)
+        self.assertIsNotNone(fd)
+        self.assertIsNone(claim_file(self.path))
+        release_claim(fd)
+        fd = claim_file(self.path)
+        self.assertIsNotNone(fd)
+        release_claim(fd)
+
+    def test_file_stamp(self):
+        """Test the stamp changes when a file is written and is None when missing."""
+        self.assertIsNone(file_stamp(self.path))
+        with open(self.path, "w") as f:
+            f.write("a")
+        stamp = file_stamp(self.path)
+        with open(self.path, "a") as f:
+            f.write("b")
+        self.assertNotEqual(file_stamp(self.path), stamp)
+
+
+# Additional tests with pytest
+
+def test_store_watcher_calls_refresh():
+    """Test the watcher refreshes in the background until stopped."""
+    called = threading.Event()
+    watcher = StoreWatcher(called.set, interval=0.01)
+    watcher.start()
+    assert called.wait(5)
+    watcher.stop()
+
+
+@pytest.fixture
+def shared_pair(tmp_path, request):
+    """Two managers sharing one directory, as two processes would."""
+    backend = request.param
+    managers = [MemoryManager(data_dir=str(tmp_path), storage_backend=backend, history_window=5,
+                              shared=True, sync_interval=3600) for _ in range(2)]
+    yield managers
+    for manager in managers:
+        manager.close()
+
+
+@pytest.mark.parametrize("shared_pair", [BACKEND_JSON, BACKEND_SQLITE], indirect=True)
+def test_changes_reach_other_instance(shared_pair):
+    """Test entries, preferences and context written by one instance are seen by the other."""
+    first, second = shared_pair
+    first.add_conversation_entry("user", "from first")
+    second.add_conversation_entry("user", "from second")
+    first.set_user_preference("theme", "dark")
+    second.set_user_preference("voice", "nova")
+    first.set_context_data("location", "London")
+    first.flush()
+    second.flush()
+
+    assert first.refresh()
+    assert second.refresh()
+    for manager in shared_pair:
+        assert [entry["text"] for entry in manager.conversation_history] == ["from first", "from second"]
+        assert manager.get_conversation_count() == 2
+        # Each instance's preference survived the other's write
+        assert manager.get_user_preference("theme") == "dark"
+        assert manager.get_user_preference("voice") == "nova"
+        assert manager.get_context_data("location") == "London"
+        assert manager.search_conversation("second").results[0]["text"] == "from second"
+
+    # Nothing changed since
+    assert not first.refresh()
+
+
+@pytest.mark.parametrize("shared_pair", [BACKEND_JSON, BACKEND_SQLITE], indirect=True)
+def test_removed_context_stays_removed(shared_pair):
+    """Test a context value removed by one instance is not written back by the other."""
+    first, second = shared_pair
+    first.set_context_data("location", "London")
+    first.flush()
+    second.refresh()
+    first._exclusive(first._remove_context, ["location"])
+    second.set_context_data("current_app", "spotify")
+    first.flush()
+    second.flush()
+
+    first.refresh()
+    assert first.get_context_data("location") is None
+    assert first.get_context_data("current_app") == "spotify"
+
+
+@pytest.mark.parametrize("shared_pair", [BACKEND_JSON, BACKEND_SQLITE], indirect=True)
+def test_clear_then_append_from_other_instance(shared_pair):
+    """Test an entry appended after another instance cleared the history lands in the new history."""
+    first, second = shared_pair
+    for i in range(3):
+        first.add_conversation_entry("user", f"old {i}")
+    first.flush()
+    second.refresh()
+    first.clear_conversation_history()
+    second.add_conversation_entry("user", "new")
+    second.flush()
+
+    first.refresh()
+    assert [entry["text"] for entry in first.get_conversation_history()] == ["new"]
+    assert [entry["text"] for entry in first.storage.iter_entries()] == ["new"]
+
+
+def test_background_sync(tmp_path):
+    """Test the watcher picks up changes without an explicit refresh."""
+    first = MemoryManager(data_dir=str(tmp_path), shared=True, sync_interval=0.01)
+    second = MemoryManager(data_dir=str(tmp_path), shared=True, sync_interval=0.01)
+    second.set_user_preference("theme", "dark")
+    second.flush()
+    for _ in range(500):
+        if first.get_user_preference("theme") == "dark":
+            break
+        threading.Event().wait(0.01)
+    assert first.get_user_preference("theme") == "dark"
+    first.close()
+    second.close()
+
+
+@pytest.mark.skipif(not (NUMPY_AVAILABLE and FCNTL_AVAILABLE), reason="numpy or fcntl not available")
+def test_one_instance_keeps_vector_index(tmp_path):
+    """Test only the first shared instance does semantic recall, and it indexes the other's entries."""
+    first = MemoryManager(data_dir=str(tmp_path), shared=True, sync_interval=3600, semantic_recall=True)
+    second = MemoryManager(data_dir=str(tmp_path), shared=True, sync_interval=3600, semantic_recall=True)
+    assert first.semantic is not None
+    assert second.semantic is None
+
+    second.add_conversation_entry("user", "the weather in London is rainy")
+    second.flush()
+    first.refresh()
+    first.semantic.wait()
+    assert first.recall("weather London", k=1)[0]["text"] == "the weather in London is rainy"
+    first.close()
+    second.close()
+
+    # The index is free again once its owner closes
+    third = MemoryManager(data_dir=str(tmp_path), shared=True, sync_interval=3600, semantic_recall=True)
+    assert third.semantic is not None
+    third.close()
+
+
+@pytest.mark.parametrize("backend", [BACKEND_JSON, BACKEND_SQLITE])
+def test_concurrent_writer_processes(tmp_path, backend):
+    """Test writer processes appending at once lose and reorder nothing."""
+    report = concurrent_writers_benchmark(processes=3, entries=100, backend=backend, data_dir=str(tmp_path))
+    assert report["intact"]
+    assert report["entries"] == 300
+    assert report["entries_per_second"] > 0
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,244 @@
+"""
+Test module for semantic recall with the memory-mapped vector index.
+"""
+
+import os
+import sys
+import unittest
+import tempfile
+import pytest
+from unittest.mock import patch
+from datetime import datetime, timedelta
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+# Import the module to test
+from assistant.memory_vectors import (
+    NUMPY_AVAILABLE, TRANSFORMERS_AVAILABLE, HashingEmbedder, SentenceEmbedder, VectorIndex,
+    SemanticMemory, create_embedder, VECTORS_FILENAME
+)
+from assistant.memory_manager import MemoryManager
+from assistant.memory_retention import RetentionPolicy
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+
+START = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def make_entry(i, text):
+    """Create a user entry i minutes after the start."""
+    return {"speaker": "user", "text": text, "timestamp": (START + timedelta(minutes=i)).isoformat()}
+
+
+def random_vectors(count, dim, seed=0):
+    """Create random unit vectors."""
+    vectors = np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "numpy not installed")
+class TestVectorIndex(unittest.TestCase):
+    """Test cases for VectorIndex."""
+
+    def setUp(self):
+        """Set up an index in a temporary directory."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.index = VectorIndex(self.temp_dir.name, dim=32, block_size=100)
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.index.close()
+        self.temp_dir.cleanup()
+
+    def test_blocked_search_matches_brute_force(self):
+        """Test blocked top-k search returns the exact nearest rows."""
+        vectors = random_vectors(1000, 32)
+        self.index.add(vectors, [make_entry(i, f"entry {i}") for i in range(1000)])
+        query = vectors[123]
+
+        hits = self.index.search(query, k=5)
+        expected = np.argsort(-(vectors @ query))[:5]
+        self.assertEqual([row for row, _ in hits], list(expected))
+        self.assertAlmostEqual(hits[0][1], 1.0, places=2)
+        self.assertEqual(self.index.entries([hits[0][0]])[0]["text"], "entry 123")
+
+    def test_vectors_stored_as_float16(self):
+        """Test vectors are appended to the file as float16 rows."""
+        self.index.add(random_vectors(10, 32), [make_entry(i, str(i)) for i in range(10)])
+        size = os.path.getsize(os.path.join(self.temp_dir.name, VECTORS_FILENAME))
+        self.assertEqual(size, 10 * 32 * 2)
+
+    def test_reopen_and_torn_append(self):
+        """Test a reopened index trims vectors whose entries were never written."""
+        self.index.add(random_vectors(10, 32), [make_entry(i, str(i)) for i in range(10)])
+        self.index.close()
+        with open(os.path.join(self.temp_dir.name, VECTORS_FILENAME), "ab") as f:
+            f.write(b"\0" * (32 * 2 + 7))
+
+        self.index = VectorIndex(self.temp_dir.name, dim=32, block_size=100)
+        self.assertEqual(len(self.index), 10)
+        self.assertEqual(self.index.last_entry()["text"], "9")
+
+    def test_dimension_change_resets(self):
+        """Test an index built with another dimension is discarded."""
+        self.index.add(random_vectors(5, 32), [make_entry(i, str(i)) for i in range(5)])
+        self.index.close()
+        self.index = VectorIndex(self.temp_dir.name, dim=64)
+        self.assertEqual(len(self.index), 0)
+
+    def test_ivf_index(self):
+        """Test the IVF index is trained past the threshold and still finds near neighbours."""
+        index = VectorIndex(os.path.join(self.temp_dir.name, "ivf"), dim=32, block_size=256,
+                            ivf_threshold=2000, nprobe=8)
+        vectors = random_vectors(3000, 32, seed=1)
+        index.add(vectors[:1500], [make_entry(i, str(i)) for i in range(1500)])
+        self.assertFalse(index.ivf_enabled)
+        index.add(vectors[1500:], [make_entry(i, str(i)) for i in range(1500, 3000)])
+        self.assertTrue(index.ivf_enabled)
+
+        # Rows added after training are assigned to clusters too
+        extra = random_vectors(1, 32, seed=2)
+        index.add(extra, [make_entry(3000, "extra")])
+        self.assertEqual(index.search(extra[0], k=1)[0][0], 3000)
+        self.assertEqual(index.search(vectors[42], k=1)[0][0], 42)
+        index.close()
+
+        reopened = VectorIndex(os.path.join(self.temp_dir.name, "ivf"), dim=32, ivf_threshold=2000)
+        self.assertTrue(reopened.ivf_enabled)
+        self.assertEqual(reopened.search(vectors[2500], k=1)[0][0], 2500)
+        reopened.close()
+
+    def test_prune(self):
+        """Test pruning rewrites the index without the removed rows."""
+        vectors = random_vectors(250, 32)
+        self.index.add(vectors, [make_entry(i, str(i)) for i in range(250)])
+        cutoff = make_entry(150, "")["timestamp"]
+
+        # The id map is streamed in blocks, never read whole
+        with patch.object(self.index.ids, 'read_all', side_effect=AssertionError):
+            removed = self.index.prune(lambda entry: entry["timestamp"] >= cutoff and entry["text"] != "170")
+        self.assertEqual(removed, 151)
+        self.assertEqual(len(self.index), 99)
+        self.assertEqual(self.index.entries([self.index.search(vectors[217], k=1)[0][0]])[0]["text"], "217")
+        self.assertEqual(self.index.entries([0, 98])[0]["text"], "150")
+        self.assertEqual(self.index.entries([98])[0]["text"], "249")
+
+
+# Additional tests with pytest
+
+@pytest.mark.skipif(not NUMPY_AVAILABLE, reason="numpy not installed")
+def test_hashing_embedder():
+    """Test related texts embed closer than unrelated ones."""
+    vectors = HashingEmbedder(dim=256).embed(["play some jazz music", "playing jazz songs", "what is the weather"])
+    assert vectors.shape == (3, 256)
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-5)
+    assert vectors[0] @ vectors[1] > vectors[0] @ vectors[2]
+
+
+def test_create_embedder_falls_back_to_hashing():
+    """Test the sentence embedder falls back to hashing without torch and transformers."""
+    with patch('assistant.memory_vectors.TRANSFORMERS_AVAILABLE', False):
+        embedder = create_embedder("sentence", dim=64)
+    assert isinstance(embedder, HashingEmbedder) and embedder.dim == 64
+    assert isinstance(create_embedder("hashing"), HashingEmbedder)
+    with pytest.raises(ValueError):
+        create_embedder("bag-of-words")
+
+
+@pytest.mark.skipif(not TRANSFORMERS_AVAILABLE, reason="torch and transformers not installed")
+def test_sentence_embedder(tmp_path):
+    """Test a sentence-embedding model is loaded from a local directory and mean-pooled."""
+    from transformers import BertConfig, BertModel, BertTokenizer
+
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "play", "some", "jazz", "weather"]
+    (tmp_path / "vocab.txt").write_text("\n".join(vocab))
+    BertTokenizer(str(tmp_path / "vocab.txt")).save_pretrained(str(tmp_path))
+    BertModel(BertConfig(vocab_size=len(vocab), hidden_size=32, num_hidden_layers=1,
+                         num_attention_heads=2, intermediate_size=64)).save_pretrained(str(tmp_path))
+
+    embedder = create_embedder("sentence", model_path=str(tmp_path), device="cpu")
+    assert isinstance(embedder, SentenceEmbedder)
+    assert embedder.dim == 32 and embedder.model is None
+
+    vectors = embedder.embed(["play some jazz", "weather"])
+    assert vectors.shape == (2, 32) and vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-5)
+    # Padding added for the longer text does not change the shorter one
+    assert np.allclose(embedder.embed(["weather"])[0], vectors[1], atol=1e-5)
+
+
+@pytest.mark.skipif(not NUMPY_AVAILABLE, reason="numpy not installed")
+def test_background_embedding(tmp_path):
+    """Test entries queued for embedding are indexed by the background thread."""
+    semantic = SemanticMemory(str(tmp_path), batch_size=8)
+    semantic.enqueue([make_entry(i, f"note {i} about topic {i % 3}") for i in range(50)])
+    assert semantic.wait(timeout=10)
+    stats = semantic.get_stats()
+    assert stats["indexed"] == 50 and stats["queued"] == 0
+    assert stats["batches"] >= 50 // 8
+    semantic.close()
+
+
+@pytest.mark.skipif(not NUMPY_AVAILABLE, reason="numpy not installed")
+def test_memory_manager_recall(tmp_path):
+    """Test recall through the memory manager, across restarts."""
+    manager = MemoryManager(data_dir=str(tmp_path), semantic_recall=True)
+    texts = ["play some jazz music", "set a timer for ten minutes", "what is the weather in London"]
+    for i, text in enumerate(texts):
+        manager.add_conversation_entry("user", text, START + timedelta(minutes=i))
+    manager.add_conversation_entry("assistant", "Playing jazz now", START + timedelta(minutes=3))
+    assert manager.semantic.wait(timeout=10)
+
+    results = manager.recall("jazz songs", k=2)
+    assert results[0]["text"] in ("play some jazz music", "Playing jazz now")
+    assert all("score" in result for result in results)
+    assert manager.recall("jazz", k=1, speaker="user")[0]["text"] == "play some jazz music"
+    manager.close()
+
+    # Entries added while semantic recall was off are embedded on the next start
+    plain = MemoryManager(data_dir=str(tmp_path))
+    plain.add_conversation_entry("user", "remind me to water the plants", START + timedelta(minutes=4))
+    plain.close()
+
+    reloaded = MemoryManager(data_dir=str(tmp_path), semantic_recall=True)
+    assert reloaded.semantic.wait(timeout=10)
+    assert len(reloaded.semantic.index) == 5
+    assert reloaded.recall("water plants", k=1)[0]["text"] == "remind me to water the plants"
+
+    reloaded.clear_conversation_history()
+    assert reloaded.semantic.wait(timeout=10)
+    assert reloaded.recall("jazz") == []
+    reloaded.close()
+
+
+@pytest.mark.skipif(not NUMPY_AVAILABLE, reason="numpy not installed")
+def test_forgotten_entries_leave_vector_index(tmp_path):
+    """Test entries forgotten by retention can no longer be recalled."""
+    manager = MemoryManager(data_dir=str(tmp_path), semantic_recall=True)
+    now = datetime.now()
+    manager.add_conversation_entry("user", "an old jazz request", now - timedelta(days=40))
+    manager.add_conversation_entry("user", "a recent jazz request", now - timedelta(days=1))
+    assert manager.semantic.wait(timeout=10)
+    manager.close()
+
+    compacted = MemoryManager(data_dir=str(tmp_path), semantic_recall=True,
+                              retention_policy=RetentionPolicy(forget_older_than_days=30))
+    assert [result["text"] for result in compacted.recall("jazz request", k=5)] == ["a recent jazz request"]
+    compacted.close()
+
+
+def test_recall_disabled(tmp_path):
+    """Test recall returns nothing when semantic recall is off."""
+    manager = MemoryManager(data_dir=str(tmp_path))
+    manager.add_conversation_entry("user", "play some jazz")
+    assert manager.semantic is None
+    assert manager.recall("jazz") == []
+    manager.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+"""
+Test module for the single memory writer and snapshot reads.
+"""
+
+import os
+import sys
+import threading
+import unittest
+import pytest
+from datetime import datetime
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+# Import the module to test
+from assistant.memory_writer import MemoryWriter, MemorySnapshot, stress_test
+from assistant.memory_manager import MemoryManager
+from assistant.memory_storage import BACKEND_JSON, BACKEND_SQLITE
+
+
+class TestMemoryWriter(unittest.TestCase):
+    """Test cases for MemoryWriter."""
+
+    def setUp(self):
+        """Set up a writer."""
+        self.writer = MemoryWriter(name="test-memory-writer")
+
+    def tearDown(self):
+        """Stop the writer."""
+        self.writer.close()
+
+    def block(self):
+        """Queue an operation that holds the writer until the returned event is set."""
+        started, release = threading.Event(), threading.Event()
+
+        def blocker():
+            started.set()
+            release.wait(5)
+
+        self.writer.submit(blocker)
+        self.assertTrue(started.wait(5))
+        return release
+
+    def test_operations_run_in_order_on_one_thread(self):
+        """Test operations run in submission order on the writer thread."""
+        calls = []
+        futures = [self.writer.submit(lambda i=i: calls.append((i, threading.current_thread().name)))
+                   for i in range(20)]
+        for future in futures:
+            future.result(5)
+        self.assertEqual([i for i, _ in calls], list(range(20)))
+        self.assertEqual({name for _, name in calls}, {"test-memory-writer"})
+
+    def test_consecutive_appends_are_merged(self):
+        """Test appends queued behind a busy writer are made in one call."""
+        calls = []
+        release = self.block()
+        futures = [self.writer.append(calls.append, [i, i + 100]) for i in range(5)]
+        release.set()
+        for future in futures:
+            future.result(5)
+        self.assertEqual(calls, [[0, 100, 1, 101, 2, 102, 3, 103, 4, 104]])
+        self.assertEqual(self.writer.get_stats()["merged"], 4)
+
+    def test_appends_are_not_merged_across_other_operations(self):
+        """Test an operation between two appends keeps them apart and in order."""
+        calls = []
+        release = self.block()
+        self.writer.append(calls.append, [1])
+        self.writer.submit(calls.append, "other")
+        last = self.writer.append(calls.append, [2])
+        release.set()
+        last.result(5)
+        self.assertEqual(calls, [[1], "other", [2]])
+
+    def test_errors_reach_the_caller(self):
+        """Test a failing operation raises for its caller and the writer keeps going."""
+        def fail():
+            raise RuntimeError("disk full")
+
+        with self.assertRaises(RuntimeError):
+            self.writer.call(fail)
+        self.assertEqual(self.writer.call(lambda: 42), 42)
+        self.assertEqual(self.writer.get_stats()["errors"], 1)
+
+    def test_call_from_writer_thread_runs_inline(self):
+        """Test an operation calling the writer does not wait on itself."""
+        self.assertEqual(self.writer.call(lambda: self.writer.call(lambda: "inner")), "inner")
+        self.assertTrue(self.writer.call(self.writer.wait))
+
+    def test_wait_and_restart(self):
+        """Test wait covers earlier operations and a closed writer restarts on use."""
+        self.assertTrue(self.writer.wait(1))
+        calls = []
+        release = self.block()
+        self.writer.submit(calls.append, 1)
+        self.assertFalse(self.writer.wait(0.05))
+        release.set()
+        self.assertTrue(self.writer.wait(5))
+        self.assertEqual(calls, [1])
+
+        self.writer.close()
+        self.writer.call(calls.append, 2)
+        self.assertEqual(calls, [1, 2])
+
+
+# Additional tests with pytest
+
+def test_snapshot_is_read_only():
+    """Test snapshot mappings cannot be modified."""
+    snapshot = MemorySnapshot(1, (), {"theme": "dark"}, {}, 0)
+    with pytest.raises(TypeError):
+        snapshot.preferences["theme"] = "light"
+    assert snapshot.history_complete
+
+
+def test_snapshots_do_not_change(tmp_path):
+    """Test a snapshot keeps its view after later changes."""
+    manager = MemoryManager(data_dir=str(tmp_path), history_window=3)
+    manager.add_conversation_entry("user", "first")
+    manager.set_user_preference("theme", "dark")
+    before = manager.snapshot()
+
+    manager.add_conversation_entry("user", "second")
+    manager.set_user_preference("theme", "light")
+    manager.set_context_data("current_app", "spotify")
+    after = manager.snapshot()
+
+    assert after.version > before.version
+    assert [entry["text"] for entry in before.history] == ["first"]
+    assert before.preferences["theme"] == "dark"
+    assert "current_app" not in before.context
+    assert [entry["text"] for entry in after.history] == ["first", "second"]
+    assert manager.get_user_preference("theme") == "light"
+    assert manager.get_context_data("current_app") == "spotify"
+    manager.close()
+
+
+def test_writes_run_on_the_writer_thread(tmp_path):
+    """Test storage is written from the writer thread only."""
+    manager = MemoryManager(data_dir=str(tmp_path))
+    threads = set()
+    append_entries = manager.storage.append_entries
+
+    def recording_append(entries):
+        threads.add(threading.current_thread().name)
+        append_entries(entries)
+
+    manager.storage.append_entries = recording_append
+    manager.add_conversation_entry("user", "hello", datetime(2024, 1, 1, 12, 0))
+    assert threads == {"memory-writer"}
+    # The write has been made by the time the call returns
+    assert manager.storage.count_entries() == 1
+    manager.close()
+
+
+@pytest.mark.parametrize("backend", [BACKEND_JSON, BACKEND_SQLITE])
+def test_stress(tmp_path, backend):
+    """Test many threads reading and writing at once keep memory consistent."""
+    manager = MemoryManager(data_dir=str(tmp_path), storage_backend=backend, history_window=50)
+    report = stress_test(manager, threads=8, operations=500)
+    assert report["errors"] == []
+    assert report["consistent"]
+    assert report["operations"] == 8 * 500
+    assert report["ops_per_second"] > 0
+    assert report["writer"]["completed"] == report["writer"]["submitted"]
+
+    # Each thread's last preference and context writes won
+    for i in range(8):
+        name = f"thread-{i}"
+        assert manager.get_user_preference(name) == manager.storage.load_preferences().get(name)
+    manager.close()
+
+    reloaded = MemoryManager(data_dir=str(tmp_path), storage_backend=backend, history_window=50)
+    assert reloaded.get_conversation_count() == manager.get_conversation_count()
+    assert dict(reloaded.snapshot().preferences) == dict(manager.snapshot().preferences)
+    assert dict(reloaded.snapshot().context) == dict(manager.snapshot().context)
+    reloaded.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
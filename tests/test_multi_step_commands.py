@@ -8,6 +8,7 @@ import os
 import sys
 import unittest
 import pytest
+import time
 import datetime
 from unittest.mock import patch, MagicMock, call
 
@@ -236,6 +237,60 @@ def test_command_classification(mock_processor, command, expected_category):
     """Test various command classifications."""
     assert mock_processor.classify_command(command) == expected_category
 
+@pytest.mark.parametrize("command,expected_category", [
+    # "open" is shared by Browsing and Files; the specific keyword decides
+    ("open the project folder", "Files"),
+    ("open youtube", "Browsing"),
+    # "youtube" is shared by Browsing and Media; "play" decides
+    ("play a video on youtube", "Media"),
+    # Multi-word phrases are indexed as a unit
+    ("open the control panel", "System"),
+    # Equal scores are resolved by category weight, not definition order
+    ("what day is the event", "Calendar"),
+    ("open my notes", "Browsing"),
+])
+def test_ambiguous_command_classification(mock_processor, command, expected_category):
+    """Test keywords shared by several categories are resolved deterministically."""
+    assert mock_processor.classify_command(command) == expected_category
+
+def test_category_weights_break_ties():
+    """Test configured category weights decide between equally scored categories."""
+    with patch('assistant.command_processor.config_manager') as mock_config:
+        mock_config.get_section.return_value = {"category_weights": {"Files": 2.0}}
+        processor = CommandProcessor()
+    assert processor.classify_command("open my notes") == "Files"
+
+def test_processors_share_grammar(mock_processor):
+    """Test processors share one compiled grammar but keep their own handlers."""
+    with patch('assistant.command_processor.config_manager') as mock_config:
+        mock_config.get_section.return_value = {}
+        other = CommandProcessor()
+
+    assert other.grammar is mock_processor.grammar
+    assert other.command_categories is mock_processor.command_categories
+
+    other.register_command_handler("Media", lambda command: "custom media")
+    assert other.process_command("play music") == ("Media", "custom media")
+    assert mock_processor.process_command("play music") == ("Media", "Playing music now.")
+
+def test_processor_construction_is_cheap(mock_processor):
+    """Test creating a processor does not rebuild the grammar."""
+    with patch('assistant.command_processor.CommandGrammar') as grammar_class, \
+         patch('assistant.command_processor.config_manager') as mock_config:
+        mock_config.get_section.return_value = {}
+        for _ in range(100):
+            CommandProcessor()
+        grammar_class.assert_not_called()
+
+def test_concurrent_classification(mock_processor):
+    """Test one processor classifies correctly from many threads."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    commands = ["open github", "play some music", "set a timer for 5 minutes", "send an email to John"] * 50
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(mock_processor.classify_command, commands))
+    assert results == ["Browsing", "Media", "Timer", "Communication"] * 50
+
 @pytest.mark.parametrize("text,expected_count", [
     ("First do this, then do that, finally do something else", 3),
     ("1. Step one 2. Step two", 2),
@@ -262,5 +317,26 @@ def test_multi_step_command_processing(mock_processor):
     assert "Media" in categories
     assert "Weather" in categories
 
+def test_multi_step_results_keep_step_order(mock_processor):
+    """Test independent steps run concurrently but report in step order."""
+    def slow_browse(command):
+        time.sleep(0.2)
+        return f"Browsed: {command}"
+
+    mock_processor.register_command_handler("Browsing", slow_browse)
+    mock_processor.register_command_handler("Media", lambda command: f"Played: {command}")
+
+    start = time.perf_counter()
+    results = mock_processor.process_multi_step_command("open github and play music and open youtube")
+    elapsed = time.perf_counter() - start
+
+    assert results == [
+        ("Browsing", "Browsed: open github"),
+        ("Media", "Played: play music"),
+        ("Browsing", "Browsed: open youtube")
+    ]
+    # Both browsing steps drive the same app, so they run one after another
+    assert 0.4 <= elapsed < 0.7
+
 if __name__ == '__main__':
     unittest.main()
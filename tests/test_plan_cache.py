@@ -0,0 +1,149 @@
+"""
+Test module for the command plan cache.
+"""
+
+import os
+import sys
+import unittest
+import pytest
+from unittest.mock import patch
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+# Import the module to test
+from assistant.plan_cache import PlanCache, CommandPlan, plan_key
+from assistant.command_processor import CommandProcessor
+from assistant.system_prompts import SystemPromptManager
+from assistant.entity_extractor import extract_entities, TARGET, MEDIA
+
+
+WAKE_WORDS = ["samantha", "hey samantha"]
+
+
+def make_plan(text, versions=(0, 0, 0)):
+    """Create a minimal plan for cache tests."""
+    return CommandPlan(text, "General", None, "general", 0.5, "default", [], [], extract_entities(text), versions)
+
+
+class TestPlanCache(unittest.TestCase):
+    """Test cases for PlanCache."""
+
+    def test_plan_key(self):
+        """Test keys strip wake words and whitespace but keep case and punctuation."""
+        self.assertEqual(plan_key("  Hey Samantha,  open GitHub,   then play music ", WAKE_WORDS),
+                         "open GitHub, then play music")
+        self.assertEqual(plan_key("samantha", WAKE_WORDS), "samantha")
+        self.assertEqual(plan_key("samanthas list", WAKE_WORDS), "samanthas list")
+
+    def test_hit_and_miss(self):
+        """Test plans are returned for matching versions only."""
+        cache = PlanCache()
+        plan = make_plan("open github")
+        cache.put("open github", plan)
+
+        self.assertIs(cache.get("open github", (0, 0, 0)), plan)
+        self.assertIsNone(cache.get("play music", (0, 0, 0)))
+        self.assertIsNone(cache.get("open github", (1, 0, 0)))
+
+        stats = cache.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["stale"]), (1, 2, 1))
+        self.assertAlmostEqual(stats["hit_rate"], 1 / 3)
+
+    def test_size_bound(self):
+        """Test the least recently used plans are evicted."""
+        cache = PlanCache(maxsize=2)
+        for text in ["a", "b", "c"]:
+            cache.put(text, make_plan(text))
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("a", (0, 0, 0)))
+        self.assertEqual(cache.get_stats()["evictions"], 1)
+
+
+# Additional tests with pytest
+
+@pytest.fixture
+def processor(tmp_path):
+    """Create a command processor with a mocked intent classifier and empty prompts."""
+    with patch('assistant.command_processor.config_manager') as mock_config:
+        mock_config.get_section.return_value = {}
+        mock_config.get.return_value = WAKE_WORDS
+        with patch('assistant.command_processor.intent_classifier') as mock_classifier, \
+             patch('assistant.command_processor.prompt_manager', SystemPromptManager(str(tmp_path))) as prompts:
+            mock_classifier.version = 0
+            mock_classifier.classify.return_value = ("browser", 0.9)
+            processor = CommandProcessor()
+            processor.mock_classifier = mock_classifier
+            processor.prompts = prompts
+            yield processor
+
+
+def test_repeated_command_reuses_plan(processor):
+    """Test a repeated command skips classification and parsing."""
+    plan = processor.plan_command("Hey Samantha, open github and play music")
+    assert plan.text == "open github and play music"
+    assert [step.category for step in plan.planned] == ["Browsing", "Media"]
+    assert plan.intent == "browser"
+    assert plan.is_multi_step
+
+    with patch.object(processor, "classify_command") as classify, \
+         patch.object(processor, "parse_steps_from_text") as parse:
+        assert processor.plan_command("open  github and play music") is plan
+        classify.assert_not_called()
+        parse.assert_not_called()
+    assert processor.mock_classifier.classify.call_count == 1
+
+
+def test_handlers_reuse_plan_entities(processor):
+    """Test each step's entities are resolved with the plan and handlers do not scan again."""
+    plan = processor.plan_command("open github.com and play jazz")
+    assert [step.entities.first(TARGET) for step in plan.planned] == ["github.com", None]
+    assert plan.planned[1].entities.first(MEDIA) == "jazz"
+
+    with patch('assistant.entity_extractor.extract_entities') as extract:
+        results = processor.process_multi_step_command("open github.com and play jazz")
+        extract.assert_not_called()
+    assert results == [("Browsing", "Opening github.com in your browser."), ("Media", "Playing jazz now.")]
+
+
+def test_plan_invalidated_by_handler_registration(processor):
+    """Test registering a handler invalidates cached plans."""
+    plan = processor.plan_command("play music")
+    processor.register_command_handler("Media", lambda command: "custom")
+
+    new_plan = processor.plan_command("play music")
+    assert new_plan is not plan
+    assert processor.process_command("play music") == ("Media", "custom")
+
+
+def test_plan_invalidated_by_intent_changes(processor):
+    """Test plans are resolved again after the intents change."""
+    plan = processor.plan_command("open github")
+    processor.mock_classifier.version += 1
+    processor.mock_classifier.classify.return_value = ("search", 0.8)
+
+    new_plan = processor.plan_command("open github")
+    assert new_plan is not plan
+    assert new_plan.intent == "search"
+    assert processor.get_plan_cache_stats()["stale"] == 1
+
+
+def test_plan_invalidated_by_prompt_changes(processor):
+    """Test adding a prompt for the command's intent updates its plan."""
+    assert processor.plan_command("open github").prompt_context == "default"
+    processor.prompts.add_prompt("browser.general", "You control the browser.", save=False)
+    assert processor.plan_command("open github").prompt_context == "browser.general"
+
+
+def test_classifier_version_changes_with_cache():
+    """Test the intent classifier's version moves whenever its results may change."""
+    from assistant.intent_classifier import intent_classifier
+
+    version = intent_classifier.version
+    intent_classifier.clear_cache()
+    assert intent_classifier.version > version
+
+
+if __name__ == "__main__":
+    unittest.main()
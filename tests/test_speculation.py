@@ -0,0 +1,146 @@
+"""
+Test module for the SpeculativeWarmer class.
+"""
+
+import os
+import sys
+import time
+import threading
+import unittest
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+# Import the module to test
+from assistant.speculation import SpeculativeWarmer
+from assistant.command_grammar import CommandGrammar
+
+
+class TestSpeculativeWarmer(unittest.TestCase):
+    """Test cases for SpeculativeWarmer."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.grammar = CommandGrammar()
+        self.warmer = SpeculativeWarmer(self.grammar.classify)
+        self.warmed = []
+
+        def warm_media(text, cancel_event):
+            time.sleep(0.05)
+            self.warmed.append(("Media", text))
+            return "spotify session"
+
+        def warm_browser(text, cancel_event):
+            # Stop early once the guess is abandoned
+            cancel_event.wait(1.0)
+            self.warmed.append(("Browsing", text))
+
+        self.warmer.register_warmup("Media", warm_media)
+        self.warmer.register_warmup("Browsing", warm_browser)
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.warmer.shutdown()
+
+    def test_hit(self):
+        """Test a correct guess is confirmed and saves latency."""
+        self.assertEqual(self.warmer.on_partial("play"), "Media")
+        self.assertEqual(self.warmer.on_partial("play some"), "Media")
+        time.sleep(0.1)
+
+        speculation = self.warmer.on_final("play some jazz", "Media")
+        self.assertIsNotNone(speculation)
+        self.assertEqual(speculation.result, "spotify session")
+
+        # Repeated partials for the same category reuse the running warm-up
+        self.assertEqual(self.warmed, [("Media", "play")])
+
+        stats = self.warmer.get_stats()
+        self.assertEqual((stats["speculations"], stats["hits"], stats["misses"]), (1, 1, 0))
+        self.assertEqual(stats["hit_rate"], 1.0)
+        # Nothing is saved until the handler reuses the result
+        self.assertEqual((stats["used"], stats["latency_saved_ms"]), (0, 0.0))
+
+        self.assertIsNone(self.warmer.use(speculation, "Browsing"))
+        self.assertEqual(self.warmer.use(speculation, "Media"), "spotify session")
+        stats = self.warmer.get_stats()
+        self.assertEqual(stats["used"], 1)
+        self.assertGreaterEqual(stats["latency_saved_ms"], 40)
+
+    def test_unfinished_warmup_is_not_used(self):
+        """Test a warm-up with no result yet saves no latency."""
+        self.warmer.on_partial("open")
+        speculation = self.warmer.on_final("open google", "Browsing")
+        self.assertIsNotNone(speculation)
+        self.assertIsNone(self.warmer.use(speculation, "Browsing"))
+        self.assertIsNone(self.warmer.use(None, "Browsing"))
+        self.assertEqual(self.warmer.get_stats()["latency_saved_ms"], 0.0)
+
+    def test_miss_is_cancelled(self):
+        """Test a wrong guess is cancelled when the final transcript disagrees."""
+        self.assertEqual(self.warmer.on_partial("open"), "Browsing")
+        speculation = self.warmer.current
+
+        self.assertIsNone(self.warmer.on_final("open spotify and play music", "Media"))
+        self.assertTrue(speculation.cancel_event.is_set())
+
+        stats = self.warmer.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["hit_rate"]), (0, 1, 0.0))
+
+    def test_guess_changes(self):
+        """Test a changed guess cancels the previous warm-up."""
+        self.warmer.on_partial("open")
+        first = self.warmer.current
+        self.assertEqual(self.warmer.on_partial("open the music"), "Media")
+
+        self.assertTrue(first.cancel_event.is_set())
+        self.assertEqual(self.warmer.current.category, "Media")
+        self.assertEqual(self.warmer.get_stats()["cancelled"], 1)
+
+    def test_no_guess(self):
+        """Test partials without keywords start nothing."""
+        self.assertIsNone(self.warmer.on_partial("um"))
+        self.assertIsNone(self.warmer.on_final("um never mind", None))
+        self.assertEqual(self.warmer.get_stats()["no_guess"], 1)
+
+
+# Additional tests with pytest
+
+def test_categories_without_warmup_are_ignored():
+    """Test only categories with a warm-up are speculated on."""
+    warmer = SpeculativeWarmer(CommandGrammar().classify)
+    warmer.register_warmup("Media", lambda text, cancel_event: None)
+    assert warmer.on_partial("check the weather") is None
+    assert warmer.get_stats()["speculations"] == 0
+    warmer.shutdown()
+
+
+def test_min_words():
+    """Test guesses wait for enough words."""
+    warmer = SpeculativeWarmer(CommandGrammar().classify, min_words=2)
+    warmer.register_warmup("Media", lambda text, cancel_event: None)
+    assert warmer.on_partial("play") is None
+    assert warmer.on_partial("play jazz") == "Media"
+    warmer.shutdown()
+
+
+def test_failing_warmup_has_no_result():
+    """Test a warm-up error does not surface through the speculation."""
+    warmer = SpeculativeWarmer(CommandGrammar().classify)
+
+    def fail(text, cancel_event):
+        raise RuntimeError("no browser")
+
+    warmer.register_warmup("Browsing", fail)
+    warmer.on_partial("open github")
+    time.sleep(0.05)
+    speculation = warmer.on_final("open github", "Browsing")
+    assert speculation is not None
+    assert speculation.result is None
+    warmer.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,7 +5,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from unittest.mock import patch, MagicMock
 import re
 
-from assistant.spotify_control import SpotifyControl, control_spotify, enhanced_control_spotify
+from assistant.spotify_control import SpotifyControl, control_spotify, enhanced_control_spotify, prepare_spotify
 
 class TestSpotifyControl(unittest.TestCase):
     """Test SpotifyControl class functionality."""
@@ -161,6 +161,24 @@ class TestControlSpotifyBasic(unittest.TestCase):
             mock_spotify.next_song.assert_called_once()
             self.assertEqual(result, "Next track")
 
+    def test_prepared_connection_is_reused(self):
+        """Test a connection prepared ahead of the command is used instead of connecting again."""
+        prepared = MagicMock()
+        prepared.is_connected.return_value = True
+        prepared.pause_music.return_value = "Music paused"
+        with patch('assistant.spotify_control.SpotifyControl') as mock_spotify_class:
+            result = control_spotify("pause", spotify=prepared)
+            mock_spotify_class.assert_not_called()
+        self.assertEqual(result, "Music paused")
+
+    def test_prepare_spotify(self):
+        """Test preparing returns the connected control, or None without a connection."""
+        with patch('assistant.spotify_control.SpotifyControl') as mock_spotify_class:
+            mock_spotify_class.return_value.is_connected.return_value = True
+            self.assertIs(prepare_spotify("play"), mock_spotify_class.return_value)
+            mock_spotify_class.return_value.is_connected.return_value = False
+            self.assertIsNone(prepare_spotify("play"))
+
 
 class TestVoiceAnalysis(unittest.TestCase):
     """Test voice analysis methods."""
@@ -216,7 +234,7 @@ class TestEnhancedControl(unittest.TestCase):
 
             result = enhanced_control_spotify("play")
 
-            mock_spotify.analyze_voice_transcription.assert_called_once_with("play")
+            mock_spotify.analyze_voice_transcription.assert_called_once_with("play", None)
             mock_spotify.play_music.assert_called_once()
             self.assertEqual(result, "Playing music")
 
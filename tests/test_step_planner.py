@@ -0,0 +1,197 @@
+"""
+Test module for the step planner and executor.
+"""
+
+import os
+import sys
+import time
+import threading
+import unittest
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+# Import the module to test
+from assistant.command_grammar import parse_steps
+from assistant.step_planner import (
+    StepPlanner, StepExecutor, PlannedStep, StepResult, summarize_results,
+    DEPENDS_SAME_APP, DEPENDS_THEN, DEPENDS_REFERENCE,
+    STEP_OK, STEP_ERROR, STEP_TIMEOUT, STEP_SKIPPED
+)
+
+
+def classify(text):
+    """Classify test steps by their first word."""
+    return {"open": "Browsing", "play": "Media", "check": "Weather"}.get(text.split()[0].lower(), "General")
+
+
+class TestStepPlanner(unittest.TestCase):
+    """Test cases for StepPlanner."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.planner = StepPlanner(classify)
+
+    def plan(self, text):
+        return self.planner.plan(parse_steps(text))
+
+    def test_independent_steps(self):
+        """Test steps for different apps have no dependencies."""
+        planned = self.plan("open github, play music and check weather")
+        self.assertEqual([step.category for step in planned], ["Browsing", "Media", "Weather"])
+        self.assertTrue(all(not step.depends_on for step in planned))
+
+    def test_same_app(self):
+        """Test a step waits for the previous step of the same app."""
+        planned = self.plan("open github, play music, open youtube")
+        self.assertEqual(planned[2].depends_on, {0: DEPENDS_SAME_APP})
+        self.assertEqual(planned[1].depends_on, {})
+
+    def test_then_barrier(self):
+        """Test "then" orders a step and everything after it."""
+        planned = self.plan("open github and play music then check weather and play jazz")
+        self.assertEqual(planned[2].depends_on, {0: DEPENDS_THEN, 1: DEPENDS_THEN})
+        self.assertEqual(planned[3].depends_on, {0: DEPENDS_THEN, 1: DEPENDS_SAME_APP})
+
+    def test_reference(self):
+        """Test a step referring to an earlier result waits for the previous step."""
+        planned = self.plan("open github, check it")
+        self.assertEqual(planned[1].depends_on, {0: DEPENDS_REFERENCE})
+
+        # Words merely containing a reference word do not count
+        planned = self.plan("open github, check items")
+        self.assertEqual(planned[1].depends_on, {})
+
+
+class TestStepExecutor(unittest.TestCase):
+    """Test cases for StepExecutor."""
+
+    def tearDown(self):
+        """Clean up after tests."""
+        if hasattr(self, "executor"):
+            self.executor.shutdown()
+
+    def make_executor(self, run_step, **kwargs):
+        self.executor = StepExecutor(run_step, **kwargs)
+        return self.executor
+
+    def test_independent_steps_run_concurrently(self):
+        """Test independent steps overlap in time."""
+        def run_step(step):
+            time.sleep(0.2)
+            return step.text.upper()
+
+        planned = [PlannedStep(i, f"step {i}", "General") for i in range(3)]
+        start = time.perf_counter()
+        results = self.make_executor(run_step).execute(planned)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual([result.response for result in results], ["STEP 0", "STEP 1", "STEP 2"])
+        self.assertTrue(all(result.ok for result in results))
+        self.assertLess(elapsed, 0.45)
+
+    def test_dependencies_are_ordered(self):
+        """Test a step starts only after its dependencies finish."""
+        order = []
+        lock = threading.Lock()
+
+        def run_step(step):
+            time.sleep(0.1 if step.index == 0 else 0.0)
+            with lock:
+                order.append(step.index)
+            return "done"
+
+        planned = [
+            PlannedStep(0, "open github", "Browsing"),
+            PlannedStep(1, "open youtube", "Browsing", {0: DEPENDS_SAME_APP}),
+        ]
+        self.make_executor(run_step).execute(planned)
+        self.assertEqual(order, [0, 1])
+
+    def test_worker_pool_is_bounded(self):
+        """Test no more than max_workers steps run at once."""
+        active = [0]
+        peak = [0]
+        lock = threading.Lock()
+
+        def run_step(step):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return "done"
+
+        planned = [PlannedStep(i, f"step {i}", "General") for i in range(6)]
+        results = self.make_executor(run_step, max_workers=2).execute(planned)
+        self.assertEqual(len(results), 6)
+        self.assertEqual(peak[0], 2)
+
+    def test_timeout(self):
+        """Test a slow step is reported as timed out without holding up the others."""
+        release = threading.Event()
+
+        def run_step(step):
+            if step.index == 0:
+                release.wait(2.0)
+            return "done"
+
+        planned = [PlannedStep(0, "slow", "General"), PlannedStep(1, "fast", "Media")]
+        start = time.perf_counter()
+        results = self.make_executor(run_step, step_timeout=0.1).execute(planned)
+        elapsed = time.perf_counter() - start
+        release.set()
+
+        self.assertEqual([result.status for result in results], [STEP_TIMEOUT, STEP_OK])
+        self.assertLess(elapsed, 1.0)
+
+    def test_errors_and_skipped_references(self):
+        """Test a failing step does not stop others but skips steps referring to it."""
+        def run_step(step):
+            if step.index == 0:
+                raise RuntimeError("browser unavailable")
+            return "done"
+
+        planned = [
+            PlannedStep(0, "open github", "Browsing"),
+            PlannedStep(1, "play music", "Media"),
+            PlannedStep(2, "check it", "Weather", {0: DEPENDS_REFERENCE}),
+        ]
+        results = self.make_executor(run_step).execute(planned)
+        self.assertEqual([result.status for result in results], [STEP_ERROR, STEP_OK, STEP_SKIPPED])
+
+
+# Additional tests with pytest
+
+def test_same_app_dependency_runs_after_failure():
+    """Test only reference dependencies are skipped when a step fails."""
+    executor = StepExecutor(lambda step: 1 / step.index)
+    planned = [
+        PlannedStep(0, "open github", "Browsing"),
+        PlannedStep(1, "open youtube", "Browsing", {0: DEPENDS_SAME_APP}),
+    ]
+    results = executor.execute(planned)
+    executor.shutdown()
+    assert [result.status for result in results] == [STEP_ERROR, STEP_OK]
+
+
+def test_summarize_results():
+    """Test responses are combined in step order."""
+    results = [
+        StepResult(0, "open github", "Browsing", ("Opening GitHub", "browse")),
+        StepResult(1, "play music", "Media", "Playing music"),
+    ]
+    assert summarize_results(results) == "Step 1: Opening GitHub Step 2: Playing music"
+    assert summarize_results(results[1:]) == "Playing music"
+
+
+def test_empty_plan():
+    """Test executing no steps returns no results."""
+    assert StepExecutor(lambda step: "done").execute([]) == []
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -63,6 +63,23 @@ class TestWhatsAppIntegration(unittest.TestCase):
         mock_send_message.assert_called_once_with("john", "hello")
         self.assertEqual(result, "Message sent successfully")
 
+    @patch('assistant.whatsapp_integration.send_message')
+    def test_whatsapp_action_message_phrasings(self, mock_send_message):
+        """Test the message text is taken after saying, that says, to say or a colon."""
+        commands = {
+            "send message to john saying hello there": ("john", "hello there"),
+            "message john smith saying how are you": ("john smith", "how are you"),
+            "message bob that says running late": ("bob", "running late"),
+            "message sarah to say happy birthday": ("sarah", "happy birthday"),
+            "message mom: on my way": ("mom", "on my way"),
+            'message john "see you soon"': ("john", "see you soon"),
+            "message john": ("john", "Hello"),
+        }
+        for command, expected in commands.items():
+            mock_send_message.reset_mock()
+            whatsapp_action(command)
+            mock_send_message.assert_called_once_with(*expected)
+
     @patch('assistant.whatsapp_integration.make_voice_call')
     def test_whatsapp_action_voice_call(self, mock_make_voice_call):
         """Test voice calling through WhatsApp action."""
@@ -263,6 +280,10 @@ class TestWhatsAppIntegration(unittest.TestCase):
         result3 = extract_contact_name("call", "call")
         self.assertEqual(result3, "Unknown")
 
+        # Test the contact is the one after the action
+        result4 = extract_contact_name("message bob then video call sarah", "video call")
+        self.assertEqual(result4, "sarah")
+
     def test_extract_file_path(self):
         """Test extracting file path from command."""
         # Test with file path
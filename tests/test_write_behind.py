@@ -0,0 +1,181 @@
+"""
+Test module for write-behind flushing of preferences and context data.
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import subprocess
+import unittest
+import tempfile
+import pytest
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+# Import the module to test
+from assistant.write_behind import WriteBehindFlusher
+from assistant.memory_storage import JsonMemoryStorage
+from assistant.memory_manager import MemoryManager
+
+
+class TestWriteBehindFlusher(unittest.TestCase):
+    """Test cases for WriteBehindFlusher."""
+
+    def setUp(self):
+        """Set up a flusher that only flushes when asked."""
+        self.flusher = WriteBehindFlusher(flush_interval=60.0)
+        self.writes = []
+
+    def tearDown(self):
+        """Stop the flusher."""
+        self.flusher.shutdown()
+
+    def test_marks_coalesce(self):
+        """Test repeated marks of one file produce one write."""
+        for i in range(10):
+            self.flusher.mark_dirty("prefs", lambda i=i: self.writes.append(i))
+        self.assertTrue(self.flusher.is_dirty("prefs"))
+        self.assertEqual(self.writes, [])
+
+        self.assertEqual(self.flusher.flush(), 1)
+        # The latest write function wins
+        self.assertEqual(self.writes, [9])
+        stats = self.flusher.get_stats()
+        self.assertEqual(stats["mutations"], 10)
+        self.assertEqual(stats["writes"], 1)
+        self.assertEqual(stats["coalesced"], 9)
+        self.assertEqual(stats["pending"], 0)
+
+    def test_flush_one_key(self):
+        """Test flushing one file leaves the others pending."""
+        self.flusher.mark_dirty("prefs", lambda: self.writes.append("prefs"))
+        self.flusher.mark_dirty("context", lambda: self.writes.append("context"))
+        self.flusher.flush("prefs")
+        self.assertEqual(self.writes, ["prefs"])
+        self.assertTrue(self.flusher.is_dirty("context"))
+
+    def test_failed_write_is_retried(self):
+        """Test a write that raises stays pending."""
+        def fail():
+            raise OSError("disk full")
+
+        self.flusher.mark_dirty("prefs", fail)
+        self.assertEqual(self.flusher.flush(), 0)
+        self.assertTrue(self.flusher.is_dirty("prefs"))
+        self.assertEqual(self.flusher.get_stats()["failed"], 1)
+
+        self.flusher.mark_dirty("prefs", lambda: self.writes.append("ok"))
+        self.flusher.flush()
+        self.assertEqual(self.writes, ["ok"])
+
+    def test_background_flush(self):
+        """Test dirty files are written by the background thread."""
+        flusher = WriteBehindFlusher(flush_interval=0.05)
+        flusher.mark_dirty("prefs", lambda: self.writes.append("bg"))
+        deadline = time.time() + 2.0
+        while not self.writes and time.time() < deadline:
+            time.sleep(0.01)
+        flusher.shutdown()
+        self.assertEqual(self.writes, ["bg"])
+        self.assertGreaterEqual(flusher.get_stats()["avg_dirty_ms"], 0.0)
+
+
+# Additional tests with pytest
+
+@pytest.fixture
+def storage(tmp_path):
+    """Fixture for a JSON storage with its own manual flusher."""
+    flusher = WriteBehindFlusher(flush_interval=60.0)
+    storage = JsonMemoryStorage(str(tmp_path / "history.jsonl"), str(tmp_path / "prefs.json"),
+                                str(tmp_path / "context.json"), flusher=flusher)
+    yield storage
+    flusher.shutdown()
+
+
+def test_context_writes_coalesce(storage, tmp_path):
+    """Test several context updates in one command become one atomic write."""
+    storage.load_context()
+    for key, value in [("current_intent", "play"), ("intent_confidence", 0.9), ("current_app", "spotify")]:
+        storage.set_context(key, value, {})
+    assert not (tmp_path / "context.json").exists()
+
+    storage.flush()
+    with open(tmp_path / "context.json", encoding="utf-8") as f:
+        assert json.load(f) == {"current_intent": "play", "intent_confidence": 0.9, "current_app": "spotify"}
+    assert storage.flusher.get_stats()["writes"] == 1
+    # No temporary files are left behind
+    assert sorted(os.listdir(tmp_path)) == ["context.json"]
+
+
+def test_load_sees_pending_writes(storage, tmp_path):
+    """Test reading a file back first writes what is pending for it."""
+    storage.load_preferences()
+    storage.set_preference("theme", "dark", {})
+    other = JsonMemoryStorage(str(tmp_path / "history.jsonl"), str(tmp_path / "prefs.json"),
+                              str(tmp_path / "context.json"), flusher=storage.flusher)
+    assert other.load_preferences() == {"theme": "dark"}
+
+
+def test_memory_manager_exposes_stats(tmp_path):
+    """Test the memory manager reports write-behind counters."""
+    manager = MemoryManager(data_dir=str(tmp_path))
+    manager.set_context_data("a", 1)
+    manager.set_context_data("b", 2)
+    manager.close()
+    stats = manager.get_write_behind_stats()
+    assert stats["mutations"] >= 2 and "coalesced" in stats
+    assert not manager.storage.flusher.is_dirty(manager.context_path)
+    with open(tmp_path / "context_data.json", encoding="utf-8") as f:
+        assert json.load(f) == {"a": 1, "b": 2}
+
+
+SIGTERM_SCRIPT = """
+import sys, time
+sys.path.insert(0, {root!r})
+from assistant.write_behind import write_behind_flusher
+from assistant.memory_manager import MemoryManager
+write_behind_flusher.flush_interval = 3600
+manager = MemoryManager(data_dir={data_dir!r})
+manager.set_user_preference("theme", "dark")
+manager.set_context_data("current_app", "spotify")
+print("ready", flush=True)
+{wait}
+"""
+
+# Waits holding the flusher's lock, as when SIGTERM arrives mid-update
+HOLD_LOCK_WAIT = """
+for _ in range(300):
+    with write_behind_flusher._lock:
+        time.sleep(0.1)
+"""
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGTERM") or os.name == "nt", reason="needs POSIX signals")
+@pytest.mark.parametrize("wait", ["time.sleep(30)", HOLD_LOCK_WAIT], ids=["idle", "holding_lock"])
+def test_sigterm_flushes_pending_writes(tmp_path, wait):
+    """Test a clean SIGTERM writes everything still pending, even while the main thread holds the flusher's lock."""
+    script = SIGTERM_SCRIPT.format(root=project_root, data_dir=str(tmp_path), wait=wait)
+    process = subprocess.Popen([sys.executable, "-c", script], stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL, text=True)
+    try:
+        assert process.stdout.readline().strip() == "ready"
+        assert not (tmp_path / "user_preferences.json").exists()
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=10)
+    finally:
+        if process.poll() is None:
+            process.kill()
+
+    assert process.returncode == -signal.SIGTERM
+    with open(tmp_path / "user_preferences.json", encoding="utf-8") as f:
+        assert json.load(f) == {"theme": "dark"}
+    with open(tmp_path / "context_data.json", encoding="utf-8") as f:
+        assert json.load(f) == {"current_app": "spotify"}
+
+
+if __name__ == "__main__":
+    unittest.main()